@@ -43,6 +43,11 @@ from .generator import PycrateGenerator, JSONDepGraphGenerator
 
 _ASN1DIR_PATH = 'pycrate_asn1dir/'
 
+# BEGIN - END block of an ASN.1 module
+SYNT_RE_MODULEBLOCK = re.compile('(^|\s)BEGIN(\s)(.*?)(\s)END($|\s)', re.DOTALL)
+# successive blank characters
+_RE_SPACES = re.compile('\s{1,}')
+
 
 def compile_all(dic=ASN_SPECS, clearing=True, **kwargs):
     """
@@ -356,7 +361,7 @@ def _compile_text_pass(text, with_order, **kwargs):
         # 3) scan text for BEGIN - END block
         # WNG: old school ASN.1 MACRO (with BEGIN - END block within ASN.1 module)
         # are not supported
-        m = re.search('(^|\s)BEGIN(\s)((.|\n)*?)(\s)END($|\s)', text)
+        m = SYNT_RE_MODULEBLOCK.search(text)
         if not m:
             raise(ASN1ProcTextErr('[proc]{0} module {1}: BEGIN - END scheme not found'\
                   .format(fn, name)))
@@ -388,10 +393,10 @@ def _compile_text_pass(text, with_order, **kwargs):
         module['_param_'] = []
         #
         # 7) scan the asnblock for assignments and initialize all ASN.1 objects
-        lines = asnblock.split('\n')
-        while len(lines) > 0:
-            # module_extract_assign() consumes lines, line by line
-            Obj = module_extract_assign(lines)
+        lines, cur = asnblock.split('\n'), 0
+        while cur < len(lines):
+            # _module_extract_assign() consumes lines from cur, line by line
+            Obj, cur = _module_extract_assign(lines, cur)
             Obj._mod = name
             if Obj._name in module:
                 raise(ASN1ProcTextErr('[proc]{0} module {1}: duplicate object, {2}'\
@@ -717,18 +722,28 @@ def module_extract_assign(lines):
         - _text_decl: str, remaining left-part of the assignment
         - _text_def: str, right-part of the assignment
     """
+    Obj, cur = _module_extract_assign(lines, 0)
+    del lines[:cur]
+    return Obj
+
+
+def _module_extract_assign(lines, cur):
+    """
+    Same as module_extract_assign(), but scans the lines from offset `cur' 
+    without consuming them, and returns the initialized ASN1Obj object 
+    together with the offset of the line following its definition
+    """
     # TODO: the way assignments are extracted, scanning for ::=, is bad...
     # e.g. in case an "::=" character string is defined somewhere, 
     # it will break this processing
     #
-    content, entered, Obj = [], False, None
-    line_num = 0
+    content, Obj = [], None
     #
-    for l in lines:
+    for line_num in range(cur, len(lines)):
+        l = lines[line_num]
         if l.find('::=') >= 0:
-            if not entered:
+            if Obj is None:
                 # we found a 1st assignment, to parse
-                entered = True
                 declared, definition = map(strip, l.split('::='))
                 if definition:
                     content.append(definition)
@@ -737,26 +752,20 @@ def module_extract_assign(lines):
                 Obj._text_decl = declared
             else:
                 # we are on a 2nd new assignments, just returning the 1st object
-                Obj._text_def = re.sub('\s{1,}', ' ', ' '.join(content).strip())
-                del lines[:line_num]
-                asnobj_getname(Obj)
-                asnobj_getparnum(Obj)
-                asnobj_gettype(Obj)
-                return Obj
+                break
         #
-        elif entered:
+        elif Obj is not None:
             content.append(l)
-        line_num += 1
+    else:
+        # end of lines
+        line_num = len(lines)
     #
-    # end of lines
     if Obj is not None:
-        Obj._text_def = re.sub('\s{1,}', ' ', ' '.join(content).strip())
-    #
-    del lines[:]
+        Obj._text_def = _RE_SPACES.sub(' ', ' '.join(content).strip())
     asnobj_getname(Obj)
     asnobj_getparnum(Obj)
     asnobj_gettype(Obj)
-    return Obj
+    return Obj, line_num
 
 
 def asnobj_getname(Obj):
@@ -71,9 +71,9 @@ class ASN1Dict(object):
         return self._dict[key]
     
     def __setitem__(self, key, val):
-        self._dict[key] = val
-        if key not in self._index:
+        if key not in self._dict:
             self._index.append(key)
+        self._dict[key] = val
     
     def __delitem__(self, key):
         del self._dict[key]
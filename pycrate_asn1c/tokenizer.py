@@ -194,92 +194,172 @@ TOKS_OBJS_EXT  = {TOK_NULL, TOK_NTYPE, TOK_HID, TOK_ID, TOK_LID, TOK_CLAID}
 TOKS_TYPES_EXT = {TOK_HID, TOK_ID, TOK_CLAID}
 
 
-REScannerASN1 = re.Scanner([
+# ASN.1 keywords: list of (regexp, token identifier, token with text)
+# each keyword is not followed by any other identifier character
+LexASN1Kw = [
+    (r'ABSENT',                         TOK_ABS,   False),
+    (r'ALL',                            TOK_ALL,   False),
+    (r'APPLICATION',                    TOK_TAPP,  False),
+    (r'AUTOMATIC',                      TOK_AUTO,  False),
+    (r'BEGIN',                          TOK_BEG,   False),
+    (r'BY',                             TOK_BY,    False),
+    (r'COMPONENT',                      TOK_COMP,  False),
+    (r'COMPONENTS',                     TOK_COMPS, False),
+    (r'CONSTRAINED',                    TOK_CONST, False),
+    (r'CONTAINING',                     TOK_CONT,  False),
+    (r'DEFAULT',                        TOK_DEF,   False),
+    (r'DEFINITIONS',                    TOK_DEFI,  False),
+    (r'ENCODED',                        TOK_ENC,   False),
+    (r'END',                            TOK_END,   False),
+    (r'EXCEPT',                         TOK_EXCE,  False),
+    (r'EXPLICIT',                       TOK_TEXP,  False),
+    (r'EXPORTS',                        TOK_EXP,   False),
+    (r'EXTENSIBILITY%sIMPLIED' % REScannerSNL, TOK_EXTI, False),
+    (r'FALSE',                          TOK_FALS,  False),
+    (r'FROM',                           TOK_FROM,  False),
+    (r'IMPLICIT',                       TOK_TIMP,  False),
+    (r'IMPORTS',                        TOK_IMP,   False),
+    (r'INCLUDES',                       TOK_INCL,  False),
+    (r'MAX',                            TOK_MAX,   False),
+    (r'MIN',                            TOK_MIN,   False),
+    (r'MINUS-INFINITY',                 TOK_MINF,  False),
+    (r'NOT-A-NUMBER',                   TOK_NAN,   False),
+    (r'NULL',                           TOK_NULL,  True),
+    (r'OF',                             TOK_OF,    False),
+    (r'OPTIONAL',                       TOK_OPT,   False),
+    (r'PATTERN',                        TOK_PAT,   False),
+    (r'PLUS-INFINITY',                  TOK_PINF,  False),
+    (r'PRESENT',                        TOK_PRES,  False),
+    (r'PRIVATE',                        TOK_TPRI,  False),
+    (r'SIZE',                           TOK_SIZE,  False),
+    (r'TAGS',                           TOK_TAGS,  False),
+    (r'TRUE',                           TOK_TRUE,  False),
+    (r'UNIQUE',                         TOK_UNIQ,  False),
+    (r'UNIVERSAL',                      TOK_TUNI,  False),
+    (r'WITH%sSYNTAX' % REScannerSNL,    TOK_WSYN,  False)
+    ]
+
+# all keywords in a single regexp, the actual token being found back from
+# the keyword's 1st word
+TOK_KW = 'KW'
+REScannerKw = '(?:%s)%s' % ('|'.join([kw[0] for kw in LexASN1Kw]), _EXC)
+_LexASN1KwAct = dict([(re.match('[A-Z\-]{1,}', kw[0]).group(), kw[1:]) \
+                      for kw in LexASN1Kw])
+
+# ASN.1 lexicon: list of (regexp, token identifier, token with text)
+# order matters, as the 1st regexp matching wins
+#
+# WNG: identifiers' regexps must not be written with nested quantifiers like
+# (?:\-{0,1}[A-Z0-9]{1,}){0,}, as it leads to catastrophic backtracking on long
+# identifiers (e.g. GANSS-ALM-KEPLERIANBDSALMANAC-ExtIEs in NBAP)
+LexASN1 = [
     #
-    (r'(--).*?([%s]|(--)|$)' % _NL,     lambda s, t: (TOK_CMT,   t)),
-    (r'(/\*).*?(\*/)',                  lambda s, t: (TOK_CMT,   t)),
-    (r'".*?(?<!")"(?!")',               lambda s, t: (TOK_CSTR,  t)),
+    (r'(--).*?([%s]|(--)|$)' % _NL,     TOK_CMT,   True),
+    (r'(/\*).*?(\*/)',                  TOK_CMT,   True),
+    (r'".*?(?<!")"(?!")',               TOK_CSTR,  True),
     #
-    (r'::=',                            lambda s, t: TOK_ASSI),
-    (r':',                              lambda s, t: TOK_COL),
-    (r';',                              lambda s, t: TOK_SCOL),
-    (r'=',                              lambda s, t: TOK_EQU),
-    (r',',                              lambda s, t: TOK_COM),
-    (r'\(',                             lambda s, t: TOK_PARO),
-    (r'\)',                             lambda s, t: TOK_PARC),
-    (r'\[{2}',                          lambda s, t: TOK_DBRAO),
-    (r'\]{2}',                          lambda s, t: TOK_DBRAC),
-    (r'\[',                             lambda s, t: TOK_BRAO),
-    (r'\]',                             lambda s, t: TOK_BRAC),
-    (r'\{',                             lambda s, t: TOK_CBRAO),
-    (r'\}',                             lambda s, t: TOK_CBRAC),
-    (r'\.\.\.',                         lambda s, t: TOK_TDOT),
-    (r'\.\.',                           lambda s, t: TOK_DDOT),
-    (r'\.',                             lambda s, t: TOK_DOT),
-    (r'\||(?:UNION%s)' % _EXC,          lambda s, t: TOK_UNIO),
-    (r'\^|(?:INTERSECTION%s)' % _EXC,   lambda s, t: TOK_INTER),
-    (r'<',                              lambda s, t: TOK_LTHAN),
-    (r'>',                              lambda s, t: TOK_GTHAN),
-    (r'@',                              lambda s, t: TOK_ARRO),
-    (r'\!',                             lambda s, t: TOK_EXCL),
+    (r'::=',                            TOK_ASSI,  False),
+    (r':',                              TOK_COL,   False),
+    (r';',                              TOK_SCOL,  False),
+    (r'=',                              TOK_EQU,   False),
+    (r',',                              TOK_COM,   False),
+    (r'\(',                             TOK_PARO,  False),
+    (r'\)',                             TOK_PARC,  False),
+    (r'\[{2}',                          TOK_DBRAO, False),
+    (r'\]{2}',                          TOK_DBRAC, False),
+    (r'\[',                             TOK_BRAO,  False),
+    (r'\]',                             TOK_BRAC,  False),
+    (r'\{',                             TOK_CBRAO, False),
+    (r'\}',                             TOK_CBRAC, False),
+    (r'\.\.\.',                         TOK_TDOT,  False),
+    (r'\.\.',                           TOK_DDOT,  False),
+    (r'\.',                             TOK_DOT,   False),
+    (r'\||(?:UNION%s)' % _EXC,          TOK_UNIO,  False),
+    (r'\^|(?:INTERSECTION%s)' % _EXC,   TOK_INTER, False),
+    (r'<',                              TOK_LTHAN, False),
+    (r'>',                              TOK_GTHAN, False),
+    (r'@',                              TOK_ARRO,  False),
+    (r'\!',                             TOK_EXCL,  False),
     #
-    (r'ABSENT%s' % _EXC,                lambda s, t: TOK_ABS),
-    (r'ALL%s' % _EXC,                   lambda s, t: TOK_ALL),
-    (r'APPLICATION%s' % _EXC,           lambda s, t: TOK_TAPP),
-    (r'AUTOMATIC%s' % _EXC,             lambda s, t: TOK_AUTO),
-    (r'BEGIN%s' % _EXC,                 lambda s, t: TOK_BEG),
-    (r'BY%s' % _EXC,                    lambda s, t: TOK_BY),
-    (r'COMPONENT%s' % _EXC,             lambda s, t: TOK_COMP),
-    (r'COMPONENTS%s' % _EXC,            lambda s, t: TOK_COMPS),
-    (r'CONSTRAINED%s' % _EXC,           lambda s, t: TOK_CONST),
-    (r'CONTAINING%s' % _EXC,            lambda s, t: TOK_CONT),
-    (r'DEFAULT%s' % _EXC,               lambda s, t: TOK_DEF),
-    (r'DEFINITIONS%s' % _EXC,           lambda s, t: TOK_DEFI),
-    (r'ENCODED%s' % _EXC,               lambda s, t: TOK_ENC),
-    (r'END%s' % _EXC,                   lambda s, t: TOK_END),
-    (r'EXCEPT%s' % _EXC,                lambda s, t: TOK_EXCE),
-    (r'EXPLICIT%s' % _EXC,              lambda s, t: TOK_TEXP),
-    (r'EXPORTS%s' % _EXC,               lambda s, t: TOK_EXP),
-    (r'EXTENSIBILITY%sIMPLIED%s' % (REScannerSNL, _EXC),    lambda s, t: TOK_EXTI),
-    (r'FALSE%s' % _EXC,                 lambda s, t: TOK_FALS),
-    (r'FROM%s' % _EXC,                  lambda s, t: TOK_FROM),
-    (r'IMPLICIT%s' % _EXC,              lambda s, t: TOK_TIMP),
-    (r'IMPORTS%s' % _EXC,               lambda s, t: TOK_IMP),
-    (r'INCLUDES%s' % _EXC,              lambda s, t: TOK_INCL),
-    (r'MAX%s' % _EXC,                   lambda s, t: TOK_MAX),
-    (r'MIN%s' % _EXC,                   lambda s, t: TOK_MIN),
-    (r'MINUS-INFINITY%s' % _EXC,        lambda s, t: TOK_MINF),
-    (r'NOT-A-NUMBER%s' % _EXC,          lambda s, t: TOK_NAN),
-    (r'NULL%s' % _EXC,                  lambda s, t: (TOK_NULL, t)),
-    (r'OF%s' % _EXC,                    lambda s, t: TOK_OF),
-    (r'OPTIONAL%s' % _EXC,              lambda s, t: TOK_OPT),
-    (r'PATTERN%s' % _EXC,               lambda s, t: TOK_PAT),
-    (r'PLUS-INFINITY%s' % _EXC,         lambda s, t: TOK_PINF),
-    (r'PRESENT%s' % _EXC,               lambda s, t: TOK_PRES),
-    (r'PRIVATE%s' % _EXC,               lambda s, t: TOK_TPRI),
-    (r'SIZE%s' % _EXC,                  lambda s, t: TOK_SIZE),
-    (r'TAGS%s' % _EXC,                  lambda s, t: TOK_TAGS),
-    (r'TRUE%s' % _EXC,                  lambda s, t: TOK_TRUE),
-    (r'UNIQUE%s' % _EXC,                lambda s, t: TOK_UNIQ),
-    (r'UNIVERSAL%s' % _EXC,             lambda s, t: TOK_TUNI),
-    (r'WITH%sSYNTAX%s' % (REScannerSNL, _EXC),              lambda s, t: TOK_WSYN),
+    (REScannerKw,                       TOK_KW,    False),
     #
-    (r'%s' % REScannerReal,             lambda s, t: (TOK_INT,   t)),
-    (r'%s' % REScannerInt,              lambda s, t: (TOK_REAL,  t)),
-    (r'%s' % REScannerBStr,             lambda s, t: (TOK_BSTR,  t)),
-    (r'%s' % REScannerHStr,             lambda s, t: (TOK_HSTR,  t)),
+    (r'%s' % REScannerReal,             TOK_INT,   True),
+    (r'%s' % REScannerInt,              TOK_REAL,  True),
+    (r'%s' % REScannerBStr,             TOK_BSTR,  True),
+    (r'%s' % REScannerHStr,             TOK_HSTR,  True),
     #
-    (r'(%s)%s' % (REScannerNTypes, _EXC),                   lambda s, t: (TOK_NTYPE, t)),
-    (r'&[a-zA-Z](?:\-{0,1}[a-zA-Z0-9]{1,}){0,}%s' % _EXC,   lambda s, t: (TOK_CLAID, t)),
-    (r'[A-Z](?:\-{0,1}[A-Z0-9]{1,}){0,}%s' % _EXC,          lambda s, t: (TOK_HID,   t)),
-    (r'[A-Z](?:\-{0,1}[a-zA-Z0-9]{1,}){0,}%s' % _EXC,       lambda s, t: (TOK_ID,    t)),
-    (r'[a-z](?:\-{0,1}[a-zA-Z0-9]{1,}){0,}%s' % _EXC,       lambda s, t: (TOK_LID,   t)),
+    (r'(%s)%s' % (REScannerNTypes, _EXC),                           TOK_NTYPE, True),
+    (r'&[a-zA-Z][a-zA-Z0-9]{0,}(?:\-[a-zA-Z0-9]{1,}){0,}%s' % _EXC, TOK_CLAID, True),
+    (r'[A-Z][A-Z0-9]{0,}(?:\-[A-Z0-9]{1,}){0,}%s' % _EXC,           TOK_HID,   True),
+    (r'[A-Z][a-zA-Z0-9]{0,}(?:\-[a-zA-Z0-9]{1,}){0,}%s' % _EXC,     TOK_ID,    True),
+    (r'[a-z][a-zA-Z0-9]{0,}(?:\-[a-zA-Z0-9]{1,}){0,}%s' % _EXC,     TOK_LID,   True),
     #
-    (r'%s' % REScannerSNL,              None)
-    ],
+    (r'%s' % REScannerSNL,              None,      False)
+    ]
+
+
+def _scanner_action(tok, wtext):
+    if tok is None:
+        return None
+    elif wtext:
+        return lambda s, t: (tok, t)
+    else:
+        return lambda s, t: tok
+
+
+def _lexicon_expand_kw(lexicon):
+    ret = []
+    for lex in lexicon:
+        if lex[1] == TOK_KW:
+            ret.extend([(kw[0] + _EXC, kw[1], kw[2]) for kw in LexASN1Kw])
+        else:
+            ret.append(lex)
+    return ret
+
+
+# legacy scanner, with a distinct lexicon entry per keyword
+# kept for reference and benchmarking
+REScannerASN1 = re.Scanner(
+    [(regexp, _scanner_action(tok, wtext)) \
+     for (regexp, tok, wtext) in _lexicon_expand_kw(LexASN1)],
+    flags=re.DOTALL
+    )
+
+
+# single master regexp, each lexicon entry being a named group
+RELexASN1 = re.compile(
+    '|'.join(['(?P<L%i>%s)' % (i, lex[0]) for (i, lex) in enumerate(LexASN1)]),
     flags=re.DOTALL
     )
 
+# group index -> (token identifier, token with text)
+_RELexASN1Act = dict([(RELexASN1.groupindex['L%i' % i], lex[1:]) \
+                      for (i, lex) in enumerate(LexASN1)])
+
+
+def scan_text(text):
+    """scan the given ASN.1 text in a single pass with the master regexp
+    
+    returns the list of tokens and the remaining text which could not be
+    tokenized, exactly as REScannerASN1.scan(text) does
+    """
+    toks, cur, act, kwact = [], 0, _RELexASN1Act, _LexASN1KwAct
+    append = toks.append
+    match = RELexASN1.scanner(text).match
+    while True:
+        m = match()
+        if m is None or m.end() == cur:
+            break
+        cur = m.end()
+        tok, wtext = act[m.lastindex]
+        if tok == TOK_KW:
+            tok, wtext = kwact[m.group().split()[0]]
+        if wtext:
+            append( (tok, m.group()) )
+        elif tok is not None:
+            append( tok )
+    return toks, text[cur:]
+
 
 class Tokenizer(object):
     """handles consciously ASN.1 tokens, forward and backward, while ignoring
@@ -325,44 +405,40 @@ class Tokenizer(object):
         except:
             raise(ASN1TokenizerErr('invalid cursor'))
     
+    # WNG: tokens are walked by index and never by slicing the list of tokens,
+    # as it makes the processing of large specifications quadratic
+    
     def get_next(self, off=1):
-        ind, cnt, curp = 0, 0, self.cur
-        for tok in self.toks[1+self.cur:]:
-            if tok[0] == TOK_CMT:
-                pass
-            else:
+        toks, ind, cur = self.toks, 0, self.cur
+        while ind < off:
+            cur += 1
+            if cur >= len(toks):
+                raise(ASN1TokenizerErr('not enough tokens'))
+            tok = toks[cur]
+            if tok[0] != TOK_CMT:
                 ind += 1
-            cnt += 1
-            if ind == off:
-                break
-        if ind < off:
-            raise(ASN1TokenizerErr('not enough tokens'))
-        self.cur += cnt
-        self.curp.append(curp)
+        self.curp.append(self.cur)
+        self.cur = cur
         return tok
     
     def has_next(self):
-        for tok in self.toks[1+self.cur:]:
-            if tok[0] == TOK_CMT:
-                pass
-            else:
+        toks = self.toks
+        for cur in range(1+self.cur, len(toks)):
+            if toks[cur][0] != TOK_CMT:
                 return True
         return False
     
     def get_prev(self, off=1):
-        ind, cnt, curp = 0, 0, self.cur
-        for tok in self.toks[:self.cur][::-1]:
-            if tok[0] == TOK_CMT:
-                pass
-            else:
+        toks, ind, cur = self.toks, 0, self.cur
+        while ind < off:
+            cur -= 1
+            if cur < 0:
+                raise(ASN1TokenizerErr('not enough tokens'))
+            tok = toks[cur]
+            if tok[0] != TOK_CMT:
                 ind += 1
-            cnt += 1
-            if ind == off:
-                break
-        if ind < off:
-            raise(ASN1TokenizerErr('not enough tokens'))
-        self.cur -= cnt
-        self.curp.append(curp)
+        self.curp.append(self.cur)
+        self.cur = cur
         return tok
     
     def get_upto(self, target):
@@ -446,7 +522,7 @@ def tokenize_text(text=u'', **kwargs):
     elif not isinstance(text, str_types):
         raise(ASN1Err('need some textual definition'))
     #
-    toks, rest = REScannerASN1.scan(text)
+    toks, rest = scan_text(text)
     if rest:
         asnlog('%i remaining chars at the end of spec' % len(rest))
     # build the handler for the tokens
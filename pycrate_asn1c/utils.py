@@ -438,10 +438,8 @@ def scan_for_comments(text=''):
     found in text
     """
     ret = []
-    cur = 0
-    next = text.find('--')
-    while next >= 0:
-        cur += next
+    cur = text.find('--')
+    while cur >= 0:
         # start of comment
         start = cur
         # move cursor forward to reach the end of comment
@@ -449,22 +447,19 @@ def scan_for_comments(text=''):
         # exception for line full of ------------------ sh*t
         while text[cur:1+cur] == '-':
             cur += 1
-        while True:
-            # move 1 by 1 and find an end-of-comment or end-of-file
-            if text[cur:1+cur] == '\n' or cur >= len(text):
-                comment = False
-                ret.append((start, cur))
-                cur += 1
-                break
-            elif text[cur:2+cur] == '--':
-                comment = False
-                cur += 2
-                ret.append((start, cur))
-                break
-            else:
-                cur += 1
+        # find an end-of-comment or end-of-file
+        eol, eoc = text.find('\n', cur), text.find('--', cur)
+        if eoc >= 0 and (eol < 0 or eoc < eol):
+            cur = eoc + 2
+            ret.append((start, cur))
+        elif eol >= 0:
+            ret.append((start, eol))
+            cur = eol + 1
+        else:
+            ret.append((start, max(cur, len(text))))
+            break
         # find the next comment
-        next = text[cur:].find('--')
+        cur = text.find('--', cur)
     return ret
 
 
@@ -29,6 +29,6 @@
 #
 __all__ = ['utils', 'err', 'glob', 'dictobj', 'setobj', 'refobj',
            'asnobj_basic', 'asnobj_str', 'asnobj_construct', 'asnobj_class', 'asnobj_ext',
-           'wrapper']
+           'compactobj', 'wrapper', 'profiler', 'export', 'offsets']
 __version__ = '0.4.0'
 
@@ -28,11 +28,14 @@
 # *--------------------------------------------------------
 #*/
 
+import random
+
 from .utils   import *
 from .err     import *
 from .refobj  import *
 from .dictobj import *
 from .setobj  import *
+from .compactobj import ASN1Array
 from .codecs  import *
 from .codecs  import _with_json
 
@@ -138,6 +141,20 @@ class ASN1Obj(Element):
     _SAFE_BND    = True
     # this enables object's table constraint verification when using set_val()
     _SAFE_BNDTAB = True
+    # this enables the rejection of buffers longer than the worst-case PER
+    # encoding of the object (see get_bnd()), before decoding them
+    _SAFE_DECLEN = False
+    # maximum length in bytes of buffers accepted with _SAFE_DECLEN, for objects
+    # without a finite worst-case encoding (e.g. extensible PDUs)
+    _SAFE_DECLEN_UNBND = 65536
+    # maximum length in bytes of buffers accepted by the decoders, or None
+    _DEC_MAXLEN  = None
+    # maximum nesting depth of constructed values accepted by the decoders, or
+    # None (with BER, each constructed TLV counts, including explicit tags)
+    _DEC_MAXDEPTH = None
+    # this makes the PER and BER decoders set compact values for BIT STRING
+    # (ASN1BitView) and SEQUENCE OF / SET OF INTEGER (ASN1Array), see compactobj.py
+    _DEC_COMPACT = False
     
     #--------------------------------------------------------------------------#
     # class attributes, initialization and safe checking methods
@@ -158,6 +175,8 @@ class ASN1Obj(Element):
     _root    = None
     _ext     = None
     _val     = None
+    # cached results of get_bnd(), indexed by (root, cap)
+    _bnd     = None
     
     _const_val    = None
     # _const_sz is only defined for types which can have a SIZE constraint
@@ -334,34 +353,87 @@ class ASN1Obj(Element):
         ensures the value val is within potential constraints defined for self
         """
         # check val against potential constraints
-        if self._const_val and \
-        self._const_val.ext is None and \
-        val not in self._const_val:
+        # (the constraint being not extensible, only its root is tested)
+        const_val = self._const_val
+        if const_val and const_val.ext is None and not const_val._in_root(val):
             raise(ASN1ObjErr('{0}: {1} value out of constraint, {2!r}'\
                   .format(self.fullname(), self.TYPE, val)))
         if self._SAFE_BNDTAB and self._const_tab and self._const_tab_at:
-            # check val against a constraint defined within the table constraint
-            const_val_type, const_val = self._get_tab_obj()
-            if const_val_type == CLASET_NONE:
-                if not self._SILENT:
-                    asnlog('%s._safechk_bnd: %s, unable to retrieve a defined object'\
-                           % (self.__class__.__name__, self._name))
-            elif self._mode == MODE_VALUE and const_val_type == CLASET_UNIQ:
-                if val != const_val:
-                    raise(ASN1ObjErr('{0}: value out of table constraint, {1!r}'\
-                          .format(self.fullname(), val)))
-            elif self._mode == MODE_SET or const_val_type == CLASET_MULT:
-                if val not in const_val:
-                    raise(ASN1ObjErr('{0}: value out of table constraint, {1!r}'\
-                          .format(self.fullname(), val)))
+            self._safechk_bnd_tab(val)
+    
+    def _safechk_bnd_tab(self, val):
+        # check val against a constraint defined within the table constraint
+        const_val_type, const_val = self._get_tab_obj()
+        if const_val_type == CLASET_NONE:
+            if not self._SILENT:
+                asnlog('%s._safechk_bnd: %s, unable to retrieve a defined object'\
+                       % (self.__class__.__name__, self._name))
+        elif self._mode == MODE_VALUE and const_val_type == CLASET_UNIQ:
+            if val != const_val:
+                raise(ASN1ObjErr('{0}: value out of table constraint, {1!r}'\
+                      .format(self.fullname(), val)))
+        elif self._mode == MODE_SET or const_val_type == CLASET_MULT:
+            if val not in const_val:
+                raise(ASN1ObjErr('{0}: value out of table constraint, {1!r}'\
+                      .format(self.fullname(), val)))
+    
+    # when decoding, each object checks its own value against its constraints
+    # just after having decoded it, without checking the values of its 
+    # components, as those are checked when they are decoded themselves
+    # (see _safechk_bnd_loc() overloaded for constructed and OPEN objects)
+    _safechk_bnd_loc = _safechk_bnd
+    
+    def _safechk_declen(self, buf, Err=ASN1PERDecodeErr):
+        # checks the length of the buffer to be decoded against _DEC_MAXLEN
+        # and, for PER, against the worst-case encoding of self
+        # this is done in O(1) once get_bnd() has been cached
+        if not isinstance(buf, bytes_types):
+            # nested decoding within an outer buffer
+            return
+        if self._DEC_MAXLEN is not None and len(buf) > self._DEC_MAXLEN:
+            raise(Err('{0}: buffer too long, {1} bytes (max {2})'\
+                  .format(self.fullname(), len(buf), self._DEC_MAXLEN)))
+        if self._SAFE_DECLEN and Err == ASN1PERDecodeErr:
+            maxlen = self.get_bnd()[0]
+            if maxlen is None:
+                maxlen = self._SAFE_DECLEN_UNBND
+            if len(buf) > maxlen:
+                raise(Err('{0}: buffer longer than the worst-case encoding, '\
+                      '{1} bytes (max {2})'.format(self.fullname(), len(buf), maxlen)))
+    
+    def _from_per_depth(self, dec, buf):
+        # runs the PER decoding method dec on buf, the decoder checking the
+        # nesting depth of constructed values against self._DEC_MAXDEPTH
+        depth = ASN1CodecPER._depth
+        depth.cur, depth.max = 0, self._DEC_MAXDEPTH
+        try:
+            dec(buf)
+        finally:
+            depth.cur = None
     
     def _get_tab_obj(self):
         ret = (CLASET_NONE, None)
         try:
-            IndIdent = self._get_obj_by_path(self._const_tab_at)._const_tab_id
-            IndVal   = self._get_val_by_path(self._const_tab_at)
+            IndObj = self._get_obj_by_path(self._const_tab_at)
+            IndIdent, IndVal = IndObj._const_tab_id, IndObj._val
         except Exception:
             return ret
+        # the table is constant once the module is initialized, hence results
+        # are cached per index value, like the tag LUT of OPEN objects
+        if not hasattr(self, '__tab_obj_lut__'):
+            self.__tab_obj_lut__ = {}
+        key = (IndIdent, IndVal)
+        try:
+            return self.__tab_obj_lut__[key]
+        except KeyError:
+            ret = self.__tab_obj_lut__[key] = self.__get_tab_obj(IndIdent, IndVal)
+            return ret
+        except TypeError:
+            # unhashable index value (constructed value)
+            return self.__get_tab_obj(IndIdent, IndVal)
+    
+    def __get_tab_obj(self, IndIdent, IndVal):
+        ret = (CLASET_NONE, None)
         cla_val_type, cla_val = self._const_tab.get(IndIdent, IndVal)
         if cla_val_type == CLASET_UNIQ and self._const_tab_id in cla_val:
             return (CLASET_UNIQ, cla_val[self._const_tab_id])
@@ -797,6 +869,217 @@ class ASN1Obj(Element):
             del self._proto_fields[-1]
         return num, depth
     
+    def get_bnd(self, w_open=True, root=False, cap=None):
+        """
+        returns the worst-case length in bytes of the PER encoding (aligned or 
+        unaligned) of self, and the maximum depth possible within self
+        
+        The length is a conservative upper bound (an octet-alignment is counted
+        for each length determinant and each octet-aligned value), it is None
+        as soon as self can contain an unbounded component (e.g. an extensible
+        or unconstrained type, or a recursive component), unless root or cap
+        are set.
+        The depth is computed like in get_complexity(), it is None when self 
+        is recursive, unless cap is set.
+        
+        The result is cached in self, when w_open is True.
+        
+        Args:
+            w_open: bool,
+                    if True, bounds the potential content of OPEN objects 
+                    according to their table constraint
+            root: bool,
+                  if True, only the extension root of self and its components
+                  is considered: extension additions are assumed absent, and
+                  extensible INTEGER and SIZE constraints are taken within their
+                  root part
+            cap: None or uint,
+                 if set, each remaining unbounded component (including extension
+                 additions when root is False) is assumed to be encoded within 
+                 cap bytes, and recursive components are not walked, hence the 
+                 length and depth returned are always finite
+        
+        The typical bound of a PDU, i.e. the one of its encodings without 
+        extension additions and with no unbounded component larger than N bytes,
+        is get_bnd(root=True, cap=N).
+        
+        Returns:
+            maxlen, depth: uint or None, uint or None
+        """
+        if w_open:
+            if self._bnd is None:
+                self._bnd = {}
+            elif (root, cap) in self._bnd:
+                return self._bnd[(root, cap)]
+        if cap is None:
+            unb = None
+        else:
+            # unbounded component, encoded like an open type of cap bytes
+            unb = 7 + 16 + 8 * cap
+        bl, depth = self._get_bnd(w_open, root, unb, [])
+        if bl is not None:
+            # an empty encoding still requires a single null byte
+            bl = max(1, (bl + 7) >> 3)
+        if w_open:
+            self._bnd[(root, cap)] = (bl, depth)
+        return bl, depth
+    
+    def _get_bnd(self, w_open, root, unb, path):
+        # returns the worst-case length in bits of the PER encoding of self, 
+        # and the depth within self
+        # unb is the length in bits assumed for unbounded components, or None
+        #
+        # recursion can only happen through the content of constructed types,
+        # which is shared between the referring and referred objects
+        if self._cont is not None and self.TYPE in TYPES_CONSTRUCT:
+            if id(self._cont) in path:
+                if unb is None:
+                    return None, None
+                else:
+                    return unb, 0
+            path.append( id(self._cont) )
+        #
+        if self.TYPE == TYPE_NULL:
+            bl, depth = 0, 0
+        #
+        elif self.TYPE == TYPE_BOOL:
+            bl, depth = 1, 0
+        #
+        elif self.TYPE == TYPE_INT:
+            depth = 0
+            if not self._const_val or self._const_val.rdyn is None \
+            or (self._const_val.ext is not None and not root):
+                # unconstrained or extensible value
+                bl = unb
+            else:
+                if self._const_val.ra <= 255:
+                    bl = self._const_val.rdyn
+                elif self._const_val.ra <= 65536:
+                    bl = 7 + 8 * ((self._const_val.rdyn + 7) >> 3)
+                else:
+                    bl = 7 + 8 + 8 * ((self._const_val.rdyn + 7) >> 3)
+                if self._const_val.ext is not None:
+                    # extension bit
+                    bl += 1
+        #
+        elif self.TYPE == TYPE_ENUM:
+            depth = 0
+            if self._ext is None:
+                bl = max(0, len(self._root) - 1).bit_length()
+            elif root:
+                bl = 1 + max(0, len(self._root) - 1).bit_length()
+            elif unb is not None:
+                # extension bit and normally-small index
+                bl = max(1 + max(0, len(self._root) - 1).bit_length(), 8)
+            else:
+                bl = None
+        #
+        elif self.TYPE in (TYPE_BIT_STR, TYPE_OCT_STR) + TYPES_STRING:
+            depth = 0
+            if self.TYPE == TYPE_BIT_STR:
+                cbl = 1
+            elif self.TYPE == TYPE_OCT_STR:
+                cbl = 8
+            elif self._clen is not None:
+                cbl = round_p2(self._clen)
+            else:
+                # not a known-multiplier character string
+                cbl = None
+            bl = self._get_bnd_sz(cbl, root, unb)
+        #
+        elif self.TYPE in (TYPE_SEQ_OF, TYPE_SET_OF):
+            bl, depth = self._cont._get_bnd(w_open, root, unb, path)
+            if depth is not None:
+                depth += 1
+            bl = self._get_bnd_sz(bl, root, unb)
+        #
+        elif self.TYPE == TYPE_CHOICE:
+            bl = max(0, len(self._root) - 1).bit_length()
+            if self._ext is not None:
+                # extension bit
+                bl += 1
+            depth = 0
+            for ident in self._root:
+                comp_bl, comp_depth = self._cont[ident]._get_bnd(w_open, root, unb, path)
+                bl = _bnd_max(bl, comp_bl)
+                depth = _bnd_max(depth, comp_depth)
+            if self._ext is not None and not root:
+                # extension bit, normally-small index and open type content
+                bl = _bnd_max(bl, _bnd_add(8, unb))
+                for ident in self._ext:
+                    comp_depth = self._cont[ident]._get_bnd(w_open, root, unb, path)[1]
+                    depth = _bnd_max(depth, comp_depth)
+            if depth is not None:
+                depth += 1
+        #
+        elif self.TYPE in (TYPE_SEQ, TYPE_SET):
+            bl = len(self._root_opt)
+            if self._ext is not None:
+                # extension bit
+                bl += 1
+            depth = 0
+            for ident in self._root:
+                comp_bl, comp_depth = self._cont[ident]._get_bnd(w_open, root, unb, path)
+                bl = _bnd_add(bl, comp_bl)
+                depth = _bnd_max(depth, comp_depth)
+            if self._ext is not None and not root:
+                # bitmap preambule with its normally-small length, and open type
+                # content for each extension addition (or group of additions)
+                num = max(1, len(self._ext_nest))
+                bl = _bnd_add(bl, _bnd_add(7 + num, _bnd_mul(num, unb)))
+                for ident in self._ext:
+                    comp_depth = self._cont[ident]._get_bnd(w_open, root, unb, path)[1]
+                    depth = _bnd_max(depth, comp_depth)
+            if depth is not None:
+                depth += 1
+        #
+        elif self.TYPE == TYPE_OPEN:
+            bl, depth = unb, 0
+            if w_open:
+                const_tr = self._get_const_tr()
+                if const_tr:
+                    bl = 0
+                    for Comp in const_tr.values():
+                        comp_bl, comp_depth = Comp._get_bnd(w_open, root, unb, path)
+                        bl = _bnd_max(bl, comp_bl)
+                        depth = _bnd_max(depth, comp_depth)
+                    if bl is not None:
+                        # length determinant and octet-aligned content
+                        bl = max(1, (bl + 7) >> 3)
+                        if bl >= 16384:
+                            # fragmented encoding
+                            bl = unb
+                        else:
+                            bl = 7 + 16 + 8 * bl
+                    if depth is not None:
+                        depth += 1
+        #
+        else:
+            # REAL, OID, REL-OID, time, ANY, EXTERNAL, EMBEDDED PDV, 
+            # CHARACTER STRING, CLASS: unbounded
+            bl, depth = unb, 0
+        #
+        if self._cont is not None and self.TYPE in TYPES_CONSTRUCT:
+            del path[-1]
+        return bl, depth
+    
+    def _get_bnd_sz(self, cbl, root, unb):
+        # returns the worst-case length in bits of the PER encoding of a 
+        # SIZE-constrained object, with components of cbl bits each
+        if cbl is None or not self._const_sz or self._const_sz.rdyn is None \
+        or self._const_sz.ub >= 65536 or (self._const_sz.ext is not None and not root):
+            return unb
+        elif self._const_sz.rdyn == 0:
+            # fixed size, potentially octet-aligned
+            bl = 7 + cbl * self._const_sz.ub
+        else:
+            # length determinant and content, both potentially octet-aligned
+            bl = 7 + 16 + 7 + cbl * self._const_sz.ub
+        if self._const_sz.ext is not None:
+            # extension bit
+            bl += 1
+        return bl
+    
     def _get_obj_by_path(self, path):
         # this is used for solving table constraint lookups
         obj = self
@@ -1058,9 +1341,9 @@ class ASN1Obj(Element):
                 # TYPE_SEQ, TYPE_SET, TYPE_EXT, TYPE_EMB_PDV, TYPE_CHAR_STR
                 parval = dict(parval)
                 parval[p] = newval
-            elif isinstance(parval, list):
+            elif isinstance(parval, (list, ASN1Array)):
                 # TYPE_SEQ_OF, TYPE_SET_OF
-                parval = parval[:]
+                parval = list(parval)
                 parval[p] = newval
             elif isinstance(parval, tuple) and len(parval) == 3:
                 # TYPE_REAL
@@ -1142,6 +1425,74 @@ class ASN1Obj(Element):
                 if names:
                     self.set_val_at(path, names)
     
+    #--------------------------------------------------------------------------#
+    # random values generation
+    #--------------------------------------------------------------------------#
+    
+    # default number of nesting levels for which optional components are generated
+    _GEN_DEPTH     = 8
+    # maximum nesting level, beyond _GEN_DEPTH, for generating mandatory components
+    _GEN_DEPTH_MAX = 24
+    # maximum number of components (SEQUENCE OF, SET OF) and of bytes / characters
+    # (strings) generated, above the lower bound of the size constraint
+    _GEN_SZ_OF     = 4
+    _GEN_SZ_STR    = 32
+    
+    def gen_random(self, seed=None, depth=None):
+        """returns a random value compliant with the constraints of self
+        
+        Value, size and permitted alphabet constraints are respected, as well as
+        table constraints: the components of a SEQUENCE / SET which are linked
+        by a table constraint (e.g. id, criticality and value in protocol IEs)
+        are all generated from a single row of the table.
+        Only the root part of the constraints and of the extensible types is
+        used.
+        
+        Args:
+            seed : None, int, str or random.Random instance; in the last case,
+                   the instance is used directly, which allows to generate
+                   distinct values in a row
+            depth: None or int, number of nesting levels for which optional
+                   components are generated; beyond it, only mandatory
+                   components are generated, with their minimum size
+        
+        Returns:
+            value compliant to self
+        
+        Raises:
+            ASN1Err, if no value can be generated (e.g. an infinitely recursive
+            type, or an OPEN type referencing an empty table)
+        """
+        if isinstance(seed, random.Random):
+            rnd = seed
+        else:
+            rnd = random.Random(seed)
+        if depth is None:
+            depth = self._GEN_DEPTH
+        return self._gen_rand(rnd, depth, [])
+    
+    def _gen_rand(self, rnd, depth, rows):
+        # rows is the stack of table constraint rows selected within the
+        # enclosing constructed objects, see _CONSTRUCT._gen_rand()
+        raise(ASN1NotSuppErr('{0}: random value generation not supported for {1}'\
+              .format(self.fullname(), self.TYPE)))
+    
+    def _gen_rand_sz(self, rnd, span):
+        # returns a random size compliant with the size constraint, at most
+        # `span' above its lower bound
+        if self._const_sz is not None and self._const_sz.root:
+            return self._const_sz.get_rand_int(rnd, 0, span, span)
+        else:
+            return rnd.randint(0, span)
+    
+    def _gen_rand_ident(self):
+        # returns the identifier of self for referencing it within an OPEN or
+        # CONTAINING value
+        if self._typeref is not None:
+            return self._typeref.called[1]
+        else:
+            return self.TYPE
+    
     #--------------------------------------------------------------------------#
     # encoding / decoding methods
     #--------------------------------------------------------------------------#
@@ -1163,13 +1514,60 @@ class ASN1Obj(Element):
             self._safechk_bnd(self._val)
         return ret
     
-    def to_asn1(self, val=None):
+    def to_asn1(self, val=None, maxdepth=None, maxlen=None):
         if val is not None:
             self.set_val(val)
-        if self._val is not None:
-            return self._to_asn1()
+        if self._val is None:
+            return None
         else:
+            # pieces of text are collected in a list and joined once, instead
+            # of concatenating the text of each component at each level
+            txt = []
+            self._write_asn1_all(txt.append, maxdepth, maxlen)
+            return ''.join(txt)
+    
+    def to_asn1_stream(self, fd, val=None, maxdepth=None, maxlen=None):
+        """
+        writes the ASN.1 value notation of self's value into the file-like 
+        object fd (e.g. io.StringIO, or a file opened in text mode), piece by 
+        piece, without building the complete text in memory
+        
+        Args:
+            fd      : file-like object, with a write() method
+            val     : value to be set before writing, or None
+            maxdepth: None or uint, constructed values nested deeper than 
+                      maxdepth are written as { ... }
+            maxlen  : None or uint, the output is truncated after maxlen chars
+                      and terminated with ' ...'
+        
+        Returns:
+            trunc: bool, True if the output was truncated according to maxlen,
+                   or None if self has no value
+        """
+        if val is not None:
+            self.set_val(val)
+        if self._val is None:
             return None
+        else:
+            return self._write_asn1_all(fd.write, maxdepth, maxlen)
+    
+    def _write_asn1_all(self, write, maxdepth, maxlen):
+        try:
+            self._write_asn1(_ASN1TextWriter(write, maxdepth, maxlen), '', 0)
+        except _ASN1TextStop:
+            return True
+        else:
+            return False
+    
+    def _write_asn1(self, W, ind, depth):
+        # W: _ASN1TextWriter instance
+        # ind: indentation string of the lines following the first one
+        # depth: number of constructed values enclosing self's value
+        txt = self._to_asn1()
+        if ind:
+            W.write(txt.replace('\n', '\n' + ind))
+        else:
+            W.write(txt)
     
     def show(self):
         return '<~ASN1~: %s>' % self.to_asn1()
@@ -1184,7 +1582,121 @@ class ASN1Obj(Element):
     def _to_per(self):
         raise(ASN1NotSuppErr(self.fullname()))
     
+    # PER encoding cache, see set_per_cache()
+    _per_cache     = None
+    # None (values keyed by their hashable image), 'def' or 'id'
+    _per_cache_key = None
+    # maximum number of entries in the PER encoding cache of a single object
+    _PER_CACHE_MAX = 256
+    
+    def set_per_cache(self, enable=True, key=None):
+        """enables or disables the caching of the PER encodings of self's values
+        
+        When enabled, each encoding of a value of self is stored as a single
+        pre-packed bit segment, keyed by the value, the alignment of the
+        encoding and the CANONICAL parameter. Encoding again the same value is
+        then done by returning the cached segment.
+        
+        This is intended for sub-structures repeated in many PDUs (e.g. lists
+        of served PLMNs, cell configurations...) whose encoding does not depend
+        on the values of components outside of self (e.g. through a table
+        constraint). Only _to_per() is cached, not _to_per_ws().
+        
+        Args:
+            enable: bool, enables or disables the cache (which is then cleared)
+            key   : None, 'def' or 'id',
+                    if None, values are keyed by their hashable image, which
+                    costs a walk through the value for each encoding,
+                    if 'def', only the DEFAULT value of self is cached,
+                    if 'id', values are keyed by their identity: they must then
+                    not be modified in place once encoded
+        
+        Returns:
+            None
+        """
+        if enable:
+            if key not in (None, 'def', 'id'):
+                raise(ASN1Err('{0}: invalid PER cache key, {1!r}'.format(self.fullname(), key)))
+            self._per_cache     = {}
+            self._per_cache_key = key
+            # instance attribute, overriding the class method
+            self._to_per = self._to_per_cached
+        else:
+            if '_to_per' in self.__dict__:
+                del self._to_per
+            if '_per_cache' in self.__dict__:
+                del self._per_cache, self._per_cache_key
+    
+    def set_per_cache_def(self, enable=True):
+        """enables or disables the caching of the PER encodings of the DEFAULT
+        values of all components within self (see set_per_cache())
+        
+        This is only useful when PER encoding with ASN1CodecPER.CANONICAL
+        disabled, as otherwise values equal to the DEFAULT ones are not encoded.
+        
+        Returns:
+            num: uint, number of components processed
+        """
+        num, stack, done = 0, [self], set()
+        while stack:
+            Obj = stack.pop()
+            if id(Obj) in done:
+                continue
+            done.add(id(Obj))
+            if Obj._def is not None:
+                Obj.set_per_cache(enable, key='def')
+                num += 1
+            if Obj.TYPE in (TYPE_CHOICE, TYPE_SEQ, TYPE_SET, TYPE_EXT,
+                            TYPE_EMB_PDV, TYPE_CHAR_STR) and Obj._cont:
+                stack.extend(Obj._cont.values())
+            elif Obj.TYPE in (TYPE_SEQ_OF, TYPE_SET_OF) and Obj._cont is not None:
+                stack.append(Obj._cont)
+        return num
+    
+    def _to_per_cached(self):
+        val = self._val
+        if self._per_cache_key is None:
+            try:
+                valkey = _freeze_val(val)
+                hash(valkey)
+            except TypeError:
+                return self.__class__._to_per(self)
+        elif self._per_cache_key == 'id':
+            valkey = id(val)
+        elif val is self._def or val == self._def:
+            valkey = None
+        else:
+            return self.__class__._to_per(self)
+        if ASN1CodecPER.ALIGNED:
+            key = (valkey, ASN1CodecPER._off[-1] % 8, ASN1CodecPER.CANONICAL)
+        else:
+            key = (valkey, None, ASN1CodecPER.CANONICAL)
+        try:
+            seg = self._per_cache[key][1]
+        except KeyError:
+            buf, bl = pack_val(*self.__class__._to_per(self))
+            if bl:
+                seg = (T_BYTES, buf, bl)
+            else:
+                seg = None
+            if len(self._per_cache) >= self._PER_CACHE_MAX:
+                self._per_cache.clear()
+            # keeping a reference to the value ensures its identity is not
+            # reused by another value
+            self._per_cache[key] = (val if self._per_cache_key == 'id' else None, seg)
+        else:
+            if seg is not None and ASN1CodecPER.ALIGNED:
+                ASN1CodecPER._off[-1] += seg[2]
+        if seg is None:
+            return []
+        else:
+            return [seg]
+    
     def from_uper(self, buf):
+        if self._DEC_MAXDEPTH is not None and ASN1CodecPER._depth.cur is None:
+            return self._from_per_depth(self.from_uper, buf)
+        if self._SAFE_DECLEN or self._DEC_MAXLEN is not None:
+            self._safechk_declen(buf)
         ASN1CodecPER.ALIGNED = False
         if isinstance(buf, bytes_types):
             char = Charpy(buf)
@@ -1203,7 +1715,7 @@ class ASN1Obj(Element):
             # realignement required for outer decoding
             char.forward(8 - ((off1 - off0)%8))
         if self._SAFE_BND:
-            self._safechk_bnd(self._val)
+            self._safechk_bnd_loc(self._val)
     
     def to_uper(self, val=None):
         ASN1CodecPER.ALIGNED = False
@@ -1219,6 +1731,10 @@ class ASN1Obj(Element):
             return None
     
     def from_aper(self, buf):
+        if self._DEC_MAXDEPTH is not None and ASN1CodecPER._depth.cur is None:
+            return self._from_per_depth(self.from_aper, buf)
+        if self._SAFE_DECLEN or self._DEC_MAXLEN is not None:
+            self._safechk_declen(buf)
         ASN1CodecPER.ALIGNED = True
         ASN1CodecPER._off.append(0)
         if isinstance(buf, bytes_types):
@@ -1237,7 +1753,7 @@ class ASN1Obj(Element):
             char.forward(8 - (ASN1CodecPER._off[-1]%8))
         del ASN1CodecPER._off[-1]
         if self._SAFE_BND:
-            self._safechk_bnd(self._val)
+            self._safechk_bnd_loc(self._val)
     
     def to_aper(self, val=None):
         ASN1CodecPER.ALIGNED = True
@@ -1252,7 +1768,7 @@ class ASN1Obj(Element):
             return ret
         else:
             return None
-     
+    
     # methods generating complete transfer structure in _struct attributes
     
     def _from_per_ws(self, char):
@@ -1262,6 +1778,10 @@ class ASN1Obj(Element):
         raise(ASN1NotSuppErr(self.fullname()))
     
     def from_uper_ws(self, buf):
+        if self._DEC_MAXDEPTH is not None and ASN1CodecPER._depth.cur is None:
+            return self._from_per_depth(self.from_uper_ws, buf)
+        if self._SAFE_DECLEN or self._DEC_MAXLEN is not None:
+            self._safechk_declen(buf)
         ASN1CodecPER.ALIGNED = False
         if isinstance(buf, bytes_types):
             char = Charpy(buf)
@@ -1286,7 +1806,7 @@ class ASN1Obj(Element):
             self._struct.append(pad)
             assert( pad() == 0 )
         if self._SAFE_BND:
-            self._safechk_bnd(self._val)
+            self._safechk_bnd_loc(self._val)
     
     def to_uper_ws(self, val=None):
         ASN1CodecPER.ALIGNED = False
@@ -1304,6 +1824,10 @@ class ASN1Obj(Element):
             return None
     
     def from_aper_ws(self, buf):
+        if self._DEC_MAXDEPTH is not None and ASN1CodecPER._depth.cur is None:
+            return self._from_per_depth(self.from_aper_ws, buf)
+        if self._SAFE_DECLEN or self._DEC_MAXLEN is not None:
+            self._safechk_declen(buf)
         ASN1CodecPER.ALIGNED = True
         ASN1CodecPER._off.append(0)
         if isinstance(buf, bytes_types):
@@ -1327,7 +1851,7 @@ class ASN1Obj(Element):
             assert( pad() == 0 )
         del ASN1CodecPER._off[-1]
         if self._SAFE_BND:
-            self._safechk_bnd(self._val)
+            self._safechk_bnd_loc(self._val)
     
     def to_aper_ws(self, val=None):
         ASN1CodecPER.ALIGNED = True
@@ -1394,21 +1918,23 @@ class ASN1Obj(Element):
         self._decode_ber_cont(char, tlv)
     
     def from_ber(self, buf, single=True):
+        if self._DEC_MAXLEN is not None:
+            self._safechk_declen(buf, ASN1BERDecodeErr)
         if isinstance(buf, bytes_types):
             char = Charpy(buf)
         else:
             char = buf
         # decode the whole char buffer into tag, length and value boundary
         if single:
-            TLV = [ASN1CodecBER.decode_single(char)[0]]
+            TLV = [ASN1CodecBER.decode_single(char, maxd=self._DEC_MAXDEPTH)[0]]
         else:
-            TLV = ASN1CodecBER.decode_all(char)
+            TLV = ASN1CodecBER.decode_all(char, maxd=self._DEC_MAXDEPTH)
         char_cur, char_lb = char._cur, char._len_bit
         # decode all value content
         self._from_ber(char, TLV)
         char._cur, char._len_bit = char_cur, char_lb
         if self._SAFE_BND:
-            self._safechk_bnd(self._val)
+            self._safechk_bnd_loc(self._val)
     
     def _to_ber(self):
         # 0) set potential BER codec locals
@@ -1511,21 +2037,23 @@ class ASN1Obj(Element):
         self._struct = TLV
     
     def from_ber_ws(self, buf, single=True):
+        if self._DEC_MAXLEN is not None:
+            self._safechk_declen(buf, ASN1BERDecodeErr)
         if isinstance(buf, bytes_types):
             char = Charpy(buf)
         else:
             char = buf
         # decode the whole char buffer into tag, length and value boundary
         if single:
-            TLV = [ASN1CodecBER.decode_single_ws(char)[0]]
+            TLV = [ASN1CodecBER.decode_single_ws(char, maxd=self._DEC_MAXDEPTH)[0]]
         else:
-            TLV = ASN1CodecBER.decode_all_ws(char)
+            TLV = ASN1CodecBER.decode_all_ws(char, maxd=self._DEC_MAXDEPTH)
         char_cur, char_lb = char._cur, char._len_bit
         # decode all value content
         self._from_ber_ws(char, TLV)
         char._cur, char._len_bit = char_cur, char_lb
         if self._SAFE_BND:
-            self._safechk_bnd(self._val)
+            self._safechk_bnd_loc(self._val)
     
     def _to_ber_ws(self):
         # 0) set potential BER codec locals
@@ -1732,8 +2260,8 @@ class ASN1Obj(Element):
         
         def from_jer(self, txt):
             try:
-                val = JsonDec.decode(txt)
-            except JSONDecodeError as err:
+                val = ASN1CodecJER.decode(txt)
+            except ValueError as err:
                 raise(ASN1JERDecodeErr('{0}: invalid json, {1}'\
                       .format(self.fullname(), err)))
             self._from_jval(val)
@@ -1748,7 +2276,7 @@ class ASN1Obj(Element):
                 self.set_val(val)
             if self._val is not None:
                 val = self._to_jval()
-                return JsonEnc.encode(val)
+                return ASN1CodecJER.encode(val)
             else:
                 return None
         
@@ -1757,6 +2285,24 @@ class ASN1Obj(Element):
         from_json = from_jer
 
 
+def _bnd_add(a, b):
+    if a is None or b is None:
+        return None
+    else:
+        return a + b
+
+def _bnd_max(a, b):
+    if a is None or b is None:
+        return None
+    else:
+        return max(a, b)
+
+def _bnd_mul(a, b):
+    if a is None or b is None:
+        return None
+    else:
+        return a * b
+
 def _save_ber_params():
     global __ber_enc_llong
     global __ber_enc_lundef
@@ -1793,3 +2339,40 @@ def _restore_ber_params():
     ASN1CodecBER.ENC_TIME_CANON = __ber_enc_time_canon
     ASN1CodecBER.ENC_DEF_CANON  = __ber_enc_def_canon
 
+
+class _ASN1TextStop(Exception):
+    pass
+
+
+class _ASN1TextWriter(object):
+    # output of ASN.1 value notation, with optional depth and length caps
+    
+    __slots__ = ('write', 'maxdepth', '_write', '_rem')
+    
+    def __init__(self, write, maxdepth=None, maxlen=None):
+        self.maxdepth = maxdepth
+        if maxlen is None:
+            self.write = write
+        else:
+            self.write, self._write, self._rem = self._write_cap, write, maxlen
+    
+    def _write_cap(self, txt):
+        if len(txt) > self._rem:
+            self._write(txt[:self._rem])
+            self._write(' ...')
+            raise(_ASN1TextStop())
+        self._rem -= len(txt)
+        self._write(txt)
+
+
+def _freeze_val(val):
+    # returns a hashable image of the value val, for the PER encoding cache
+    if isinstance(val, dict):
+        return tuple([(k, _freeze_val(v)) for k, v in val.items()])
+    elif isinstance(val, (list, ASN1Array)):
+        return (list, ) + tuple([_freeze_val(v) for v in val])
+    elif isinstance(val, tuple):
+        return tuple([_freeze_val(v) for v in val])
+    else:
+        return val
+
@@ -59,6 +59,13 @@ Single value: int 0
         if val != 0:
             raise(ASN1ObjErr('{0}: invalid value, {1!r}'.format(self.fullname(), val)))
     
+    ###
+    # random value generation
+    ###
+    
+    def _gen_rand(self, rnd, depth, rows):
+        return 0
+    
     ###
     # conversion between internal value and ASN.1 syntax
     ###
@@ -102,7 +109,7 @@ Single value: int 0
                   .format(self.fullname())))
         if vbnd[1] != vbnd[0]:
             raise(ASN1BERDecodeErr('{0}: invalid NULL length, {1!r}'\
-                  .format(self.fullname(), lval)))
+                  .format(self.fullname(), (vbnd[1] - vbnd[0]) >> 3)))
         self._val = 0
         return Buf('V', val=b'', bl=0)
     
@@ -112,7 +119,7 @@ Single value: int 0
                   .format(self.fullname())))
         if vbnd[1] != vbnd[0]:
             raise(ASN1BERDecodeErr('{0}: invalid NULL length, {1!r}'\
-                  .format(self.fullname(), lval)))
+                  .format(self.fullname(), (vbnd[1] - vbnd[0]) >> 3)))
         self._val = 0
     
     def _encode_ber_cont_ws(self):
@@ -157,6 +164,13 @@ Single value: Python bool
         if not isinstance(val, bool):
             raise(ASN1ObjErr('{0}: invalid value, {1!r}'.format(self.fullname(), val)))
     
+    ###
+    # random value generation
+    ###
+    
+    def _gen_rand(self, rnd, depth, rows):
+        return rnd.random() < 0.5
+    
     ###
     # conversion between internal value and ASN.1 syntax
     ###
@@ -212,7 +226,7 @@ Single value: Python bool
                   .format(self.fullname())))
         if vbnd[1] - vbnd[0] != 8:
             raise(ASN1BERDecodeErr('{0}: invalid BOOLEAN length, {1!r}'\
-                  .format(self.fullname(), lval)))
+                  .format(self.fullname(), (vbnd[1] - vbnd[0]) >> 3)))
         char._cur, char._len_bit = vbnd[0], vbnd[1]
         V = Uint('V', bl=8)
         V._from_char(char)
@@ -228,7 +242,7 @@ Single value: Python bool
                   .format(self.fullname())))
         if vbnd[1] - vbnd[0] != 8:
             raise(ASN1BERDecodeErr('{0}: invalid BOOLEAN length, {1!r}'\
-                  .format(self.fullname(), lval)))
+                  .format(self.fullname(), (vbnd[1] - vbnd[0]) >> 3)))
         char._cur, char._len_bit = vbnd[0], vbnd[1]
         val = char.get_uint(8)
         if val:
@@ -302,8 +316,17 @@ Specific attribute:
     
     def _safechk_bnd(self, val):
         # only check bound when an integer is set as value
+        # (this is ASN1Obj._safechk_bnd() inlined, as it is called for each 
+        # INTEGER decoded)
         if isinstance(val, integer_types):
-            ASN1Obj._safechk_bnd(self, val)
+            const_val = self._const_val
+            if const_val and const_val.ext is None and not const_val._in_root(val):
+                raise(ASN1ObjErr('{0}: {1} value out of constraint, {2!r}'\
+                      .format(self.fullname(), self.TYPE, val)))
+            if self._SAFE_BNDTAB and self._const_tab and self._const_tab_at:
+                self._safechk_bnd_tab(val)
+    
+    _safechk_bnd_loc = _safechk_bnd
     
     def get_name(self):
         """Returns the NamedNumber corresponding to the internal value
@@ -319,6 +342,16 @@ Specific attribute:
         except:
             raise(ASN1ObjErr('{0}: invalid named value, {1!r}'.format(self.fullname(), val)))
     
+    ###
+    # random value generation
+    ###
+    
+    def _gen_rand(self, rnd, depth, rows):
+        if self._const_val is not None and self._const_val.root:
+            return self._const_val.get_rand_int(rnd, -2147483648, 2147483647)
+        else:
+            return rnd.randint(-2147483648, 2147483647)
+    
     ###
     # conversion between internal value and ASN.1 syntax
     ###
@@ -594,6 +627,21 @@ Specific attribute:
     def _safechk_val(self, val):
         self._safechk_val_real(val)
     
+    ###
+    # random value generation
+    ###
+    
+    def _gen_rand(self, rnd, depth, rows):
+        if self._const_val is not None and self._const_val.root:
+            C = rnd.choice(self._const_val.root)
+            if isinstance(C, tuple):
+                return C
+            elif C.lb is not None and C.lb_incl:
+                return C.lb
+            elif C.ub is not None and C.ub_incl:
+                return C.ub
+        return (rnd.randint(-16777216, 16777216) | 1, 2, rnd.randint(-64, 64))
+    
     ###
     # conversion between internal value and ASN.1 syntax
     ###
@@ -976,6 +1024,13 @@ Specific attribute:
             if self._ext is None or not re.match('_ext_[0-9]{1,}', val):
                 raise(ASN1ObjErr('{0}: invalid value, {1!r}'.format(self.fullname(), val)))
     
+    ###
+    # random value generation
+    ###
+    
+    def _gen_rand(self, rnd, depth, rows):
+        return rnd.choice(self._root)
+    
     ###
     # conversion between internal value and ASN.1 syntax
     ###
@@ -1268,6 +1323,19 @@ class _OID(ASN1Obj):
         not all([isinstance(i, integer_types) for i in val]):
             raise(ASN1ObjErr('{0}: invalid value, {1!r}'.format(self.fullname(), val)))
     
+    ###
+    # random value generation
+    ###
+    
+    def _gen_rand(self, rnd, depth, rows):
+        if self._const_val is not None and self._const_val.root:
+            return rnd.choice(self._const_val.root)
+        arcs = tuple([rnd.randint(0, 65535) for i in range(rnd.randint(1, 4))])
+        if self.TYPE == TYPE_OID:
+            return (rnd.randint(0, 2), rnd.randint(0, 39)) + arcs
+        else:
+            return arcs
+    
     ###
     # conversion between internal value and ASN.1 syntax
     ###
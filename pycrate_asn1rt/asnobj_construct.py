@@ -34,9 +34,10 @@ from .dictobj import *
 from .glob    import *
 from .refobj  import *
 from .setobj  import *
+from .compactobj import ASN1Array, get_array_typecode
 from .asnobj  import *
 from .codecs  import *
-from .codecs  import _with_json
+from .codecs  import _with_json, _get_uints
 
 
 #------------------------------------------------------------------------------#
@@ -91,6 +92,32 @@ Specific attributes:
         if val[0] in self._cont:
             self._cont[val[0]]._safechk_bnd(val[1])
     
+    def _safechk_bnd_loc(self, val):
+        pass
+    
+    ###
+    # random value generation
+    ###
+    
+    def _gen_rand(self, rnd, depth, rows):
+        if depth < -self._GEN_DEPTH_MAX:
+            raise(ASN1ObjErr('{0}: maximum depth reached for generating a random value'\
+                  .format(self.fullname())))
+        alts = list(self._root)
+        rnd.shuffle(alts)
+        rows.append({})
+        try:
+            # try alternatives 1 by 1, as some may not be generated (e.g.
+            # because of recursion)
+            for ident in alts[:-1]:
+                try:
+                    return (ident, self._cont[ident]._gen_rand(rnd, depth-1, rows))
+                except ASN1Err:
+                    pass
+            return (alts[-1], self._cont[alts[-1]]._gen_rand(rnd, depth-1, rows))
+        finally:
+            del rows[-1]
+    
     ###
     # conversion between internal value and ASN.1 syntax
     ###
@@ -126,11 +153,32 @@ Specific attributes:
             ret = '%s : \'%s\'H' % (ident, hexlify(self._val[1]))
         return ret
     
+    def _write_asn1(self, W, ind, depth):
+        if '_to_asn1' in self.__dict__:
+            # value notation overridden for this object
+            ASN1Obj._write_asn1(self, W, ind, depth)
+            return
+        ident = self._val[0]
+        if ident in self._cont:
+            Comp = self._cont[ident]
+            Comp._val = self._val[1]
+            _par = Comp._parent
+            Comp._parent = self
+            W.write('%s : ' % ident)
+            try:
+                Comp._write_asn1(W, ind, depth)
+            finally:
+                Comp._parent = _par
+        else:
+            W.write('%s : \'%s\'H' % (ident, hexlify(self._val[1])))
+    
     ###
     # conversion between internal value and ASN.1 PER encoding
     ###
     
     def _from_per_ws(self, char):
+        if ASN1CodecPER._depth.cur is not None:
+            ASN1CodecPER.enter_depth(self)
         GEN = []
         if self._ext is not None:
             E = Uint('E', bl=1)
@@ -173,6 +221,8 @@ Specific attributes:
                 if Cho is not None:
                     Cho._parent = _par
                 self._struct = Envelope(self._name, GEN=tuple(GEN + _gen))
+                if ASN1CodecPER._depth.cur is not None:
+                    ASN1CodecPER._depth.cur -= 1
                 return
             elif ASN1CodecPER.ALIGNED:
                 ASN1CodecPER._off[-1] += 1
@@ -193,13 +243,19 @@ Specific attributes:
         _par = Cho._parent
         Cho._parent = self
         Cho._from_per_ws(char)
+        if Cho._SAFE_BND:
+            Cho._safechk_bnd_loc(Cho._val)
         GEN.append(Cho._struct)
         self._val = (ident, Cho._val)
         Cho._parent = _par
         self._struct = Envelope(self._name, GEN=tuple(GEN))
+        if ASN1CodecPER._depth.cur is not None:
+            ASN1CodecPER._depth.cur -= 1
         return
     
     def _from_per(self, char):
+        if ASN1CodecPER._depth.cur is not None:
+            ASN1CodecPER.enter_depth(self)
         GEN = []
         if self._ext is not None:
             E = char.get_uint(1)
@@ -232,6 +288,8 @@ Specific attributes:
                 self._val = (ident, ASN1CodecPER.decode_unconst_open(char, wrapped=Cho))
                 if Cho is not None:
                     Cho._parent = _par
+                if ASN1CodecPER._depth.cur is not None:
+                    ASN1CodecPER._depth.cur -= 1
                 return
             elif ASN1CodecPER.ALIGNED:
                 ASN1CodecPER._off[-1] += 1
@@ -251,8 +309,12 @@ Specific attributes:
         _par = Cho._parent
         Cho._parent = self
         Cho._from_per(char)
+        if Cho._SAFE_BND:
+            Cho._safechk_bnd_loc(Cho._val)
         self._val = (ident, Cho._val)
         Cho._parent = _par
+        if ASN1CodecPER._depth.cur is not None:
+            ASN1CodecPER._depth.cur -= 1
         return
     
     def _to_per_ws(self):
@@ -428,6 +490,8 @@ Specific attributes:
                     Cho[-1]._parent = Cho[-2]
                 # decode it
                 Cho[-1]._from_ber_ws(char, [tlv])
+                if Cho[-1]._SAFE_BND:
+                    Cho[-1]._safechk_bnd_loc(Cho[-1]._val)
                 val = Cho[-1]._val
                 # restore parents and set value
                 for i in range(len(_par)):
@@ -443,6 +507,8 @@ Specific attributes:
                 Cho._parent = self
                 # decode it
                 Cho._from_ber_ws(char, [tlv])
+                if Cho._SAFE_BND:
+                    Cho._safechk_bnd_loc(Cho._val)
                 # restore parent and set value
                 Cho._parent = _par
                 self._val = (path, Cho._val)
@@ -490,6 +556,8 @@ Specific attributes:
                     Cho[-1]._parent = Cho[-2]
                 # decode it
                 Cho[-1]._from_ber(char, [tlv])
+                if Cho[-1]._SAFE_BND:
+                    Cho[-1]._safechk_bnd_loc(Cho[-1]._val)
                 val = Cho[-1]._val
                 # restore parents and set value
                 for i in range(len(_par)):
@@ -504,6 +572,8 @@ Specific attributes:
                 Cho._parent = self
                 # decode it
                 Cho._from_ber(char, [tlv])
+                if Cho._SAFE_BND:
+                    Cho._safechk_bnd_loc(Cho._val)
                 # restore parent and set value
                 Cho._parent = _par
                 self._val = (path, Cho._val)
@@ -624,6 +694,105 @@ class _CONSTRUCT(ASN1Obj):
                 Obj._val = val[name]
                 Obj._safechk_bnd(Obj._val)
     
+    def _safechk_bnd_loc(self, val):
+        pass
+    
+    ###
+    # random value generation
+    ###
+    
+    def _gen_rand(self, rnd, depth, rows):
+        if depth < -self._GEN_DEPTH_MAX:
+            raise(ASN1ObjErr('{0}: maximum depth reached for generating a random value'\
+                  .format(self.fullname())))
+        keys, comps, cands = self._get_gen_tab()
+        val, sel = {}, {}
+        rows.append(sel)
+        try:
+            # components referenced by table constraints first, selecting a row
+            # of the table for each of them
+            for ident in keys:
+                Comp = self._cont[ident]
+                if cands[ident]:
+                    sel[ident] = rnd.choice(cands[ident])
+                    val[ident] = sel[ident][Comp._const_tab_id]
+                elif cands[ident] is None:
+                    val[ident] = Comp._gen_rand(rnd, depth-1, rows)
+                else:
+                    raise(ASN1ObjErr('{0}: no table constraint value for {1}'\
+                          .format(self.fullname(), ident)))
+            for ident in comps:
+                mand = ident in self._root_mand
+                if not mand and (depth <= 0 or rnd.random() < 0.5):
+                    continue
+                Comp = self._cont[ident]
+                row  = self._get_gen_row(Comp, rows)
+                if row is not None:
+                    if Comp._const_tab_id in row:
+                        Obj = row[Comp._const_tab_id]
+                        if isinstance(Obj, ASN1Obj):
+                            val[ident] = (Obj._gen_rand_ident(),
+                                          Obj._gen_rand(rnd, depth-1, rows))
+                        else:
+                            val[ident] = Obj
+                    elif mand:
+                        raise(ASN1ObjErr('{0}: no table constraint value for {1}'\
+                              .format(self.fullname(), ident)))
+                elif mand:
+                    val[ident] = Comp._gen_rand(rnd, depth-1, rows)
+                else:
+                    try:
+                        val[ident] = Comp._gen_rand(rnd, depth-1, rows)
+                    except ASN1Err:
+                        pass
+            return val
+        finally:
+            del rows[-1]
+    
+    def _get_gen_tab(self):
+        # returns the list of root components referenced by the table constraint
+        # of other components (i.e. keys), the list of other root components and
+        # the dict of table rows which can be selected for each key
+        # (None if the key is not referenced within self)
+        if hasattr(self, '__gen_tab__'):
+            return self.__gen_tab__
+        keys, comps, cands = [], [], {}
+        for ident in self._root:
+            Comp = self._cont[ident]
+            if Comp._const_tab is not None and Comp._const_tab_at is None and \
+            Comp._const_tab_id:
+                keys.append(ident)
+            else:
+                comps.append(ident)
+        for ident in keys:
+            Comp = self._cont[ident]
+            # table fields required by the mandatory components referencing it
+            deps = [self._cont[i]._const_tab_id for i in comps \
+                    if i in self._root_mand and self._cont[i]._const_tab is not None \
+                    and self._cont[i]._const_tab_at == ('..', ident)]
+            if not any([self._cont[i]._const_tab_at == ('..', ident) for i in comps \
+                        if self._cont[i]._const_tab is not None]):
+                cands[ident] = None
+            else:
+                tab = Comp._const_tab._val
+                cands[ident] = [r for r in tab.root + (tab.ext or []) \
+                                if isinstance(r, dict) and Comp._const_tab_id in r \
+                                and all([d in r for d in deps])]
+        self.__gen_tab__ = (keys, comps, cands)
+        return self.__gen_tab__
+    
+    def _get_gen_row(self, Comp, rows):
+        # returns the table constraint row selected for the component referenced
+        # by Comp._const_tab_at, or None
+        if Comp._const_tab is None or not Comp._const_tab_at:
+            return None
+        at, up = Comp._const_tab_at, 0
+        while up < len(at) and at[up] == '..':
+            up += 1
+        if up == 0 or up > len(rows) or len(at) != up+1:
+            return None
+        return rows[-up].get(at[up])
+    
     ###
     # conversion between internal value and ASN.1 syntax
     ###
@@ -647,6 +816,34 @@ class _CONSTRUCT(ASN1Obj):
                 val[-1] = val[-1][:-2]
             return '{\n' + ''.join(val) + '\n}'
     
+    def _write_asn1(self, W, ind, depth):
+        if '_to_asn1' in self.__dict__:
+            # value notation overridden for this object
+            ASN1Obj._write_asn1(self, W, ind, depth)
+            return
+        if not self._val:
+            # empty dict
+            W.write('{ }')
+        elif depth == W.maxdepth:
+            W.write('{ ... }')
+        else:
+            ind_in, sep = ind + '  ', '{\n'
+            for ident in self._cont:
+                if ident in self._val:
+                    Comp = self._cont[ident]
+                    _par = Comp._parent
+                    Comp._parent = self
+                    Comp._val = self._val[ident]
+                    W.write('%s%s%s ' % (sep, ind_in, ident))
+                    try:
+                        Comp._write_asn1(W, ind_in, depth+1)
+                    finally:
+                        Comp._parent = _par
+                    sep = ',\n'
+            if sep == '{\n':
+                W.write(sep)
+            W.write('\n%s}' % ind)
+    
     ###
     # conversion between internal value and ASN.1 PER encoding
     ###
@@ -658,6 +855,8 @@ class _CONSTRUCT(ASN1Obj):
             self._struct = Envelope(self._name, GEN=tuple())
             return
         #
+        if ASN1CodecPER._depth.cur is not None:
+            ASN1CodecPER.enter_depth(self)
         extended = False
         if self._ext is not None:
             E = Uint('E', bl=1)
@@ -694,6 +893,8 @@ class _CONSTRUCT(ASN1Obj):
                 _par = Comp._parent
                 Comp._parent = self
                 Comp._from_per_ws(char)
+                if Comp._SAFE_BND:
+                    Comp._safechk_bnd_loc(Comp._val)
                 GEN.append(Comp._struct)
                 self._val[ident] = Comp._val
                 Comp._parent = _par
@@ -759,6 +960,8 @@ class _CONSTRUCT(ASN1Obj):
                     GEN.extend(_gen)
         #
         self._struct = Envelope(self._name, GEN=tuple(GEN))
+        if ASN1CodecPER._depth.cur is not None:
+            ASN1CodecPER._depth.cur -= 1
         return
     
     def _from_per(self, char):
@@ -767,6 +970,8 @@ class _CONSTRUCT(ASN1Obj):
             # empty sequence
             return
         #
+        if ASN1CodecPER._depth.cur is not None:
+            ASN1CodecPER.enter_depth(self)
         extended = False
         if self._ext is not None:
             E = char.get_uint(1)
@@ -798,6 +1003,8 @@ class _CONSTRUCT(ASN1Obj):
                 _par = Comp._parent
                 Comp._parent = self
                 Comp._from_per(char)
+                if Comp._SAFE_BND:
+                    Comp._safechk_bnd_loc(Comp._val)
                 self._val[ident] = Comp._val
                 Comp._parent = _par
             elif Comp._def is not None and ASN1CodecPER.GET_DEFVAL:
@@ -847,6 +1054,8 @@ class _CONSTRUCT(ASN1Obj):
                         # unknown extension
                         self._val['_ext_%r' % i] = ASN1CodecPER.decode_unconst_open(char)
         #
+        if ASN1CodecPER._depth.cur is not None:
+            ASN1CodecPER._depth.cur -= 1
         return
     
     def _to_per_ws(self):
@@ -1363,6 +1572,8 @@ Specific attributes:
                 _par = Comp._parent
                 Comp._parent = self
                 Comp._from_ber_ws(char, [tlv[ind]])
+                if Comp._SAFE_BND:
+                    Comp._safechk_bnd_loc(Comp._val)
                 Comp._parent = _par
                 self._val[Comp._name] = Comp._val
                 TLV.append(Comp._struct)
@@ -1472,6 +1683,8 @@ Specific attributes:
                 _par = Comp._parent
                 Comp._parent = self
                 Comp._from_ber(char, [tlv[ind]])
+                if Comp._SAFE_BND:
+                    Comp._safechk_bnd_loc(Comp._val)
                 Comp._parent = _par
                 self._val[Comp._name] = Comp._val
                 dec.append(Comp._name)
@@ -1730,6 +1943,8 @@ Specific attributes:
                         Comp[-1]._parent = Comp[-2]
                     # decode it
                     Comp[-1]._from_ber_ws(char, [comp_tlv])
+                    if Comp[-1]._SAFE_BND:
+                        Comp[-1]._safechk_bnd_loc(Comp[-1]._val)
                     val = Comp[-1]._val
                     # restore parents and set value
                     for i in range(len(_par)):
@@ -1745,6 +1960,8 @@ Specific attributes:
                     Comp._parent = self
                     # decode it
                     Comp._from_ber_ws(char, [comp_tlv])
+                    if Comp._SAFE_BND:
+                        Comp._safechk_bnd_loc(Comp._val)
                     # restore parent and set value
                     Comp._parent = _par
                     self._val[path] = Comp._val
@@ -1815,6 +2032,8 @@ Specific attributes:
                         Comp[-1]._parent = Comp[-2]
                     # decode it
                     Comp[-1]._from_ber(char, [comp_tlv])
+                    if Comp[-1]._SAFE_BND:
+                        Comp[-1]._safechk_bnd_loc(Comp[-1]._val)
                     val = Comp[-1]._val
                     # restore parents and set value
                     for i in range(len(_par)):
@@ -1829,6 +2048,8 @@ Specific attributes:
                     Comp._parent = self
                     # decode it
                     Comp._from_ber(char, [comp_tlv])
+                    if Comp._SAFE_BND:
+                        Comp._safechk_bnd_loc(Comp._val)
                     # restore parent and set value
                     Comp._parent = _par
                     self._val[path] = Comp._val
@@ -1893,27 +2114,28 @@ Specific attributes:
                         lval += comp_tlv.get_bl() >> 3
                 val_ids.remove(ident)
         # encode extended component 1 by 1 in their definition order
-        for ident in self._ext:
-            if ident in self._val:
-                if ASN1CodecBER.ENC_DEF_CANON and self._val[ident] == self._cont[ident]._def:
-                    # the value provided equals the default one
-                    # hence will not be encoded
-                    if not self._SILENT:
-                        asnlog('SET._encode_ber_cont_ws: %s.%s, removing value equal '\
-                               'to the default one' % (self.fullname(), ident))
-                    del self._val[ident]
-                else:
-                    # component to be encoded
-                    Comp = self._cont[ident]
-                    _par = Comp._parent
-                    Comp._parent = self
-                    Comp._val = self._val[ident]
-                    comp_tlv = Comp._to_ber_ws()
-                    TLV.append( comp_tlv )
-                    Comp._parent = _par
-                    if lval >= 0:
-                        lval += comp_tlv.get_bl() >> 3
-                val_ids.remove(ident)
+        if self._ext is not None:
+            for ident in self._ext:
+                if ident in self._val:
+                    if ASN1CodecBER.ENC_DEF_CANON and self._val[ident] == self._cont[ident]._def:
+                        # the value provided equals the default one
+                        # hence will not be encoded
+                        if not self._SILENT:
+                            asnlog('SET._encode_ber_cont_ws: %s.%s, removing value equal '\
+                                   'to the default one' % (self.fullname(), ident))
+                        del self._val[ident]
+                    else:
+                        # component to be encoded
+                        Comp = self._cont[ident]
+                        _par = Comp._parent
+                        Comp._parent = self
+                        Comp._val = self._val[ident]
+                        comp_tlv = Comp._to_ber_ws()
+                        TLV.append( comp_tlv )
+                        Comp._parent = _par
+                        if lval >= 0:
+                            lval += comp_tlv.get_bl() >> 3
+                    val_ids.remove(ident)
         #
         if val_ids:
             # encode unknown extended components
@@ -1956,27 +2178,28 @@ Specific attributes:
                         lval += sum([f[2] for f in comp_tlv]) >> 3
                 val_ids.remove(ident)
         # encode extended component 1 by 1 in their definition order
-        for ident in self._ext:
-            if ident in self._val:
-                if ASN1CodecBER.ENC_DEF_CANON and self._val[ident] == self._cont[ident]._def:
-                    # the value provided equals the default one
-                    # hence will not be encoded
-                    if not self._SILENT:
-                        asnlog('SET._encode_ber_cont: %s.%s, removing value equal '\
-                               'to the default one' % (self.fullname(), ident))
-                    del self._val[ident]
-                else:
-                    # component to be encoded
-                    Comp = self._cont[ident]
-                    _par = Comp._parent
-                    Comp._parent = self
-                    Comp._val = self._val[ident]
-                    comp_tlv = Comp._to_ber()
-                    TLV.extend( comp_tlv )
-                    Comp._parent = _par
-                    if lval >= 0:
-                        lval += sum([f[2] for f in comp_tlv]) >> 3
-                val_ids.remove(ident)
+        if self._ext is not None:
+            for ident in self._ext:
+                if ident in self._val:
+                    if ASN1CodecBER.ENC_DEF_CANON and self._val[ident] == self._cont[ident]._def:
+                        # the value provided equals the default one
+                        # hence will not be encoded
+                        if not self._SILENT:
+                            asnlog('SET._encode_ber_cont: %s.%s, removing value equal '\
+                                   'to the default one' % (self.fullname(), ident))
+                        del self._val[ident]
+                    else:
+                        # component to be encoded
+                        Comp = self._cont[ident]
+                        _par = Comp._parent
+                        Comp._parent = self
+                        Comp._val = self._val[ident]
+                        comp_tlv = Comp._to_ber()
+                        TLV.extend( comp_tlv )
+                        Comp._parent = _par
+                        if lval >= 0:
+                            lval += sum([f[2] for f in comp_tlv]) >> 3
+                    val_ids.remove(ident)
         #
         if val_ids:
             # encode unknown extended components
@@ -2002,21 +2225,53 @@ class _CONSTRUCT_OF(ASN1Obj):
     # this is to potentially limit the length of the encoded content
     _ENC_MAXLEN = None
     
+    # routines for decoding components in bulk, in UPER and APER,
+    # set by the 1st PER decoding (see _get_per_bulk())
+    _per_bulk = None
+    # set to False to decode components one by one (e.g. to record the offset
+    # of each one, see offsets.py)
+    _PER_BULK = True
+    
+    # typecode of the ASN1Array compact value, set by the 1st decoding in 
+    # compact mode (see _set_compact())
+    _compact_tc = None
+    
     def _safechk_val(self, val):
-        if not isinstance(val, list):
+        if not isinstance(val, (list, ASN1Array)):
             raise(ASN1ObjErr('{0}: invalid value, {1!r}'.format(self.fullname(), val)))
         for v in val:
             self._cont._safechk_val(v)
     
     def _safechk_bnd(self, val):
+        self._safechk_bnd_loc(val)
+        for v in val:
+            self._cont._safechk_bnd(v)
+    
+    def _safechk_bnd_loc(self, val):
         ASN1Obj._safechk_bnd(self, val)
         if self._const_sz and \
         self._const_sz.ext is None and \
         len(val) not in self._const_sz:
             raise(ASN1ObjErr('{0}: value out of size constraint, {1!r}'\
                   .format(self.fullname(), val)))
-        for v in val:
-            self._cont._safechk_bnd(v)
+    
+    ###
+    # random value generation
+    ###
+    
+    def _gen_rand(self, rnd, depth, rows):
+        if depth < -self._GEN_DEPTH_MAX:
+            raise(ASN1ObjErr('{0}: maximum depth reached for generating a random value'\
+                  .format(self.fullname())))
+        if depth > 0:
+            num = self._gen_rand_sz(rnd, self._GEN_SZ_OF)
+        else:
+            num = self._gen_rand_sz(rnd, 0)
+        rows.append({})
+        try:
+            return [self._cont._gen_rand(rnd, depth-1, rows) for i in range(num)]
+        finally:
+            del rows[-1]
     
     ###
     # conversion between internal value and ASN.1 syntax
@@ -2061,6 +2316,30 @@ class _CONSTRUCT_OF(ASN1Obj):
                 val[-1] = val[-1][:-2]
             return '{\n' + ''.join(val) + '\n}'
     
+    def _write_asn1(self, W, ind, depth):
+        if '_to_asn1' in self.__dict__:
+            # value notation overridden for this object
+            ASN1Obj._write_asn1(self, W, ind, depth)
+            return
+        if not self._val:
+            # empty list
+            W.write('{ }')
+        elif depth == W.maxdepth:
+            W.write('{ ... }')
+        else:
+            Comp, ind_in, sep = self._cont, ind + '  ', '{\n'
+            _par = Comp._parent
+            Comp._parent = self
+            try:
+                for v in self._val:
+                    Comp._val = v
+                    W.write(sep + ind_in)
+                    Comp._write_asn1(W, ind_in, depth+1)
+                    sep = ',\n'
+            finally:
+                Comp._parent = _par
+            W.write('\n%s}' % ind)
+    
     ###
     # conversion between internal value and ASN.1 PER encoding
     ###
@@ -2101,11 +2380,19 @@ class _CONSTRUCT_OF(ASN1Obj):
                 self._val = []
                 _par = self._cont._parent
                 self._cont._parent = self
+                if ASN1CodecPER._depth.cur is not None:
+                    ASN1CodecPER.enter_depth(self)
                 for i in range(ldet):
                     self._cont._from_per_ws(char)
+                    if self._cont._SAFE_BND:
+                        self._cont._safechk_bnd_loc(self._cont._val)
                     GEN.append(self._cont._struct)
                     self._val.append(self._cont._val)
                 self._cont._parent = _par
+                if ASN1CodecPER._depth.cur is not None:
+                    ASN1CodecPER._depth.cur -= 1
+                if self._DEC_COMPACT:
+                    self._set_compact()
                 self._struct = Envelope(self._name, GEN=tuple(GEN))
                 return
         # 4) size is semi-constrained or has no constraint
@@ -2123,10 +2410,14 @@ class _CONSTRUCT_OF(ASN1Obj):
         self._val, L = [], ldet
         _par = self._cont._parent
         self._cont._parent = self
+        if ASN1CodecPER._depth.cur is not None:
+            ASN1CodecPER.enter_depth(self)
         while ldet in (65536, 49152, 32768, 16384):
             # requires defragmentation
             for i in range(ldet):
                 self._cont._from_per_ws(char)
+                if self._cont._SAFE_BND:
+                    self._cont._safechk_bnd_loc(self._cont._val)
                 GEN.append(self._cont._struct)
                 self._val.append(self._cont._val)
             if ASN1CodecPER.ALIGNED and ASN1CodecPER._off[-1] % 8:
@@ -2138,9 +2429,15 @@ class _CONSTRUCT_OF(ASN1Obj):
                 raise(ASN1PERDecodeErr('too much fragments, {0!r}'.format(L)))
         for i in range(ldet):
             self._cont._from_per_ws(char)
+            if self._cont._SAFE_BND:
+                self._cont._safechk_bnd_loc(self._cont._val)
             GEN.append(self._cont._struct)
             self._val.append(self._cont._val)
         self._cont._parent = _par
+        if ASN1CodecPER._depth.cur is not None:
+            ASN1CodecPER._depth.cur -= 1
+        if self._DEC_COMPACT:
+            self._set_compact()
         self._struct = Envelope(self._name, GEN=tuple(GEN))
     
     def _from_per(self, char):
@@ -2176,9 +2473,7 @@ class _CONSTRUCT_OF(ASN1Obj):
                 self._val = []
                 _par = self._cont._parent
                 self._cont._parent = self
-                for i in range(ldet):
-                    self._cont._from_per(char)
-                    self._val.append(self._cont._val)
+                self.__from_per_cont(char, ldet)
                 self._cont._parent = _par
                 return
         # 4) size is semi-constrained or has no constraint
@@ -2197,20 +2492,125 @@ class _CONSTRUCT_OF(ASN1Obj):
         self._cont._parent = self
         while ldet in (65536, 49152, 32768, 16384):
             # requires defragmentation
-            for i in range(ldet):
-                self._cont._from_per(char)
-                self._val.append(self._cont._val)
+            self.__from_per_cont(char, ldet)
             if ASN1CodecPER.ALIGNED and ASN1CodecPER._off[-1] % 8:
                 ASN1CodecPER.decode_pad(char)
             ldet = ASN1CodecPER.decode_count(char)
             L += ldet
             if L > ASN1CodecPER.DEC_MAXL:
                 raise(ASN1PERDecodeErr('too much fragments, {0!r}'.format(L)))
-        for i in range(ldet):
-            self._cont._from_per(char)
-            self._val.append(self._cont._val)
+        self.__from_per_cont(char, ldet)
         self._cont._parent = _par
     
+    def __from_per_cont(self, char, num):
+        # decodes num components and appends their values to self._val
+        if ASN1CodecPER._depth.cur is not None:
+            ASN1CodecPER.enter_depth(self)
+        if self._per_bulk is None:
+            self._per_bulk = (self._get_per_bulk(False), self._get_per_bulk(True))
+        bulk = self._per_bulk[ASN1CodecPER.ALIGNED]
+        if bulk is not None and num > 1 and self._PER_BULK:
+            self._val.extend( bulk(char, num) )
+            self._cont._val = self._val[-1]
+        else:
+            Cont = self._cont
+            for i in range(num):
+                Cont._from_per(char)
+                if Cont._SAFE_BND:
+                    Cont._safechk_bnd_loc(Cont._val)
+                self._val.append(Cont._val)
+        if ASN1CodecPER._depth.cur is not None:
+            ASN1CodecPER._depth.cur -= 1
+        if self._DEC_COMPACT and isinstance(self._val, list):
+            self._set_compact()
+    
+    def _set_compact(self):
+        # converts the list of INTEGER values decoded into an ASN1Array
+        if self._compact_tc is None:
+            C = self._cont._const_val
+            if self._cont.TYPE == TYPE_INT and C and C.ext is None:
+                self._compact_tc = get_array_typecode(C.lb, C.ub) or ''
+            else:
+                self._compact_tc = ''
+        if self._compact_tc:
+            self._val = ASN1Array(self._compact_tc, self._val)
+    
+    def _get_per_bulk(self, aligned):
+        """returns a routine decoding a given number of components at once
+        in PER (aligned or not), or None if the component type has no fixed 
+        width encoding
+        
+        This is the case for BOOLEAN, fully constrained INTEGER and ENUMERATED
+        without extension, and fixed size OCTET STRING without extension
+        """
+        Cont = self._cont
+        if Cont._const_tab is not None:
+            return None
+        #
+        if Cont.TYPE == TYPE_INT:
+            C = Cont._const_val
+            if not C or C.ext is not None or C.rdyn is None or \
+            (aligned and C.ra > 65536):
+                return None
+            in_root = C.in_root
+            if len(C.root) == 1:
+                # single range: only the upper bound needs to be checked
+                ub = C.ub
+                def chk(vals):
+                    return max(vals) <= ub
+            else:
+                def chk(vals):
+                    return all(map(in_root, vals))
+            #
+            def bulk_int(char, num):
+                vals = ASN1CodecPER.decode_intconst_bulk(char, C, num)
+                if Cont._SAFE_BND and not chk(vals):
+                    for v in vals:
+                        Cont._safechk_bnd_loc(v)
+                return vals
+            return bulk_int
+        #
+        elif Cont._const_val:
+            return None
+        #
+        elif Cont.TYPE == TYPE_ENUM:
+            if Cont._ext is not None or Cont._const_ind is None or \
+            (aligned and Cont._const_ind.ra > 65536):
+                return None
+            C, root = Cont._const_ind, Cont._root
+            #
+            def bulk_enum(char, num):
+                try:
+                    return [root[i] for i in ASN1CodecPER.decode_intconst_bulk(char, C, num)]
+                except IndexError:
+                    raise(ASN1PERDecodeErr('{0}: invalid ENUMERATED index'\
+                          .format(Cont.fullname())))
+            return bulk_enum
+        #
+        elif Cont.TYPE == TYPE_BOOL:
+            lut = Cont._PER_LUT
+            #
+            def bulk_bool(char, num):
+                vals = [lut[b] for b in _get_uints(char, num, 1)]
+                if ASN1CodecPER.ALIGNED:
+                    ASN1CodecPER._off[-1] += num
+                return vals
+            return bulk_bool
+        #
+        elif Cont.TYPE == TYPE_OCT_STR:
+            C = Cont._const_sz
+            if not C or C.ext is not None or C.rdyn != 0 or C.ub >= 65536 or \
+            Cont._const_cont is not None:
+                return None
+            ldet = C.ub
+            #
+            def bulk_octstr(char, num):
+                return ASN1CodecPER.decode_const_buf_bulk(char, ldet, num)
+            return bulk_octstr
+        #
+        else:
+            return None
+    
     def _to_per_ws(self):
         GEN, ldet = [], len(self._val)
         if self._const_sz:
@@ -2431,10 +2831,14 @@ class _CONSTRUCT_OF(ASN1Obj):
                 break
             else:
                 Comp._from_ber_ws(char, [comp_tlv])
+                if Comp._SAFE_BND:
+                    Comp._safechk_bnd_loc(Comp._val)
                 self._val.append( Comp._val )
                 TLV.append( Comp._struct )
         #
         Comp._parent = _par
+        if self._DEC_COMPACT:
+            self._set_compact()
         return Envelope('V', GEN=tuple(TLV))
     
     def _decode_ber_cont(self, char, tlv):
@@ -2459,9 +2863,13 @@ class _CONSTRUCT_OF(ASN1Obj):
                 break
             else:
                 Comp._from_ber(char, [comp_tlv])
+                if Comp._SAFE_BND:
+                    Comp._safechk_bnd_loc(Comp._val)
                 self._val.append( Comp._val )
         #
         Comp._parent = _par
+        if self._DEC_COMPACT:
+            self._set_compact()
     
     def _encode_ber_cont_ws(self):
         Comp, TLV = self._cont, []
@@ -160,6 +160,29 @@ Single value: Python 2-tuple
             self.__const_tr__ = const_tr
             return const_tr
     
+    def _get_tag_lut(self, const_obj=None):
+        # returns the lookup table of BER tag to the list of objects which can
+        # be decoded with it, for the set of objects const_obj retrieved from 
+        # the table constraint, or for the value constraint if const_obj is None
+        # lookup tables are built only once, and then cached
+        if const_obj is None:
+            if not hasattr(self, '__const_tag_lut__'):
+                ConstList = self._const_val.root
+                if self._const_val.ext:
+                    ConstList = ConstList + self._const_val.ext
+                self.__const_tag_lut__ = get_tag_lut(ConstList)
+            return self.__const_tag_lut__
+        else:
+            if not hasattr(self, '__tab_tag_lut__'):
+                self.__tab_tag_lut__ = {}
+            key = tuple([id(O) for O in const_obj])
+            try:
+                return self.__tab_tag_lut__[key]
+            except KeyError:
+                lut = get_tag_lut(const_obj)
+                self.__tab_tag_lut__[key] = lut
+                return lut
+    
     def _safechk_val(self, val):
         if isinstance(val, tuple) and len(val) == 2:
             if isinstance(val[0], ASN1Obj):
@@ -183,6 +206,25 @@ Single value: Python 2-tuple
         elif val[0][:5] != '_unk_':
             self._get_val_obj(val[0])._safechk_bnd(val[1])
     
+    def _safechk_bnd_loc(self, val):
+        pass
+    
+    ###
+    # random value generation
+    ###
+    
+    def _gen_rand(self, rnd, depth, rows):
+        # this is only called when no table constraint row has been selected
+        # for self (see _CONSTRUCT._gen_rand()): pick any type from the
+        # constraints, or generate some unknown content
+        objs = [O for ref, O in self._get_const_tr().items() if isinstance(ref, str_types)]
+        if objs:
+            Obj = rnd.choice(objs)
+            return (Obj._gen_rand_ident(), Obj._gen_rand(rnd, depth-1, rows))
+        else:
+            return ('_unk_004', bytes(bytearray([rnd.randint(0, 255) \
+                                      for i in range(rnd.randint(0, self._GEN_SZ_STR))])))
+    
     ###
     # conversion between internal value and ASN.1 syntax
     ###
@@ -245,11 +287,29 @@ Single value: Python 2-tuple
             Obj._val = self._val[1]
             return '%s: %s' % (ident, Obj.to_asn1())
     
+    def _write_asn1(self, W, ind, depth):
+        if self._val[0][:5] == '_unk_':
+            W.write(self._to_asn1())
+        else:
+            if isinstance(self._val[0], str_types):
+                ident = self._val[0]
+            elif isinstance(self._val[0], tuple):
+                ident = '.'.join(self._val[0])
+            else:
+                # self._val[0] is an ASN1Obj instance
+                ident = '%s.%s' % (self._val[0]._mod, self._val[0]._name)
+            Obj = self._get_val_obj(self._val[0])
+            Obj._val = self._val[1]
+            W.write('%s: ' % ident)
+            Obj._write_asn1(W, ind, depth)
+    
     ###
     # conversion between internal value and ASN.1 PER encoding
     ###
     
     def _from_per_ws(self, char):
+        if ASN1CodecPER._depth.cur is not None:
+            ASN1CodecPER.enter_depth(self)
         # try to get a defined object from a table constraint
         if self._TAB_LUT and self._const_tab and self._const_tab_at:
             const_obj_type, const_obj = self._get_tab_obj()
@@ -286,9 +346,13 @@ Single value: Python 2-tuple
                 val, GEN = ASN1CodecPER.decode_unconst_open_ws(char, wrapped=Obj)
                 self._val = (Obj.TYPE, val)
         self._struct = Envelope(self._name, GEN=tuple(GEN))
+        if ASN1CodecPER._depth.cur is not None:
+            ASN1CodecPER._depth.cur -= 1
         return
     
     def _from_per(self, char):
+        if ASN1CodecPER._depth.cur is not None:
+            ASN1CodecPER.enter_depth(self)
         # try to get a defined object from a table constraint
         if self._TAB_LUT and self._const_tab and self._const_tab_at:
             const_obj_type, const_obj = self._get_tab_obj()
@@ -322,6 +386,8 @@ Single value: Python 2-tuple
                 self._val = (Obj._typeref.called[1], val)
             else:
                 self._val = (Obj.TYPE, val)
+        if ASN1CodecPER._depth.cur is not None:
+            ASN1CodecPER._depth.cur -= 1
         return
     
     def _to_per_ws(self):
@@ -376,13 +442,13 @@ Single value: Python 2-tuple
             else:
                 # const_obj_type == CLASET_MULT
                 obj_mult = True
-                Objs = get_obj_by_tag(self, tag, const_obj)
+                Objs = self._get_tag_lut(const_obj).get(tag, [])
         #
         elif self._const_val is not None:
             # another way to provide a (set of) potential defined object(s)
             # is to look into value constraint self._const_val
             # we must select the right one according to the decoded tag
-            Objs = get_obj_by_tag(self, tag)
+            Objs = self._get_tag_lut().get(tag, [])
         #
         elif hasattr(self, '_defby') and self._defby is not None:
             # TODO: 3rd way to specify the potential defined object
@@ -397,10 +463,15 @@ Single value: Python 2-tuple
             for Obj in Objs:
                 try:
                     Obj._from_ber_ws(char, [tlv])
+                except ASN1ObjErr:
+                    # decoded value out of constraint
+                    raise
                 except Exception:
                     # decoding failed
                     char._cur, char._len_bit = char_cur, char_lb
                 else:
+                    if Obj._SAFE_BND:
+                        Obj._safechk_bnd_loc(Obj._val)
                     # set value
                     if Obj._typeref is not None:
                         if obj_mult:
@@ -470,13 +541,13 @@ Single value: Python 2-tuple
             else:
                 # const_obj_type == CLASET_MULT
                 obj_mult = True
-                Objs = get_obj_by_tag(self, tag, const_obj)
+                Objs = self._get_tag_lut(const_obj).get(tag, [])
         #
         elif self._const_val is not None:
             # another way to provide a (set of) potential defined object(s)
             # is to look into value constraint self._const_val
             # we must select the right one according to the decoded tag
-            Objs = get_obj_by_tag(self, tag)
+            Objs = self._get_tag_lut().get(tag, [])
         #
         elif hasattr(self, '_defby') and self._defby is not None:
             # TODO: 3rd way to specify the potential defined object
@@ -491,9 +562,14 @@ Single value: Python 2-tuple
             for Obj in Objs:
                 try:
                     Obj._from_ber(char, [tlv])
+                except ASN1ObjErr:
+                    # decoded value out of constraint
+                    raise
                 except Exception:
                     char._cur, char._len_bit = char_cur, char_lb
                 else:
+                    if Obj._SAFE_BND:
+                        Obj._safechk_bnd_loc(Obj._val)
                     # set value
                     if Obj._typeref is not None:
                         if obj_mult:
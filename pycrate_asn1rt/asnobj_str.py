@@ -34,6 +34,7 @@ from .dictobj import *
 from .glob    import *
 from .refobj  import *
 from .setobj  import *
+from .compactobj import ASN1BitView
 from .asnobj  import *
 from .codecs  import *
 from .codecs  import _with_json
@@ -67,6 +68,10 @@ Alternative single value: Python set of str (from the object's NamedBitList)
     This is only to be used in set_val() method, and is converted to a Python
     2-tuple of int when set
 
+Alternative single value: ASN1BitView
+    This is set by the PER and BER decoders when _DEC_COMPACT is True, and 
+    compares equal to the Python 2-tuple of int
+
 Alternative single value: Python 2-tuple
     the 1st item corresponds to a reference to another ASN.1 object, it can be:
         - a str corresponding to an ASN.1 typeref taken from the CONTAINING constraint of self
@@ -122,7 +127,10 @@ Specific constraints attributes:
                       .format(self.fullname(), ref)))
     
     def _safechk_val(self, val):
-        if isinstance(val, tuple) and len(val) == 2:
+        if isinstance(val, ASN1BitView):
+            # compact raw value
+            pass
+        elif isinstance(val, tuple) and len(val) == 2:
             if isinstance(val[0], integer_types):
                 # raw value
                 if not isinstance(val[1], integer_types):
@@ -140,8 +148,8 @@ Specific constraints attributes:
             raise(ASN1ObjErr('{0}: invalid value, {1!r}'.format(self.fullname(), val)))
     
     def _safechk_bnd(self, val):
-        if isinstance(val, tuple):
-            if isinstance(val[0], integer_types):
+        if isinstance(val, (tuple, ASN1BitView)):
+            if isinstance(val, ASN1BitView) or isinstance(val[0], integer_types):
                 # check val against potential constraints
                 ASN1Obj._safechk_bnd(self, val)
                 if self._const_sz and \
@@ -158,6 +166,8 @@ Specific constraints attributes:
                     raise(ASN1ObjErr('{0}: value out of containing constraint, {1!r}'\
                           .format(self.fullname(), val)))
     
+    _safechk_bnd_loc = _safechk_bnd
+    
     def get_names(self):
         """Returns the set of names from the NamedBitList corresponding to the 
         internal value currently set
@@ -195,6 +205,22 @@ Specific constraints attributes:
         else:
             self._val = val
     
+    ###
+    # random value generation
+    ###
+    
+    def _gen_rand(self, rnd, depth, rows):
+        if self._const_cont is not None:
+            return (self._const_cont._gen_rand_ident(),
+                    self._const_cont._gen_rand(rnd, depth-1, rows))
+        elif self._const_val is not None and self._const_val.root:
+            return rnd.choice(self._const_val.root)
+        bl = self._gen_rand_sz(rnd, 8*self._GEN_SZ_STR)
+        if bl:
+            return (rnd.getrandbits(bl), bl)
+        else:
+            return (0, 0)
+    
     ###
     # conversion between internal value and ASN.1 syntax
     ###
@@ -305,6 +331,21 @@ Specific constraints attributes:
         raise(ASN1ASNEncodeErr('{0}: non-encodable value, {1!r}'\
               .format(self.fullname(), self._val)))
     
+    def _write_asn1(self, W, ind, depth):
+        if self._const_cont and isinstance(self._val, tuple) \
+        and isinstance(self._val[0], str_types):
+            # CHOICE-like value notation
+            if self._const_cont._typeref:
+                ident = self._const_cont._typeref.called[1]
+            else:
+                ident = self._const_cont.TYPE 
+            if self._val[0] == ident:
+                self._const_cont._val = self._val[1]
+                W.write('%s: ' % ident)
+                self._const_cont._write_asn1(W, ind, depth)
+                return
+        W.write(self._to_asn1().replace('\n', '\n' + ind))
+    
     ###
     # conversion between internal value and ASN.1 unaligned PER encoding
     ###
@@ -421,6 +462,8 @@ Specific constraints attributes:
                     else:
                         ident = self._const_cont.TYPE
                     self._val = (ident, self._const_cont._val)
+        elif self._DEC_COMPACT:
+            self._val = ASN1BitView(Buf.to_bytes(), Buf.get_bl())
         else:
             if Buf._bl:
                 self._val = (Buf.to_uint(), Buf.get_bl())
@@ -529,6 +572,8 @@ Specific constraints attributes:
                     else:
                         ident = self._const_cont.TYPE 
                     self._val = (ident, self._const_cont._val)
+        elif self._DEC_COMPACT:
+            self._val = ASN1BitView(buf, bl)
         else:
             if bl:
                 self._val = (bytes_to_uint(buf, bl), bl)
@@ -592,7 +637,10 @@ Specific constraints attributes:
     
     def __to_per_ws_buf(self):
         # convert the value into a buffer and length in bits
-        if not isinstance(self._val[0], integer_types):
+        if isinstance(self._val, ASN1BitView):
+            # compact value
+            return self._val.buf, self._val.bl
+        elif not isinstance(self._val[0], integer_types):
             # 1) value is for a contained object to be encoded 
             Cont = self._get_val_obj(self._val[0])
             if Cont == self._const_cont and self._const_cont_enc is not None:
@@ -684,7 +732,10 @@ Specific constraints attributes:
     
     def __to_per_buf(self):
         # convert the value into a buffer and length in bits
-        if not isinstance(self._val[0], integer_types):
+        if isinstance(self._val, ASN1BitView):
+            # compact value
+            return self._val.buf, self._val.bl
+        elif not isinstance(self._val[0], integer_types):
             # 1) value is for a contained object to be encoded 
             Cont = self._get_val_obj(self._val[0])
             if Cont == self._const_cont and self._const_cont_enc is not None:
@@ -874,6 +925,8 @@ Specific constraints attributes:
                     else:
                         ident = Obj.TYPE
                     self._val = (ident, self._const_cont._val)
+        elif self._DEC_COMPACT:
+            self._val = ASN1BitView(buf, bl)
         else:
             if bl:
                 self._val = (bytes_to_uint(buf, bl), bl)
@@ -936,7 +989,10 @@ Specific constraints attributes:
     
     def __to_ber_buf(self):
         # convert the value into a buffer and length in bits
-        if not isinstance(self._val[0], integer_types):
+        if isinstance(self._val, ASN1BitView):
+            # compact value
+            return self._val.buf, self._val.bl
+        elif not isinstance(self._val[0], integer_types):
             # 1) value is for a contained object to be encoded 
             Cont = self._get_val_obj(self._val[0])
             if Cont == self._const_cont and self._const_cont_enc is not None:
@@ -1120,6 +1176,21 @@ Specific constraints attributes:
                 raise(ASN1ObjErr('{0}: value out of containing constraint, {1!r}'\
                       .format(self.fullname(), val)))
     
+    _safechk_bnd_loc = _safechk_bnd
+    
+    ###
+    # random value generation
+    ###
+    
+    def _gen_rand(self, rnd, depth, rows):
+        if self._const_cont is not None:
+            return (self._const_cont._gen_rand_ident(),
+                    self._const_cont._gen_rand(rnd, depth-1, rows))
+        elif self._const_val is not None and self._const_val.root:
+            return rnd.choice(self._const_val.root)
+        return bytes(bytearray([rnd.randint(0, 255) \
+                                for i in range(self._gen_rand_sz(rnd, self._GEN_SZ_STR))]))
+    
     ###
     # conversion between internal value and ASN.1 syntax
     ###
@@ -1189,6 +1260,21 @@ Specific constraints attributes:
         raise(ASN1ASNEncodeErr('{0}: non-encodable value, {1!r}'\
               .format(self.fullname(), self._val)))
     
+    def _write_asn1(self, W, ind, depth):
+        if self._const_cont and isinstance(self._val, tuple) \
+        and isinstance(self._val[0], str_types):
+            # CHOICE-like value notation
+            if self._const_cont._typeref:
+                ident = self._const_cont._typeref.called[1]
+            else:
+                ident = self._const_cont.TYPE 
+            if self._val[0] == ident:
+                self._const_cont._val = self._val[1]
+                W.write('%s: ' % ident)
+                self._const_cont._write_asn1(W, ind, depth)
+                return
+        W.write(self._to_asn1().replace('\n', '\n' + ind))
+    
     ###
     # conversion between internal value and ASN.1 PER encoding
     ###
@@ -1742,6 +1828,34 @@ Virtual parent for any ASN.1 *String object
                     raise(ASN1ObjErr('{0}: value out of alphabet constraint, {1!r}'\
                           .format(self.fullname(), val)))
     
+    _safechk_bnd_loc = _safechk_bnd
+    
+    ###
+    # random value generation
+    ###
+    
+    # alphabet used for generating random values, when there is no alphabet
+    # constraint nor restricted character set
+    _GEN_ALPHA = 'ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789'
+    
+    def _gen_rand(self, rnd, depth, rows):
+        if self._const_val is not None and self._const_val.root:
+            C = rnd.choice(self._const_val.root)
+            if isinstance(C, str_types):
+                return C
+        if self._const_alpha is not None and self._const_alpha.root:
+            alpha = []
+            for C in self._const_alpha.root:
+                if isinstance(C, ASN1RangeStr):
+                    alpha.extend(map(chr, range(ord(C.lb), 1+ord(C.ub))))
+                else:
+                    alpha.extend(C)
+        elif self._ALPHA_RE:
+            alpha = self._ALPHA_RE
+        else:
+            alpha = self._GEN_ALPHA
+        return ''.join([rnd.choice(alpha) for i in range(self._gen_rand_sz(rnd, self._GEN_SZ_STR))])
+    
     ###
     # conversion between internal value and ASN.1 syntax
     ###
@@ -2072,7 +2186,7 @@ Virtual parent for any ASN.1 *String object
                 self._val = ''.join([self._const_alpha.root[i] for i in val])
             except Exception:
                 raise(ASN1PERDecodeErr('{0}: character out of alphabet constraint, {1!r}'\
-                      .format(self.fullname(), V())))
+                      .format(self.fullname(), val)))
         elif cdyn == 4:
             # ldet is the number of characters
             val = [char.get_uint(cdyn) for i in range(ldet)]
@@ -2083,7 +2197,7 @@ Virtual parent for any ASN.1 *String object
                 self._val = ''.join([self._ALPHA_RE[i] for i in val])
             except Exception:
                 raise(ASN1PERDecodeErr('{0}: character out of alphabet, {1!r}'\
-                      .format(self.fullname(), V())))
+                      .format(self.fullname(), val)))
         elif cdyn == 7:
             # ldet is the number of characters
             val = [char.get_uint(cdyn) for i in range(ldet)]
@@ -2094,7 +2208,7 @@ Virtual parent for any ASN.1 *String object
                 self._val = ''.join(map(chr, val))
             except Exception:
                 raise(ASN1PERDecodeErr('{0}: character out of alphabet, {1!r}'\
-                      .format(self.fullname(), V())))
+                      .format(self.fullname(), val)))
         else:
             # ldet is the number of characters, val is bytes
             assert( cdyn % 8 == 0 )
@@ -2807,6 +2921,15 @@ Single value: Python 7-tuple of str or None
             # TODO: more conditions are required to test for the exact format
             raise(ASN1ObjErr('{0}: invalid value, {1!r}'.format(self.fullname(), val)))
     
+    ###
+    # random value generation
+    ###
+    
+    def _gen_rand(self, rnd, depth, rows):
+        return ('%.2i' % rnd.randint(0, 99), '%.2i' % rnd.randint(1, 12),
+                '%.2i' % rnd.randint(1, 28), '%.2i' % rnd.randint(0, 23),
+                '%.2i' % rnd.randint(0, 59), '%.2i' % rnd.randint(0, 59), 'Z')
+    
     ###
     # conversion between internal value and ASN.1 syntax
     ###
@@ -2898,6 +3021,15 @@ Single value: Python 8-tuple of str or None
             # TODO: more conditions are required to test for the exact format
             raise(ASN1ObjErr('{0}: invalid value, {1!r}'.format(self.fullname(), val)))
     
+    ###
+    # random value generation
+    ###
+    
+    def _gen_rand(self, rnd, depth, rows):
+        return ('%.4i' % rnd.randint(1970, 2099), '%.2i' % rnd.randint(1, 12),
+                '%.2i' % rnd.randint(1, 28), '%.2i' % rnd.randint(0, 23),
+                '%.2i' % rnd.randint(0, 59), '%.2i' % rnd.randint(0, 59), None, 'Z')
+    
     ###
     # conversion between internal value and ASN.1 syntax
     ###
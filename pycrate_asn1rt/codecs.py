@@ -27,15 +27,32 @@
 # *--------------------------------------------------------
 #*/
 
+from threading import local
+
 from .utils import *
 from .err   import *
 
 from pycrate_core.elt import _with_json
 if _with_json:
     from pycrate_core.elt import JsonEnc, JsonDec, JSONDecodeError
+    from json             import JSONEncoder
     from binascii         import hexlify, unhexlify
 
 
+def _get_uints(char, num, bl):
+    # consumes num consecutive unsigned integers of bl bits each from char
+    if bl == 0:
+        return [0] * num
+    elif bl == 8:
+        return list(bytearray(char.get_bytes(8*num)))
+    elif bl == 16:
+        return list(unpack('>%iH' % num, char.get_bytes(16*num)))
+    else:
+        tbl  = num*bl
+        bits = uint_to_bitstr(char.get_uint(tbl), tbl)
+        return [int(bits[i:i+bl], 2) for i in range(0, tbl, bl)]
+
+
 class ASN1Codec(object):
     pass
 
@@ -44,6 +61,11 @@ class ASN1CodecASN(ASN1Codec):
     pass
 
 
+class _DepthLocal(local):
+    cur = None
+    max = None
+
+
 class ASN1CodecPER(ASN1Codec):
     
     ALIGNED = False # True: aligned PER (APER), False: unaligned PER (UPER)
@@ -60,6 +82,11 @@ class ASN1CodecPER(ASN1Codec):
     
     _off = [] # stack of offsets in bits, only used with APER
     
+    # nesting depth of constructed values (cur) and maximum depth allowed (max)
+    # when decoding, per thread, only used when the decoded object has 
+    # _DEC_MAXDEPTH set
+    _depth = _DepthLocal()
+    
     _CntUndef_LUT = {1:16384, 2:32768, 3:49152, 4:65536,
                      16384:1, 32768:2, 49152:3, 65536:4}
     
@@ -77,6 +104,14 @@ class ASN1CodecPER(ASN1Codec):
         pad = char.get_uint(pl)
         cla._off[-1] += pl
     
+    @classmethod
+    def enter_depth(cla, Obj):
+        depth = cla._depth
+        depth.cur += 1
+        if depth.cur > depth.max:
+            raise(ASN1PERDecodeErr('{0}: nesting too deep, depth {1} (max {2})'\
+                  .format(Obj.fullname(), depth.cur, depth.max)))
+    
     @classmethod
     def encode_pad_ws(cla):
         pl = 8 - (cla._off[-1] % 8)
@@ -387,6 +422,33 @@ class ASN1CodecPER(ASN1Codec):
             bl = const_val.rdyn
         return char.get_uint(bl) + const_val.lb
     
+    @classmethod
+    def decode_intconst_bulk(cla, char, const_val, num):
+        """decodes num consecutive fully constrained integers, all encoded 
+        with the same fixed width
+        
+        const_val must not require the APER custom length determinant variant
+        (i.e. its range must be at most 65536)
+        """
+        if cla.ALIGNED and const_val.ra > 255:
+            # realignment required before the 1st value only, all values being
+            # encoded with 1 or 2 bytes
+            if cla._off[-1] % 8:
+                cla.decode_pad(char)
+            if const_val.ra == 256:
+                bl = 8
+            else:
+                bl = 16
+        else:
+            bl = const_val.rdyn
+        if cla.ALIGNED:
+            cla._off[-1] += num*bl
+        lb = const_val.lb
+        if lb:
+            return [lb + u for u in _get_uints(char, num, bl)]
+        else:
+            return _get_uints(char, num, bl)
+    
     @classmethod
     def encode_intconst_ws(cla, val, const_val, name='V'):
         GEN = []
@@ -914,6 +976,21 @@ class ASN1CodecPER(ASN1Codec):
             #wrapped._val = None
             return val
     
+    @classmethod
+    def decode_const_buf_bulk(cla, char, ldet, num):
+        """decodes num consecutive byte buffers, all of the same fixed length
+        ldet (lower than 65536)
+        """
+        if ldet == 0:
+            return [b''] * num
+        if cla.ALIGNED:
+            # realignment required before the 1st buffer only
+            if ldet > 2 and cla._off[-1] % 8:
+                cla.decode_pad(char)
+            cla._off[-1] += 8*ldet*num
+        buf = char.get_bytes(8*ldet*num)
+        return [buf[i:i+ldet] for i in range(0, ldet*num, ldet)]
+    
     @classmethod
     def encode_unconst_open_ws(cla, wrapped):
         if cla.ALIGNED and cla._off[-1] % 8:
@@ -1509,7 +1586,7 @@ class ASN1CodecBER(ASN1Codec):
             return [(T_UINT, 0, 1), (T_UINT, l, 7)]
     
     @classmethod
-    def decode_single_ws(cla, char, lundef=False):
+    def decode_single_ws(cla, char, lundef=False, maxd=None):
         EOS = False
         # tag
         Tag, cl, pc, tval = cla.decode_tag_ws(char)
@@ -1520,12 +1597,17 @@ class ASN1CodecBER(ASN1Codec):
         # value
         if pc == 1:
             # constructed (can have an undefinite length)
+            if maxd is not None:
+                # maxd is the number of nested constructed TLV still allowed
+                if maxd <= 0:
+                    raise(ASN1BERDecodeErr('nesting too deep'))
+                maxd -= 1
             if lval == -1:
-                V = cla.decode_all_ws(char, lundef=True)
+                V = cla.decode_all_ws(char, lundef=True, maxd=maxd)
             else:
                 char_lb = char._len_bit
                 char._len_bit = char._cur + 8*lval
-                V = cla.decode_all_ws(char, lundef=False)
+                V = cla.decode_all_ws(char, lundef=False, maxd=maxd)
                 char._len_bit = char_lb
             TLV = [Tag, cl, pc, tval, Len, lval, V, ccur]
         else:
@@ -1544,17 +1626,17 @@ class ASN1CodecBER(ASN1Codec):
         return TLV, EOS
     
     @classmethod
-    def decode_all_ws(cla, char, lundef=False):
+    def decode_all_ws(cla, char, lundef=False, maxd=None):
         TLVs = []
         while char._len_bit - char._cur >= 16:
-            TLV, EOS = cla.decode_single_ws(char, lundef)
+            TLV, EOS = cla.decode_single_ws(char, lundef, maxd)
             TLVs.append( TLV )
             if EOS:
                 break
         return TLVs
     
     @classmethod
-    def decode_single(cla, char, lundef=False):
+    def decode_single(cla, char, lundef=False, maxd=None):
         EOS = False
         # tag
         cl, pc, tval = cla.decode_tag(char)
@@ -1565,12 +1647,17 @@ class ASN1CodecBER(ASN1Codec):
         # value
         if pc == 1:
             # constructed (can have an undefinite length)
+            if maxd is not None:
+                # maxd is the number of nested constructed TLV still allowed
+                if maxd <= 0:
+                    raise(ASN1BERDecodeErr('nesting too deep'))
+                maxd -= 1
             if lval == -1:
-                V = cla.decode_all(char, lundef=True)
+                V = cla.decode_all(char, lundef=True, maxd=maxd)
             else:
                 char_lb = char._len_bit
                 char._len_bit = char._cur + 8*lval
-                V = cla.decode_all(char, lundef=False)
+                V = cla.decode_all(char, lundef=False, maxd=maxd)
                 char._len_bit = char_lb
             TLV = [cl, pc, tval, lval, V, ccur]
         else:
@@ -1590,10 +1677,10 @@ class ASN1CodecBER(ASN1Codec):
         return TLV, EOS
     
     @classmethod
-    def decode_all(cla, char, lundef=False):
+    def decode_all(cla, char, lundef=False, maxd=None):
         TLVs = []
         while char._len_bit - char._cur >= 16:
-            TLV, EOS = cla.decode_single(char, lundef)
+            TLV, EOS = cla.decode_single(char, lundef, maxd)
             TLVs.append(TLV)
             if EOS:
                 break
@@ -1660,3 +1747,70 @@ class ASN1CodecGSER(ASN1Codec):
     # TODO: implement this
     pass
 
+
+
+if _with_json:
+    
+    # optional faster JSON backends
+    try:
+        import orjson
+    except ImportError:
+        orjson = None
+    try:
+        import ujson
+    except ImportError:
+        ujson = None
+    
+    
+    class ASN1CodecJER(ASN1Codec):
+        
+        # JSON text layout produced by the encoder:
+        # - if ENC_COMPACT is False, the JSON text is indented and keys are sorted,
+        #   (this is the default pycrate_core layout, which is slow to produce)
+        # - if ENC_COMPACT is True, the JSON text is produced without any 
+        #   whitespace, with keys in the order of the ASN.1 components,
+        #   using the fastest JSON backend available
+        ENC_COMPACT = False
+        
+        # JSON backend for the compact encoder: 'json' (Python standard library),
+        # 'orjson' or 'ujson'
+        # the latter ones are only used if installed, and fallback to the
+        # standard library for values they do not support (e.g. large integers)
+        if orjson is not None:
+            BACKEND = 'orjson'
+        elif ujson is not None:
+            BACKEND = 'ujson'
+        else:
+            BACKEND = 'json'
+        
+        _JsonEncCompact = JSONEncoder(separators=(',', ':'))
+        
+        @classmethod
+        def encode(cla, val):
+            """returns the JSON text corresponding to the JSON value val
+            """
+            if not cla.ENC_COMPACT:
+                return JsonEnc.encode(val)
+            elif cla.BACKEND == 'orjson' and orjson is not None:
+                try:
+                    return orjson.dumps(val).decode('utf-8')
+                except TypeError:
+                    # e.g. integer larger than 64 bits
+                    pass
+            elif cla.BACKEND == 'ujson' and ujson is not None:
+                try:
+                    return ujson.dumps(val, ensure_ascii=False)
+                except (OverflowError, TypeError):
+                    pass
+            return cla._JsonEncCompact.encode(val)
+        
+        @classmethod
+        def decode(cla, txt):
+            """returns the JSON value corresponding to the JSON text txt
+            
+            raises JSONDecodeError (or ValueError) in case of invalid JSON text
+            """
+            # the standard library decoder is always used here: it is already
+            # written in C, and the optional backends convert large integers 
+            # into floats
+            return JsonDec.decode(txt)
@@ -0,0 +1,182 @@
+# -*- coding: UTF-8 -*-
+#/**
+# * Software Name : pycrate
+# * Version : 0.4
+# *
+# * Copyright 2019. Benoit Michau. P1Sec.
+# *
+# * This library is free software; you can redistribute it and/or
+# * modify it under the terms of the GNU Lesser General Public
+# * License as published by the Free Software Foundation; either
+# * version 2.1 of the License, or (at your option) any later version.
+# *
+# * This library is distributed in the hope that it will be useful,
+# * but WITHOUT ANY WARRANTY; without even the implied warranty of
+# * MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# * Lesser General Public License for more details.
+# *
+# * You should have received a copy of the GNU Lesser General Public
+# * License along with this library; if not, write to the Free Software
+# * Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston,
+# * MA 02110-1301  USA
+# *
+# *--------------------------------------------------------
+# * File Name : pycrate_asn1rt/compactobj.py
+# * Created : 2026-10-19
+# * Authors : agent
+# *--------------------------------------------------------
+#*/
+
+from array import array
+
+from .utils import *
+from .err   import *
+
+
+#------------------------------------------------------------------------------#
+# compact values
+#------------------------------------------------------------------------------#
+# those are set by the PER and BER decoders when ASN1Obj._DEC_COMPACT is True,
+# instead of the classic Python values; they compare equal to the classic values
+# and can be used for encoding like them
+
+class ASN1BitView(object):
+    """Compact BIT STRING value, storing the bytes buffer and the length in bits
+    
+    It behaves like the classic BIT STRING value, the 2-tuple (uint, bit length):
+    it can be indexed, unpacked and compared to it, the unsigned integral value
+    being only computed when requested.
+    It is not a bytes object: use the buf attribute to get the buffer.
+    
+    Its memory footprint is close to the one of the classic value, as a bytes
+    buffer is as large as an integer of the same width: the decoding saves the
+    conversion to an integer, but the several-fold memory reduction of the
+    compact mode comes from ASN1Array.
+    
+    Attributes:
+        buf: bytes buffer, with unused trailing bits set to 0
+        bl : length in bits
+    """
+    
+    __slots__ = ('buf', 'bl')
+    
+    def __init__(self, buf, bl):
+        nb = (bl + 7) >> 3
+        if len(buf) != nb:
+            buf = buf[:nb]
+            if len(buf) < nb:
+                raise(ASN1Err('ASN1BitView: buffer too short for {0} bits'.format(bl)))
+        if bl % 8:
+            # ensure unused trailing bits are 0
+            last = ord(buf[-1:])
+            mask = (0xff << (8 - bl%8)) & 0xff
+            if last & ~mask:
+                buf = buf[:-1] + bytes(bytearray((last & mask, )))
+        self.buf, self.bl = buf, bl
+    
+    def to_uint(self):
+        """returns the unsigned integral value of the bit string
+        """
+        if self.bl:
+            return bytes_to_uint(self.buf, self.bl)
+        else:
+            return 0
+    
+    def to_tuple(self):
+        """returns the classic BIT STRING value (uint, bit length)
+        """
+        return (self.to_uint(), self.bl)
+    
+    def get_bit(self, i):
+        """returns the bit at offset i (0 being the leftmost bit)
+        """
+        if not 0 <= i < self.bl:
+            raise(IndexError('bit offset out of range'))
+        return (ord(self.buf[i>>3:1+(i>>3)]) >> (7 - i%8)) & 1
+    
+    def iter_bits(self):
+        """yields all the bits of the bit string, from the leftmost one
+        """
+        for i in range(self.bl):
+            yield self.get_bit(i)
+    
+    def __len__(self):
+        return 2
+    
+    def __getitem__(self, i):
+        if i in (1, -1):
+            return self.bl
+        elif i in (0, -2):
+            return self.to_uint()
+        else:
+            return self.to_tuple()[i]
+    
+    def __iter__(self):
+        return iter(self.to_tuple())
+    
+    def __eq__(self, other):
+        if isinstance(other, ASN1BitView):
+            return self.bl == other.bl and self.buf == other.buf
+        else:
+            return self.to_tuple() == other
+    
+    def __ne__(self, other):
+        return not self.__eq__(other)
+    
+    def __hash__(self):
+        return hash(self.to_tuple())
+    
+    def __repr__(self):
+        return 'ASN1BitView({0!r}, {1!r})'.format(self.buf, self.bl)
+
+
+class ASN1Array(array):
+    """Compact SEQUENCE OF / SET OF INTEGER value, storing the integers in a
+    Python array
+    
+    It behaves like the classic Python list of integers, and compares equal to it.
+    """
+    
+    def __eq__(self, other):
+        if isinstance(other, list):
+            return len(self) == len(other) and self.tolist() == other
+        else:
+            return array.__eq__(self, other)
+    
+    def __ne__(self, other):
+        return not self.__eq__(other)
+    
+    __hash__ = None
+    
+    def __repr__(self):
+        return 'ASN1Array({0!r}, {1!r})'.format(self.typecode, self.tolist())
+
+
+def get_array_typecode(lb, ub):
+    """returns the typecode of the smallest Python array able to store all the
+    integers between lb and ub, or None
+    """
+    if lb is None or ub is None:
+        return None
+    for tc in _ARRAY_TC:
+        bl = 8 * array(tc).itemsize
+        if tc.islower():
+            # signed
+            if -(1 << (bl-1)) <= lb and ub < (1 << (bl-1)):
+                return tc
+        elif 0 <= lb and ub < (1 << bl):
+            return tc
+    return None
+
+
+def _is_typecode(tc):
+    try:
+        array(tc)
+    except ValueError:
+        # 'q' and 'Q' are not available with Python 2
+        return False
+    else:
+        return True
+
+_ARRAY_TC = [tc for tc in ('B', 'b', 'H', 'h', 'I', 'i', 'L', 'l', 'Q', 'q') \
+             if _is_typecode(tc)]
@@ -0,0 +1,305 @@
+# -*- coding: UTF-8 -*-
+#/**
+# * Software Name : pycrate
+# * Version : 0.4
+# *
+# * Copyright 2019. Benoit Michau. P1Sec.
+# *
+# * This library is free software; you can redistribute it and/or
+# * modify it under the terms of the GNU Lesser General Public
+# * License as published by the Free Software Foundation; either
+# * version 2.1 of the License, or (at your option) any later version.
+# *
+# * This library is distributed in the hope that it will be useful,
+# * but WITHOUT ANY WARRANTY; without even the implied warranty of
+# * MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# * Lesser General Public License for more details.
+# *
+# * You should have received a copy of the GNU Lesser General Public
+# * License along with this library; if not, write to the Free Software
+# * Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston,
+# * MA 02110-1301  USA
+# *
+# *--------------------------------------------------------
+# * File Name : pycrate_asn1rt/export.py
+# * Created : 2026-10-19
+# * Authors : agent
+# *--------------------------------------------------------
+#*/
+
+import csv
+from binascii import hexlify
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:
+    _with_arrow = False
+else:
+    _with_arrow = True
+
+from .utils  import *
+from .err    import *
+from .setobj import real_to_float
+
+
+#------------------------------------------------------------------------------#
+# columnar export of ASN.1 values
+#------------------------------------------------------------------------------#
+
+# extraction steps
+_STEP_DICT  = 0 # SEQUENCE, SET, ...: value is a dict
+_STEP_ALT   = 1 # CHOICE, OPEN, ANY, CONTAINING: value is (ident, value)
+_STEP_LIST  = 2 # SEQUENCE OF, SET OF: value is a list
+
+
+class ASN1ExportPlan(object):
+    """Extraction plan of a list of value paths within an ASN.1 type
+    
+    Each value path is compiled once against the type, into a list of
+    extraction steps and a conversion routine for the value reached, so that
+    extracting a row of values from a record does not require to walk the
+    whole record (contrary to get_val_paths()), nor to set values into the
+    ASN.1 objects.
+    
+    Value paths are given in the same format as the ones returned by
+    get_val_paths(): list of str (component identifiers, or type identifiers
+    within OPEN types) and int (index within SEQUENCE OF / SET OF).
+    When a path is not present within a record, the corresponding field is None.
+    
+    Init args:
+        Obj  : ASN1Obj instance (ASN.1 type)
+        paths: list of value paths
+        names: list of column names, or None (in this case, column names are
+               the paths joined with '.')
+    
+    Usage:
+        Plan = ASN1ExportPlan(PDU, [['a', 'b'], ['c', 0, 'd']])
+        Plan.export_csv(fd, records)
+    """
+    
+    # number of rows buffered before being written
+    BATCH = 1024
+    
+    def __init__(self, Obj, paths, names=None):
+        self.Obj   = Obj
+        self.paths = [list(p) for p in paths]
+        if names is None:
+            self.names = ['.'.join(map(str, p)) for p in self.paths]
+        elif len(names) != len(self.paths):
+            raise(ASN1Err('{0}: invalid number of column names'.format(Obj.fullname())))
+        else:
+            self.names = list(names)
+        self._steps, self._conv, self._leaves = [], [], []
+        for p in self.paths:
+            steps, Leaf = self._compile_path(p)
+            self._steps.append(steps)
+            self._conv.append(_get_conv(Leaf))
+            self._leaves.append(Leaf)
+    
+    def _compile_path(self, path):
+        Obj, steps = self.Obj, []
+        for i, p in enumerate(path):
+            try:
+                if Obj.TYPE in (TYPE_SEQ, TYPE_SET, TYPE_EXT, TYPE_EMB_PDV, TYPE_CHAR_STR):
+                    Obj = Obj._cont[p]
+                    steps.append( (_STEP_DICT, p) )
+                elif Obj.TYPE == TYPE_CHOICE:
+                    Obj = Obj._cont[p]
+                    steps.append( (_STEP_ALT, p) )
+                elif Obj.TYPE in (TYPE_OPEN, TYPE_ANY):
+                    Obj = Obj._get_val_obj(p)
+                    steps.append( (_STEP_ALT, p) )
+                elif Obj.TYPE in (TYPE_BIT_STR, TYPE_OCT_STR) and \
+                Obj._const_cont is not None:
+                    Obj = Obj._const_cont
+                    steps.append( (_STEP_ALT, p) )
+                elif Obj.TYPE in (TYPE_SEQ_OF, TYPE_SET_OF) and \
+                isinstance(p, integer_types):
+                    Obj = Obj._cont
+                    steps.append( (_STEP_LIST, p) )
+                else:
+                    raise()
+            except Exception:
+                raise(ASN1Err('{0}: invalid path {1!r}'\
+                      .format(self.Obj.fullname(), path[:1+i])))
+        return tuple(steps), Obj
+    
+    def extract(self, val):
+        """returns the tuple of values extracted from the record value val
+        """
+        row = []
+        for steps, conv in zip(self._steps, self._conv):
+            v = val
+            for st, p in steps:
+                if st == _STEP_DICT:
+                    v = v.get(p)
+                elif st == _STEP_ALT:
+                    v = v[1] if v[0] == p else None
+                elif p < len(v):
+                    v = v[p]
+                else:
+                    v = None
+                if v is None:
+                    break
+            if v is not None:
+                v = conv(v)
+            row.append(v)
+        return tuple(row)
+    
+    def iter_rows(self, records, dec=None):
+        """yields the tuple of values extracted from each record
+        
+        Args:
+            records: iterable of values, or of buffers if dec is set
+            dec    : None or str, decoding method of self.Obj to be applied to
+                     each record (e.g. 'from_ber' or 'from_aper')
+        """
+        if dec is None:
+            for val in records:
+                yield self.extract(val)
+        else:
+            Obj = self.Obj
+            decode = getattr(Obj, dec)
+            for buf in records:
+                decode(buf)
+                yield self.extract(Obj._val)
+    
+    def iter_batches(self, records, dec=None, batch=None):
+        """yields lists of at most `batch' rows extracted from the records
+        """
+        if batch is None:
+            batch = self.BATCH
+        rows = []
+        for row in self.iter_rows(records, dec):
+            rows.append(row)
+            if len(rows) >= batch:
+                yield rows
+                rows = []
+        if rows:
+            yield rows
+    
+    def export_csv(self, fd, records, dec=None, batch=None, header=True, **kwargs):
+        """writes the rows extracted from the records into the file-like object
+        fd, in CSV format, and returns the number of rows written
+        
+        kwargs are passed to csv.writer()
+        """
+        W, num = csv.writer(fd, **kwargs), 0
+        if header:
+            W.writerow(self.names)
+        for rows in self.iter_batches(records, dec, batch):
+            W.writerows(rows)
+            num += len(rows)
+        return num
+    
+    if _with_arrow:
+        
+        def get_arrow_schema(self):
+            """returns the pyarrow schema corresponding to the columns
+            """
+            return pyarrow.schema([(name, _ARROW_TYPES.get(Leaf.TYPE, pyarrow.string())) \
+                                   for name, Leaf in zip(self.names, self._leaves)])
+        
+        def iter_arrow_batches(self, records, dec=None, batch=None):
+            """yields pyarrow RecordBatch of at most `batch' rows extracted
+            from the records
+            """
+            schema = self.get_arrow_schema()
+            for rows in self.iter_batches(records, dec, batch):
+                cols = [pyarrow.array(col, type=schema.field(i).type) \
+                        for i, col in enumerate(zip(*rows))]
+                yield pyarrow.RecordBatch.from_arrays(cols, schema=schema)
+        
+        def export_arrow(self, where, records, dec=None, batch=None, fmt='parquet'):
+            """writes the rows extracted from the records into the file
+            (or pyarrow NativeFile) `where', in Parquet (fmt='parquet') or
+            Arrow IPC (fmt='arrow') format, and returns the number of rows written
+            """
+            schema = self.get_arrow_schema()
+            if fmt == 'parquet':
+                W = pyarrow.parquet.ParquetWriter(where, schema)
+            elif fmt == 'arrow':
+                W = pyarrow.ipc.new_file(where, schema)
+            else:
+                raise(ASN1Err('invalid export format, {0!r}'.format(fmt)))
+            num = 0
+            try:
+                for RB in self.iter_arrow_batches(records, dec, batch):
+                    if fmt == 'parquet':
+                        W.write_table(pyarrow.Table.from_batches([RB]))
+                    else:
+                        W.write_batch(RB)
+                    num += RB.num_rows
+            finally:
+                W.close()
+            return num
+
+
+#------------------------------------------------------------------------------#
+# conversion of basic values into columnar fields
+#------------------------------------------------------------------------------#
+
+def _conv_id(val):
+    return val
+
+def _conv_null(val):
+    # NULL is exported as a presence flag
+    return True
+
+def _conv_real(val):
+    try:
+        return real_to_float(val)
+    except OverflowError:
+        return None
+
+def _conv_bitstr(val):
+    # (uint value, bit length)
+    if val[1]:
+        return uint_to_bitstr(val[0], val[1])
+    else:
+        return ''
+
+def _conv_octstr(val):
+    return hexlify(val).decode('ascii')
+
+def _conv_oid(val):
+    return '.'.join(map(str, val))
+
+
+def _get_conv(Obj):
+    if Obj.TYPE in (TYPE_BOOL, TYPE_INT, TYPE_ENUM) + TYPES_STRING:
+        return _conv_id
+    elif Obj.TYPE == TYPE_NULL:
+        return _conv_null
+    elif Obj.TYPE == TYPE_REAL:
+        return _conv_real
+    elif Obj.TYPE == TYPE_BIT_STR:
+        return _conv_bitstr
+    elif Obj.TYPE == TYPE_OCT_STR:
+        return _conv_octstr
+    elif Obj.TYPE in (TYPE_OID, TYPE_REL_OID):
+        return _conv_oid
+    else:
+        # any other value (time, constructed, open...) is converted to its
+        # ASN.1 textual representation
+        def _conv_asn1(val):
+            _val = Obj._val
+            Obj._val = val
+            try:
+                return Obj._to_asn1()
+            finally:
+                Obj._val = _val
+        return _conv_asn1
+
+
+if _with_arrow:
+    
+    # any other type is exported as string
+    # WNG: INTEGER values beyond 64 bits cannot be exported to Arrow
+    _ARROW_TYPES = {
+        TYPE_NULL : pyarrow.bool_(),
+        TYPE_BOOL : pyarrow.bool_(),
+        TYPE_INT  : pyarrow.int64(),
+        TYPE_REAL : pyarrow.float64(),
+        }
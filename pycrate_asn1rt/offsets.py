@@ -0,0 +1,340 @@
+# -*- coding: UTF-8 -*-
+#/**
+# * Software Name : pycrate
+# * Version : 0.4
+# *
+# * Copyright 2019. Benoit Michau. P1Sec.
+# *
+# * This library is free software; you can redistribute it and/or
+# * modify it under the terms of the GNU Lesser General Public
+# * License as published by the Free Software Foundation; either
+# * version 2.1 of the License, or (at your option) any later version.
+# *
+# * This library is distributed in the hope that it will be useful,
+# * but WITHOUT ANY WARRANTY; without even the implied warranty of
+# * MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# * Lesser General Public License for more details.
+# *
+# * You should have received a copy of the GNU Lesser General Public
+# * License along with this library; if not, write to the Free Software
+# * Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston,
+# * MA 02110-1301  USA
+# *
+# *--------------------------------------------------------
+# * File Name : pycrate_asn1rt/offsets.py
+# * Created : 2026-10-19
+# * Authors : agent
+# *--------------------------------------------------------
+#*/
+
+from array     import array
+from threading import local, Lock
+
+from .utils            import *
+from .err              import *
+from .asnobj           import ASN1Obj
+from .asnobj_construct import _CONSTRUCT_OF
+from .profiler         import ASN1Profiler, _get_subclasses
+from .profiler         import _wrap as _wrap_prof
+
+
+#------------------------------------------------------------------------------#
+# offsets-only decoding
+#------------------------------------------------------------------------------#
+
+_DEC_PER = ('from_uper', 'from_aper')
+_DEC_BER = ('from_ber', 'from_cer', 'from_der')
+
+# decoding methods hooked while ASN1Offsets instances are being recorded,
+# indexed by method name, with values [number of recordings in progress,
+# {class: (original method, hook)}]
+# the hook only records offsets when the current thread has an ASN1Offsets
+# instance being recorded, otherwise it calls the original method directly
+_HOOKS = {}
+_HOOK_LOCK = Lock()
+
+
+class _OffsetsLocal(local):
+    def __init__(self):
+        # stack of ASN1Offsets instances being recorded by the current thread
+        self.cur = []
+
+_LOC = _OffsetsLocal()
+
+
+class ASN1Offsets(object):
+    """Offsets-only decoding of a buffer
+    
+    The buffer is decoded with the fast PER or BER decoder of the ASN.1 object,
+    while recording, for each object decoded, its value path, its offset and its
+    length in bits within the buffer, into a flat array. This is much faster
+    than decoding with the from_*_ws() methods, which build the complete
+    pycrate_core Element structure of the transfer syntax.
+    This structure is only built when requested, with get_struct().
+    
+    Value paths are in the same format as the ones returned by get_val_paths(),
+    the root object having an empty path. Records are in the order of decoding,
+    which is the order of the buffer.
+    For PER, the offset and length cover the complete encoding of the object
+    (including its preambule and length determinant). For BER, they cover the
+    value part of the outermost TLV of the object only.
+    Objects within fragmented contents (e.g. an OPEN value longer than 16K in
+    PER) get approximate offsets.
+    
+    Init args:
+        Obj: ASN1Obj instance (ASN.1 type)
+        dec: str, decoding method (from_uper, from_aper, from_ber, from_cer or
+             from_der)
+        buf: bytes, buffer to be decoded
+    
+    Attributes:
+        val  : value decoded
+        paths: list of the value paths recorded
+        recs : flat array of records, each one being 3 consecutive integers
+               (index in paths, bit offset, bit length)
+    
+    Usage:
+        Offs = ASN1Offsets(PDU, 'from_aper', buf)
+        for path, off, bl in Offs:
+            ...
+        Offs.get_struct().show()
+    
+    The _from_per() / _from_ber() methods of all ASN1Obj subclasses are hooked
+    while recording only (or during the whole iteration with iter()), and the
+    hook records into the ASN1Offsets instance of the current thread only:
+    distinct ASN.1 objects can be decoded concurrently by multiple threads, 
+    with or without offsets, and decoding is not slowed down once recording
+    is over.
+    """
+    
+    # array typecode for records
+    TC = 'L'
+    
+    def __init__(self, Obj, dec, buf):
+        meth_name = _get_meth_name(dec)
+        self.Obj, self.dec, self.buf = Obj, dec, buf
+        self.paths, self.recs = [], array(self.TC)
+        self._ind, self._struct = {}, None
+        # stack of frames [object, char, base offset, path, number of components,
+        # index of the record in recs]
+        self._stack = []
+        #
+        _install(meth_name)
+        cur = _LOC.cur
+        cur.append(self)
+        try:
+            getattr(Obj, dec)(buf)
+        finally:
+            del cur[-1]
+            _uninstall(meth_name)
+        self.val = Obj._val
+    
+    @classmethod
+    def iter(cla, Obj, dec, bufs):
+        """yields an ASN1Offsets instance for each buffer in bufs, the decoding
+        methods being hooked only once for all of them
+        
+        The generator must be consumed entirely, or closed.
+        """
+        meth_name = _get_meth_name(dec)
+        _install(meth_name)
+        try:
+            for buf in bufs:
+                yield cla(Obj, dec, buf)
+        finally:
+            _uninstall(meth_name)
+    
+    def __len__(self):
+        return len(self.recs) // 3
+    
+    def __iter__(self):
+        paths, recs = self.paths, self.recs
+        for i in range(0, len(recs), 3):
+            yield paths[recs[i]], recs[i+1], recs[i+2]
+    
+    def get(self, path):
+        """returns the (bit offset, bit length) of the object at the given
+        value path, or None
+        """
+        try:
+            ind = self._ind[tuple(path)]
+        except KeyError:
+            return None
+        recs = self.recs
+        for i in range(0, len(recs), 3):
+            if recs[i] == ind:
+                return recs[i+1], recs[i+2]
+    
+    def get_struct(self):
+        """returns the pycrate_core Element structure of the transfer syntax,
+        built by decoding the buffer again with the from_*_ws() method
+        """
+        if self._struct is None:
+            getattr(self.Obj, self.dec + '_ws')(self.buf)
+            self._struct = self.Obj._struct
+        return self._struct
+
+
+def _ber_val_bnd(tlv):
+    # returns the offset and length in bits of the value of a BER TLV
+    # [cl, pc, tval, lval, V, ccur]
+    if tlv[3] >= 0:
+        return tlv[5], 8*tlv[3]
+    elif tlv[4] and tlv[4][-1][0:4] == [0, 0, 0, 0]:
+        # undefinite length, up to the EOC marker
+        return tlv[5], tlv[4][-1][5] - 16 - tlv[5]
+    else:
+        return tlv[5], 0
+
+
+def _get_meth_name(dec):
+    if dec in _DEC_PER:
+        return '_from_per'
+    elif dec in _DEC_BER:
+        return '_from_ber'
+    else:
+        raise(ASN1Err('invalid decoding method, {0!r}'.format(dec)))
+
+
+def _install(meth_name):
+    with _HOOK_LOCK:
+        if meth_name in _HOOKS:
+            _HOOKS[meth_name][0] += 1
+            return
+        hooks = {}
+        prof  = ASN1Profiler._orig
+        for cl in _get_subclasses(ASN1Obj):
+            if (cl, meth_name) in prof:
+                # hook the original method under the profiler's wrapper, so that
+                # disabling the profiler restores the hook
+                orig = prof[(cl, meth_name)]
+                hook = prof[(cl, meth_name)] = _wrap(meth_name, orig)
+                setattr(cl, meth_name, _wrap_prof(ASN1Profiler, meth_name, hook))
+            elif meth_name in cl.__dict__:
+                orig = cl.__dict__[meth_name]
+                hook = _wrap(meth_name, orig)
+                setattr(cl, meth_name, hook)
+            else:
+                continue
+            hooks[cl] = (orig, hook)
+        if meth_name == '_from_per':
+            # components of SEQUENCE OF / SET OF must be decoded one by one
+            # by the threads recording offsets only
+            bulk = hooks['_PER_BULK'] = _CONSTRUCT_OF.__dict__['_PER_BULK']
+            _CONSTRUCT_OF._PER_BULK = property(lambda Obj: bulk and not _LOC.cur)
+        _HOOKS[meth_name] = [1, hooks]
+
+
+def _uninstall(meth_name):
+    with _HOOK_LOCK:
+        _HOOKS[meth_name][0] -= 1
+        if _HOOKS[meth_name][0]:
+            return
+        hooks = _HOOKS.pop(meth_name)[1]
+        if meth_name == '_from_per':
+            _CONSTRUCT_OF._PER_BULK = hooks.pop('_PER_BULK')
+        prof = ASN1Profiler._orig
+        for cl, (orig, hook) in hooks.items():
+            if prof.get((cl, meth_name)) is hook:
+                # the profiler has been enabled meanwhile, or was already
+                prof[(cl, meth_name)] = orig
+                setattr(cl, meth_name, _wrap_prof(ASN1Profiler, meth_name, orig))
+            elif cl.__dict__.get(meth_name) is hook:
+                setattr(cl, meth_name, orig)
+
+
+def _get_cho_path(Cho, Obj):
+    # returns the path to Obj within the CHOICE Cho, which goes through untagged
+    # CHOICE components in BER (see CHOICE._cont_tags)
+    if Obj._name in Cho._cont and Cho._cont[Obj._name] is Obj:
+        return (Obj._name, )
+    for path in Cho._cont_tags.values():
+        if isinstance(path, list) and path[-1] == Obj._name:
+            Comp = Cho
+            for ident in path:
+                Comp = Comp._cont[ident]
+            if Comp is Obj:
+                return tuple(path)
+    return (Obj._name, )
+
+
+def _wrap(meth_name, func):
+    
+    is_per = meth_name == '_from_per'
+    
+    def wrapper(self, char, *args):
+        cur = _LOC.cur
+        if not cur:
+            return func(self, char, *args)
+        Offs  = cur[-1]
+        stack = Offs._stack
+        if not stack:
+            base, path, gext = 0, (), False
+        else:
+            Par = stack[-1]
+            ParObj = Par[0]
+            if ParObj is self:
+                # an overloaded method calling the one of its parent class
+                return func(self, char, *args)
+            # path element
+            gext = '_gext' in self.__dict__
+            if gext:
+                # extension group, transparent
+                path = Par[3]
+            elif ParObj.TYPE in (TYPE_SEQ_OF, TYPE_SET_OF):
+                path = Par[3] + (Par[4], )
+                Par[4] += 1
+            elif ParObj.TYPE == TYPE_CHOICE:
+                path = Par[3] + _get_cho_path(ParObj, self)
+            elif ParObj.TYPE in (TYPE_OPEN, TYPE_ANY, TYPE_BIT_STR, TYPE_OCT_STR):
+                if self._typeref is not None:
+                    path = Par[3] + (self._typeref.called[1], )
+                else:
+                    path = Par[3] + (self.TYPE, )
+            else:
+                path = Par[3] + (self._name, )
+            # base offset, when decoding a buffer extracted from the parent one
+            if char is Par[1]:
+                base = Par[2]
+            elif is_per:
+                base = Par[2] + Par[1]._cur - char._len_bit
+            else:
+                base = Offs.recs[Par[5]+1]
+                if ParObj.TYPE == TYPE_BIT_STR:
+                    # 1st byte of the BIT STRING value is the unused bits count
+                    base += 8
+        #
+        recs = Offs.recs
+        if gext:
+            # no record for extension groups
+            rec = Par[5]
+        else:
+            ind = Offs._ind.setdefault(path, len(Offs.paths))
+            if ind == len(Offs.paths):
+                Offs.paths.append(path)
+            rec = len(recs)
+            if is_per:
+                off = char._cur
+                recs.extend((ind, base + off, 0))
+            else:
+                off, bl = _ber_val_bnd(args[0][0])
+                recs.extend((ind, base + off, bl))
+        stack.append([self, char, base, path, 0, rec])
+        try:
+            ret = func(self, char, *args)
+        except Exception:
+            # drop the records of this object and its components, e.g. when
+            # different objects are tried for decoding an OPEN value
+            del stack[-1]
+            if not gext:
+                del recs[rec:]
+            raise
+        del stack[-1]
+        if is_per and not gext:
+            recs[rec+2] = char._cur - off
+        return ret
+    
+    wrapper.__name__ = func.__name__
+    wrapper.__doc__  = func.__doc__
+    return wrapper
+
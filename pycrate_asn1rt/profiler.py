@@ -0,0 +1,203 @@
+# -*- coding: UTF-8 -*-
+#/**
+# * Software Name : pycrate
+# * Version : 0.4
+# *
+# * Copyright 2019. Benoit Michau. P1Sec.
+# *
+# * This library is free software; you can redistribute it and/or
+# * modify it under the terms of the GNU Lesser General Public
+# * License as published by the Free Software Foundation; either
+# * version 2.1 of the License, or (at your option) any later version.
+# *
+# * This library is distributed in the hope that it will be useful,
+# * but WITHOUT ANY WARRANTY; without even the implied warranty of
+# * MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# * Lesser General Public License for more details.
+# *
+# * You should have received a copy of the GNU Lesser General Public
+# * License along with this library; if not, write to the Free Software
+# * Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston,
+# * MA 02110-1301  USA
+# *
+# *--------------------------------------------------------
+# * File Name : pycrate_asn1rt/profiler.py
+# * Created : 2026-10-19
+# * Authors : agent
+# *--------------------------------------------------------
+#*/
+
+try:
+    from time import perf_counter as _clock
+except ImportError:
+    # Python 2
+    from time import time as _clock
+
+from .asnobj       import ASN1Obj
+# ensure all ASN1Obj subclasses are defined before being wrapped
+from .asnobj_class import *
+from .asnobj_ext   import *
+
+
+#------------------------------------------------------------------------------#
+# per-type PER / BER encoding and decoding profiler
+#------------------------------------------------------------------------------#
+
+class ASN1Profiler(object):
+    """Opt-in profiler of the PER and BER codecs, for all ASN.1 objects
+    
+    When enabled, the _from_per(), _to_per(), _from_ber() and _to_ber() methods
+    of all ASN1Obj subclasses are wrapped, in order to record, for each object
+    (indexed by its fullname()) and each method:
+        - the number of calls
+        - the cumulative time, including inner components' processing
+        - the self time, excluding inner components' processing
+        - the number of bytes consumed (decoding) or produced (encoding);
+          for BER decoding, this is the length of the value part only
+    
+    When disabled, the original methods are restored in the classes, hence
+    there is no cost at all for the codecs.
+    
+    Usage:
+        ASN1Profiler.enable()
+        PDU.from_aper(buf)
+        ...
+        ASN1Profiler.disable()
+        print(ASN1Profiler.report())
+    """
+    
+    METH = ('_from_per', '_to_per', '_from_ber', '_to_ber')
+    
+    # stats: dict indexed by (object fullname, method name),
+    # with values [calls, cumulative time, self time, bit length]
+    STATS = {}
+    
+    # original methods: dict indexed by (class, method name)
+    _orig  = {}
+    # stack of frames [object, method name, inner time], for computing self time
+    _stack = []
+    
+    @classmethod
+    def enabled(cla):
+        return bool(cla._orig)
+    
+    @classmethod
+    def enable(cla, meth=METH):
+        """wraps the given codec methods of all ASN1Obj subclasses
+        """
+        for meth_name in meth:
+            if meth_name not in cla.METH:
+                raise(ValueError('invalid method to profile, %r' % meth_name))
+            for cl in _get_subclasses(ASN1Obj):
+                if meth_name in cl.__dict__ and (cl, meth_name) not in cla._orig:
+                    func = cl.__dict__[meth_name]
+                    cla._orig[(cl, meth_name)] = func
+                    setattr(cl, meth_name, _wrap(cla, meth_name, func))
+    
+    @classmethod
+    def disable(cla):
+        """restores the original codec methods of all ASN1Obj subclasses
+        """
+        for (cl, meth_name), func in cla._orig.items():
+            setattr(cl, meth_name, func)
+        cla._orig.clear()
+        del cla._stack[:]
+    
+    @classmethod
+    def reset(cla):
+        """clears all the statistics recorded
+        """
+        cla.STATS.clear()
+    
+    @classmethod
+    def get_stats(cla, sort='self', meth=None):
+        """returns the list of statistics recorded, as 6-tuples
+        (fullname, method name, calls, cumulative time, self time, bytes),
+        ranked by decreasing `sort' (calls, cum, self or bytes)
+        """
+        ind = {'calls': 2, 'cum': 3, 'self': 4, 'bytes': 5}[sort]
+        stats = [(name, meth_name, st[0], st[1], st[2], st[3] >> 3) \
+                 for (name, meth_name), st in cla.STATS.items() \
+                 if meth is None or meth_name == meth]
+        stats.sort(key=lambda st: st[ind], reverse=True)
+        return stats
+    
+    @classmethod
+    def report(cla, num=40, sort='self', meth=None):
+        """returns a textual report of the `num' first statistics entries,
+        ranked by decreasing `sort' (calls, cum, self or bytes)
+        """
+        stats = cla.get_stats(sort, meth)
+        tot_self = sum([st[4] for st in stats])
+        lines = ['%10s %10s %10s %6s %10s %10s  %-10s %s' % (
+                 'calls', 'cum (s)', 'self (s)', 'self %', 'bytes', 'us/call',
+                 'method', 'object')]
+        for name, meth_name, calls, cum, selft, byt in stats[:num]:
+            lines.append('%10i %10.4f %10.4f %6.2f %10i %10.2f  %-10s %s' % (
+                         calls, cum, selft,
+                         100.0 * selft / tot_self if tot_self else 0.0,
+                         byt, 1e6 * cum / calls, meth_name, name))
+        return '\n'.join(lines)
+    
+    @classmethod
+    def show(cla, num=40, sort='self', meth=None):
+        print(cla.report(num, sort, meth))
+
+
+def _get_subclasses(cl):
+    ret, stack = [cl], [cl]
+    while stack:
+        for sub in stack.pop().__subclasses__():
+            if sub not in ret:
+                ret.append(sub)
+                stack.append(sub)
+    return ret
+
+
+def _wrap(prof, meth_name, func):
+    
+    STATS, stack = prof.STATS, prof._stack
+    
+    def wrapper(self, *args):
+        if stack and stack[-1][0] is self and stack[-1][1] == meth_name:
+            # an overloaded method calling the one of its parent class
+            return func(self, *args)
+        frame = [self, meth_name, 0.0]
+        stack.append(frame)
+        if meth_name == '_from_per':
+            off = args[0]._cur
+        T0 = _clock()
+        try:
+            ret = func(self, *args)
+        finally:
+            T = _clock() - T0
+            stack.pop()
+            if stack:
+                stack[-1][2] += T
+        if meth_name == '_from_per':
+            bl = args[0]._cur - off
+        elif meth_name == '_from_ber':
+            # value length of the 1st TLV
+            try:
+                bl = max(0, args[1][0][3]) << 3
+            except Exception:
+                bl = 0
+        else:
+            # list of packable values
+            bl = sum([f[2] for f in ret])
+        key = (self.fullname(), meth_name)
+        try:
+            st = STATS[key]
+        except KeyError:
+            STATS[key] = [1, T, T - frame[2], bl]
+        else:
+            st[0] += 1
+            st[1] += T
+            st[2] += T - frame[2]
+            st[3] += bl
+        return ret
+    
+    wrapper.__name__ = func.__name__
+    wrapper.__doc__  = func.__doc__
+    return wrapper
+
@@ -28,6 +28,7 @@
 #*/
 
 from functools import reduce
+from bisect    import bisect_right
 
 from .utils  import *
 from .err    import *
@@ -660,6 +661,79 @@ def reduce_rangelist(rl=[]):
     return red 
 
 
+#------------------------------------------------------------------------------#
+# compiled membership predicates
+#------------------------------------------------------------------------------#
+# each ASN1Set compiles its root and extension parts into the cheapest
+# predicate available, in order to avoid iterating over its list of values and
+# ranges (and calling their __contains__ method) for each membership test
+
+_INF = float('inf')
+
+def _in_none(v):
+    return False
+
+
+def _make_in_pred(vals, ranges, expd):
+    """returns a predicate testing the membership of a value within the list
+    of individual values `vals' and the list of ranges `ranges', `expd' being 
+    the ordered list of both values and ranges, where ASN1RangeStr are expanded
+    """
+    if ranges and all([isinstance(r, ASN1RangeStr) for r in ranges]):
+        # character ranges are expanded: this is a plain enumeration
+        vals, ranges = expd, []
+    #
+    if not ranges:
+        # enumeration: frozenset lookup
+        try:
+            fs = frozenset(vals)
+        except TypeError:
+            # unhashable values (e.g. dict for constructed types)
+            return lambda v: v in vals
+        #
+        def in_enum(v):
+            try:
+                return v in fs
+            except TypeError:
+                # unhashable value cannot be equal to any hashable one
+                return False
+        return in_enum
+    #
+    elif all([isinstance(r, ASN1RangeInt) for r in ranges]) and \
+    all([isinstance(v, integer_types) for v in vals]):
+        # integral ranges and values: sorted disjoint bounds
+        # (ranges are reduced and values within ranges are discarded by ASN1Set)
+        bnds = [(v, v) for v in vals] + \
+               [(-_INF if r.lb is None else r.lb, _INF if r.ub is None else r.ub) \
+                for r in ranges]
+        bnds.sort()
+        if len(bnds) == 1:
+            lb, ub = bnds[0]
+            #
+            def in_range(v):
+                return isinstance(v, integer_types) and lb <= v <= ub
+            return in_range
+        #
+        else:
+            lbs, ubs = [b[0] for b in bnds], [b[1] for b in bnds]
+            #
+            def in_ranges(v):
+                if not isinstance(v, integer_types):
+                    return False
+                i = bisect_right(lbs, v)
+                return i > 0 and v <= ubs[i-1]
+            return in_ranges
+    #
+    else:
+        # any other ranges (e.g. ASN1RangeReal): generic test
+        def in_any(v):
+            for r in ranges:
+                if v in r:
+                    return True
+            return v in vals
+        return in_any
+
+
 #------------------------------------------------------------------------------#
 # set of ASN.1 values or range of values
 #------------------------------------------------------------------------------#
@@ -679,6 +753,9 @@ class ASN1Set(object):
     root : ordered list with all individual and ranges of values in the root set
     ext  : ordered list with all individual and ranges of values in the 
            extension set
+    
+    _in_root, _in_ext: membership predicates for the root and extension sets,
+           compiled by _init() (see _make_in_pred())
     """
     
     _CONTAIN_WEXT = False # use extension to test for containment
@@ -711,7 +788,7 @@ class ASN1Set(object):
             self._ev = None
         self._init(sort_root, sort_ext)
     
-    def _init(self, sort_root, sort_ext):
+    def _init(self, sort_root=True, sort_ext=True):
         """
         creates the `root' and `ext' attributes which lists all values and 
         ranges of their domain in order
@@ -803,6 +880,12 @@ class ASN1Set(object):
                     self.ext.extend( self._er[er_off:] )
         else:
             self.ext = None
+        #
+        self._in_root = _make_in_pred(self._rv, self._rr, self.root)
+        if self._ev is not None:
+            self._in_ext = _make_in_pred(self._ev, self._er, self.ext)
+        else:
+            self._in_ext = _in_none
     
     def _set_root_bnd(self):
         """
@@ -855,29 +938,17 @@ class ASN1Set(object):
     
     def __contains__(self, v):
         if self._CONTAIN_WEXT:
-            return self.in_root(v) or self.in_ext(v)
+            return self._in_root(v) or self._in_ext(v)
         else:
-            return self.in_root(v)
+            return self._in_root(v)
     
     def in_root(self, v):
-        for r in self._rr:
-            if v in r:
-                return True
-        if v in self._rv:
-            return True
-        return False
+        return self._in_root(v)
     
     def in_ext(self, v):
         # WNG: for complex constraint, this may return True, 
         # even if in_root() returns also True
-        if self._ev is None:
-            return False
-        for r in self._er:
-            if v in r:
-                return True
-        if v in self._ev:
-            return True
-        return False
+        return self._in_ext(v)
     
     def intersect(self, S):
         """
@@ -961,3 +1032,27 @@ class ASN1Set(object):
             ret.extend( self._ev )
         return ret
 
+    
+    def get_rand_int(self, rnd, lb_def, ub_def, span=None):
+        """
+        returns a random integer from the root part of the set, which must be
+        of integers, picking first one of its values or ranges
+        
+        lb_def and ub_def are used as bounds for unbounded ranges (or as the
+        width of half-bounded ranges), and span, if set, restricts ranges to
+        their `span' first values
+        """
+        C = rnd.choice(self.root)
+        if isinstance(C, ASN1RangeInt):
+            lb, ub = C.lb, C.ub
+            if lb is None and ub is None:
+                lb, ub = lb_def, ub_def
+            elif lb is None:
+                lb = ub - (ub_def - lb_def)
+            elif ub is None:
+                ub = lb + (ub_def - lb_def)
+            if span is not None and ub > lb + span:
+                ub = lb + span
+            return rnd.randint(lb, ub)
+        else:
+            return C
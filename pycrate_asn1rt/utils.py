@@ -474,12 +474,16 @@ def match_tag(Obj, tag):
                     return ret
             else:
                 #const_obj_type == CLASET_MULT
+                if tag in Obj._get_tag_lut(const_obj):
+                    return 1
                 for obj in const_obj:
                     ret = match_tag(obj, tag)
                     if ret:
                         return ret
         elif Obj._const_val:
             # some objects are defined as value constraint
+            if tag in Obj._get_tag_lut():
+                return 1
             for ConstObj in Obj._const_val.root:
                 ret = match_tag(ConstObj, tag)
                 if ret:
@@ -506,6 +510,31 @@ def match_tag(Obj, tag):
     return 0
 
 
+def get_tag_lut(ConstList):
+    """Build the lookup table of tag (tag_class, tag_value) to the list of 
+    objects from ConstList which can be decoded with this tag, in the order
+    of ConstList
+    
+    Untagged CHOICE objects are flattened, with all the tags of their content,
+    including the ones of their nested untagged CHOICE (see CHOICE._cont_tags)
+    """
+    lut = {}
+    for ConstObj in ConstList:
+        if ConstObj._tagc:
+            tags = (ConstObj._tagc[0], )
+        elif ConstObj.TYPE == TYPE_CHOICE:
+            tags = ConstObj._cont_tags
+        else:
+            continue
+        for tag in tags:
+            if tag in lut:
+                if not any([O is ConstObj for O in lut[tag]]):
+                    lut[tag].append(ConstObj)
+            else:
+                lut[tag] = [ConstObj]
+    return lut
+
+
 def get_obj_by_tag(ObjOpen, tag, ConstList=None):
     """Check within the value constraint of an OPEN / ANY object ObjOpen 
     for a given tag (tag_class, tag_value) and return the matching object, 
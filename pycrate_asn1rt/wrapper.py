@@ -118,11 +118,13 @@ def gen_ber_wrapper(obj, asn_acquire=lambda:None, asn_release=lambda:None):
                 self._buf = b''
             else:
                 self._asn_acquire()
-                self.OBJ.set_val(val)
-                self._val = self.OBJ._val
-                self._buf = self.OBJ.to_ber()
-                self._bl  = 8*len(self._buf)
-                self._asn_release()
+                try:
+                    self.OBJ.set_val(val)
+                    self._val = self.OBJ._val
+                    self._buf = self.OBJ.to_ber()
+                    self._bl  = 8*len(self._buf)
+                finally:
+                    self._asn_release()
         
         def get_val(self):
             return self._val
@@ -138,9 +140,11 @@ def gen_ber_wrapper(obj, asn_acquire=lambda:None, asn_release=lambda:None):
         def _from_char(self, char):
             buf = char.get_bytes()
             self._asn_acquire()
-            self.OBJ.from_ber(buf)
-            self._val = self.OBJ._val
-            self._asn_release()
+            try:
+                self.OBJ.from_ber(buf)
+                self._val = self.OBJ._val
+            finally:
+                self._asn_release()
             self._buf = buf
             self._bl  = 8*len(buf)
         
@@ -159,9 +163,11 @@ def gen_ber_wrapper(obj, asn_acquire=lambda:None, asn_release=lambda:None):
         
         def show(self):
             self._asn_acquire()
-            self.OBJ._val = self._val
-            ret = '<%s [~ASN1~] : %s>' % (self._name, self.OBJ.to_asn1())
-            self._asn_release()
+            try:
+                self.OBJ._val = self._val
+                ret = '<%s [~ASN1~] : %s>' % (self._name, self.OBJ.to_asn1())
+            finally:
+                self._asn_release()
             return ret
         
         def hex(self):
@@ -198,21 +204,25 @@ def gen_ber_wrapper(obj, asn_acquire=lambda:None, asn_release=lambda:None):
             
             def _from_jval(self, val):
                 self._asn_acquire()
-                self.OBJ._from_jval(val)
-                self._val = self.OBJ._val
-                self._buf = self.OBJ.to_ber()
-                self._bl  = 8*len(self._buf)
-                self._asn_release()
+                try:
+                    self.OBJ._from_jval(val)
+                    self._val = self.OBJ._val
+                    self._buf = self.OBJ.to_ber()
+                    self._bl  = 8*len(self._buf)
+                finally:
+                    self._asn_release()
                 if self.OBJ._SAFE_BND:
                     self.OBJ._safechk_bnd(self.OBJ._val)
             
             def _to_jval(self):
                 self._asn_acquire()
-                self.OBJ._val = self._val
-                self._buf = self.OBJ.to_ber()
-                self._bl = 8*len(self._buf)
-                ret = self.OBJ._to_jval()
-                self._asn_release()
+                try:
+                    self.OBJ._val = self._val
+                    self._buf = self.OBJ.to_ber()
+                    self._bl = 8*len(self._buf)
+                    ret = self.OBJ._to_jval()
+                finally:
+                    self._asn_release()
                 return ret
     
     #
@@ -239,7 +239,8 @@ class ENBd(object):
             else:
                 self.set_ue_s1(ue, ctx_id)
                 try:
-                    ue.set_ran(self, ctx_id, sid)
+                    with ue._lock:
+                        ue.set_ran(self, ctx_id, sid)
                 except Exception as err:
                     self._log('ERR', 'UE connected to several RAN, %r' % err)
                     return []
@@ -263,7 +264,8 @@ class ENBd(object):
                 self.ProcLast = Proc.Code
                 return Proc.send()
             else:
-                return ue.S1.process_s1ap_pdu(pdu_rx)
+                with ue._lock:
+                    return ue.S1.process_s1ap_pdu(pdu_rx)
     
     def set_ue_s1(self, ued, ctx_id):
         self.UE[ctx_id] = ued
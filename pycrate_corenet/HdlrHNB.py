@@ -303,7 +303,7 @@ class HNBd(SigStack):
                 self._errpdu = pdu
             else:
                 if self.TRACE_ASN_RANAP:
-                    self._log('TRACE_ASN_RANAP_DL', '\n' + PDU_RANAP.to_asn1())
+                    self._log('TRACE_ASN_RANAP_DL', '\n' + asn_trace(PDU_RANAP))
                 ret.append( PDU_RANAP.to_aper() )
         asn_ranap_release()
         return ret
@@ -329,7 +329,7 @@ class HNBd(SigStack):
             return self._encode_ranap_pdu(Proc.send())
         #
         if self.TRACE_ASN_RANAP:
-            self._log('TRACE_ASN_RANAP_UL', '\n' + PDU_RANAP.to_asn1())
+            self._log('TRACE_ASN_RANAP_UL', '\n' + asn_trace(PDU_RANAP))
         pdu_rx = PDU_RANAP()
         asn_ranap_release()
         #
@@ -107,6 +107,8 @@ class UEd(SigStack):
     
     def __init__(self, server, imsi, **kw):
         self.Server = server
+        # lock held while processing signalling for this UE
+        self._lock = RLock()
         if imsi:
             self.IMSI = imsi
         elif 'tmsi' in kw:
@@ -171,7 +173,7 @@ class UEd(SigStack):
     
     def set_ran(self, ran, ctx_id, sid=None, dom=None):
         # UE going connected
-        if ran.__class__.__name__ == 'HNBd':
+        if ran.RAT == RAT_UTRA:
             #
             if self.S1.is_connected():
                 # error: already linked with another ran
@@ -199,7 +201,7 @@ class UEd(SigStack):
                     raise(CorenetErr('UE already connected through another IuPS link'))
             self._last_ran = self.IuCS
         #
-        elif ran.__class__.__name__ == 'ENBd':
+        elif ran.RAT == RAT_EUTRA:
             #
             if self.IuCS.is_connected() or self.IuPS.is_connected():
                 # error: already linked with another ran
@@ -364,40 +366,43 @@ class UEd(SigStack):
         return random.getrandbits(32)
     
     def set_tmsi(self, tmsi):
-        # delete current TMSI from the Server LUT
-        if self.TMSI is not None:
-            try:
-                del self.Server.TMSI[self.TMSI]
-            except:
-                pass
-        # set the new TMSI
-        self.TMSI = tmsi
-        # update the Server LUT
-        self.Server.TMSI[tmsi] = self.IMSI
+        with self.Server._UELock:
+            # delete current TMSI from the Server LUT
+            if self.TMSI is not None:
+                try:
+                    del self.Server.TMSI[self.TMSI]
+                except:
+                    pass
+            # set the new TMSI
+            self.TMSI = tmsi
+            # update the Server LUT
+            self.Server.TMSI[tmsi] = self.IMSI
     
     def set_ptmsi(self, ptmsi):
-        # delete current PTMSI from the Server LUT
-        if self.PTMSI is not None:
-            try:
-                del self.Server.PTMSI[self.PTMSI]
-            except:
-                pass
-        # set the new PTMSI
-        self.PTMSI = ptmsi
-        # update the Server LUT
-        self.Server.PTMSI[ptmsi] = self.IMSI
+        with self.Server._UELock:
+            # delete current PTMSI from the Server LUT
+            if self.PTMSI is not None:
+                try:
+                    del self.Server.PTMSI[self.PTMSI]
+                except:
+                    pass
+            # set the new PTMSI
+            self.PTMSI = ptmsi
+            # update the Server LUT
+            self.Server.PTMSI[ptmsi] = self.IMSI
     
     def set_mtmsi(self, mtmsi):
-        # delete current MTMSI from the Server LUT
-        if self.MTMSI is not None:
-            try:
-                del self.Server.MTMSI[self.MTMSI]
-            except:
-                pass
-        # set the new PTMSI
-        self.MTMSI = mtmsi
-        # update the Server LUT
-        self.Server.MTMSI[mtmsi] = self.IMSI
+        with self.Server._UELock:
+            # delete current MTMSI from the Server LUT
+            if self.MTMSI is not None:
+                try:
+                    del self.Server.MTMSI[self.MTMSI]
+                except:
+                    pass
+            # set the new PTMSI
+            self.MTMSI = mtmsi
+            # update the Server LUT
+            self.Server.MTMSI[mtmsi] = self.IMSI
     
     #--------------------------------------------------------------------------#
     # UE location
@@ -700,16 +705,18 @@ class UEd(SigStack):
                                 txt.append(c[1].show())
                             elif kb == 'utra':
                                 UEUTRACap = RRC3G.PDU_definitions.InterRATHandoverInfo
-                                UEUTRACap.set_val(c)
-                                txt.append(UEUTRACap.to_asn1())
+                                with ASN_RRC_LOCK:
+                                    UEUTRACap.set_val(c)
+                                    txt.append(UEUTRACap.to_asn1())
                             elif kb == 'eutra':
                                 UEEUTRACap = RRCLTE.EUTRA_RRC_Definitions.UE_EUTRA_Capability
-                                if not with_measparams:
-                                    meas_params_to_asn1_patch()
-                                UEEUTRACap.set_val(c)
-                                txt.append(UEEUTRACap.to_asn1())
-                                if not with_measparams:
-                                    meas_params_to_asn1_restore()
+                                with ASN_RRC_LOCK:
+                                    if not with_measparams:
+                                        meas_params_to_asn1_patch()
+                                    UEEUTRACap.set_val(c)
+                                    txt.append(UEEUTRACap.to_asn1())
+                                    if not with_measparams:
+                                        meas_params_to_asn1_restore()
                             #
                             elif hasattr(c, 'show'):
                                 txt.append(c.show())
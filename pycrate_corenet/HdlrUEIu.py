@@ -139,9 +139,9 @@ class UEIuSigStack(SigStack):
                 self._errpdu = pdu
             else:
                 if self.DOM == 'CS' and self.UE.TRACE_ASN_RANAP_CS:
-                    self._log('TRACE_ASN_RANAP_CS_DL', '\n' + PDU_RANAP.to_asn1())
+                    self._log('TRACE_ASN_RANAP_CS_DL', '\n' + asn_trace(PDU_RANAP))
                 elif self.DOM == 'PS' and self.UE.TRACE_ASN_RANAP_PS:
-                    self._log('TRACE_ASN_RANAP_PS_DL', '\n' + PDU_RANAP.to_asn1())
+                    self._log('TRACE_ASN_RANAP_PS_DL', '\n' + asn_trace(PDU_RANAP))
                 ret.append( PDU_RANAP.to_aper() )
         asn_ranap_release()
         return ret
@@ -167,9 +167,9 @@ class UEIuSigStack(SigStack):
             return self._encode_ranap_pdu(Proc.send())
         #
         if self.DOM == 'CS' and self.UE.TRACE_ASN_RANAP_CS:
-            self._log('TRACE_ASN_RANAP_CS_UL', '\n' + PDU_RANAP.to_asn1())
+            self._log('TRACE_ASN_RANAP_CS_UL', '\n' + asn_trace(PDU_RANAP))
         elif self.DOM == 'PS' and self.UE.TRACE_ASN_RANAP_PS:
-            self._log('TRACE_ASN_RANAP_PS_UL', '\n' + PDU_RANAP.to_asn1())
+            self._log('TRACE_ASN_RANAP_PS_UL', '\n' + asn_trace(PDU_RANAP))
         pdu_rx = PDU_RANAP()
         asn_ranap_release()
         #
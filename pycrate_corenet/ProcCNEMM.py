@@ -132,6 +132,7 @@ class EMMSigProc(NASSigProc):
     
     def abort(self):
         # abort this procedure, and all procedures started within this one
+        self.stop_timer()
         ind = self.EMM.Proc.index(self)
         if ind >= 0:
             for p in self.EMM.Proc[ind+1:]:
@@ -147,6 +148,7 @@ class EMMSigProc(NASSigProc):
         try:
             if self.EMM.Proc[-1] == self:
                 del self.EMM.Proc[-1]
+                self.stop_timer()
         except:
             self._log('WNG', 'EMM stack corrupted')
         else:
@@ -159,6 +161,10 @@ class EMMSigProc(NASSigProc):
             self.TimerValue = getattr(self.EMM, self.Timer, self.TimerDefault)
             self.TimerStart = time()
             self.TimerStop  = self.TimerStart + self.TimerValue
+            self.start_timer(self.UE.Server)
+    
+    def is_active(self):
+        return self in self.EMM.Proc
     
     def get_timer(self):
         if self.Timer is None:
@@ -194,32 +200,39 @@ class EMMSigProc(NASSigProc):
             self.errcause = self.EMM.IDENT_IMSI_NOT_ALLOWED
             return False
         else:
-            # update the MTMSI table
-            Server.MTMSI[self.UE.MTMSI] = imsi
-            #
-            if imsi in Server.UE:
-                if self.UE != self.UE.Server.UE[imsi]:
-                    ue = Server.UE[imsi]
-                    if not ue.merge_eps_handler(self.S1):
-                        # unable to merge to the existing profile
-                        self._log('WNG', 'profile for IMSI %s already exists, '\
-                                  'need to reject for reconnection' % imsi)
-                        # reject so that it will reconnect
-                        # and get the already existing profile
-                        self.errcause = self.EMM.ATT_IMSI_PROV_REJECT
-                        return False
-                    else:
-                        return True
-                else:
+            with Server._UELock:
+                # update the MTMSI table
+                Server.MTMSI[self.UE.MTMSI] = imsi
+                #
+                ue = Server.UE.get(imsi)
+                if ue is None:
+                    Server.UE[imsi] = self.UE
+                    # update the Server UE's tables
+                    if imsi in Server.ConfigUE:
+                        # update UE's config with it's dedicated config
+                        self.UE.set_config( Server.ConfigUE[imsi] )
+                    elif '*' in Server.ConfigUE:
+                        self.UE.set_config( Server.ConfigUE['*'] )
                     return True
-            else:
-                Server.UE[imsi] = self.UE
-                # update the Server UE's tables
-                if imsi in Server.ConfigUE:
-                    # update UE's config with it's dedicated config
-                    self.UE.set_config( Server.ConfigUE[imsi] )
-                elif '*' in Server.ConfigUE:
-                    self.UE.set_config( Server.ConfigUE['*'] )
+                elif ue == self.UE:
+                    return True
+            # the S1 handler needs to be merged into the existing UE, which is 
+            # done while holding its lock, as PDUs from another eNodeB may be 
+            # processed for it concurrently (the UE's lock is never acquired 
+            # while holding the Server's UE lock)
+            with ue._lock:
+                if not ue.merge_eps_handler(self.S1):
+                    # unable to merge to the existing profile
+                    self._log('WNG', 'profile for IMSI %s already exists, '\
+                              'need to reject for reconnection' % imsi)
+                    # reject so that it will reconnect
+                    # and get the already existing profile
+                    self.errcause = self.EMM.ATT_IMSI_PROV_REJECT
+                    return False
+                # the eNodeB UE context now refers to the existing UE, so that 
+                # the next PDUs are processed while holding its lock
+                if self.S1.ENB is not None and self.S1.CtxId >= 0:
+                    self.S1.ENB.set_ue_s1(ue, self.S1.CtxId)
                 return True
     
     def _ret_req_imsi(self):
@@ -901,10 +914,11 @@ class EMMAttach(EMMSigProc):
         elif self.UE.IMSI is None:
             # UEd was created based on a S-TMSI provided at the RRC layer
             # -> we need to get its IMSI before continuing
-            try:
-                del self.UE.Server._UEpre[self.UE.MTMSI]
-            except:
-                pass
+            with self.UE.Server._UELock:
+                try:
+                    del self.UE.Server._UEpre[self.UE.MTMSI]
+                except:
+                    pass
             #
             if self.UEInfo['EPSID'][0] == 1:
                 # IMSI is provided at the NAS layer
@@ -1145,10 +1159,11 @@ class EMMDetachUE(EMMSigProc):
             if self.UE.IMSI is None:
                 # UEd was created based on a S-TMSI provided at the RRC layer
                 # just delete it
-                try:
-                    del self.UE.Server._UEpre[self.UE.MTMSI]
-                except:
-                    pass
+                with self.UE.Server._UELock:
+                    try:
+                        del self.UE.Server._UEpre[self.UE.MTMSI]
+                    except:
+                        pass
     
     def process(self, pdu):
         # preempt the EMM stack
@@ -1376,10 +1391,11 @@ class EMMTrackingAreaUpdate(EMMSigProc):
         if self.UE.IMSI is None:
             # UEd was created based on a S-TMSI provided at the RRC layer
             # -> we need to get its IMSI before continuing
-            try:
-                del self.UE.Server._UEpre[self.UE.MTMSI]
-            except:
-                pass
+            with self.UE.Server._UELock:
+                try:
+                    del self.UE.Server._UEpre[self.UE.MTMSI]
+                except:
+                    pass
             # need to request the IMSI, prepare an id request procedure
             return self._ret_req_imsi()
         #
@@ -1615,10 +1631,11 @@ class EMMServiceRequest(EMMSigProc):
         if self.UE.IMSI is None:
             # UEd was created based on a S-TMSI provided at the RRC layer
             # -> we need to get its IMSI before continuing
-            try:
-                del self.UE.Server._UEpre[self.UE.MTMSI]
-            except:
-                pass
+            with self.UE.Server._UELock:
+                try:
+                    del self.UE.Server._UEpre[self.UE.MTMSI]
+                except:
+                    pass
             # need to request the IMSI, prepare an id request procedure
             return self._ret_req_imsi()
         #
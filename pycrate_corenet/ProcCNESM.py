@@ -149,6 +149,7 @@ class ESMSigProc(NASSigProc):
     
     def abort(self):
         # abort this procedure, and all procedures started within this one
+        self.stop_timer()
         ProcStack = self.ESM.Proc[self._ebi]
         ind = ProcStack.index(self)
         if ind >= 0:
@@ -163,6 +164,7 @@ class ESMSigProc(NASSigProc):
             ProcStack = self.ESM.Proc[self._ebi]
             if ProcStack[-1] == self:
                 del ProcStack[-1]
+                self.stop_timer()
         except:
             self._log('WNG', 'ESM stack corrupted')
     
@@ -171,6 +173,10 @@ class ESMSigProc(NASSigProc):
             self.TimerValue = getattr(self.ESM, self.Timer, self.TimerDefault)
             self.TimerStart = time()
             self.TimerStop  = self.TimerStart + self.TimerValue
+            self.start_timer(self.UE.Server)
+    
+    def is_active(self):
+        return self._ebi in self.ESM.Proc and self in self.ESM.Proc[self._ebi]
     
     def get_timer(self):
         if self.Timer is None:
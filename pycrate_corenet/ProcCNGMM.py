@@ -120,6 +120,7 @@ class GMMSigProc(NASSigProc):
     
     def abort(self):
         # abort this procedure, and all procedures started within this one
+        self.stop_timer()
         ind = self.GMM.Proc.index(self)
         if ind >= 0:
             for p in self.GMM.Proc[ind+1:]:
@@ -135,6 +136,7 @@ class GMMSigProc(NASSigProc):
         try:
             if self.GMM.Proc[-1] == self:
                 del self.GMM.Proc[-1]
+                self.stop_timer()
         except:
             self._log('WNG', 'GMM stack corrupted')
         else:
@@ -147,6 +149,10 @@ class GMMSigProc(NASSigProc):
             self.TimerValue = getattr(self.GMM, self.Timer, self.TimerDefault)
             self.TimerStart = time()
             self.TimerStop  = self.TimerStart + self.TimerValue
+            self.start_timer(self.UE.Server)
+    
+    def is_active(self):
+        return self in self.GMM.Proc
     
     def get_timer(self):
         if self.Timer is None:
@@ -176,35 +182,36 @@ class GMMSigProc(NASSigProc):
             self.errcause = self.GMM.IDENT_IMSI_NOT_ALLOWED
             return False
         else:
-            # update the PTMSI table
-            Server.PTMSI[self.UE.PTMSI] = imsi
-            #
-            if imsi in Server.UE:
-                # in the meantime, IMSI was obtained from the CS domain connection
-                if self.UE != Server.UE[imsi]:
-                    # there is 2 distincts Iu contexts, that need to be merged
-                    ue = Server.UE[imsi]
-                    if not ue.merge_ps_handler(self.Iu):
-                        # unable to merge to the existing profile
-                        self._log('WNG', 'profile for IMSI %s already exists, '\
-                                  'need to reject for reconnection' % imsi)
-                        # reject so that it will reconnect
-                        # and get the already existing profile
-                        self.errcause = self.GMM.ATT_IMSI_PROV_REJECT
-                        return False
+            with Server._UELock:
+                # update the PTMSI table
+                Server.PTMSI[self.UE.PTMSI] = imsi
+                #
+                if imsi in Server.UE:
+                    # in the meantime, IMSI was obtained from the CS domain connection
+                    if self.UE != Server.UE[imsi]:
+                        # there is 2 distincts Iu contexts, that need to be merged
+                        ue = Server.UE[imsi]
+                        if not ue.merge_ps_handler(self.Iu):
+                            # unable to merge to the existing profile
+                            self._log('WNG', 'profile for IMSI %s already exists, '\
+                                      'need to reject for reconnection' % imsi)
+                            # reject so that it will reconnect
+                            # and get the already existing profile
+                            self.errcause = self.GMM.ATT_IMSI_PROV_REJECT
+                            return False
+                        else:
+                            return True
                     else:
                         return True
                 else:
+                    Server.UE[imsi] = self.UE
+                    # update the Server UE's tables
+                    if imsi in Server.ConfigUE:
+                        # update UE's config with it's dedicated config
+                        self.UE.set_config( Server.ConfigUE[imsi] )
+                    elif '*' in Server.ConfigUE:
+                        self.UE.set_config( Server.ConfigUE['*'] )
                     return True
-            else:
-                Server.UE[imsi] = self.UE
-                # update the Server UE's tables
-                if imsi in Server.ConfigUE:
-                    # update UE's config with it's dedicated config
-                    self.UE.set_config( Server.ConfigUE[imsi] )
-                elif '*' in Server.ConfigUE:
-                    self.UE.set_config( Server.ConfigUE['*'] )
-                return True
     
     def _ret_req_imsi(self):
         NasProc = self.GMM.init_proc(GMMIdentification)
@@ -381,10 +388,11 @@ class GMMAttach(GMMSigProc):
             # UEd was created based on a PTMSI provided at the RRC layer
             # -> we need to get its IMSI before continuing
             # we remove it from the Server's provisory dict of UE
-            try:
-                del self.UE.Server._UEpre[self.UE.PTMSI]
-            except:
-                pass
+            with self.UE.Server._UELock:
+                try:
+                    del self.UE.Server._UEpre[self.UE.PTMSI]
+                except:
+                    pass
             #
             if self.UEInfo['ID'][0] == 1:
                 # IMSI is provided at the NAS layer
@@ -803,10 +811,11 @@ class GMMRoutingAreaUpdating(GMMSigProc):
             # UEd was created based on a PTMSI provided at the RRC layer
             # -> we need to get its IMSI before continuing
             # we remove it from the Server's provisory dict of UE
-            try:
-                del self.UE.Server._UEpre[self.UE.PTMSI]
-            except:
-                pass
+            with self.UE.Server._UELock:
+                try:
+                    del self.UE.Server._UEpre[self.UE.PTMSI]
+                except:
+                    pass
             # need to request the IMSI, prepare an id request procedure
             return self._ret_req_imsi()
         #
@@ -124,6 +124,7 @@ class MMSigProc(NASSigProc):
     
     def abort(self):
         # abort this procedure, and all procedures started within this one
+        self.stop_timer()
         ind = self.MM.Proc.index(self)
         if ind >= 0:
             for p in self.MM.Proc[ind+1:]:
@@ -139,6 +140,7 @@ class MMSigProc(NASSigProc):
         try:
             if self.MM.Proc[-1] == self:
                 del self.MM.Proc[-1]
+                self.stop_timer()
         except:
             self._log('WNG', 'MM stack corrupted')
         else:
@@ -151,6 +153,10 @@ class MMSigProc(NASSigProc):
             self.TimerValue = getattr(self.MM, self.Timer, self.TimerDefault)
             self.TimerStart = time()
             self.TimerStop  = self.TimerStart + self.TimerValue
+            self.start_timer(self.UE.Server)
+    
+    def is_active(self):
+        return self in self.MM.Proc
     
     def get_timer(self):
         if self.Timer is None:
@@ -180,35 +186,36 @@ class MMSigProc(NASSigProc):
             self.errcause = self.MM.IDENT_IMSI_NOT_ALLOWED
             return False
         else:
-            # update the TMSI table
-            Server.TMSI[self.UE.TMSI] = imsi
-            #
-            if imsi in Server.UE:
-                # in the meantime, IMSI was obtained from the PS domain connection
-                if self.UE != Server.UE[imsi]:
-                    # there is 2 distincts Iu contexts, that need to be merged
-                    ue = Server.UE[imsi]
-                    if not ue.merge_cs_handler(self.Iu):
-                        # unable to merge to the existing profile
-                        self._log('WNG', 'profile for IMSI %s already exists, '\
-                                  'need to reject for reconnection' % imsi)
-                        # reject so that it will reconnect
-                        # and get the already existing profile
-                        self.errcause = self.MM.LU_IMSI_PROV_REJECT
-                        return False
+            with Server._UELock:
+                # update the TMSI table
+                Server.TMSI[self.UE.TMSI] = imsi
+                #
+                if imsi in Server.UE:
+                    # in the meantime, IMSI was obtained from the PS domain connection
+                    if self.UE != Server.UE[imsi]:
+                        # there is 2 distincts Iu contexts, that need to be merged
+                        ue = Server.UE[imsi]
+                        if not ue.merge_cs_handler(self.Iu):
+                            # unable to merge to the existing profile
+                            self._log('WNG', 'profile for IMSI %s already exists, '\
+                                      'need to reject for reconnection' % imsi)
+                            # reject so that it will reconnect
+                            # and get the already existing profile
+                            self.errcause = self.MM.LU_IMSI_PROV_REJECT
+                            return False
+                        else:
+                            return True
                     else:
                         return True
                 else:
+                    # update the Server UE's tables
+                    Server.UE[imsi] = self.UE
+                    if imsi in Server.ConfigUE:
+                        # update UE's config with it's dedicated config
+                        self.UE.set_config( Server.ConfigUE[imsi] )
+                    else:
+                        self.UE.set_config( Server.ConfigUE['*'] )
                     return True
-            else:
-                # update the Server UE's tables
-                Server.UE[imsi] = self.UE
-                if imsi in Server.ConfigUE:
-                    # update UE's config with it's dedicated config
-                    self.UE.set_config( Server.ConfigUE[imsi] )
-                else:
-                    self.UE.set_config( Server.ConfigUE['*'] )
-                return True
     
     def _ret_req_imsi(self):
         NasProc = self.MM.init_proc(MMIdentification)
@@ -758,10 +765,11 @@ class MMLocationUpdating(MMSigProc):
             # UEd was created based on a TMSI provided at the RRC layer
             # -> we need to get its IMSI before continuing
             # we remove it from the Server's provisory dict of UE
-            try:
-                del self.UE.Server._UEpre[self.UE.TMSI]
-            except:
-                pass
+            with self.UE.Server._UELock:
+                try:
+                    del self.UE.Server._UEpre[self.UE.TMSI]
+                except:
+                    pass
             #
             if self.UEInfo['ID'][0] == 1:
                 # IMSI is provided at the NAS layer
@@ -171,7 +171,8 @@ class RUAConnect(RUASigProc):
                     except Exception as err:
                         self._log('ERR', 'UE connected to several RAN, %r' % err)
                         return []
-                    self.retpdu = ued.IuCS.process_ranap(self.ConInfo['RANAP_Message'])
+                    with ued._lock:
+                        self.retpdu = ued.IuCS.process_ranap(self.ConInfo['RANAP_Message'])
                 else:
                     #self.ConInfo['CN_DomainIndicator'] == 'ps-domain'
                     self.HNB.set_ue_iups(ued, ctx_id)
@@ -180,7 +181,8 @@ class RUAConnect(RUASigProc):
                     except Exception as err:
                         self._log('ERR', 'UE connected to several RAN, %r' % err)
                         return []
-                    self.retpdu = ued.IuPS.process_ranap(self.ConInfo['RANAP_Message'])
+                    with ued._lock:
+                        self.retpdu = ued.IuPS.process_ranap(self.ConInfo['RANAP_Message'])
     
     def trigger(self):
         if self.errcause:
@@ -241,7 +243,8 @@ class RUADirectTransfer(RUASigProc):
                               % self.ConInfo['Context_ID'][0])
                     self.errcause = ('protocol', 'abstract-syntax-error-reject')
                 else:
-                    self.retpdu = ued.IuCS.process_ranap(self.ConInfo['RANAP_Message'])
+                    with ued._lock:
+                        self.retpdu = ued.IuCS.process_ranap(self.ConInfo['RANAP_Message'])
             else:
                 try:
                     ued = self.HNB.UE_IuPS[self.ConInfo['Context_ID'][0]]
@@ -250,7 +253,8 @@ class RUADirectTransfer(RUASigProc):
                               % self.ConInfo['Context_ID'][0])
                     self.errcause = ('protocol', 'abstract-syntax-error-reject')
                 else:
-                    self.retpdu = ued.IuPS.process_ranap(self.ConInfo['RANAP_Message'])
+                    with ued._lock:
+                        self.retpdu = ued.IuPS.process_ranap(self.ConInfo['RANAP_Message'])
     
     def trigger(self):
         if self.errcause:
@@ -312,7 +316,8 @@ class RUADisconnect(RUASigProc):
                               % self.ConInfo['Context_ID'][0])
                     self.errcause = ('protocol', 'abstract-syntax-error-reject')
                 else:
-                    self.retpdu = ued.IuCS.process_ranap(self.ConInfo['RANAP_Message'])
+                    with ued._lock:
+                        self.retpdu = ued.IuCS.process_ranap(self.ConInfo['RANAP_Message'])
                     # RANAP_Message should be an IuRelease response
                     # hence, there should be no RANAP answer from the CN
                     # after receiving an RUA disconnect
@@ -326,7 +331,8 @@ class RUADisconnect(RUASigProc):
                               % self.ConInfo['Context_ID'][0])
                     self.errcause = ('protocol', 'abstract-syntax-error-reject')
                 else:
-                    self.retpdu = ued.IuPS.process_ranap(self.ConInfo['RANAP_Message'])
+                    with ued._lock:
+                        self.retpdu = ued.IuPS.process_ranap(self.ConInfo['RANAP_Message'])
                     assert( self.retpdu == [] )
                     self.HNB.unset_ue_iups(self.ConInfo['Context_ID'][0])
     
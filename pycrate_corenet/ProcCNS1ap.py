@@ -1972,7 +1972,10 @@ class S1APENBConfigUpdate(S1APNonUESigProc):
     
     # Custom decoders
     Decod = {
-        'ini': ({}, {}),
+        'ini': ({
+            'SupportedTAs': supptas_to_hum,
+            },
+            {}),
         'suc': ({}, {}),
         'uns': ({}, {})
         }
@@ -1983,6 +1986,31 @@ class S1APENBConfigUpdate(S1APNonUESigProc):
         'suc': ({}, {}),
         'uns': ({}, {})
         }
+    
+    def recv(self, pdu):
+        # recv the ENBConfigurationUpdate
+        self._recv(pdu)
+        if self.errcause:
+            # procedure unsuccessful outcome
+            self.encode_pdu('uns', Cause=self.errcause)
+            self._log('INF', 'eNB configuration not updated')
+        else:
+            # update the eNB config with the IEs provided
+            Config = cpdict(self.ENB.Config) if self.ENB.Config else {'TAIs': []}
+            Config.update(cpdict(self.ENBInfo))
+            if 'SupportedTAs' in self.ENBInfo:
+                Config['TAIs'] = []
+                for tas in self.ENBInfo['SupportedTAs']:
+                    for plmn in tas['broadcastPLMNs']:
+                        if plmn == self.Server.PLMN or \
+                        self.Server.EQUIV_PLMN and plmn in self.Server.EQUIV_PLMN:
+                            # supported PLMN by Corenet
+                            Config['TAIs'].append( (plmn, tas['tAC']) )
+            self.Server.set_enb_config(self.ENB, Config)
+            self.encode_pdu('suc')
+            self._log('INF', 'eNB configuration updated')
+    
+    send = S1APNonUESigProc._send
 
 
 class S1APMMEConfigUpdate(S1APNonUESigProc):
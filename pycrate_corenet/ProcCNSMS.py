@@ -81,6 +81,7 @@ class CMSMSProc(NASSigProc):
         self._log('INF', 'aborting')
     
     def rm_from_sms_stack(self):
+        self.stop_timer()
         try:
             del self.SMS.Proc[self.TID]
         except:
@@ -91,6 +92,10 @@ class CMSMSProc(NASSigProc):
             self.TimerValue = getattr(self.SMS, self.Timer, self.TimerDefault)
             self.TimerStart = time()
             self.TimerStop  = self.TimerStart + self.TimerValue
+            self.start_timer(self.SMS.UE.Server)
+    
+    def is_active(self):
+        return self.SMS.Proc.get(self.TID) is self
     
     def get_timer(self):
         if self.Timer is None:
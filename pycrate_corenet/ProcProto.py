@@ -688,4 +688,32 @@ class NASSigProc(SigProc):
         """abort the procedure, e.g. due to a timeout or an error indication
         """
         pass
-
+    
+    #--------------------------------------------------------------------------#
+    # timer
+    #--------------------------------------------------------------------------#
+    
+    # entry of the procedure timer, in the server timers
+    _timer = None
+    
+    def start_timer(self, server):
+        """register the procedure timer (TimerStop) to the server timers, 
+        replacing the previous one, if any
+        """
+        self.stop_timer()
+        timers = getattr(server, 'Timers', None)
+        if timers is not None:
+            self._timer = (timers, timers.add(self.TimerStop, self))
+    
+    def stop_timer(self):
+        """deregister the procedure timer from the server timers
+        """
+        if self._timer is not None:
+            self._timer[0].cancel(self._timer[1])
+            self._timer = None
+    
+    def is_active(self):
+        """return True if the procedure is still referenced in the stack of 
+        procedures of its handler
+        """
+        return True
@@ -86,15 +86,54 @@ class CorenetServer(object):
                   'GTPU'  : '10.2.1.1'}
     #SERVER_ENB = {} # disabling S1AP server
     #
+    # With 'INET' set to socket.AF_UNIX, a local SCTP loopback transport is used
+    # instead of SCTP, 'IP' being the path of the UNIX socket (see SCTPLoopSocket
+    # in utils.py), e.g. for testing without kernel SCTP support
+    #
     # Server scheduler resolution:
     # This is the timeout on the main select() loop.
     SCHED_RES = 0.1
-    # This is the resolution (in sec) for the Server to start a thread that 
-    # checks the list of registered UE, and checks for ongoing NAS procedures 
-    # potentially in timeout.
+    # NAS procedures register their timer to the Server, which starts a thread
+    # aborting them as soon as their timer expires (the main loop timeout being
+    # shortened accordingly).
+    # SCHED_UE_TO is only checked as a flag: any non-zero value enables it, and
+    # the value itself is not used anymore as a checking period.
     # If set to 0, no check is made (so, NAS procedures can stall)
-    # It is useless to make it lower than the SCHED_RES.
     SCHED_UE_TO = 0.5
+    #
+    # Server mode:
+    # 'select': a single select() loop reads SCTP sockets, and decodes and
+    #           processes each PDU received inline
+    # 'event' : the best event loop available on the platform (e.g. epoll) 
+    #           reads SCTP sockets, and dispatches PDUs received to workers, 
+    #           PDUs from a given SCTP association being always processed by 
+    #           the same worker, hence in order
+    # In 'event' mode with several workers, a UE can be reached through several
+    # SCTP associations (e.g. during a handover): UE-associated PDUs are hence
+    # processed while holding the UE's lock (UEd._lock), and the UE, TMSI, 
+    # PTMSI, MTMSI and _UEpre tables are only looked-up / updated while holding
+    # the Server's UE lock (._UELock); the UE's lock must never be acquired 
+    # while holding the Server's UE lock
+    SERVER_MODE = 'select'
+    # number of workers, in 'event' mode
+    SERVER_WORKERS = 1
+    # maximum number of PDUs waiting to be processed by the workers, in 'event'
+    # mode; when reached, SCTP sockets are not read anymore until a worker 
+    # becomes available
+    SERVER_QUEUE_LEN = 1024
+    # factory for the workers' executor, in 'event' mode:
+    # it must return an object with a submit(fn, *args) method, like 
+    # concurrent.futures.Executor, which runs callables in the order they are
+    # submitted, and a shutdown(wait) method
+    # if None, a single-threaded ThreadPoolExecutor is used for each worker
+    SERVER_EXECUTOR = None
+    #
+    # number of ASN.1 contexts loaded at startup (see asn_acquire()), 
+    # one is required for each thread encoding or decoding PDUs concurrently
+    # (the server loop, the UE procedures' cleaner, and the workers in 'event'
+    # mode, for which one context each is added), other threads (e.g. the SMS
+    # server, or the interpreter) wait for a context to be released
+    ASN_CTX_NUM = 2
     
     #--------------------------------------------------------------------------#
     # corenet service handlers
@@ -107,6 +146,8 @@ class CorenetServer(object):
     GTPUd = GTPUd
     # SMS center
     SMSd  = None
+    # UE handler
+    UEd   = UEd
     
     #--------------------------------------------------------------------------#
     # corenet global config parameters
@@ -309,6 +350,8 @@ class CorenetServer(object):
             self._skc   = []
         # LUT for connected SCTP client and ENBId / HNBId
         self.SCTPCli    = {}
+        # selector, in 'event' mode
+        self._sel       = None
         #
         if self.SERVER_HNB:
             self._start_hnb_server()
@@ -325,6 +368,8 @@ class CorenetServer(object):
         #
         # init the dict for storing UE with unknown IMSI at attachment
         self._UEpre = {}
+        # lock for the UE, TMSI, PTMSI, MTMSI and _UEpre tables
+        self._UELock = RLock()
         # set the LUT for MSISDN to IMSI translation
         self.MSISDN = {}
         for imsi, cfgue in self.ConfigUE.items():
@@ -338,9 +383,18 @@ class CorenetServer(object):
         self.RAI.clear()
         self.TAI.clear()
         #
+        # init the heap of NAS procedures' timers
+        self.Timers = ProcTimers()
+        #
         # initialize GTP TEID UL counter
         self._GTP_TEID_UL = randint(1, 200000)
         #
+        # load ASN.1 contexts
+        if self.SERVER_MODE == 'event':
+            asn_pool_init(self.ASN_CTX_NUM + max(1, self.SERVER_WORKERS))
+        else:
+            asn_pool_init(self.ASN_CTX_NUM)
+        #
         # start sub-servers
         if self.AUCd:
             self.AUCd  = self.__class__.AUCd()
@@ -363,7 +417,10 @@ class CorenetServer(object):
         # start SCTP server for Home-NodeBs
         server_addr = (self.SERVER_HNB['IP'], self.SERVER_HNB['port'])
         try:
-            self._sk_hnb = sctp.sctpsocket_tcp(self.SERVER_HNB['INET'])
+            if self.SERVER_HNB['INET'] == socket.AF_UNIX:
+                self._sk_hnb = SCTPLoopSocket()
+            else:
+                self._sk_hnb = sctp.sctpsocket_tcp(self.SERVER_HNB['INET'])
             self.sctp_set_events(self._sk_hnb)
         except Exception as err:
             raise(CorenetErr('cannot create SCTP socket: {0}'.format(err)))
@@ -383,7 +440,10 @@ class CorenetServer(object):
         # start SCTP server for eNodeBs
         server_addr = (self.SERVER_ENB['IP'], self.SERVER_ENB['port'])
         try:
-            self._sk_enb = sctp.sctpsocket_tcp(self.SERVER_ENB['INET'])
+            if self.SERVER_ENB['INET'] == socket.AF_UNIX:
+                self._sk_enb = SCTPLoopSocket()
+            else:
+                self._sk_enb = sctp.sctpsocket_tcp(self.SERVER_ENB['INET'])
             self.sctp_set_events(self._sk_enb)
         except Exception as err:
             raise(CorenetErr('cannot create SCTP socket: {0}'.format(err)))
@@ -400,15 +460,17 @@ class CorenetServer(object):
         self._log('INF', 'SCTP ENB server started on address %r' % (server_addr, ))
     
     def _serve(self):
+        if self.SERVER_MODE == 'event':
+            return self._serve_event()
         # Main server loop, using select() to read sockets, the loop:
         # gets new SCTP clients,
         # gets new SCTP streams for connected SCTP clients,
         # and eventually timeouts running UE NAS procedures
-        self._running, T0 = True, time()
+        self._running = True
         while self._running:
             skr = []
             try:
-                skr = select(self.SCTPServ + tuple(self.SCTPCli), (), (), self.SCHED_RES)[0]
+                skr = select(self.SCTPServ + tuple(self.SCTPCli), (), (), self._get_sched_to())[0]
             except Exception as err:
                 self._log('ERR', 'select() error: %s' % err)
                 self._running = False
@@ -425,13 +487,75 @@ class CorenetServer(object):
                     # (whatever PDU)
                     self.handle_stream_msg(sk)
             #
-            # clean-up potential signalling procedures in timeout
-            if self.SCHED_UE_TO and time() - T0 > self.SCHED_UE_TO and \
-            not self._clean_ue_proc.isAlive():
-                # select() timeout or more than `SCHED_RES' seconds since 
-                # last timeout
+            # clean-up signalling procedures in timeout
+            self._sched_clean_ue_proc()
+    
+    def _serve_event(self):
+        # Event-driven server loop, using the default selector of the platform
+        # to read sockets, the loop:
+        # gets new SCTP clients (which are processed inline),
+        # gets new SCTP streams for connected SCTP clients, and dispatches them 
+        # to the workers,
+        # and eventually timeouts running UE NAS procedures
+        self._sel = selectors.DefaultSelector()
+        for sk in self.SCTPServ + tuple(self.SCTPCli):
+            self._sel.register(sk, selectors.EVENT_READ)
+        self._start_workers()
+        self._running = True
+        while self._running:
+            events = []
+            try:
+                events = self._sel.select(self._get_sched_to())
+            except Exception as err:
+                self._log('ERR', 'select() error: %s' % err)
+                self._running = False
+            #
+            for key, mask in events:
+                sk = key.fileobj
+                if sk == self._sk_enb:
+                    # new eNodeB STCP client (S1SetupRequest)
+                    self.handle_new_enb()
+                elif sk == self._sk_hnb:
+                    # new Home-NodeB SCTP client (HNBRegisterRequest)
+                    self.handle_new_hnb()
+                else:
+                    # read from connected SCTP client for a new stream,
+                    # and pass it to a worker
+                    self.dispatch_stream_msg(sk)
+            #
+            # clean-up signalling procedures in timeout
+            self._sched_clean_ue_proc()
+        #
+        self._stop_workers()
+        sel, self._sel = self._sel, None
+        sel.close()
+    
+    def _get_sched_to(self):
+        # main loop timeout, up to the expiration of the next procedure timer
+        if self.SCHED_UE_TO:
+            stop = self.Timers.next_stop()
+            if stop is not None:
+                return min(self.SCHED_RES, max(0, stop - time()))
+        return self.SCHED_RES
+    
+    def _sched_clean_ue_proc(self):
+        if self.SCHED_UE_TO and not self._clean_ue_proc.is_alive():
+            stop = self.Timers.next_stop()
+            if stop is not None and stop <= time():
                 self._clean_ue_proc = threadit(self.clean_ue_proc)
-                T0 = time()
+    
+    def _start_workers(self):
+        if self.SERVER_EXECUTOR is None:
+            new_exec = lambda: ThreadPoolExecutor(max_workers=1)
+        else:
+            new_exec = self.SERVER_EXECUTOR
+        self._workers  = [new_exec() for i in range(max(1, self.SERVER_WORKERS))]
+        self._work_sem = BoundedSemaphore(max(1, self.SERVER_QUEUE_LEN))
+    
+    def _stop_workers(self):
+        for worker in self._workers:
+            worker.shutdown(True)
+        self._workers = []
     
     def stop(self):
         self._running = False
@@ -453,9 +577,12 @@ class CorenetServer(object):
         self.SCTPCli.clear()
         #
         # stop sub-servers
-        self.AUCd.stop()
-        self.GTPUd.stop()
-        self.SMSd.stop()
+        if self.AUCd:
+            self.AUCd.stop()
+        if self.GTPUd:
+            self.GTPUd.stop()
+        if self.SMSd:
+            self.SMSd.stop()
     
     def sctp_handle_notif(self, sk, notif):
         self._log('DBG', 'SCTP notification: type %i, flags %i' % (notif.type, notif.flags))
@@ -509,8 +636,19 @@ class CorenetServer(object):
                 self._log('WNG', 'SCTP message truncated') 
         return buf, notif
     
+    def _add_sk(self, sk, ranid):
+        # keep track of the client
+        self.SCTPCli[sk] = ranid
+        if self._sel is not None:
+            self._sel.register(sk, selectors.EVENT_READ)
+    
     def _rem_sk(self, sk):
-        # close socket
+        # stop listening to it, and close socket
+        if self._sel is not None:
+            try:
+                self._sel.unregister(sk)
+            except (KeyError, ValueError):
+                pass
         sk.close()
         # select RAN client
         cli = self.RAN[self.SCTPCli[sk]]
@@ -555,6 +693,33 @@ class CorenetServer(object):
         if not buf:
             # WNG: it may be required to handle SCTP notifications, at some point...
             return
+        self.handle_stream_buf(sk, buf, notif)
+    
+    def dispatch_stream_msg(self, sk):
+        buf, notif = self._read_sk(sk)
+        if not buf:
+            return
+        # always select the same worker for a given SCTP association
+        worker = self._workers[sk.fileno() % len(self._workers)]
+        # wait for a place in the queue
+        self._work_sem.acquire()
+        try:
+            worker.submit(self._work_stream_msg, sk, buf, notif)
+        except RuntimeError:
+            # worker shutdown
+            self._work_sem.release()
+    
+    def _work_stream_msg(self, sk, buf, notif):
+        try:
+            if sk in self.SCTPCli:
+                # the client may have disconnected in the meantime
+                self.handle_stream_buf(sk, buf, notif)
+        except Exception as err:
+            self._log('ERR', 'unable to process SCTP stream: %s' % err)
+        finally:
+            self._work_sem.release()
+    
+    def handle_stream_buf(self, sk, buf, notif):
         # getting SCTP ppid, stream id and eNB/HNB handler
         ppid, sid, ranid = ntohl(notif.ppid), notif.stream, self.SCTPCli[sk]
         ran = self.RAN[ranid]
@@ -578,7 +743,7 @@ class CorenetServer(object):
             else:
                 pdu_rx = PDU_HNBAP()
                 if hnb.TRACE_ASN_HNBAP:
-                    hnb._log('TRACE_ASN_HNBAP_UL', PDU_HNBAP.to_asn1())
+                    hnb._log('TRACE_ASN_HNBAP_UL', asn_trace(PDU_HNBAP))
                 asn_hnbap_release()
                 pdu_tx = hnb.process_hnbap_pdu(pdu_rx)
             for pdu in pdu_tx:
@@ -603,7 +768,7 @@ class CorenetServer(object):
             else:
                 pdu_rx = PDU_RUA()
                 if hnb.TRACE_ASN_RUA:
-                    hnb._log('TRACE_ASN_RUA_UL', PDU_HNBAP.to_asn1())
+                    hnb._log('TRACE_ASN_RUA_UL', asn_trace(PDU_HNBAP))
                 asn_rua_release()
                 pdu_tx = hnb.process_rua_pdu(pdu_rx)
             for pdu in pdu_tx:
@@ -627,7 +792,7 @@ class CorenetServer(object):
             else:
                 pdu_rx = PDU_S1AP()
                 if enb.TRACE_ASN_S1AP:
-                    enb._log('TRACE_ASN_S1AP_UL', PDU_S1AP.to_asn1())
+                    enb._log('TRACE_ASN_S1AP_UL', asn_trace(PDU_S1AP))
                 asn_s1ap_release()
                 if sid == enb.SKSid:
                     # non-UE-associated signalling
@@ -650,7 +815,7 @@ class CorenetServer(object):
             return
         PDU_HNBAP.set_val(pdu)
         if hnb.TRACE_ASN_HNBAP:
-            hnb._log('TRACE_ASN_HNBAP_DL', PDU_HNBAP.to_asn1())
+            hnb._log('TRACE_ASN_HNBAP_DL', asn_trace(PDU_HNBAP))
         buf = PDU_HNBAP.to_aper()
         asn_hnbap_release()
         return self._write_sk(hnb.SK, buf, ppid=SCTP_PPID_HNBAP)
@@ -661,7 +826,7 @@ class CorenetServer(object):
             return
         PDU_RUA.set_val(pdu)
         if hnb.TRACE_ASN_RUA:
-            hnb._log('TRACE_ASN_RUA_DL', PDU_RUA.to_asn1())
+            hnb._log('TRACE_ASN_RUA_DL', asn_trace(PDU_RUA))
         buf = PDU_RUA.to_aper()
         asn_rua_release()
         return self._write_sk(hnb.SK, buf, ppid=SCTP_PPID_RUA)
@@ -672,7 +837,7 @@ class CorenetServer(object):
             return
         PDU_S1AP.set_val(pdu)
         if enb.TRACE_ASN_S1AP:
-            enb._log('TRACE_ASN_S1AP_DL', PDU_S1AP.to_asn1())
+            enb._log('TRACE_ASN_S1AP_DL', asn_trace(PDU_S1AP))
         buf = PDU_S1AP.to_aper()
         asn_s1ap_release()
         return self._write_sk(enb.SK, buf, ppid=SCTP_PPID_S1AP, stream=sid)
@@ -726,7 +891,7 @@ class CorenetServer(object):
         else:
             PDU_S1AP.set_val(pdu)
             if ENBd.TRACE_ASN_S1AP:
-                self._log('TRACE_ASN_S1AP_DL', PDU_S1AP.to_asn1())
+                self._log('TRACE_ASN_S1AP_DL', asn_trace(PDU_S1AP))
             self._write_sk(sk, PDU_S1AP.to_aper(), ppid=SCTP_PPID_S1AP, stream=0)
             asn_s1ap_release()
         if self.SERVER_ENB['errclo']:
@@ -755,12 +920,13 @@ class CorenetServer(object):
         try:
             PDU_S1AP.from_aper(buf)
         except:
+            asn_s1ap_release()
             self._log('WNG', 'invalid S1AP PDU transfer-syntax: %s'\
                       % hexlify(buf).decode('ascii'))
             # return nothing, no need to bother
             return
         if ENBd.TRACE_ASN_S1AP:
-            self._log('TRACE_ASN_S1AP_UL', PDU_S1AP.to_asn1())
+            self._log('TRACE_ASN_S1AP_UL', asn_trace(PDU_S1AP))
         pdu_rx = PDU_S1AP()
         asn_s1ap_release()
         #
@@ -803,7 +969,7 @@ class CorenetServer(object):
         # process the initial PDU
         pdu_tx = enb.process_s1ap_pdu(pdu_rx)
         # keep track of the client
-        self.SCTPCli[sk] = ENBId
+        self._add_sk(sk, ENBId)
         # add the enb TAI to the Server location tables
         if enb.Config:
             self._set_enb_loc(enb)
@@ -815,7 +981,7 @@ class CorenetServer(object):
         for pdu in pdu_tx:
             PDU_S1AP.set_val(pdu)
             if ENBd.TRACE_ASN_S1AP:
-                enb._log('TRACE_ASN_S1AP_DL', PDU_S1AP.to_asn1())
+                enb._log('TRACE_ASN_S1AP_DL', asn_trace(PDU_S1AP))
             self._write_sk(sk, PDU_S1AP.to_aper(), ppid=SCTP_PPID_S1AP, stream=sid)
         asn_s1ap_release()
     
@@ -834,6 +1000,16 @@ class CorenetServer(object):
             except:
                 self._log('ERR', 'ENB not referenced into the TAI table')
     
+    def set_enb_config(self, enb, config):
+        """set the config of the connected eNB enb (e.g. after an eNB 
+        Configuration Update), and update the Server location tables
+        """
+        if enb.Config:
+            self._unset_enb_loc(enb)
+        enb.Config = config
+        if enb.Config:
+            self._set_enb_loc(enb)
+    
     #--------------------------------------------------------------------------#
     # Home-NodeB connection
     #--------------------------------------------------------------------------#
@@ -881,7 +1057,7 @@ class CorenetServer(object):
         else:
             PDU_HNBAP.set_val(pdu)
             if HNBd.TRACE_ASN_HNBAP:
-                self._log('TRACE_ASN_HNBAP_DL', PDU_HNBAP.to_asn1())
+                self._log('TRACE_ASN_HNBAP_DL', asn_trace(PDU_HNBAP))
             self._write_sk(sk, PDU_HNBAP.to_aper(), ppid=SCTP_PPID_HNBAP)
             asn_hnbap_release()
         if self.SERVER_HNB['errclo']:
@@ -909,12 +1085,13 @@ class CorenetServer(object):
         try:
             PDU_HNBAP.from_aper(buf)
         except:
+            asn_hnbap_release()
             self._log('WNG', 'invalid HNBAP PDU transfer-syntax: %s'\
                       % hexlify(buf).decode('ascii'))
             # return nothing, no need to bother
             return
         if HNBd.TRACE_ASN_HNBAP:
-            self._log('TRACE_ASN_HNBAP_UL', PDU_HNBAP.to_asn1())
+            self._log('TRACE_ASN_HNBAP_UL', asn_trace(PDU_HNBAP))
         pdu = PDU_HNBAP()
         asn_hnbap_release()
         #
@@ -958,7 +1135,7 @@ class CorenetServer(object):
         # process the initial PDU
         ret = hnb.process_hnbap_pdu(pdu)
         # keep track of the client
-        self.SCTPCli[sk] = HNBId
+        self._add_sk(sk, HNBId)
         # add the hnb LAI / RAI to the Server location tables
         if hnb.Config:
             self._set_hnb_loc(hnb)
@@ -970,7 +1147,7 @@ class CorenetServer(object):
         for retpdu in ret:
             PDU_HNBAP.set_val(retpdu)
             if HNBd.TRACE_ASN_HNBAP:
-                hnb._log('TRACE_ASN_HNBAP_DL', PDU_HNBAP.to_asn1())
+                hnb._log('TRACE_ASN_HNBAP_DL', asn_trace(PDU_HNBAP))
             self._write_sk(sk, PDU_HNBAP.to_aper(), ppid=SCTP_PPID_HNBAP)
         asn_hnbap_release()
     
@@ -1014,49 +1191,51 @@ class CorenetServer(object):
             the UEd instance corresponding to this TMSI if already available
             a new UEd instance which will take care of requesting the IMSI
         """
-        if 'imsi' in kw:
-            imsi = kw['imsi']
-            if imsi in self.UE:
-                # UEd already available
-                return self.UE[imsi]
-            elif imsi in self.ConfigUE:
-                # UEd has to be instantiated
-                self.UE[imsi] = UEd(self, imsi, config=self.ConfigUE[imsi])
-                return self.UE[imsi]
-            elif self.UE_ATTACH_FILTER and re.match(self.UE_ATTACH_FILTER, imsi) and \
-            '*' in self.ConfigUE:
-                self._log('WNG', 'attaching an UE without dedicated configuration, IMSI %s' % imsi)
-                self.UE[imsi] = UEd(self, imsi, config=self.ConfigUE['*'])
-                return self.UE[imsi]
-            else:
-                self._log('INF', 'IMSI not allowed, %s' % imsi)
-        elif 'tmsi' in kw:
-            tmsi = kw['tmsi']
-            if tmsi in self.TMSI:
-                return self.UE[self.TMSI[tmsi]]
-            else:
-                # creating a UEd instance which will request IMSI
-                return self.create_dummy_ue(tmsi=tmsi)
-        elif 'ptmsi' in kw:
-            ptmsi = kw['ptmsi']
-            if ptmsi in self.PTMSI:
-                return self.UE[self.PTMSI[ptmsi]]
-            else:
-                # creating a UEd instance which will request IMSI
-                return self.create_dummy_ue(ptmsi=ptmsi)
-        elif 'mtmsi' in kw:
-            mtmsi = kw['mtmsi']
-            if mtmsi in self.MTMSI:
-                return self.UE[self.MTMSI[mtmsi]]
-            else:
-                # creating a UEd instance which will request IMSI
-                return self.create_dummy_ue(mtmsi=mtmsi)
-        return None
+        with self._UELock:
+            if 'imsi' in kw:
+                imsi = kw['imsi']
+                if imsi in self.UE:
+                    # UEd already available
+                    return self.UE[imsi]
+                elif imsi in self.ConfigUE:
+                    # UEd has to be instantiated
+                    self.UE[imsi] = self.UEd(self, imsi, config=self.ConfigUE[imsi])
+                    return self.UE[imsi]
+                elif self.UE_ATTACH_FILTER and re.match(self.UE_ATTACH_FILTER, imsi) and \
+                '*' in self.ConfigUE:
+                    self._log('WNG', 'attaching an UE without dedicated configuration, IMSI %s' % imsi)
+                    self.UE[imsi] = self.UEd(self, imsi, config=self.ConfigUE['*'])
+                    return self.UE[imsi]
+                else:
+                    self._log('INF', 'IMSI not allowed, %s' % imsi)
+            elif 'tmsi' in kw:
+                tmsi = kw['tmsi']
+                if tmsi in self.TMSI:
+                    return self.UE[self.TMSI[tmsi]]
+                else:
+                    # creating a UEd instance which will request IMSI
+                    return self.create_dummy_ue(tmsi=tmsi)
+            elif 'ptmsi' in kw:
+                ptmsi = kw['ptmsi']
+                if ptmsi in self.PTMSI:
+                    return self.UE[self.PTMSI[ptmsi]]
+                else:
+                    # creating a UEd instance which will request IMSI
+                    return self.create_dummy_ue(ptmsi=ptmsi)
+            elif 'mtmsi' in kw:
+                mtmsi = kw['mtmsi']
+                if mtmsi in self.MTMSI:
+                    return self.UE[self.MTMSI[mtmsi]]
+                else:
+                    # creating a UEd instance which will request IMSI
+                    return self.create_dummy_ue(mtmsi=mtmsi)
+            return None
     
     def create_dummy_ue(self, **kw):
         assert( len(kw) == 1 )
-        ued = UEd(self, '', **kw)
-        self._UEpre[tuple(kw.values())[0]] = ued
+        ued = self.UEd(self, '', **kw)
+        with self._UELock:
+            self._UEpre[tuple(kw.values())[0]] = ued
         return ued
     
     def is_imsi_allowed(self, imsi):
@@ -1079,68 +1258,17 @@ class CorenetServer(object):
     
     def clean_ue_proc(self):
         #self._log('DBG', 'clean_ue_proc()')
-        # go over all UE and abort() NAS signalling procedures in timeout
-        T = time()
-        for ue in self.UE.values():
-            if ue.IuCS is not None:
-                if ue.IuCS.MM.Proc:
-                    for P in ue.IuCS.MM.Proc:
-                        if hasattr(P, 'TimerStop') and T > P.TimerStop:
-                            P._log('WNG', 'timeout: aborting')
-                            P.abort()
-                
-                #if ue.IuCS.CC.Proc:
-                #    for P in ue.IuCS.CC.Proc.values():
-                #        if hasattr(P, 'TimerStop') and T > P.TimerStop:
-                #            P._log('WNG', 'timeout: aborting')
-                #            P.abort()
-                
-                if ue.IuCS.SMS.Proc:
-                    for P in tuple(ue.IuCS.SMS.Proc.values()):
-                        if hasattr(P, 'TimerStop') and T > P.TimerStop:
-                            P._log('WNG', 'timeout: aborting')
-                            P.abort()
-                
-                #if ue.IuCS.SS.Proc:
-                #    for P in ue.IuCS.SS.Proc.values():
-                #        if hasattr(P, 'TimerStop') and T > P.TimerStop:
-                #            P._log('WNG', 'timeout: aborting')
-                #            P.abort()
-            
-            
-            if ue.IuPS is not None:
-            
-                if ue.IuPS.GMM.Proc:
-                    for P in ue.IuPS.GMM.Proc:
-                        if hasattr(P, 'TimerStop') and T > P.TimerStop:
-                            P._log('WNG', 'timeout: aborting')
-                            P.abort()
-                
-                #if ue.IuPS.SM.Proc:
-                #    for P in tuple(ue.IuPS.SM.Proc.values()):
-                #        if hasattr(P, 'TimerStop') and T > P.TimerStop:
-                #            P._log('WNG', 'timeout: aborting')
-                #            P.abort()
-            
-            if ue.S1 is not None:
-            
-                if ue.S1.EMM.Proc:
-                    for P in ue.S1.EMM.Proc:
-                        if hasattr(P, 'TimerStop') and T > P.TimerStop:
-                            P._log('WNG', 'timeout: aborting')
-                            P.abort()
-                
-                if ue.S1.ESM.Proc:
-                    for P in tuple(ue.S1.ESM.Proc.values()):
-                        if hasattr(P, 'TimerStop') and T > P.TimerStop:
-                            P._log('WNG', 'timeout: aborting')
-                            P.abort()
-                
-                if ue.S1.SMS.Proc:
-                    for P in tuple(ue.S1.SMS.Proc.values()):
-                        if hasattr(P, 'TimerStop') and T > P.TimerStop:
-                            P._log('WNG', 'timeout: aborting')
-                            P.abort()
+        # abort() NAS signalling procedures with their timer expired
+        for P in self.Timers.pop_expired(time()):
+            if hasattr(P, 'UE'):
+                ued = P.UE
+            else:
+                # SMS procedure
+                ued = P.SMS.UE
+            with ued._lock:
+                if P.is_active():
+                    P._log('WNG', 'timeout: aborting')
+                    P.abort()
     
     def get_gtp_teid(self):
         if self._GTP_TEID_UL > 4294967294:
@@ -1159,5 +1287,6 @@ class CorenetServer(object):
             self.SMSd.discard_rp(rp_msg, msisdn)
             return
         ue = self.UE[imsi]
-        return ue.smsrp_downlink(rp_msg)
+        with ue._lock:
+            return ue.smsrp_downlink(rp_msg)
 
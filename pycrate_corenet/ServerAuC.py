@@ -34,6 +34,11 @@ HOWTO:
 -> files AuC.db need to be edited with IMSI and authentication parameters from your (U)SIM cards
 -> AuC.AUC_DB_PATH can be change if the AuC.db file is put elsewhere
 -> AuC.OP needs to be changed according to your Milenage customization
+-> AuC.AV_POOL_LEN sets the number of 3G / 4G vectors pre-computed in background
+   for each IMSI requesting vectors, 0 disables pools
+-> AuC.AUC_DB_BACKEND can be set to 'sqlite' for large subscribers databases:
+   the AuC.sqlite database is then created from the AuC.db file at 1st start
+   (this can also be done with the tools/pycrate_aucdb.py script)
 
 2) To use the AuC (in case your IMSI is '001010000000001'):
 >>> MyAuc = AuC()
@@ -50,9 +55,11 @@ __all__ = ['AuC']
 
 import os
 import time as timemod
-from binascii import hexlify, unhexlify
-from struct   import pack, unpack
-from time     import sleep
+from binascii    import hexlify, unhexlify
+from collections import deque
+from struct      import pack, unpack
+from threading   import RLock
+from time        import sleep
 
 try:
     from os import urandom as genrand
@@ -71,7 +78,8 @@ except ImportError as err:
     print('CryptoMobile library is required for Milenage and Comp-128')
     raise(err)
 
-from .utils import *
+from .utils       import *
+from .ServerAuCDB import AuCDBFile, AuCDBSQLite
 
 
 class AuC:
@@ -87,6 +95,17 @@ class AuC:
     AUC_DB_PATH = os.path.dirname(os.path.abspath( __file__ )) + os.sep
     #AUC_DB_PATH = 'C:\Python27\Lib\sitepackages\pycrate_corenet\'
     
+    # subscribers database backend:
+    # 'file'  : the AuC.db text file, entirely loaded at startup, and rewritten
+    #           by .save()
+    # 'sqlite': the AUC_DB_SQLITE sqlite3 database (in WAL mode), created from
+    #           the AuC.db file if it does not exist, with SQN updates committed 
+    #           by batch of SQLITE_COMMIT_NUM, or every SQLITE_COMMIT_PERIOD seconds
+    AUC_DB_BACKEND       = 'file'
+    AUC_DB_SQLITE        = 'AuC.sqlite'
+    SQLITE_COMMIT_NUM    = 256
+    SQLITE_COMMIT_PERIOD = 1.0
+    
     # when rewriting the AuC.db, do a back-up of the last version of the file
     DO_BACKUP = True
     
@@ -97,6 +116,20 @@ class AuC:
     # SQN incrementation when a resynch is required by a USIM card
     SQN_SYNCH_STEP = 2
     
+    # authentication vectors pools (disabled by default):
+    # for each IMSI requesting a 3G or 4G vector, AV_POOL_LEN vectors are 
+    # pre-computed in background with consecutive SQN, so that next requests
+    # only pop a vector from the pool;
+    # pools are released after AV_POOL_TTL seconds without request, or after
+    # a SQN resynchronization;
+    # each pre-computed vector consumes its SQN in the db, hence vectors that
+    # are released unused make the SQN jump by up to AV_POOL_LEN: this stays
+    # within the USIM acceptance window (TS 33.102, annex C) for small values
+    # only;
+    # set AV_POOL_LEN to 0 for computing all vectors on request
+    AV_POOL_LEN = 0
+    AV_POOL_TTL = 300
+    
     # PLMN restriction for returning 4G vectors
     # provide a list of allowed PLMN, or None for disabling the filter
     #PLMN_FILTER = ['20869']
@@ -106,42 +139,55 @@ class AuC:
     def __init__(self):
         """start the AuC
         
-        open AuC.db file
-        parse it into self.db (dict), containing IMSI: (K, SQN [, OP])
+        open the subscribers database into self.db (AuCDBFile or AuCDBSQLite), 
+        containing IMSI: [K, ALG2, SQN, OP]
             IMSI: string of digits
             K   : 16 bytes buffer
             ALG2: integer (0, 1, 2 or 3, identifies the 2G auth algorithm)
             SQN : unsigned integer
             OP  : subscriber specific OP, distinct from self.OP, optional field
         """
-        self.db = {}
         try:
-            # get 3G authentication database AuC.db
-            db_fd = open('%sAuC.db' % self.AUC_DB_PATH, 'r')
-            # parse it into a dict object with IMSI as key
-            for line in db_fd.readlines():
-                if line[0] != '#' and line.count(';') >= 3:
-                    fields = line[:-1].split(';')
-                    IMSI   = str( fields[0] )
-                    K      = unhexlify( fields[1].encode('ascii') )
-                    ALG2   = int( fields[2] )
-                    SQN    = int( fields[3] )
-                    if len(fields) > 4 and len(fields) == 32:
-                        OP = unhexlify( fields[4].encode('ascii') )
-                    else:
-                        OP = None
-                    self.db[IMSI] = [ K, ALG2, SQN, OP ]
-            self._log('INF', 'AuC.db file opened: %i record(s) found' % len(self.db))
-            # close the file
-            db_fd.close()
+            if self.AUC_DB_BACKEND == 'sqlite':
+                path = self.AUC_DB_PATH + self.AUC_DB_SQLITE
+                init = not os.path.exists(path)
+                self.db = AuCDBSQLite(path, self.SQLITE_COMMIT_NUM,
+                                      self.SQLITE_COMMIT_PERIOD, self._log)
+                if init:
+                    # migrate the AuC.db file
+                    self.db.import_file('%sAuC.db' % self.AUC_DB_PATH)
+                self._log('INF', '%s opened: %i record(s) found'\
+                          % (self.AUC_DB_SQLITE, len(self.db)))
+            else:
+                # get 3G authentication database AuC.db
+                self.db = AuCDBFile('%sAuC.db' % self.AUC_DB_PATH, self.DO_BACKUP,
+                                    self._log)
+                self._log('INF', 'AuC.db file opened: %i record(s) found' % len(self.db))
         except Exception as err:
-            self._log('ERR', 'unable to read AuC.db, path: %s' % self.AUC_DB_PATH)
+            self._log('ERR', 'unable to read the AuC database, path: %s' % self.AUC_DB_PATH)
             raise(err)
-        self._save_required = False
         #
         # initiatlize the Milenage algo with the AuC-defined OP
         self.Milenage = Milenage(self.OP)
         #
+        # authentication vectors pools, IMSI: [params, deque of (SQN, vector), last use]
+        # with params being (SN_ID, AMF) for 4G, (None, AMF) for 3G
+        self._av_pool  = {}
+        # last SQN returned for each IMSI with a pool, vectors with a lower SQN 
+        # are discarded from the pool
+        self._av_sqn   = {}
+        # IMSI for which the pool has to be refilled
+        self._av_todo  = set()
+        self._av_lock  = RLock()
+        self._av_event = Event()
+        if self.AV_POOL_LEN:
+            # the pool thread uses its own Milenage instance
+            self._av_milenage = Milenage(self.OP)
+            self._av_running  = True
+            self._av_thread   = threadit(self._av_loop)
+        else:
+            self._av_thread   = None
+        #
         self._log('DBG', 'AuC started')
     
     def _log(self, logtype='DBG', msg=''):
@@ -150,50 +196,20 @@ class AuC:
     
     def save(self):
         """
-        optionally save old AuC.db with timestamp suffix (if self.DO_BACKUP is set)
-        write the current content of self.db dict into AuC.db, with updated SQN
-        values
+        save SQN updates in the database:
+        with the 'file' backend, optionally save old AuC.db with timestamp suffix 
+        (if self.DO_BACKUP is set), and write the current content of self.db 
+        into AuC.db;
+        with the 'sqlite' backend, commit pending SQN updates
         """
-        if not self._save_required:
-            return
-        
-        T = timemod.strftime( '20%y%m%d_%H%M', timemod.gmtime() )
-        
-        # get header from original file AuC.db
-        header = []
-        file_db = open('%sAuC.db' % self.AUC_DB_PATH)
-        for line in file_db:
-            if line[0] == '#':
-                header.append( line )
-            else:
-                break
-        header = ''.join(header) + '\n'
-        file_db.close()
-        
-        if self.DO_BACKUP:
-            # save the last current version of AuC.db
-            os.rename( '%sAuC.db' % self.AUC_DB_PATH,
-                       '%sAuC.%s.db' % (self.AUC_DB_PATH, T) )
-            self._log('DBG', 'old AuC.db saved with timestamp')
-        
-        # save the current self.db into a new AuC.db file
-        file_db = open('%s/AuC.db' % self.AUC_DB_PATH, 'w')
-        file_db.write( header )
-        indexes = list(self.db.keys())
-        indexes.sort()
-        for IMSI in indexes:
-            K, ALG2, SQN, OP = self.db[IMSI]
-            if OP is not None:
-                # OP additional parameter
-                file_db.write('%s;%s;%i;%i;%s;\n'\
-                    % (IMSI, hexlify(K).decode('ascii'), ALG2, SQN, hexlify(OP).decode('ascii')))
-            else:
-                file_db.write('%s;%s;%i;%i;\n'\
-                    % (IMSI, hexlify(K).decode('ascii'), ALG2, SQN))
-        file_db.close()
-        self._log('INF', 'current db saved to AuC.db file')
+        self.db.save()
     
-    stop = save
+    def stop(self):
+        if self._av_thread:
+            self._av_running = False
+            self._av_event.set()
+            self._av_thread.join()
+        self.db.close()
     
     def make_2g_vector(self, IMSI, RAND=None):
         """
@@ -235,32 +251,27 @@ class AuC:
                      hexlify(Kc).decode('ascii')))
         return RAND, RES, Kc
     
-    def make_3g_vector(self, IMSI, AMF=b'\0\0', RAND=None):
-        '''
-        return a 3G authentication vector "quintuplet":
-        RAND [16 bytes], XRES [8 bytes], AUTN [16 bytes], CK [16 bytes], IK [16 bytes]
-        or None if the IMSI is not defined in the db or does not support Milenage
-        
-        RAND can be passed as argument
-        '''
-        # lookup db for authentication Key and counter for IMSI
-        try:
-            K_ALG2_SQN_OP = self.db[IMSI]
-        except:
-            self._log('WNG', '[make_3g_vector] IMSI %s not present in AuC.db' % IMSI)
-            return None
-        #
-        K, ALG2, SQN, OP = K_ALG2_SQN_OP
-        #
-        if SQN == -1:
-            # Milenage not supported
-            self._log('WNG', '[make_3g_vector] IMSI %s does not support Milenage' % IMSI)
-            return None
-        #
-        # increment SQN counter in the db
-        K_ALG2_SQN_OP[2] += 1
-        self._save_required = True
-        
+    def _reserve_sqn(self, IMSI):
+        """
+        return (K, SQN, OP) for IMSI and increment SQN in the db, 
+        or None if the IMSI is not defined in the db, 
+        SQN is -1 (and not incremented) if Milenage is not supported
+        """
+        with self._av_lock:
+            try:
+                K, ALG2, SQN, OP = self.db[IMSI]
+            except KeyError:
+                return None
+            if SQN != -1:
+                # increment SQN counter in the db
+                self.db.set_sqn(IMSI, SQN + 1)
+            return K, SQN, OP
+    
+    def _milenage(self, mil, K, SQN, OP, AMF, RAND):
+        """
+        return RAND, XRES, AUTN, CK, IK, SQN_X_AK computed with the Milenage 
+        instance mil
+        """
         # pack SQN from integer to a 48-bit buffer
         SQNb = b'\0\0' + pack('>I', SQN)
         
@@ -270,13 +281,156 @@ class AuC:
         
         # compute Milenage functions
         if OP is not None:
-            XRES, CK, IK, AK = self.Milenage.f2345( K, RAND, OP )
-            MAC_A            = self.Milenage.f1( K, RAND, SQNb, AMF, OP )
-            AUTN             = xor_buf( SQNb, AK ) + AMF + MAC_A
+            XRES, CK, IK, AK = mil.f2345( K, RAND, OP )
+            MAC_A            = mil.f1( K, RAND, SQNb, AMF, OP )
         else:
-            XRES, CK, IK, AK = self.Milenage.f2345( K, RAND )
-            MAC_A            = self.Milenage.f1( K, RAND, SQNb, AMF )
-            AUTN             = xor_buf( SQNb, AK ) + AMF + MAC_A
+            XRES, CK, IK, AK = mil.f2345( K, RAND )
+            MAC_A            = mil.f1( K, RAND, SQNb, AMF )
+        SQN_X_AK = xor_buf( SQNb, AK )
+        AUTN     = SQN_X_AK + AMF + MAC_A
+        return RAND, XRES, AUTN, CK, IK, SQN_X_AK
+    
+    def _make_vector(self, mil, K, SQN, OP, params, RAND=None):
+        """
+        return a 3G (params[0] is None) or 4G (params[0] is SN_ID) auth vector
+        """
+        SN_ID, AMF = params
+        RAND, XRES, AUTN, CK, IK, SQN_X_AK = self._milenage(mil, K, SQN, OP, AMF, RAND)
+        if SN_ID is None:
+            return RAND, XRES, AUTN, CK, IK
+        else:
+            # convert to LTE master key
+            return RAND, XRES, AUTN, conv_A2(CK, IK, SN_ID, SQN_X_AK)
+    
+    def _av_pop(self, IMSI, params):
+        """
+        return (SQN, vector) from the pool of IMSI for params, or None
+        """
+        with self._av_lock:
+            pool = self._av_pool.get(IMSI)
+            if pool is None:
+                return None
+            elif pool[0] != params:
+                # vectors are requested with other params, e.g. another SN_ID
+                del self._av_pool[IMSI]
+                return None
+            pool[2] = time()
+            last, ret = self._av_sqn.get(IMSI, -1), None
+            while pool[1]:
+                SQN, vect = pool[1].popleft()
+                if SQN > last:
+                    self._av_sqn[IMSI] = SQN
+                    ret = (SQN, vect)
+                    break
+            self._av_todo.add(IMSI)
+        self._av_event.set()
+        return ret
+    
+    def _av_push(self, IMSI, params, SQN):
+        """
+        record SQN as the last one returned for IMSI, and request a refill of 
+        its pool for params
+        """
+        with self._av_lock:
+            if SQN > self._av_sqn.get(IMSI, -1):
+                self._av_sqn[IMSI] = SQN
+            if IMSI not in self._av_pool:
+                self._av_pool[IMSI] = [params, deque(), time()]
+            self._av_todo.add(IMSI)
+        self._av_event.set()
+    
+    def _av_flush(self, IMSI):
+        """
+        release the pool of IMSI, vectors being computed for it are discarded
+        """
+        with self._av_lock:
+            if IMSI in self._av_pool:
+                del self._av_pool[IMSI]
+            if IMSI in self._av_sqn:
+                del self._av_sqn[IMSI]
+    
+    def _av_refill(self, IMSI):
+        while self._av_running:
+            with self._av_lock:
+                pool = self._av_pool.get(IMSI)
+                if pool is None or len(pool[1]) >= self.AV_POOL_LEN:
+                    return
+                rec = self._reserve_sqn(IMSI)
+            if rec is None or rec[1] == -1:
+                self._av_flush(IMSI)
+                return
+            K, SQN, OP = rec
+            vect = self._make_vector(self._av_milenage, K, SQN, OP, pool[0])
+            with self._av_lock:
+                if self._av_pool.get(IMSI) is not pool:
+                    # pool flushed in the meantime
+                    return
+                pool[1].append( (SQN, vect) )
+    
+    def _av_loop(self):
+        """
+        pool thread: refill the pools requested, and release the unused ones
+        """
+        while self._av_running:
+            self._av_event.wait(self.AV_POOL_TTL)
+            with self._av_lock:
+                self._av_event.clear()
+                todo, self._av_todo = self._av_todo, set()
+            for IMSI in todo:
+                try:
+                    self._av_refill(IMSI)
+                except Exception as err:
+                    self._log('ERR', '[pool] IMSI %s, unable to compute vectors: %s'\
+                              % (IMSI, err))
+                    self._av_flush(IMSI)
+            #
+            T = time() - self.AV_POOL_TTL
+            with self._av_lock:
+                for IMSI in [IMSI for IMSI, pool in self._av_pool.items() if pool[2] < T]:
+                    del self._av_pool[IMSI]
+                    self._av_sqn.pop(IMSI, None)
+    
+    def _get_vector(self, IMSI, params, RAND, meth):
+        """
+        return (SQN, vector) for a 3G or 4G vector request, from the pool of 
+        IMSI or computed on request, or None
+        """
+        if RAND is None and self._av_thread:
+            ret = self._av_pop(IMSI, params)
+            if ret is not None:
+                return ret
+        #
+        # lookup db for authentication Key and counter for IMSI
+        rec = self._reserve_sqn(IMSI)
+        if rec is None:
+            self._log('WNG', '[%s] IMSI %s not present in AuC.db' % (meth, IMSI))
+            return None
+        #
+        K, SQN, OP = rec
+        #
+        if SQN == -1:
+            # Milenage not supported
+            self._log('WNG', '[%s] IMSI %s does not support Milenage' % (meth, IMSI))
+            return None
+        #
+        vect = self._make_vector(self.Milenage, K, SQN, OP, params, RAND)
+        if self._av_thread:
+            self._av_push(IMSI, params, SQN)
+        return SQN, vect
+    
+    def make_3g_vector(self, IMSI, AMF=b'\0\0', RAND=None):
+        '''
+        return a 3G authentication vector "quintuplet":
+        RAND [16 bytes], XRES [8 bytes], AUTN [16 bytes], CK [16 bytes], IK [16 bytes]
+        or None if the IMSI is not defined in the db or does not support Milenage
+        
+        RAND can be passed as argument, otherwise the vector may be taken from 
+        the IMSI pool
+        '''
+        ret = self._get_vector(IMSI, (None, AMF), RAND, 'make_3g_vector')
+        if ret is None:
+            return None
+        SQN, (RAND, XRES, AUTN, CK, IK) = ret
         
         # return auth vector
         self._log('DBG', '[make_3g_vector] IMSI %s, SQN %i: RAND %s, XRES %s, AUTN %s, CK %s, IK %s'\
@@ -293,7 +447,8 @@ class AuC:
         or SN_ID is invalid or not allowed
         
         SN_ID is the serving network identity, bcd-encoded buffer
-        RAND can be passed as argument
+        RAND can be passed as argument, otherwise the vector may be taken from 
+        the IMSI pool
         """
         if not isinstance(SN_ID, bytes_types) or len(SN_ID) != 3:
             self._log('WNG', '[make_4g_vector] SN_ID invalid, %s' % hexlify(SN_ID).decode('ascii'))
@@ -302,45 +457,10 @@ class AuC:
             self._log('WNG', '[make_4g_vector] SN_ID not allowed, %s' % hexlify(SN_ID).decode('ascii'))
             return None
         #
-        # lookup db for authentication Key and counter for IMSI
-        try:
-            K_ALG2_SQN_OP = self.db[IMSI]
-        except:
-            self._log('WNG', '[make_4g_vector] IMSI %s not present in AuC.db' % IMSI)
-            return None
-        #
-        K, ALG2, SQN, OP = K_ALG2_SQN_OP
-        #
-        if SQN == -1:
-            # Milenage not supported
-            self._log('WNG', '[make_4g_vector] IMSI %s does not support Milenage' % IMSI)
+        ret = self._get_vector(IMSI, (SN_ID, AMF), RAND, 'make_4g_vector')
+        if ret is None:
             return None
-        #
-        # increment SQN counter in the db
-        K_ALG2_SQN_OP[2] += 1
-        self._save_required = True
-        
-        # pack SQN from integer to a 48-bit buffer
-        SQNb = b'\0\0' + pack('>I', SQN)
-        #
-        # generate challenge
-        if RAND is None:
-            RAND = genrand(16)
-        
-        # compute Milenage functions
-        if OP is not None:
-            XRES, CK, IK, AK = self.Milenage.f2345( K, RAND, OP )
-            MAC_A            = self.Milenage.f1( K, RAND, SQNb, AMF, OP )
-            SQN_X_AK         = xor_buf( SQNb, AK )
-            AUTN             = SQN_X_AK + AMF + MAC_A
-        else:
-            XRES, CK, IK, AK = self.Milenage.f2345( K, RAND )
-            MAC_A            = self.Milenage.f1( K, RAND, SQNb, AMF )
-            SQN_X_AK         = xor_buf( SQNb, AK )
-            AUTN             = SQN_X_AK + AMF + MAC_A
-        
-        # convert to LTE master key
-        KASME = conv_A2(CK, IK, SN_ID, SQN_X_AK)
+        SQN, (RAND, XRES, AUTN, KASME) = ret
         
         # return auth vector
         self._log('DBG', '[make_4g_vector] IMSI %s, SQN %i, SN_ID %s: RAND %s, XRES %s, AUTN %s, KASME %s'\
@@ -394,9 +514,12 @@ class AuC:
             self._log('WNG', '[synch_sqn] IMSI %s, USIM authentication failure' % IMSI)
             return 1
         
-        # resynchronize local SQN value
-        K_ALG2_SQN_OP[2] = SQN_MSi + self.SQN_SYNCH_STEP
-        self._save_required = True
-        self._log('DBG', '[synch_sqn] IMSI %s, SQN resynchronized to %i' % (IMSI, K_ALG2_SQN_OP[2]))
+        # resynchronize local SQN value, and release pre-computed vectors
+        with self._av_lock:
+            self.db.set_sqn(IMSI, SQN_MSi + self.SQN_SYNCH_STEP)
+            if self._av_thread:
+                self._av_flush(IMSI)
+        self._log('DBG', '[synch_sqn] IMSI %s, SQN resynchronized to %i'\
+                  % (IMSI, SQN_MSi + self.SQN_SYNCH_STEP))
         return 0
 
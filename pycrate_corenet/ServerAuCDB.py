@@ -0,0 +1,333 @@
+# -*- coding: UTF-8 -*-
+#/**
+# * Software Name : pycrate
+# * Version : 0.4
+# *
+# * Copyright 2019. Benoit Michau. P1Sec.
+# *
+# * This library is free software; you can redistribute it and/or
+# * modify it under the terms of the GNU Lesser General Public
+# * License as published by the Free Software Foundation; either
+# * version 2.1 of the License, or (at your option) any later version.
+# *
+# * This library is distributed in the hope that it will be useful,
+# * but WITHOUT ANY WARRANTY; without even the implied warranty of
+# * MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# * Lesser General Public License for more details.
+# *
+# * You should have received a copy of the GNU Lesser General Public
+# * License along with this library; if not, write to the Free Software
+# * Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston,
+# * MA 02110-1301  USA
+# *
+# *--------------------------------------------------------
+# * File Name : pycrate_corenet/ServerAuCDB.py
+# * Created : 2026-10-19
+# * Authors : agent
+# *--------------------------------------------------------
+#*/
+
+#------------------------------------------------------------------------------#
+# Subscribers database backends for the AuC
+#
+# Each record is indexed by IMSI (string of digits), and is a list:
+# [K (16 bytes), ALG2 (uint), SQN (int, -1 if Milenage is not supported),
+#  OP (16 bytes or None)]
+#
+# Both backends provide the same mapping-like interface:
+# db[IMSI], IMSI in db, db.get(IMSI), db.items(), len(db),
+# db.set_sqn(IMSI, SQN) to update the SQN of a subscriber,
+# db.save() to persist updates and db.close()
+#
+# This module only depends on the Python standard library, so that the AuC.db
+# file can be migrated without the corenet dependencies
+#------------------------------------------------------------------------------#
+
+# filtering exports
+__all__ = ['AuCDBFile', 'AuCDBSQLite', 'parse_aucdb_line', 'format_aucdb_rec']
+
+import os
+import sqlite3
+import time as timemod
+from binascii  import hexlify, unhexlify
+from threading import Thread, Lock, Event
+from time      import time
+
+
+def parse_aucdb_line(line):
+    """returns (IMSI, [K, ALG2, SQN, OP]) from a line of the AuC.db text file,
+    or None for a comment or an invalid line
+    """
+    if line[:1] == '#' or line.count(';') < 3:
+        return None
+    fields = line.rstrip('\r\n').split(';')
+    IMSI   = str( fields[0] )
+    K      = unhexlify( fields[1].encode('ascii') )
+    ALG2   = int( fields[2] )
+    SQN    = int( fields[3] )
+    if len(fields) > 4 and len(fields[4]) == 32:
+        OP = unhexlify( fields[4].encode('ascii') )
+    else:
+        OP = None
+    return IMSI, [K, ALG2, SQN, OP]
+
+
+def format_aucdb_rec(IMSI, rec):
+    """returns the line of the AuC.db text file for the record rec of IMSI
+    """
+    K, ALG2, SQN, OP = rec
+    if OP is not None:
+        # OP additional parameter
+        return '%s;%s;%i;%i;%s;\n'\
+               % (IMSI, hexlify(K).decode('ascii'), ALG2, SQN, hexlify(OP).decode('ascii'))
+    else:
+        return '%s;%s;%i;%i;\n'\
+               % (IMSI, hexlify(K).decode('ascii'), ALG2, SQN)
+
+
+def _nolog(logtype, msg):
+    pass
+
+
+class AuCDBFile(dict):
+    """AuC.db text file backend
+    
+    The whole file is loaded into this dict, and it is entirely rewritten by
+    .save() when SQN values were updated
+    """
+    
+    def __init__(self, path, do_backup=True, log=_nolog):
+        dict.__init__(self)
+        self.path      = path
+        self.do_backup = do_backup
+        self._log      = log
+        with open(self.path, 'r') as fd:
+            for line in fd:
+                rec = parse_aucdb_line(line)
+                if rec is not None:
+                    self[rec[0]] = rec[1]
+        self._save_required = False
+    
+    def set_sqn(self, IMSI, SQN):
+        self[IMSI][2] = SQN
+        self._save_required = True
+    
+    def save(self):
+        """
+        optionally save old AuC.db with timestamp suffix (if self.do_backup is set)
+        write the current content of self into AuC.db, with updated SQN values
+        """
+        if not self._save_required:
+            return
+        
+        T = timemod.strftime( '20%y%m%d_%H%M', timemod.gmtime() )
+        
+        # get header from original file AuC.db
+        header = []
+        with open(self.path, 'r') as fd:
+            for line in fd:
+                if line[0] == '#':
+                    header.append( line )
+                else:
+                    break
+        header = ''.join(header) + '\n'
+        
+        if self.do_backup:
+            # save the last current version of AuC.db
+            os.rename( self.path, '%s.%s.db' % (os.path.splitext(self.path)[0], T) )
+            self._log('DBG', 'old AuC.db saved with timestamp')
+        
+        # save the current content into a new AuC.db file
+        with open(self.path, 'w') as fd:
+            fd.write( header )
+            for IMSI in sorted(self.keys()):
+                fd.write( format_aucdb_rec(IMSI, self[IMSI]) )
+        self._save_required = False
+        self._log('INF', 'current db saved to AuC.db file')
+    
+    close = save
+
+
+class AuCDBSQLite(object):
+    """sqlite3 backend, in WAL mode
+    
+    Records are looked up in the database for each request, hence millions of
+    subscribers can be handled without loading them at startup.
+    SQN updates are recorded in memory, and committed by batch when commit_num
+    are pending, or every commit_period seconds (by a background thread),
+    or when calling .save().
+    In case of a crash, at most commit_num updates are lost: the USIMs concerned
+    then just require a SQN resynchronization.
+    """
+    
+    # number of records per SELECT when iterating over the whole database
+    ITER_LEN = 1024
+    
+    def __init__(self, path, commit_num=256, commit_period=1.0, log=_nolog):
+        self.path           = path
+        self.commit_num     = commit_num
+        self.commit_period  = commit_period
+        self._log           = log
+        # pending SQN updates, IMSI: SQN
+        self._sqn           = {}
+        self._lock          = Lock()
+        self._last_commit   = time()
+        #
+        # transactions are handled explicitly, see _commit()
+        self._db = sqlite3.connect(self.path, isolation_level=None,
+                                   check_same_thread=False)
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.execute('PRAGMA synchronous=NORMAL')
+        self._db.execute('CREATE TABLE IF NOT EXISTS subscriber ('\
+                         'imsi TEXT PRIMARY KEY, k BLOB NOT NULL, '\
+                         'alg2 INTEGER NOT NULL, sqn INTEGER NOT NULL, op BLOB) '\
+                         'WITHOUT ROWID')
+        #
+        if self.commit_period:
+            self._stopped = Event()
+            self._commit_t = Thread(target=self._commit_loop)
+            self._commit_t.daemon = True
+            self._commit_t.start()
+        else:
+            self._stopped = None
+    
+    def _commit_loop(self):
+        while not self._stopped.wait(self.commit_period):
+            with self._lock:
+                if self._sqn and time() - self._last_commit >= self.commit_period:
+                    self._commit()
+    
+    def _commit(self):
+        # to be called with self._lock acquired
+        if self._sqn:
+            try:
+                self._db.execute('BEGIN')
+                self._db.executemany('UPDATE subscriber SET sqn=? WHERE imsi=?',
+                                     [(SQN, IMSI) for (IMSI, SQN) in self._sqn.items()])
+                self._db.execute('COMMIT')
+            except Exception as err:
+                self._db.execute('ROLLBACK')
+                self._log('ERR', 'unable to commit %i SQN update(s): %s'\
+                          % (len(self._sqn), err))
+                return
+            self._sqn.clear()
+        self._last_commit = time()
+    
+    def _rec(self, row):
+        # row: (imsi, k, alg2, sqn, op)
+        return [bytes(row[1]), row[2], self._sqn.get(row[0], row[3]),
+                None if row[4] is None else bytes(row[4])]
+    
+    def __getitem__(self, IMSI):
+        with self._lock:
+            row = self._db.execute('SELECT imsi, k, alg2, sqn, op FROM subscriber '\
+                                   'WHERE imsi=?', (IMSI, )).fetchone()
+            if row is None:
+                raise(KeyError(IMSI))
+            return self._rec(row)
+    
+    def get(self, IMSI, dflt=None):
+        try:
+            return self[IMSI]
+        except KeyError:
+            return dflt
+    
+    def __contains__(self, IMSI):
+        with self._lock:
+            return self._db.execute('SELECT 1 FROM subscriber WHERE imsi=?',
+                                    (IMSI, )).fetchone() is not None
+    
+    def __len__(self):
+        with self._lock:
+            return self._db.execute('SELECT count(*) FROM subscriber').fetchone()[0]
+    
+    def items(self):
+        """yields all (IMSI, [K, ALG2, SQN, OP]), ordered by IMSI, by chunks of
+        ITER_LEN records
+        """
+        last = ''
+        while True:
+            with self._lock:
+                rows = self._db.execute('SELECT imsi, k, alg2, sqn, op FROM subscriber '\
+                                        'WHERE imsi>? ORDER BY imsi LIMIT ?',
+                                        (last, self.ITER_LEN)).fetchall()
+                recs = [(row[0], self._rec(row)) for row in rows]
+            for rec in recs:
+                yield rec
+            if len(rows) < self.ITER_LEN:
+                return
+            last = rows[-1][0]
+    
+    def set_sqn(self, IMSI, SQN):
+        with self._lock:
+            self._sqn[IMSI] = SQN
+            if len(self._sqn) >= self.commit_num:
+                self._commit()
+    
+    def add(self, IMSI, K, ALG2, SQN, OP=None):
+        """adds or replaces the record for IMSI
+        """
+        with self._lock:
+            self._sqn.pop(IMSI, None)
+            self._db.execute('INSERT OR REPLACE INTO subscriber VALUES (?, ?, ?, ?, ?)',
+                             (IMSI, K, ALG2, SQN, OP))
+    
+    def remove(self, IMSI):
+        """removes the record for IMSI
+        """
+        with self._lock:
+            self._sqn.pop(IMSI, None)
+            self._db.execute('DELETE FROM subscriber WHERE imsi=?', (IMSI, ))
+    
+    def import_file(self, path):
+        """imports all records from the AuC.db text file at path, in a single
+        transaction, and returns the number of records imported
+        """
+        def get_recs(fd):
+            for line in fd:
+                rec = parse_aucdb_line(line)
+                if rec is not None:
+                    IMSI, (K, ALG2, SQN, OP) = rec
+                    yield IMSI, K, ALG2, SQN, OP
+        with self._lock, open(path, 'r') as fd:
+            self._commit()
+            self._db.execute('BEGIN')
+            try:
+                cur = self._db.executemany('INSERT OR REPLACE INTO subscriber '\
+                                           'VALUES (?, ?, ?, ?, ?)', get_recs(fd))
+            except Exception as err:
+                self._db.execute('ROLLBACK')
+                raise(err)
+            self._db.execute('COMMIT')
+            num = cur.rowcount
+        self._log('INF', '%i record(s) imported from %s' % (num, path))
+        return num
+    
+    def export_file(self, path, header=''):
+        """exports all records into the AuC.db text file at path,
+        and returns the number of records exported
+        """
+        num = 0
+        with open(path, 'w') as fd:
+            fd.write( header )
+            for IMSI, rec in self.items():
+                fd.write( format_aucdb_rec(IMSI, rec) )
+                num += 1
+        self._log('INF', '%i record(s) exported to %s' % (num, path))
+        return num
+    
+    def save(self):
+        """commits all pending SQN updates
+        """
+        with self._lock:
+            self._commit()
+    
+    def close(self):
+        """commits all pending SQN updates and closes the database
+        """
+        if self._stopped is not None:
+            self._stopped.set()
+            self._commit_t.join()
+        with self._lock:
+            self._commit()
+            self._db.close()
@@ -38,10 +38,11 @@
 #------------------------------------------------------------------------------#
 
 # filtering exports
-__all__ = ['ARPd', 'GTPUd', 'DPI', 'MOD', 'DNSRESP', 'TCPSYNACK']
+__all__ = ['ARPd', 'GTPUd', 'DPIv4', 'DPIv6', 'MOD', 'DNSRESP', 'TCPSYNACK']
 
 import os
 import signal
+from queue import SimpleQueue
 #
 if os.name != 'nt':
     from fcntl  import ioctl
@@ -336,6 +337,41 @@ BLACKHOLE_LAN   = 0b01
 BLACKHOLE_WAN   = 0b10
 IPV6_LOCAL_PREF = b'\xfe\x80\0\0\0\0\0\0'
 
+# offset at which packets are read into the GTPUd receive buffer:
+# the GTP-U header (8 bytes min) of an UL packet is then replaced in place with
+# the Ethernet header (14 bytes), and the Ethernet header of a DL packet with the 
+# GTP-U header, without copying the IP payload
+_RX_OFF = 6
+
+# IP protocols with ports: TCP, UDP, SCTP
+_PORT_PROT = {6, 17, 132}
+
+def get_ip_flow(ipvers, ipbuf, ul=1):
+    """returns the IP protocol (uint), payload offset (uint) and server port 
+    (2 bytes, or None) of the IPv4 or IPv6 packet ipbuf:
+    the server port is the destination port in UL and the source port in DL
+    """
+    if ipvers == 4:
+        prot, off = ipbuf[9], (ipbuf[0] & 0xf) << 2
+    else:
+        # TODO: unstack IPv6 opts
+        prot, off = ipbuf[6], 40
+    if prot in _PORT_PROT and len(ipbuf) >= off + 4:
+        if ul:
+            return prot, off, ipbuf[off+2:off+4]
+        else:
+            return prot, off, ipbuf[off:off+2]
+    else:
+        return prot, off, None
+
+def ip_ntoa(ip):
+    """returns the textual representation of the raw IPv4 or IPv6 address ip
+    """
+    if len(ip) == 4:
+        return inet_ntoa(ip)
+    else:
+        return inet_ntop(AF_INET6, ip)
+
 class GTPUd(object):
     '''
     GTP-U forwarder
@@ -363,11 +399,24 @@ class GTPUd(object):
     the IP payload is transferred to the external Gi interface over an Ethernet header.
     When an Ethernet packet arrives on the external Gi interface,
     the IP payload is transferred to the internal interface over a GTP-U header.
+    Each readable socket is drained up to BATCH_LEN packets at once, into a
+    preallocated buffer. When MOD and BLACKHOLING are both disabled, headers
+    are then swapped in place in this buffer, without copying the IP payload
+    (with DPI, the packets are analyzed in place too).
+    With WORKER_NUM > 0, each socket has its own receive thread, and packets are
+    forwarded by WORKER_NUM worker threads, selected with the teid_ul of the 
+    mobile: packets of a given mobile are hence always forwarded in order.
 
     A little traffic statistics feature can be used with the class attribute:
     .DPI = True
     Traffic statistics are then placed into the attribute .stats
+    (merged from all workers, see .init_stats())
     It is populated even if GTP-U trafic is not forwarded (see BLACKHOLING)
+    
+    Modules acting on GTP-U payloads (see MOD) are loaded with the method:
+    .add_mod(mod)
+    Each packet is then only passed to the modules subscribed to its flow
+    (IP version, protocol, port), through dispatch tables compiled when loading.
 
     A blackholing feature is integrated to disable the forwarding of GTP-U packet
     to the local LAN (with BLACKHOLE_LAN) and/or the routed WAN (with BLACKHOLE_WAN).
@@ -390,6 +439,15 @@ class GTPUd(object):
     BUFLEN        = 2048
     # select loop settings
     SELECT_TO     = 0.1
+    # maximum number of packets read from a single socket at each select()
+    # wake-up: sockets are non-blocking and drained until empty or BATCH_LEN
+    BATCH_LEN     = 64
+    # number of worker threads for forwarding packets:
+    # when 0, packets are forwarded by the single listener thread;
+    # otherwise, each socket gets its own receive thread, that dispatches packets
+    # to workers according to their teid_ul (the same for UL and DL packets of
+    # a given mobile), hence packets of a given mobile are forwarded in order
+    WORKER_NUM    = 0
     #
     # Gi interface, with GGSN ethernet IF, MAC address and IPv6 /64 network prefix
     EXT_IF        = ARPd.GGSN_ETH_IF
@@ -439,20 +497,24 @@ class GTPUd(object):
         #
         # initialize the traffic statistics
         self.stats         = {}
+        self._stats_lock   = Lock()
+        # same stats, indexed with raw IP addresses, together with the set of 
+        # flows already accounted (see _analyze())
+        self._stats_raw    = {}
         self._prot_dict    = {1:'ICMP', 6:'TCP', 17:'UDP'}
         # initialize the list of modules that can act on GTP-U payloads
         self.MOD           = []
+        # and the dispatch tables for them, and the whitelist
+        self.compile_rules()
         #
         # create two RAW PF_PACKET sockets on the `Internet` side (1 for IPv4, 1 for IPv6)
         self.sk_ext_v4     = socket.socket(socket.AF_PACKET, socket.SOCK_RAW)
-        self.sk_ext_v4.settimeout(0.001)
-        #self.sk_ext_v4.setblocking(0)
+        self.sk_ext_v4.setblocking(0)
         self.sk_ext_v4.bind((self.EXT_IF, 0x0800))
         set_promisc(self.sk_ext_v4, self.EXT_IF, 1)
         #
         self.sk_ext_v6     = socket.socket(socket.AF_PACKET, socket.SOCK_RAW, ntohs(0x86dd))
-        self.sk_ext_v6.settimeout(0.001)
-        #self.sk_ext_v6.setblocking(0)
+        self.sk_ext_v6.setblocking(0)
         self.sk_ext_v6.bind((self.EXT_IF, 0x86dd))
         set_promisc(self.sk_ext_v6, self.EXT_IF, 1)
         #
@@ -460,8 +522,7 @@ class GTPUd(object):
         sk_int, sk_int_ind, ind = [], {}, 0
         for gtpip in self.GTP_IF:
             sk = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-            sk.settimeout(0.001)
-            #sk.setblocking(0)
+            sk.setblocking(0)
             sk.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
             sk.bind((gtpip, self.GTP_PORT))
             sk_int.append(sk)
@@ -470,6 +531,10 @@ class GTPUd(object):
         self.sk_int = tuple(sk_int)
         self._sk_int_ind = sk_int_ind
         #
+        # preallocated receive buffer for the listener, see _RX_OFF
+        self._rx_buf = bytearray(_RX_OFF + self.BUFLEN)
+        self._rx_mv  = memoryview(self._rx_buf)
+        #
         # interrupt handler
         if self.CATCH_SIGINT:
             def sigint_handler(signum, frame):
@@ -481,7 +546,12 @@ class GTPUd(object):
         # and start listening and transferring packets in background
         self.sk_list = (self.sk_ext_v4, self.sk_ext_v6) + self.sk_int
         self._listening = True
-        self._listener_t = threadit(self.listen)
+        if self.WORKER_NUM:
+            self._workers    = [_GTPUWorker(self, i) for i in range(self.WORKER_NUM)]
+            self._listener_t = [threadit(self.listen_sk, sk) for sk in self.sk_list]
+        else:
+            self._workers    = []
+            self._listener_t = threadit(self.listen)
         self._log('INF', 'GTP-U tunnels handler started')
         #
         # and finally start ARP resolver
@@ -493,7 +563,28 @@ class GTPUd(object):
             log('[%s] [GTPUd] %s' % (logtype, msg))
     
     def init_stats(self, ip):
-        stats = {
+        # the stats for a given ip are shared between all workers: they are 
+        # hence merged in self.stats
+        with self._stats_lock:
+            try:
+                stats = self.stats[ip]
+            except KeyError:
+                stats = self._new_stats()
+                self.stats[ip] = stats
+        return stats
+    
+    def _get_stats_raw(self, ipsrc, wstats=None):
+        # ipsrc: raw IP address
+        # wstats: stats dict of a worker, which references the stats for ipsrc 
+        # too, so that each worker can look them up without locking
+        stats = self.init_stats(ip_ntoa(ipsrc))
+        ent   = self._stats_raw.setdefault(ipsrc, (stats, set()))
+        if wstats is not None:
+            wstats[ipsrc] = ent
+        return ent
+    
+    def _new_stats(self):
+        return {
             'DNS'     : set(), # IP of DNS servers requested
             'NTP'     : set(), # IP of NTP servers requested
             'resolved': set(), # domain name resolved
@@ -502,8 +593,6 @@ class GTPUd(object):
             'UDP'     : set(), # UDP endpoint (IP, port) contacted
             'alien'   : set(), # other protocol packets
             }
-        self.stats[ip] = stats
-        return stats
     
     def stop(self):
         # stop ARP resolver
@@ -522,6 +611,9 @@ class GTPUd(object):
                     sk.close()
             except Exception as err:
                 self._log('ERR', 'socket error: %s' % err)
+            # stop workers
+            for wk in self._workers:
+                wk.stop()
     
     def listen(self):
         # select() until we receive something on 1 side
@@ -529,56 +621,194 @@ class GTPUd(object):
             r = select(self.sk_list, [], [], self.SELECT_TO)[0]
             # read ext and int sockets until they are empty
             for sk in r:
-                #
                 if sk == self.sk_ext_v4:
-                    # DL IPv4
-                    try:
-                        buf = sk.recvfrom(self.BUFLEN)[0]
-                    #except timeout:
-                    #    pass
-                    except Exception as err:
-                        self._log('ERR', 'sk_ext_v4 IF error (recvfrom): %s' % err)
-                    else:
-                        #self._log('DBG', 'sk_ext_v4, recvfrom()')
-                        if len(buf) >= 34 and buf[:6] == self.EXT_MAC_BUF \
-                        and buf[30:34] in self._mobiles_addr:
-                            # IPv4 of a mobile, transfer over GTP-U
-                            # after removing the Ethernet header
-                            self.transfer_v4_to_int(buf[14:])
-                            #threadit(self.transfer_v4_to_int, buf[14:])
-                #
+                    self._recv_ext_v4()
                 elif sk == self.sk_ext_v6:
-                    # DL IPv6
-                    try:
-                        buf = sk.recvfrom(self.BUFLEN)[0]
-                    #except timeout:
-                    #    pass
-                    except Exception as err:
-                        self._log('ERR', 'sk_ext_v6 IF error (recvfrom): %s' % err)
-                    else:
-                        #self._log('DBG', 'sk_ext_v6, recvfrom()')
-                        if len(buf) >= 54 and buf[:6] == self.EXT_MAC_BUF \
-                        and buf[46:54] in self._mobiles_addr:
-                            # IPv6 of a mobile, transfer over GTP-U
-                            # after removing the Ethernet header
-                            self.transfer_v6_to_int(buf[14:])
-                            #threadit(self.transfer_v6_to_int, buf[14:])
-                #
+                    self._recv_ext_v6()
                 else:
-                    #sk in self.sk_int
-                    # UL, both IPv4 and IPv6 packets
-                    try:
-                        buf = sk.recv(self.BUFLEN)
-                    #except timeout:
-                    #    pass
-                    except Exception as err:
-                        self._log('ERR', 'sk_int IF error (recv): %s' % err)
-                    else:
-                        self.transfer_to_ext(buf)
-                        #threadit(self.transfer_to_ext, buf)
+                    self._recv_int(sk)
         #
         self._log('INF', 'GTPU handler stopped')
     
+    def _recv_ext_v4(self):
+        # DL IPv4
+        sk, mv = self.sk_ext_v4, self._rx_mv[_RX_OFF:]
+        for i in range(self.BATCH_LEN):
+            try:
+                buflen = sk.recv_into(mv, self.BUFLEN)
+            except (BlockingIOError, timeout):
+                return
+            except Exception as err:
+                self._log('ERR', 'sk_ext_v4 IF error (recv_into): %s' % err)
+                return
+            if buflen >= 34 and mv[:6] == self.EXT_MAC_BUF:
+                teid_ul = self._mobiles_addr.get(bytes(mv[30:34]))
+                if teid_ul is not None:
+                    # IPv4 of a mobile, transfer over GTP-U
+                    # after removing the Ethernet header
+                    if self._mod_dl:
+                        self.transfer_v4_to_int(bytes(mv[14:buflen]))
+                    else:
+                        self.forward_to_int(teid_ul, self._rx_buf, self._rx_mv,
+                                            _RX_OFF+14, _RX_OFF+buflen)
+    
+    def _recv_ext_v6(self):
+        # DL IPv6
+        sk, mv = self.sk_ext_v6, self._rx_mv[_RX_OFF:]
+        for i in range(self.BATCH_LEN):
+            try:
+                buflen = sk.recv_into(mv, self.BUFLEN)
+            except (BlockingIOError, timeout):
+                return
+            except Exception as err:
+                self._log('ERR', 'sk_ext_v6 IF error (recv_into): %s' % err)
+                return
+            if buflen >= 54 and mv[:6] == self.EXT_MAC_BUF:
+                teid_ul = self._mobiles_addr.get(bytes(mv[46:54]))
+                if teid_ul is not None:
+                    # IPv6 of a mobile, transfer over GTP-U
+                    # after removing the Ethernet header
+                    if self._mod_dl:
+                        self.transfer_v6_to_int(bytes(mv[14:buflen]))
+                    else:
+                        self.forward_to_int(teid_ul, self._rx_buf, self._rx_mv,
+                                            _RX_OFF+14, _RX_OFF+buflen)
+    
+    def _recv_int(self, sk):
+        # UL, both IPv4 and IPv6 packets
+        mv = self._rx_mv[_RX_OFF:]
+        # the fast path is only possible when GTP-U payloads are not modified 
+        # or filtered
+        fast = not (self._mod_ul or self.BLACKHOLING)
+        for i in range(self.BATCH_LEN):
+            try:
+                buflen = sk.recv_into(mv, self.BUFLEN)
+            except (BlockingIOError, timeout):
+                return
+            except Exception as err:
+                self._log('ERR', 'sk_int IF error (recv_into): %s' % err)
+                return
+            if fast:
+                self.forward_to_ext(self._rx_buf, self._rx_mv, _RX_OFF, _RX_OFF+buflen)
+            else:
+                self.transfer_to_ext(bytes(mv[:buflen]))
+    
+    def listen_sk(self, sk):
+        # receive loop for a single socket, when WORKER_NUM > 0:
+        # packets are dispatched to workers according to their teid_ul
+        workers, num = self._workers, len(self._workers)
+        if sk == self.sk_ext_v4:
+            # DL IPv4, with IP dst at offset 30
+            way, ipoff, ipend = 4, 30, 34
+        elif sk == self.sk_ext_v6:
+            # DL IPv6, with IP dst if suffix at offset 46
+            way, ipoff, ipend = 6, 46, 54
+        else:
+            # UL, both IPv4 and IPv6 packets
+            way = 0
+        while self._listening:
+            if not select((sk, ), [], [], self.SELECT_TO)[0]:
+                continue
+            # packets read at once are dispatched in a single list per worker
+            batches = [[] for i in range(num)]
+            for i in range(self.BATCH_LEN):
+                try:
+                    buf = sk.recv(self.BUFLEN)
+                except (BlockingIOError, timeout):
+                    break
+                except Exception as err:
+                    self._log('ERR', 'socket error (recv): %s' % err)
+                    break
+                if way:
+                    if len(buf) >= ipend and buf[:6] == self.EXT_MAC_BUF:
+                        teid_ul = self._mobiles_addr.get(buf[ipoff:ipend])
+                        if teid_ul is not None:
+                            batches[teid_ul % num].append((way, teid_ul, buf))
+                elif len(buf) >= 8:
+                    teid_ul = unpack_from('>I', buf, 4)[0]
+                    batches[teid_ul % num].append((0, teid_ul, buf))
+                else:
+                    self._log('WNG', 'invalid GTP packet from RAN, dropping it')
+            for i in range(num):
+                if batches[i]:
+                    workers[i].queue.put(batches[i])
+    
+    #--------------------------------------------------------------------------#
+    # MOD handlers
+    #--------------------------------------------------------------------------#
+    
+    def add_mod(self, mod):
+        """adds the MOD handler mod, and recompiles the dispatch tables
+        """
+        if mod not in self.MOD:
+            self.MOD.append(mod)
+        self.compile_rules()
+    
+    def rem_mod(self, mod):
+        """removes the MOD handler mod, and recompiles the dispatch tables
+        """
+        if mod in self.MOD:
+            self.MOD.remove(mod)
+        self.compile_rules()
+    
+    def compile_rules(self):
+        """compiles the UL and DL dispatch tables of MOD handlers, according to 
+        their MATCH attribute, and the WL_PORTS whitelist
+        
+        This must be called after changing the MOD list or WL_PORTS directly
+        """
+        prot_num = dict([(name, num) for (num, name) in self._prot_dict.items()])
+        self._wl_ports = set([(prot_num[prot], pack('!H', port)) \
+                              for (prot, port) in self.WL_PORTS])
+        self._mod_ul = self._compile_mod('handle_ul')
+        self._mod_dl = self._compile_mod('handle_dl')
+    
+    def _compile_mod(self, meth):
+        # list the rules (ipvers, prot, port) of MOD handlers overriding meth
+        rules = []
+        for mod in self.MOD:
+            mod.GTPUd = self
+            if getattr(getattr(mod, meth), '__func__', None) is getattr(MOD, meth).__func__:
+                continue
+            hdl = (mod.TYPE, getattr(mod, meth))
+            for ipvers, prot, port in (mod.MATCH or [(None, None, None)]):
+                if port is not None:
+                    port = pack('!H', port)
+                for v in ((4, 6) if ipvers is None else (ipvers, )):
+                    rules.append( ((v, prot, port), hdl) )
+        #
+        # dispatch table:
+        # key: (ipvers, prot, port), (ipvers, prot, None) or (ipvers, None, None)
+        # value: tuple of all handlers matching the key, in the MOD list order
+        keys = set()
+        for (v, prot, port), hdl in rules:
+            keys.update( ((v, prot, port), (v, prot, None), (v, None, None)) )
+        tab = {}
+        for (kv, kprot, kport) in keys:
+            hdls = []
+            for (v, prot, port), hdl in rules:
+                if v == kv and (prot is None or (prot == kprot and \
+                (port is None or port == kport))) and hdl not in hdls:
+                    hdls.append(hdl)
+            if hdls:
+                tab[(kv, kprot, kport)] = tuple(hdls)
+        return tab
+    
+    def _process_mod(self, tab, ipvers, prot, port, ipbuf):
+        # the packet goes through the handlers subscribed to its flow only
+        hdls = tab.get((ipvers, prot, port)) or tab.get((ipvers, prot, None)) \
+               or tab.get((ipvers, None, None))
+        if hdls:
+            try:
+                for typ, hdl in hdls:
+                    if typ == 0:
+                        ipbuf = hdl(ipbuf)
+                    else:
+                        hdl(ipbuf)
+            except Exception as err:
+                self._log('ERR', 'MOD error: %s' % err)
+        return ipbuf
+    
     def resolve_mac(self, ipdst):
         if len(ipdst) == 4:
             return self.arpd.resolve(inet_ntoa(ipdst))
@@ -590,10 +820,10 @@ class GTPUd(object):
     # UL transfer
     #--------------------------------------------------------------------------#
     
-    def transfer_to_ext(self, buf):
+    def transfer_to_ext(self, buf, wstats=None):
         try:
             # extract the GTP header
-            flags, msgtype, msglen, teid_ul = unpack('>BBHI', buf[:8])
+            flags, msgtype, msglen, teid_ul = unpack_from('>BBHI', buf)
             ran_info, teid_dl, ipv4buf, ipv6buf, ctx_num = self._mobiles_teid[teid_ul]
             if msgtype != 0xff:
                 # TODO: handle GTP ECHO
@@ -605,7 +835,7 @@ class GTPUd(object):
                 msglen -= 4
             ipbuf = buf[-msglen:]
             # get the IP version
-            ipvers = ord(ipbuf[0:1])>>4
+            ipvers = ipbuf[0]>>4
             if ipvers == 4:
                 ipsrc = ipbuf[12:16]
                 ipdst = ipbuf[16:20]
@@ -619,88 +849,93 @@ class GTPUd(object):
             self._log('WNG', 'invalid GTP / IP packet from RAN / UE, dropping it')
             return
         #
-        if ipvers == 4:
-            if self.DROP_SPOOF and ipsrc != ipv4buf:
+        if self.DROP_SPOOF:
+            if ipvers == 4 and ipsrc != ipv4buf:
                 self._log('WNG', 'spoofed IPv4 src addr, teid_ul 0x%.8x' % teid_ul)
                 return
-            if self.DPI:
-                self._analyze(ipvers, inet_ntoa(ipsrc), ipbuf)
-            if self.MOD:
-                try:
-                    for mod in self.MOD:
-                        if mod.TYPE == 0:
-                            ipbuf = mod.handle_ul(ipbuf)
-                        else:
-                            mod.handle_ul(ipbuf)
-                except Exception as err:
-                    self._log('ERR', 'MOD error: %s' % err)
-            # resolve the dest MAC addr
-            macdst = self.resolve_mac(ipdst)
-            # apply blackholing
-            if self.BLACKHOLING:
-                if macdst != self.arpd.ROUTER_MAC_BUF:
-                    if self.BLACKHOLING & BLACKHOLE_LAN:
-                        drop = True
-                    else:
-                        drop = False
-                else:
-                    if self.BLACKHOLING & BLACKHOLE_WAN:
-                        drop = True
-                    else:
-                        drop = False
-                if drop and self.WL_ACTIVE:
-                    ipdst, prot, pay = DPIv4.get_ip_info(ipbuf)
-                    if prot in (6, 17) and pay:
-                        # UDP / TCP
-                        port = DPIv4.get_port(pay)
-                        if (self._prot_dict[prot], port) in self.WL_PORTS:
-                            self._transfer_v4_to_ext(macdst, ipbuf)
-                        else:
-                            return
+            elif ipvers == 6 and ipsrc[8:] != ipv6buf:
+                self._log('WNG', 'spoofed IPv6 src addr, teid_ul 0x%.8x' % teid_ul)
+                return
+        # get the flow of the packet: IP protocol, payload offset and server port
+        prot, off, port = get_ip_flow(ipvers, ipbuf, 1)
+        if self.DPI:
+            self._analyze(ipsrc, ipdst, prot, off, port, ipbuf, wstats)
+        if self._mod_ul:
+            ipbuf = self._process_mod(self._mod_ul, ipvers, prot, port, ipbuf)
+        # resolve the dest MAC addr
+        macdst = self.resolve_mac(ipdst)
+        # apply blackholing
+        if self.BLACKHOLING:
+            if macdst != self.arpd.ROUTER_MAC_BUF:
+                drop = self.BLACKHOLING & BLACKHOLE_LAN
             else:
-                self._transfer_v4_to_ext(macdst, ipbuf)
-        #
+                drop = self.BLACKHOLING & BLACKHOLE_WAN
+            if drop and not (self.WL_ACTIVE and (prot, port) in self._wl_ports):
+                return
+        if ipvers == 4:
+            self._transfer_v4_to_ext(macdst, ipbuf)
         else:
-            #ipvers == 6
+            self._transfer_v6_to_ext(macdst, ipbuf)
+    
+    def forward_to_ext(self, buf, mv, start, end, wstats=None):
+        # fast path for UL packets read in the receive buffer buf (and its 
+        # memoryview mv) at offset start, when there is no MOD and BLACKHOLING:
+        # the GTP-U header is replaced in place with the Ethernet header, and the
+        # IP packet is analyzed in place with DPI
+        try:
+            flags, msgtype, msglen, teid_ul = unpack_from('>BBHI', buf, start)
+            ran_info, teid_dl, ipv4buf, ipv6buf, ctx_num = self._mobiles_teid[teid_ul]
+            if msgtype != 0xff:
+                # TODO: handle GTP ECHO
+                self._log('WNG', 'unsupported GTP type from RAN: 0x%.2x' % msgtype)
+                return
+            if flags & 0b111:
+                # GTP header extended
+                msglen -= 4
+        except:
+            self._log('WNG', 'invalid GTP / IP packet from RAN / UE, dropping it')
+            return
+        # start of the IP packet
+        ipoff = end - msglen
+        if ipoff < start + 8 or ipoff >= end:
+            self._log('WNG', 'invalid GTP / IP packet from RAN / UE, dropping it')
+            return
+        ipvers = buf[ipoff]>>4
+        #
+        if ipvers == 4:
+            ipsrc, ipdst = mv[ipoff+12:ipoff+16], bytes(mv[ipoff+16:ipoff+20])
+            if self.DROP_SPOOF and ipsrc != ipv4buf:
+                self._log('WNG', 'spoofed IPv4 src addr, teid_ul 0x%.8x' % teid_ul)
+                return
+            sk, ethtype, ethbuf = self.sk_ext_v4, 0x0800, b'\x08\0'
+        elif ipvers == 6:
+            ipsrc, ipdst = mv[ipoff+8:ipoff+24], bytes(mv[ipoff+24:ipoff+40])
             if self.DROP_SPOOF and ipsrc[8:] != ipv6buf:
                 self._log('WNG', 'spoofed IPv6 src addr, teid_ul 0x%.8x' % teid_ul)
                 return
-            if self.DPI:
-                self._analyze(ipvers, inet_ntop(AF_INET6, ipsrc), ipbuf)
-            if self.MOD:
-                try:
-                    for mod in self.MOD:
-                        if mod.TYPE == 0:
-                            ipbuf = mod.handle_ul(ipbuf)
-                        else:
-                            mod.handle_ul(ipbuf)
-                except Exception as err:
-                    self._log('ERR', 'MOD error: %s' % err)
-            # resolve the dest MAC addr
-            macdst = self.resolve_mac(ipdst)
-            # apply blackholing
-            if self.BLACKHOLING:
-                if macdst != self.arpd.ROUTER_MAC_BUF:
-                    if self.BLACKHOLING & BLACKHOLE_LAN:
-                        drop = True
-                    else:
-                        drop = False
-                else:
-                    if self.BLACKHOLING & BLACKHOLE_WAN:
-                        drop = True
-                    else:
-                        drop = False
-                if drop and self.WL_ACTIVE:
-                    ipdst, prot, pay = DPIv6.get_ip_info(ipbuf)
-                    if prot in (6, 17) and pay:
-                        # UDP / TCP
-                        port = DPIv6.get_port(pay)
-                        if (self._prot_dict[prot], port) in self.WL_PORTS:
-                            self._transfer_v6_to_ext(macdst, ipbuf)
-                        else:
-                            return
-            else:
-                self._transfer_v6_to_ext_v6(macdst, ipbuf)
+            sk, ethtype, ethbuf = self.sk_ext_v6, 0x86dd, b'\x86\xdd'
+        else:
+            self._log('WNG', 'invalid IP packet from UE, dropping it')
+            return
+        if self.DPI:
+            # the IP packet is analyzed through the memoryview, only the 
+            # addresses and port used as keys are copied
+            ipbuf = mv[ipoff:end]
+            prot, off, port = get_ip_flow(ipvers, ipbuf, 1)
+            if port is not None:
+                port = bytes(port)
+            self._analyze(bytes(ipsrc), ipdst, prot, off, port, ipbuf, wstats)
+        macdst = self.resolve_mac(ipdst)
+        #
+        # prepend the Ethernet header and forward to the external PF_PACKET socket
+        ethoff = ipoff - 14
+        buf[ethoff:ethoff+6]     = macdst
+        buf[ethoff+6:ethoff+12]  = self.EXT_MAC_BUF
+        buf[ethoff+12:ipoff]     = ethbuf
+        try:
+            sk.sendto(mv[ethoff:end], (self.EXT_IF, ethtype))
+        except Exception as err:
+            self._log('ERR', 'sk_ext IF error (sendto): %s' % err)
     
     def _transfer_v4_to_ext(self, macdst, ipbuf):
         # forward to the external PF_PACKET socket, over the Gi interface
@@ -718,40 +953,48 @@ class GTPUd(object):
         except Exception as err:
             self._log('ERR', 'sk_ext_v6 IF error (sendto): %s' % err)
     
-    def _analyze(self, ipvers, ipsrc, ipbuf):
+    def _analyze(self, ipsrc, ipdst, prot, off, port, ipbuf, wstats=None):
+        # ipsrc, ipdst, port: raw bytes
         #
+        # each flow is accounted once in the stats sets: it is then just looked up
+        # with its raw bytes key for the following packets
         try:
-            stats = self.stats[ipsrc]
-        except:
-            stats = self.init_stats(ipsrc)
-        #
-        if ipvers == 4:
-            dst, prot, pay = DPIv4.get_ip_info(ipbuf)
-            DPI = DPIv4
-        else:
-            dst, prot, pay = DPIv6.get_ip_info(ipbuf)
-            DPI = DPIv6
+            if wstats is None:
+                stats, flows = self._stats_raw[ipsrc]
+            else:
+                stats, flows = wstats[ipsrc]
+        except KeyError:
+            stats, flows = self._get_stats_raw(ipsrc, wstats)
         #
-        # UDP
-        if prot == 17 and pay:
-            port = DPI.get_port(pay)
-            stats['UDP'].add((dst, port))
-            # DNS
-            if port == 53:
-                stats['DNS'].add(dst)
-                name = DPI.get_dn_req(pay[8:])
-                stats['resolved'].add(name)
-            elif port == 123:
-                stats['NTP'].add(dst)
-        # TCP
-        elif prot == 6 and pay:
-            port = DPI.get_port(pay)
-            stats['TCP'].add((dst, port))
-        # ICMP / ICMPv6
-        elif prot in (1, 58) and pay:
-            stats['ICMP'].add(dst)
-        # alien
+        if port is not None:
+            # UDP / TCP
+            if len(ipbuf) == off + 4:
+                # no payload after ports
+                stats['alien'].add(hexlify(ipbuf))
+                return
+            flow = (prot, ipdst, port)
+            if flow not in flows:
+                flows.add(flow)
+                dst, portnum = ip_ntoa(ipdst), unpack('!H', port)[0]
+                if prot == 17:
+                    stats['UDP'].add((dst, portnum))
+                    if portnum == 53:
+                        stats['DNS'].add(dst)
+                    elif portnum == 123:
+                        stats['NTP'].add(dst)
+                else:
+                    stats['TCP'].add((dst, portnum))
+            if prot == 17 and port == b'\0\x35':
+                # DNS: the name requested changes with each packet
+                stats['resolved'].add(_DPI.get_dn_req(ipbuf[off+8:]))
+        elif prot in (1, 58) and len(ipbuf) > off:
+            # ICMP / ICMPv6
+            flow = (prot, ipdst)
+            if flow not in flows:
+                flows.add(flow)
+                stats['ICMP'].add(ip_ntoa(ipdst))
         else:
+            # alien
             stats['alien'].add(hexlify(ipbuf))
     
     #--------------------------------------------------------------------------#
@@ -762,16 +1005,10 @@ class GTPUd(object):
         #self._log('DBG', 'transfer_v4_to_int()')
         # buf length is guaranteed >= 20 and ipdst in self._mobiles_addr
         #
-        if self.MOD:
+        if self._mod_dl:
             # possibly process the DL GTP-U payload within modules
-            try:
-                for mod in self.MOD:
-                    if mod.TYPE == 0:
-                        buf = mod.handle_dl(buf)
-                    else:
-                        mod.handle_dl(buf)
-            except Exception as err:
-                self._log('ERR', 'MOD error: %s' % err)        
+            prot, off, port = get_ip_flow(4, buf, 0)
+            buf = self._process_mod(self._mod_dl, 4, prot, port, buf)
         #
         teid_ul = self._mobiles_addr[buf[16:20]]
         ran_info, teid_dl = self._mobiles_teid[teid_ul][:2]
@@ -790,16 +1027,10 @@ class GTPUd(object):
         #self._log('DBG', 'transfer_v6_to_int()')
         # buf length is guaranteed >= 40 and ipdst in self._mobiles_addr
         #
-        if self.MOD:
+        if self._mod_dl:
             # possibly process the DL GTP-U payload within modules
-            try:
-                for mod in self.MOD:
-                    if mod.TYPE == 0:
-                        buf = mod.handle_dl(buf)
-                    else:
-                        mod.handle_dl(buf)
-            except Exception as err:
-                self._log('ERR', 'MOD error: %s' % err)        
+            prot, off, port = get_ip_flow(6, buf, 0)
+            buf = self._process_mod(self._mod_dl, 6, prot, port, buf)
         #
         teid_ul = self._mobiles_addr[buf[32:40]]
         ran_info, teid_dl = self._mobiles_teid[teid_ul][:2]
@@ -814,6 +1045,24 @@ class GTPUd(object):
         else:
             self._log('WNG', 'teid_ul 0x%.8x, downlink GTP parameters not set' % teid_ul)
     
+    def forward_to_int(self, teid_ul, buf, mv, start, end):
+        # fast path for DL packets read in the receive buffer buf (and its 
+        # memoryview mv), with the IP packet from offset start, when there is no MOD:
+        # the Ethernet header is replaced in place with the GTP-U header
+        try:
+            ran_info, teid_dl = self._mobiles_teid[teid_ul][:2]
+        except KeyError:
+            # mobile context just deleted
+            return
+        if ran_info and teid_dl is not None:
+            pack_into('>BBHI', buf, start-8, 0x30, 0xff, end-start, teid_dl)
+            try:
+                ran_info[2].sendto(mv[start-8:end], (ran_info[1], self.GTP_PORT))
+            except Exception as err:
+                self._log('ERR', 'sk_int IF error (sendto): %s' % err)
+        else:
+            self._log('WNG', 'teid_ul 0x%.8x, downlink GTP parameters not set' % teid_ul)
+    
     #--------------------------------------------------------------------------#
     # UE management
     #--------------------------------------------------------------------------#
@@ -935,6 +1184,53 @@ class GTPUd(object):
                           % (ipaddr, teid_ul))
 
 
+class _GTPUWorker(object):
+    """forwards packets dispatched by the GTPUd receive threads, in their order
+    of arrival, within its own thread
+    """
+    
+    def __init__(self, gtpud, ind):
+        self.gtpud   = gtpud
+        self.ind     = ind
+        # DPI stats, referencing the ones of the GTPUd, see GTPUd._get_stats_raw()
+        self.stats   = {}
+        # queue of lists of (way, teid_ul, buf), way being 0 for UL, 4 or 6 for DL
+        self.queue   = SimpleQueue()
+        self._rx_buf = bytearray(_RX_OFF + gtpud.BUFLEN)
+        self._rx_mv  = memoryview(self._rx_buf)
+        self._thread = threadit(self.run)
+    
+    def stop(self):
+        self.queue.put(None)
+    
+    def run(self):
+        gtpud, get, buf, mv = self.gtpud, self.queue.get, self._rx_buf, self._rx_mv
+        while True:
+            batch = get()
+            if batch is None:
+                break
+            for way, teid_ul, pkt in batch:
+                try:
+                    if way == 0:
+                        if gtpud._mod_ul or gtpud.BLACKHOLING:
+                            gtpud.transfer_to_ext(pkt, self.stats)
+                        else:
+                            end = _RX_OFF + len(pkt)
+                            mv[_RX_OFF:end] = pkt
+                            gtpud.forward_to_ext(buf, mv, _RX_OFF, end, self.stats)
+                    elif gtpud._mod_dl:
+                        if way == 4:
+                            gtpud.transfer_v4_to_int(pkt[14:])
+                        else:
+                            gtpud.transfer_v6_to_int(pkt[14:])
+                    else:
+                        end = _RX_OFF + len(pkt)
+                        mv[_RX_OFF:end] = pkt
+                        gtpud.forward_to_int(teid_ul, buf, mv, _RX_OFF+14, end)
+                except Exception as err:
+                    gtpud._log('ERR', 'worker %i error: %s' % (self.ind, err))
+
+
 class _DPI(object):
     
     @staticmethod
@@ -1060,6 +1356,16 @@ class MOD(object):
     # with TYPE = 1
     TYPE = 0
     
+    # flows the handler is subscribed to, as a list of 
+    # (IP version, IP protocol, server port) rules:
+    # the server port being the destination port in UL, and the source port in DL,
+    # None for any port, and None for any protocol or IP version (then, port 
+    # must be None too);
+    # None to get all packets
+    # The GTPUd instance compiles its dispatch tables from it when calling
+    # .add_mod() or .compile_rules()
+    MATCH = None
+    
     # reference to the GTPUd instance
     GTPUd = None
     
@@ -1086,6 +1392,9 @@ class DNSRESP(MOD):
     '''
     TYPE = 1
     
+    # UDP/53 over IPv4
+    MATCH = [(4, 17, 53)]
+    
     # compute UDP checksum in DNS response
     UDP_CS = True
     # in case we want to answer random addresses
@@ -1100,7 +1409,7 @@ class DNSRESP(MOD):
         # check if we have an UDP/53 request
         ip_vers, ip_proto, (udpsrc, udpdst) = \
             ord(ipbuf[0:1])>>4, ord(ipbuf[9:10]), unpack('!HH', ipbuf[20:24])
-        if ip_vers != 4 or ip_proto != 53 or udp_dst != 53:
+        if ip_vers != 4 or ip_proto != 17 or udpdst != 53:
             # not IPv4, not UDP or not on DNS port 53
             return
         
@@ -1148,6 +1457,9 @@ class TCPSYNACK(MOD):
     '''
     TYPE = 1
     
+    # any TCP port over IPv4
+    MATCH = [(4, 6, None)]
+    
     DEBUG = False
     
     @classmethod
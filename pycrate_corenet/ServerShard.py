@@ -0,0 +1,744 @@
+# -*- coding: UTF-8 -*-
+#/**
+# * Software Name : pycrate
+# * Version : 0.4
+# *
+# * Copyright 2019. Benoit Michau. P1Sec.
+# *
+# * This library is free software; you can redistribute it and/or
+# * modify it under the terms of the GNU Lesser General Public
+# * License as published by the Free Software Foundation; either
+# * version 2.1 of the License, or (at your option) any later version.
+# *
+# * This library is distributed in the hope that it will be useful,
+# * but WITHOUT ANY WARRANTY; without even the implied warranty of
+# * MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# * Lesser General Public License for more details.
+# *
+# * You should have received a copy of the GNU Lesser General Public
+# * License along with this library; if not, write to the Free Software
+# * Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston,
+# * MA 02110-1301  USA
+# *
+# *--------------------------------------------------------
+# * File Name : pycrate_corenet/ServerShard.py
+# * Created : 2026-10-19
+# * Authors : agent
+# *--------------------------------------------------------
+#*/
+
+#------------------------------------------------------------------------------#
+# This is the sharded corenet server
+#
+# The front process terminates SCTP associations with eNodeBs (and Home-NodeBs),
+# and handles non-UE-associated S1AP signalling, as the CorenetServer does.
+# UE-associated S1AP signalling is routed to worker processes (shards), each
+# one owning a part of the UEd instances and handling their NAS signalling.
+#
+# The AuC is only run by the front process: shards forward their authentication
+# vectors and SQN resynchronization requests to it, so that each SQN is issued
+# once, and subscribers are only loaded by the front AuC.
+#
+# WNG: Iu signalling (HNBAP, RUA and RANAP) is still handled by the front
+# process, hence a UE should not be attached through both 3G and LTE RAN.
+# SMS are not supported by shards.
+#
+# WNG: a throughput scaling close to the number of shards has not been
+# demonstrated. The only measurement so far (test/bench/bench_corenet_shard.py,
+# on a single-CPU host) gave a speed-up of 1.37 with 2 shards and 1.08 with 4
+# shards against a single one. Scaling needs at least one CPU core per shard,
+# plus one for the front process, and remains to be measured on such a host.
+#------------------------------------------------------------------------------#
+
+import multiprocessing
+from collections import deque
+
+from .utils      import *
+from .Server     import CorenetServer
+from .HdlrENB    import ENBd
+from .HdlrUE     import UEd
+from .ProcCNS1ap import S1APErrorIndNonUECN
+
+
+# messages exchanged between the front process and the shards
+SHARD_ENB     = 0 # front -> shard: (SHARD_ENB, ENBId, sid, Config)
+SHARD_ENB_REM = 1 # front -> shard: (SHARD_ENB_REM, ENBId)
+SHARD_S1AP    = 2 # both ways     : (SHARD_S1AP, ENBId, sid, buf)
+SHARD_GTPU    = 3 # shard -> front: (SHARD_GTPU, method name, args, kwargs)
+SHARD_AUC     = 4 # shard -> front: (SHARD_AUC, request id, method name, args)
+                  # front -> shard: (SHARD_AUC, request id, return value)
+SHARD_STOP    = 5 # front -> shard: (SHARD_STOP, )
+SHARD_ENB_CFG = 6 # front -> shard: (SHARD_ENB_CFG, ENBId, Config)
+
+
+#------------------------------------------------------------------------------#
+# S1AP and NAS light-weight parsing, for routing
+#------------------------------------------------------------------------------#
+
+def _aper_len(buf, off):
+    # APER length determinant, without fragmentation
+    b = buf[off]
+    if b < 0x80:
+        return off+1, b
+    elif b < 0xc0:
+        return off+2, ((b & 0x3f) << 8) + buf[off+1]
+    else:
+        raise(ValueError('fragmented length'))
+
+
+def s1ap_scan_ies(buf):
+    """scan an S1AP-PDU APER buffer, without decoding it entirely
+
+    Returns:
+        None if the buffer cannot be scanned (e.g. extended PDU type or
+        fragmented content), or
+        3-tuple (PDU type index, procedure code, dict of IE id: IE value buffer)
+    """
+    try:
+        if buf[0] & 0x80:
+            # S1AP-PDU CHOICE extension
+            return None
+        # procedureCode, criticality and open type length
+        off, l = _aper_len(buf, 3)
+        end = off + l
+        # 1 bit for the SEQUENCE extension, then the number of IEs, aligned
+        num = (buf[off+1] << 8) + buf[off+2]
+        off += 3
+        ies = {}
+        for i in range(num):
+            # IE id, criticality and open type length
+            ieid = (buf[off] << 8) + buf[off+1]
+            off, l = _aper_len(buf, off+3)
+            ies[ieid] = buf[off:off+l]
+            off += l
+        if off > end or end > len(buf):
+            return None
+        return (buf[0] >> 5) & 3, buf[1], ies
+    except (IndexError, ValueError):
+        return None
+
+
+def s1ap_enb_ue_id(ies):
+    """returns the ENB-UE-S1AP-ID from the dict of IEs returned by
+    s1ap_scan_ies(), or None
+    """
+    try:
+        val = ies[8]
+    except KeyError:
+        return None
+    # INTEGER (0..16777215): 2 bits of length, then aligned bytes
+    l = 1 + (val[0] >> 6)
+    return bytes_to_uint(val[1:1+l], 8*l)
+
+
+def s1ap_mtmsi(ies):
+    """returns the M-TMSI from the S-TMSI IE within the dict of IEs returned by
+    s1ap_scan_ies(), or None
+    """
+    try:
+        val = ies[96]
+    except KeyError:
+        return None
+    # extension and optional bits, MMEC, then aligned M-TMSI
+    return bytes_to_uint(val[2:6], 32)
+
+
+def s1ap_nas_pdu(ies):
+    """returns the NAS-PDU from the dict of IEs returned by s1ap_scan_ies(),
+    or None
+    """
+    try:
+        val = ies[26]
+        off, l = _aper_len(val, 0)
+    except (KeyError, IndexError, ValueError):
+        return None
+    return val[off:off+l]
+
+
+# EMM messages with an EPS mobile identity, after a half octet
+_EMM_EPSID = (
+    0x41, # Attach Request
+    0x45, # Detach Request
+    0x48, # Tracking Area Update Request
+    )
+
+def nas_eps_ident(buf):
+    """returns the decoded EPS mobile identity (see NAS.EPSID.decode()) within
+    the uplink EMM NAS PDU, or None
+
+    Only clear-text or integrity-protected Attach, Detach and TAU Requests are
+    parsed.
+    """
+    try:
+        sh, pd = buf[0] >> 4, buf[0] & 0xf
+        if pd == 7 and sh in (1, 3):
+            # integrity protected, skip the security header
+            buf = buf[6:]
+            sh, pd = buf[0] >> 4, buf[0] & 0xf
+        if pd != 7 or sh != 0 or buf[1] not in _EMM_EPSID:
+            return None
+        epsid = buf[4:4+buf[3]]
+        EpsId = NAS.EPSID()
+        EpsId.from_bytes(epsid)
+        return EpsId.decode()
+    except Exception:
+        return None
+
+
+def _next_teid(server, ind, num):
+    # GTP TEID allocation, so that each process allocates TEID distinct from
+    # the other ones: teid % num == ind
+    if server._GTP_TEID_UL >= (0xffffffff - ind) // num:
+        server._GTP_TEID_UL = randint(1, 200000)
+    server._GTP_TEID_UL += 1
+    return server._GTP_TEID_UL * num + ind
+
+
+#------------------------------------------------------------------------------#
+# shard handlers
+#------------------------------------------------------------------------------#
+
+class UEdShard(UEd):
+    """UE handler within a CorenetShard instance
+    """
+
+    def get_new_tmsi(self):
+        # TMSI allocated by a shard always hash to it, so that the front process
+        # can route UE-associated signalling from the S-TMSI or GUTI
+        num = self.Server.SHARD_NUM
+        return num * random.randrange(0, (1<<32) // num) + self.Server.SHARD_IND
+
+
+class ENBdShard(ENBd):
+    """eNB handler within a CorenetShard instance
+
+    The SCTP association is owned by the front process: SK is only the eNB ID,
+    and S1AP PDUs are sent back through the front process.
+    """
+
+    def connect(self, server, enbid, sid):
+        self.Server = server
+        self.SK     = enbid
+        self.SKSid  = sid
+        self.Addr   = None
+
+
+class GTPUdShard(object):
+    """GTPU handler within a CorenetShard instance
+
+    The GTPU user-plane is handled by the front process, mobiles' contexts
+    updates are sent to it.
+    """
+
+    def __init__(self):
+        self._send = None
+
+    def _call(self, meth, args, kw):
+        if self._send is not None:
+            self._send((SHARD_GTPU, meth, args, kw))
+
+    def add_mobile(self, *args, **kw):
+        self._call('add_mobile', args, kw)
+
+    def set_mobile_dl(self, *args, **kw):
+        self._call('set_mobile_dl', args, kw)
+
+    def rem_mobile(self, *args, **kw):
+        self._call('rem_mobile', args, kw)
+
+    def stop(self):
+        pass
+
+
+class AuCShard(object):
+    """AuC within a CorenetShard instance
+
+    The subscribers database is owned by the AuC of the front process: requests
+    are forwarded to it, and its answers returned.
+    """
+
+    def __init__(self):
+        self._call = None
+
+    def _request(self, meth, args):
+        if self._call is None:
+            return None
+        return self._call(meth, args)
+
+    def make_2g_vector(self, IMSI, RAND=None):
+        return self._request('make_2g_vector', (IMSI, RAND))
+
+    def make_3g_vector(self, IMSI, AMF=b'\0\0', RAND=None):
+        return self._request('make_3g_vector', (IMSI, AMF, RAND))
+
+    def make_4g_vector(self, IMSI, SN_ID, AMF=b'\x80\x00', RAND=None):
+        return self._request('make_4g_vector', (IMSI, SN_ID, AMF, RAND))
+
+    def synch_sqn(self, IMSI, RAND, AUTS):
+        return self._request('synch_sqn', (IMSI, RAND, AUTS))
+
+    def save(self):
+        pass
+
+    def stop(self):
+        pass
+
+
+#------------------------------------------------------------------------------#
+# shard server
+#------------------------------------------------------------------------------#
+
+class CorenetShard(CorenetServer):
+    """Shard of a CorenetShardServer, running in its own process
+
+    It owns the UEd instances which are routed to it by the front process and
+    processes their UE-associated S1AP signalling. It does not open any socket,
+    and communicates with the front process over a multiprocessing connection.
+    """
+
+    AUCd  = AuCShard
+    GTPUd = GTPUdShard
+    SMSd  = None
+    UEd   = UEdShard
+    # a single thread processes PDUs
+    ASN_CTX_NUM = 1
+    # maximum time to wait for the front process to answer an AuC request
+    AUC_TO = 2.0
+
+    def __init__(self, ind, num, conn, config={}):
+        self.SHARD_IND, self.SHARD_NUM, self._conn = ind, num, conn
+        for name, val in config.items():
+            setattr(self, name, val)
+        self.RAN = {}
+        self.UE, self.TMSI, self.PTMSI, self.MTMSI = {}, {}, {}, {}
+        self.LAI, self.RAI, self.TAI = {}, {}, {}
+        # messages received while waiting for an AuC answer
+        self._pending, self._auc_req = deque(), 0
+        CorenetServer.__init__(self, serving=False, threaded=False)
+        self.GTPUd._send = self._send
+        if self.AUCd:
+            self.AUCd._call = self.call_auc
+
+    def _log(self, logtype, msg):
+        CorenetServer._log(self, logtype, '[shard %i] %s' % (self.SHARD_IND, msg))
+
+    def _start_hnb_server(self):
+        self._sk_hnb = None
+
+    def _start_enb_server(self):
+        self._sk_enb = None
+
+    def _send(self, msg):
+        self._conn.send(msg)
+
+    def _write_sk(self, sk, buf, ppid=0, stream=0):
+        # sk is the eNB ID, the front process sends the buffer
+        if self.TRACE_SK:
+            self._log('TRACE_SK_DL', buf)
+        self._send((SHARD_S1AP, sk, stream, buf))
+        return len(buf)
+
+    def get_gtp_teid(self):
+        # the front process allocates TEID too, with index SHARD_NUM
+        return _next_teid(self, self.SHARD_IND, 1 + self.SHARD_NUM)
+
+    def serve(self):
+        """process messages from the front process, and eventually timeouts
+        running UE NAS procedures, until SHARD_STOP is received
+        """
+        conn, self._running = self._conn, True
+        while self._running:
+            try:
+                if self._pending:
+                    self.handle_msg(self._pending.popleft())
+                elif conn.poll(self._get_sched_to()):
+                    self.handle_msg(conn.recv())
+            except (EOFError, OSError):
+                # front process exited
+                self._running = False
+            except Exception as err:
+                self._log('ERR', 'unable to process message: %s' % err)
+            #
+            if self.SCHED_UE_TO:
+                self.clean_ue_proc()
+
+    def handle_msg(self, msg):
+        if msg[0] == SHARD_S1AP:
+            self.handle_s1ap_ue(*msg[1:])
+        elif msg[0] == SHARD_ENB:
+            self.add_enb(*msg[1:])
+        elif msg[0] == SHARD_ENB_REM:
+            self.rem_enb(msg[1])
+        elif msg[0] == SHARD_ENB_CFG:
+            self.update_enb(*msg[1:])
+        elif msg[0] == SHARD_STOP:
+            self._running = False
+        elif msg[0] == SHARD_AUC:
+            self._log('WNG', 'AuC answer received too late, request %i' % msg[1])
+        else:
+            self._log('ERR', 'invalid message, %r' % (msg[0], ))
+
+    def call_auc(self, meth, args):
+        """forwards the call to the method meth with args to the AuC of the front
+        process, and returns its return value, or None if it did not answer 
+        within AUC_TO seconds
+
+        Other messages received in the meantime are processed afterwards.
+        """
+        conn = self._conn
+        self._auc_req += 1
+        req = self._auc_req
+        self._send((SHARD_AUC, req, meth, args))
+        stop = time() + self.AUC_TO
+        while True:
+            rem = stop - time()
+            if rem <= 0 or not conn.poll(rem):
+                self._log('ERR', 'no answer from the front AuC to %s' % meth)
+                return None
+            msg = conn.recv()
+            if msg[0] != SHARD_AUC:
+                self._pending.append(msg)
+            elif msg[1] == req:
+                return msg[2]
+
+    def handle_s1ap_ue(self, enbid, sid, buf):
+        try:
+            enb = self.RAN[enbid]
+            assert( enb.is_connected() )
+        except Exception:
+            self._log('ERR', 'S1AP PDU from unknown eNB %r' % (enbid, ))
+            return
+        if self.TRACE_SK:
+            self._log('TRACE_SK_UL', buf)
+        if not asn_s1ap_acquire():
+            enb._log('ERR', 'unable to acquire the S1AP module')
+            return
+        try:
+            PDU_S1AP.from_aper(buf)
+        except Exception:
+            asn_s1ap_release()
+            enb._log('WNG', 'invalid S1AP PDU transfer-syntax: %s'\
+                     % hexlify(buf).decode('ascii'))
+            Err = enb.init_s1ap_proc(S1APErrorIndNonUECN,
+                                     Cause=('protocol', 'transfer-syntax-error'))
+            if Err is None:
+                return
+            pdu_tx = Err.send()
+        else:
+            pdu_rx = PDU_S1AP()
+            if enb.TRACE_ASN_S1AP:
+                enb._log('TRACE_ASN_S1AP_UL', asn_trace(PDU_S1AP))
+            asn_s1ap_release()
+            pdu_tx = enb.process_s1ap_ue_pdu(pdu_rx, sid)
+        for pdu in pdu_tx:
+            self.send_s1ap_pdu(enb, pdu, sid)
+
+    def add_enb(self, enbid, sid, config):
+        if enbid in self.RAN:
+            self.rem_enb(enbid)
+        enb = ENBdShard(self, enbid, sid)
+        enb.ID, enb.Config = enbid, config
+        self.RAN[enbid] = enb
+        if enb.Config:
+            self._set_enb_loc(enb)
+
+    def rem_enb(self, enbid):
+        enb = self.RAN.get(enbid)
+        if enb is not None and enb.is_connected():
+            if enb.Config:
+                self._unset_enb_loc(enb)
+            enb.disconnect()
+
+    def update_enb(self, enbid, config):
+        enb = self.RAN.get(enbid)
+        if enb is not None and enb.is_connected():
+            self.set_enb_config(enb, config)
+
+    def stop(self):
+        self._running = False
+
+
+def _run_shard(Shard, ind, num, conn, config):
+    # entry point of a shard process
+    try:
+        Shard(ind, num, conn, config).serve()
+    finally:
+        conn.close()
+
+
+#------------------------------------------------------------------------------#
+# pool of shards
+#------------------------------------------------------------------------------#
+
+class UEShardPool(object):
+    """Pool of shard processes, each one running a CorenetShard instance
+
+    UE-associated S1AP PDUs are routed to shards without being decoded
+    entirely:
+    - InitialUEMessage, by the M-TMSI (from the S-TMSI IE, or the GUTI within
+      the NAS PDU), which are allocated by each shard such that they hash to it,
+      or by the IMSI (within the NAS PDU), or by the ENB-UE-S1AP-ID otherwise
+    - other PDUs, to the shard which got the InitialUEMessage of the same
+      ENB-UE-S1AP-ID
+
+    It is independent of the SCTP transport: the CorenetShardServer passes S1AP
+    buffers to route_s1ap(), and gets buffers from shards with recv_s1ap().
+
+    Init args:
+        num      : number of shards
+        config   : dict of CorenetServer attributes to be set in each shard
+        recv_s1ap: callable(ENBId, sid, buf), for S1AP buffers sent by shards
+        recv_gtpu: None or callable(method name, args, kwargs), for GTPUd calls
+                   by shards
+        recv_auc : None or callable(method name, args), for AuC requests by
+                   shards, returning the AuC answer
+        Shard    : CorenetShard class or subclass
+    """
+
+    # multiprocessing start method, None for the default one of the platform
+    MP_START = None
+    # timeout when stopping shard processes
+    STOP_TO  = 2.0
+
+    def __init__(self, num, config, recv_s1ap, recv_gtpu=None, recv_auc=None,
+                 Shard=CorenetShard):
+        self.num       = max(1, num)
+        self.config    = config
+        self.recv_s1ap = recv_s1ap
+        self.recv_gtpu = recv_gtpu
+        self.recv_auc  = recv_auc
+        self.Shard     = Shard
+        self._procs, self._conns, self._locks, self._readers = [], [], [], []
+        # (ENBId, ENB-UE-S1AP-ID): shard index
+        self._ctx = {}
+        # number of PDUs routed, per shard
+        self.stats = [0] * self.num
+
+    def start(self):
+        ctx = multiprocessing.get_context(self.MP_START)
+        for i in range(self.num):
+            conn, conn_shard = ctx.Pipe()
+            proc = ctx.Process(target=_run_shard,
+                               args=(self.Shard, i, self.num, conn_shard, self.config))
+            proc.daemon = True
+            proc.start()
+            conn_shard.close()
+            self._procs.append(proc)
+            self._conns.append(conn)
+            self._locks.append(Lock())
+        for i in range(self.num):
+            self._readers.append(threadit(self._recv, i))
+
+    def stop(self):
+        if not self._procs:
+            return
+        for i in range(self.num):
+            self.send(i, (SHARD_STOP, ))
+        for proc in self._procs:
+            proc.join(self.STOP_TO)
+            if proc.is_alive():
+                proc.terminate()
+        for reader in self._readers:
+            reader.join(self.STOP_TO)
+        for conn in self._conns:
+            conn.close()
+        self._procs, self._conns, self._locks, self._readers = [], [], [], []
+        self._ctx.clear()
+
+    def _recv(self, i):
+        conn = self._conns[i]
+        while True:
+            try:
+                msg = conn.recv()
+            except (EOFError, OSError):
+                # shard process exited
+                break
+            try:
+                if msg[0] == SHARD_S1AP:
+                    self.recv_s1ap(*msg[1:])
+                elif msg[0] == SHARD_GTPU:
+                    if self.recv_gtpu:
+                        self.recv_gtpu(*msg[1:])
+                elif msg[0] == SHARD_AUC:
+                    self._recv_auc(i, *msg[1:])
+            except Exception as err:
+                log('[ERR] [shard %i] unable to process message: %s' % (i, err))
+
+    def _recv_auc(self, i, req, meth, args):
+        ret = None
+        if self.recv_auc:
+            try:
+                ret = self.recv_auc(meth, args)
+            except Exception as err:
+                log('[ERR] [shard %i] AuC request %s failed: %s' % (i, meth, err))
+        # the shard is waiting for the answer
+        self.send(i, (SHARD_AUC, req, ret))
+
+    def send(self, i, msg):
+        with self._locks[i]:
+            try:
+                self._conns[i].send(msg)
+            except (OSError, ValueError) as err:
+                log('[ERR] [shard %i] unable to send message: %s' % (i, err))
+                return False
+            else:
+                return True
+
+    def add_enb(self, enbid, sid, config):
+        for i in range(self.num):
+            self.send(i, (SHARD_ENB, enbid, sid, config))
+
+    def rem_enb(self, enbid):
+        for i in range(self.num):
+            self.send(i, (SHARD_ENB_REM, enbid))
+        for key in [k for k in self._ctx if k[0] == enbid]:
+            del self._ctx[key]
+
+    def update_enb(self, enbid, config):
+        for i in range(self.num):
+            self.send(i, (SHARD_ENB_CFG, enbid, config))
+
+    def get_shard_init(self, ies):
+        """returns the index of the shard to route an InitialUEMessage to, from
+        its dict of IEs returned by s1ap_scan_ies(), or None
+        """
+        mtmsi = s1ap_mtmsi(ies)
+        if mtmsi is not None:
+            return mtmsi % self.num
+        nas_pdu = s1ap_nas_pdu(ies)
+        if nas_pdu:
+            ident = nas_eps_ident(nas_pdu)
+            if ident is not None:
+                if ident[0] == NAS.IDTYPE_IMSI:
+                    return int(ident[1]) % self.num
+                elif ident[0] == NAS.IDTYPE_GUTI:
+                    return ident[4] % self.num
+        return None
+
+    def route_s1ap(self, enbid, sid, buf):
+        """routes the UE-associated S1AP buffer from the given eNB and SCTP
+        stream to a shard, and returns its index
+        """
+        scan, ind = s1ap_scan_ies(buf), None
+        if scan is not None:
+            typ, code, ies = scan
+            enb_ue_id = s1ap_enb_ue_id(ies)
+            key = (enbid, enb_ue_id)
+            if code == 12 and typ == 0:
+                # InitialUEMessage
+                ind = self.get_shard_init(ies)
+                if ind is None and enb_ue_id is not None:
+                    ind = enb_ue_id % self.num
+                self._ctx[key] = ind
+            elif code == 23 and typ == 1:
+                # UEContextReleaseComplete
+                ind = self._ctx.pop(key, None)
+            else:
+                ind = self._ctx.get(key)
+            if ind is None and enb_ue_id is not None:
+                ind = enb_ue_id % self.num
+        if ind is None:
+            # the shard will answer with an error
+            ind = 0
+        self.stats[ind] += 1
+        self.send(ind, (SHARD_S1AP, enbid, sid, buf))
+        return ind
+
+
+#------------------------------------------------------------------------------#
+# front server
+#------------------------------------------------------------------------------#
+
+class CorenetShardServer(CorenetServer):
+    """Sharded corenet server
+
+    The front process serves SCTP associations exactly as the CorenetServer,
+    but routes UE-associated S1AP signalling to SHARD_NUM shard processes,
+    which own the UEd instances.
+    """
+
+    # number of shard processes
+    SHARD_NUM   = 2
+    # shard class
+    SHARD_CLASS = CorenetShard
+    # CorenetServer attributes passed to each shard
+    SHARD_CONFIG = ('DEBUG', 'TRACE_SK', 'SCHED_RES', 'SCHED_UE_TO', 'SERVER_ENB',
+                    'PLMN', 'MME_GID', 'MME_CODE', 'EQUIV_PLMN', 'EMERG_NUMS',
+                    'ConfigS1', 'ConfigUE', 'ConfigPDN', 'UE_ATTACH_FILTER')
+
+    def get_shard_config(self):
+        return dict([(name, getattr(self, name)) for name in self.SHARD_CONFIG])
+
+    # AuC methods callable by shards
+    SHARD_AUC_METH = ('make_2g_vector', 'make_3g_vector', 'make_4g_vector', 'synch_sqn')
+
+    def _serve(self):
+        # AuC requests from all shards are processed one at a time
+        self._auc_lock = Lock()
+        self.Shards = UEShardPool(self.SHARD_NUM,
+                                  self.get_shard_config(),
+                                  self._shard_recv_s1ap,
+                                  self._shard_recv_gtpu,
+                                  self._shard_recv_auc,
+                                  self.SHARD_CLASS)
+        self.Shards.start()
+        self._log('INF', '%i shards started' % self.Shards.num)
+        try:
+            CorenetServer._serve(self)
+        finally:
+            self.Shards.stop()
+
+    def stop(self):
+        # stop shards first, so that they do not send AuC requests anymore
+        if hasattr(self, 'Shards'):
+            self.Shards.stop()
+        CorenetServer.stop(self)
+
+    def _add_sk(self, sk, ranid):
+        CorenetServer._add_sk(self, sk, ranid)
+        enb = self.RAN[ranid]
+        if isinstance(enb, ENBd):
+            self.Shards.add_enb(ranid, enb.SKSid, enb.Config)
+
+    def _rem_sk(self, sk):
+        ranid = self.SCTPCli[sk]
+        CorenetServer._rem_sk(self, sk)
+        if isinstance(self.RAN[ranid], ENBd):
+            self.Shards.rem_enb(ranid)
+
+    def handle_stream_buf(self, sk, buf, notif):
+        ppid, sid = ntohl(notif.ppid), notif.stream
+        if ppid == SCTP_PPID_S1AP:
+            ranid = self.SCTPCli[sk]
+            enb   = self.RAN[ranid]
+            if isinstance(enb, ENBd) and sid != enb.SKSid:
+                # UE-associated signalling
+                self.Shards.route_s1ap(ranid, sid, buf)
+                return
+        CorenetServer.handle_stream_buf(self, sk, buf, notif)
+
+    def get_gtp_teid(self):
+        return _next_teid(self, self.SHARD_NUM, 1 + self.SHARD_NUM)
+
+    def _shard_recv_s1ap(self, enbid, sid, buf):
+        enb = self.RAN.get(enbid)
+        if enb is None or not enb.is_connected():
+            self._log('WNG', 'S1AP PDU from shard for disconnected eNB %r' % (enbid, ))
+        else:
+            self._write_sk(enb.SK, buf, ppid=SCTP_PPID_S1AP, stream=sid)
+
+    def _shard_recv_gtpu(self, meth, args, kw):
+        if self.GTPUd and meth in ('add_mobile', 'set_mobile_dl', 'rem_mobile'):
+            getattr(self.GTPUd, meth)(*args, **kw)
+
+    def _shard_recv_auc(self, meth, args):
+        if self.AUCd and meth in self.SHARD_AUC_METH:
+            with self._auc_lock:
+                return getattr(self.AUCd, meth)(*args)
+        else:
+            return None
+
+    def set_enb_config(self, enb, config):
+        CorenetServer.set_enb_config(self, enb, config)
+        if isinstance(enb, ENBd) and hasattr(self, 'Shards'):
+            self.Shards.update_enb(enb.ID, enb.Config)
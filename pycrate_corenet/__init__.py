@@ -27,7 +27,7 @@
 # *--------------------------------------------------------
 #*/
 
-__all__ = ['utils', 'Server', 'ServerAuC', 'ServerGTPU',
+__all__ = ['utils', 'Server', 'ServerAuC', 'ServerAuCDB', 'ServerGTPU', 'ServerShard',
            'HdlrENB', 'HdlrHNB',
            'HdlrUE', 'HdlrUEIu', 'HdlrUEIuCS', 'HdlrUEIuPS', 'HdlrUES1', 'HdlrUESMS',
            'ProcProto', 'ProcCNHnbap', 'ProcCNRua', 'ProcCNRanap', 'ProcCNS1ap',
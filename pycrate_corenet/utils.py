@@ -32,14 +32,19 @@ import sys
 import socket
 import random
 import re
+import importlib
 #import traceback
+import selectors
 from select    import select
-from threading import Thread, Lock, Event
+from threading import Thread, Lock, RLock, Condition, Event, BoundedSemaphore, \
+                      local
+from concurrent.futures import ThreadPoolExecutor
 from random    import SystemRandom, randint
 from time      import time, sleep
+from heapq     import heappush, heappop
 from datetime  import datetime
 from binascii  import hexlify, unhexlify
-from struct    import pack, unpack
+from struct    import pack, unpack, pack_into, unpack_from
 from socket    import AF_INET, AF_INET6, AF_PACKET, ntohl, htonl, ntohs, htons, \
                       inet_aton, inet_ntoa, inet_pton, inet_ntop
 
@@ -110,93 +115,207 @@ from pycrate_mobile  import NAS
 ASN_GLOBAL = S1AP.GLOBAL.MOD
 
 # ASN.1 PDU encoders / decoders
-PDU_S1AP  = S1AP.S1AP_PDU_Descriptions.S1AP_PDU
-PDU_HNBAP = HNBAP.HNBAP_PDU_Descriptions.HNBAP_PDU
-PDU_RUA   = RUA.RUA_PDU_Descriptions.RUA_PDU
-PDU_RANAP = RANAP.RANAP_PDU_Descriptions.RANAP_PDU
-PDU_SS_Facility = SS.SS_Facility.Facility
-
-# ASN.1 modules are not thread-safe
-# objects' value will be mixed in case a thread ctxt switch occurs between 
-# the fg interpreter and the bg CorenetServer loop, and both accesses the same
-# ASN.1 modules / objects
-ASN_READY_S1AP  = Event()
-ASN_READY_HNBAP = Event()
-ASN_READY_RUA   = Event()
-ASN_READY_RANAP = Event()
-ASN_READY_S1AP.set()
-ASN_READY_HNBAP.set()
-ASN_READY_RUA.set()
-ASN_READY_RANAP.set()
-
-ASN_ACQUIRE_TO = 0.01 # in sec
-
-def asn_s1ap_acquire():
-    if ASN_READY_S1AP.is_set():
-        ASN_READY_S1AP.clear()
-        return True
-    else:
-        ready = ASN_READY_S1AP.wait(ASN_ACQUIRE_TO)
-        if not ready:
-            # timeout, module is still locked
-            return False
-        else:
-            ASN_READY_S1AP.clear()
-            return True
-
-def asn_s1ap_release():
-    ASN_READY_S1AP.set()
-
-def asn_hnbap_acquire():
-    if ASN_READY_HNBAP.is_set():
-        ASN_READY_HNBAP.clear()
-        return True
-    else:
-        ready = ASN_READY_HNBAP.wait(ASN_ACQUIRE_TO)
-        if not ready:
-            # timeout, module is still locked
-            return False
-        else:
-            ASN_READY_HNBAP.clear()
-            return True
-
-def asn_hnbap_release():
-    ASN_READY_HNBAP.set()
-
-def asn_rua_acquire():
-    if ASN_READY_RUA.is_set():
-        ASN_READY_RUA.clear()
+#
+# The ASN.1 runtime is not thread-safe: objects' value, and the PER codec state,
+# will be mixed in case a thread ctxt switch occurs between 2 threads accessing
+# the same ASN.1 modules / objects (e.g. the fg interpreter and the bg
+# CorenetServer loop, or the CorenetServer workers).
+# Hence, each thread encoding or decoding PDUs acquires its own ASN.1 context,
+# which is a fresh import of the ASN.1 runtime and the specifications in ASN_SPECS,
+# independent from any other one (with its own GLOBAL and codecs).
+# PDU_S1AP, PDU_HNBAP, PDU_RUA and PDU_RANAP then always refer to the PDU of the
+# context acquired by the current thread, or to the default one otherwise.
+# The number of contexts is capped: they are all loaded at startup with
+# asn_pool_init(), and a thread acquiring a context when all are in use waits
+# for one to be released, as loading a new one takes seconds and hides the ASN.1
+# modules from sys.modules for the whole process. If the pool was not initialized,
+# a single context is loaded on the first acquisition, so that threads acquiring
+# a context are always excluded from each other.
+#
+# As a context is a fresh import, the class-level configuration of the default
+# ASN.1 runtime (e.g. ASN1Obj._SILENT, ASN1Obj._SAFE_BND, ASN1CodecBER.ENC_LUNDEF)
+# is copied into each context when it is loaded: it must hence be set before
+# calling asn_pool_init() (CorenetServer calls it when it starts), later changes
+# do not apply to the contexts already loaded. Only attributes with a basic
+# value (bool, int, float, str, bytes, None) are copied: methods patched on the
+# classes of the default runtime (e.g. by ASN1Profiler or ASN1Offsets) apply to
+# the default ASN.1 objects only.
+#
+# RRCLTE and RRC3G (for UE radio capabilities) are only available in the default
+# context, and are used while holding ASN_RRC_LOCK. This is the same for SS and
+# MAP (for NAS IEs), with TS24080_SS.ASN_SS_LOCK and TS24301_IE.ASN_MAP_LOCK.
+
+# ASN.1 specifications and PDU object within a context
+ASN_SPECS = {
+    'S1AP' : ('S1AP_PDU_Descriptions', 'S1AP_PDU'),
+    'HNBAP': ('HNBAP_PDU_Descriptions', 'HNBAP_PDU'),
+    'RUA'  : ('RUA_PDU_Descriptions', 'RUA_PDU'),
+    'RANAP': ('RANAP_PDU_Descriptions', 'RANAP_PDU'),
+    }
+
+# pool of ASN.1 contexts not acquired by any thread
+ASN_POOL      = []
+ASN_POOL_LOCK = Lock()
+ASN_POOL_COND = Condition(ASN_POOL_LOCK)
+# number of ASN.1 contexts loaded
+ASN_POOL_CNT  = 0
+# ASN.1 context acquired by the current thread
+_ASN_LOCAL    = local()
+# import of ASN.1 contexts
+_ASN_LOAD_LOCK = Lock()
+# loading of the pool
+_ASN_INIT_LOCK = Lock()
+# class attributes' values copied from the default ASN.1 runtime into each context
+_ASN_CONF_TYPES = (bool, int, float, str_types, bytes_types, type(None))
+
+
+
+def asn_load_ctx():
+    """returns a new ASN.1 context, as a dict {spec name: PDU object}, with
+    the specifications in ASN_SPECS imported together with their own ASN.1 
+    runtime, independently from those already imported
+    """
+    global ASN_POOL_CNT
+    pkgs = ('pycrate_asn1rt', 'pycrate_asn1dir')
+    with _ASN_LOAD_LOCK:
+        # temporarily hide the ASN.1 runtime and specifications already imported
+        mods = {}
+        for name in list(sys.modules):
+            if name.split('.')[0] in pkgs:
+                mods[name] = sys.modules.pop(name)
+        try:
+            ctx = {}
+            for spec, (modname, pduname) in ASN_SPECS.items():
+                Spec = importlib.import_module('pycrate_asn1dir.%s' % spec)
+                ctx[spec] = getattr(getattr(Spec, modname), pduname)
+            for name, mod in list(sys.modules.items()):
+                if name.split('.')[0] == 'pycrate_asn1rt' and name in mods:
+                    _asn_copy_conf(mods[name], mod)
+        finally:
+            for name in list(sys.modules):
+                if name.split('.')[0] in pkgs:
+                    del sys.modules[name]
+            sys.modules.update(mods)
+    with ASN_POOL_LOCK:
+        ASN_POOL_CNT += 1
+    return ctx
+
+def _asn_copy_conf(mod_def, mod):
+    # copies the class-level configuration of the classes of the module mod_def,
+    # from the default ASN.1 runtime, to the same classes of the module mod
+    for name, cl in vars(mod).items():
+        if not isinstance(cl, type) or cl.__module__ != mod.__name__:
+            continue
+        cl_def = getattr(mod_def, name, None)
+        if not isinstance(cl_def, type):
+            continue
+        for attr, val in vars(cl_def).items():
+            if attr[:2] != '__' and isinstance(val, _ASN_CONF_TYPES):
+                setattr(cl, attr, val)
+
+def asn_pool_init(num):
+    """loads ASN.1 contexts into the pool, so that at least num of them are
+    available in total
+    """
+    with _ASN_INIT_LOCK:
+        while ASN_POOL_CNT < num:
+            ctx = asn_load_ctx()
+            with ASN_POOL_LOCK:
+                ASN_POOL.append(ctx)
+                ASN_POOL_COND.notify()
+
+def asn_acquire():
+    """acquires an ASN.1 context for the current thread, from the pool, 
+    waiting for one to be released if all are acquired by other threads
+    
+    If the pool was not initialized (no context loaded), a first context is
+    loaded into it.
+    Always returns True, as the context is waited for without timeout.
+    
+    Contexts are reentrant: the current thread keeps its context until it 
+    releases it as many times as it acquired it.
+    """
+    if getattr(_ASN_LOCAL, 'ctx', None) is not None:
+        _ASN_LOCAL.depth += 1
         return True
-    else:
-        ready = ASN_READY_RUA.wait(ASN_ACQUIRE_TO)
-        if not ready:
-            # timeout, module is still locked
-            return False
+    if not ASN_POOL_CNT:
+        asn_pool_init(1)
+    with ASN_POOL_LOCK:
+        while not ASN_POOL:
+            ASN_POOL_COND.wait()
+        ctx = ASN_POOL.pop()
+    _ASN_LOCAL.ctx, _ASN_LOCAL.depth = ctx, 1
+    return True
+
+def asn_release():
+    """releases the ASN.1 context of the current thread, if any, back to the
+    pool
+    """
+    depth = getattr(_ASN_LOCAL, 'depth', 0)
+    if depth > 1:
+        _ASN_LOCAL.depth -= 1
+    elif depth == 1:
+        ctx = _ASN_LOCAL.ctx
+        _ASN_LOCAL.ctx, _ASN_LOCAL.depth = None, 0
+        with ASN_POOL_LOCK:
+            ASN_POOL.append(ctx)
+            ASN_POOL_COND.notify()
+
+
+class ASNPDU(object):
+    """proxy to the PDU object of the ASN.1 context acquired by the current
+    thread, or to the default PDU object otherwise
+    """
+    
+    __slots__ = ('_spec', '_pdu')
+    
+    def __init__(self, spec, pdu):
+        self._spec = spec
+        self._pdu  = pdu
+    
+    def get_pdu(self):
+        ctx = getattr(_ASN_LOCAL, 'ctx', None)
+        if ctx is None:
+            return self._pdu
         else:
-            ASN_READY_RUA.clear()
-            return True
+            return ctx[self._spec]
+    
+    def __getattr__(self, attr):
+        return getattr(self.get_pdu(), attr)
+    
+    def __call__(self, *args):
+        return self.get_pdu()(*args)
+    
+    def __repr__(self):
+        return repr(self.get_pdu())
+
+
+PDU_S1AP  = ASNPDU('S1AP', S1AP.S1AP_PDU_Descriptions.S1AP_PDU)
+PDU_HNBAP = ASNPDU('HNBAP', HNBAP.HNBAP_PDU_Descriptions.HNBAP_PDU)
+PDU_RUA   = ASNPDU('RUA', RUA.RUA_PDU_Descriptions.RUA_PDU)
+PDU_RANAP = ASNPDU('RANAP', RANAP.RANAP_PDU_Descriptions.RANAP_PDU)
+PDU_SS_Facility = SS.SS_Facility.Facility
 
-def asn_rua_release():
-    ASN_READY_RUA.set()
+# per-protocol helpers, all ASN.1 PDUs are in the same context
+asn_s1ap_acquire  = asn_acquire
+asn_s1ap_release  = asn_release
+asn_hnbap_acquire = asn_acquire
+asn_hnbap_release = asn_release
+asn_rua_acquire   = asn_acquire
+asn_rua_release   = asn_release
+asn_ranap_acquire = asn_acquire
+asn_ranap_release = asn_release
 
-def asn_ranap_acquire():
-    if ASN_READY_RANAP.is_set():
-        ASN_READY_RANAP.clear()
-        return True
-    else:
-        ready = ASN_READY_RANAP.wait(ASN_ACQUIRE_TO)
-        if not ready:
-            # timeout, module is still locked
-            return False
-        else:
-            ASN_READY_RANAP.clear()
-            return True
 
-def asn_ranap_release():
-    ASN_READY_RANAP.set()
+# RRCLTE and RRC3G objects are shared by all threads
+ASN_RRC_LOCK = RLock()
 
 
 def decode_ue_rad_cap(buf):
+    with ASN_RRC_LOCK:
+        return _decode_ue_rad_cap(buf)
+
+def _decode_ue_rad_cap(buf):
     UERadCap = RRCLTE.EUTRA_InterNodeDefinitions.UERadioAccessCapabilityInformation
     try:
         UERadCap.from_uper(buf)
@@ -323,6 +442,17 @@ class RANAPErr(CorenetErr):
 TRACE_COLOR_START = '\x1b[94m'
 TRACE_COLOR_END = '\x1b[0m'
 
+# caps for the ASN.1 value notation of the PDUs in TRACE_ASN_* logs: constructed 
+# values deeper than TRACE_ASN_MAXDEPTH are elided, and the text is truncated 
+# after TRACE_ASN_MAXLEN chars (None for no cap)
+TRACE_ASN_MAXDEPTH = None
+TRACE_ASN_MAXLEN   = None
+
+def asn_trace(PDU):
+    """returns the ASN.1 value notation of PDU, for TRACE_ASN_* logs
+    """
+    return PDU.to_asn1(maxdepth=TRACE_ASN_MAXDEPTH, maxlen=TRACE_ASN_MAXLEN)
+
 # logging facility
 def log(msg='', withdate=True, tostdio=False, tofile='/tmp/corenet.log'):
     if withdate:
@@ -369,6 +499,94 @@ PROTO_RANAP = 'RANAP'
 PROTO_S1AP  = 'S1AP'
 
 
+#------------------------------------------------------------------------------#
+# SCTP loopback transport
+#------------------------------------------------------------------------------#
+# When SCTP is not supported by the kernel (e.g. within most containers),
+# UNIX sockets of type SOCK_SEQPACKET, which preserve messages' boundaries,
+# can replace the SCTP sockets for local tests and benchmarks:
+# the CorenetServer uses them when the 'INET' parameter of SERVER_HNB /
+# SERVER_ENB is socket.AF_UNIX, 'IP' being then the path of the socket
+# (starting with '\0' for an abstract socket), and 'port' being ignored.
+# Each message is prefixed with the SCTP payload protocol identifier (uint32,
+# in the same byte order as passed to sctp_send()) and stream id (uint16).
+
+SCTP_LOOP_HDR = '=IH'
+SCTP_LOOP_HDRLEN = 6
+
+
+class SCTPLoopNotif(object):
+    """sctp_recv() notification of SCTPLoopSocket, with the ppid and stream
+    attributes of pysctp's sndrcvinfo
+    """
+    
+    __slots__ = ('ppid', 'stream', 'type', 'flags')
+    
+    def __init__(self, ppid=0, stream=0):
+        self.ppid   = ppid
+        self.stream = stream
+        self.type   = 0
+        self.flags  = 0
+
+
+class SCTPLoopEvents(object):
+    """events subscription of SCTPLoopSocket, there is no SCTP event to
+    subscribe to
+    """
+    
+    def flush(self):
+        pass
+
+
+class SCTPLoopSocket(object):
+    """replacement for pysctp's sctpsocket_tcp, over a UNIX SOCK_SEQPACKET socket
+    """
+    
+    def __init__(self, sk=None):
+        if sk is None:
+            sk = socket.socket(socket.AF_UNIX, socket.SOCK_SEQPACKET)
+        self.sock   = sk
+        self.events = SCTPLoopEvents()
+    
+    def fileno(self):
+        return self.sock.fileno()
+    
+    def bind(self, addr):
+        # addr: (path, port) as for SCTP sockets, or path
+        self.sock.bind(addr[0] if isinstance(addr, tuple) else addr)
+    
+    def listen(self, num):
+        self.sock.listen(num)
+    
+    def connect(self, addr):
+        self.sock.connect(addr[0] if isinstance(addr, tuple) else addr)
+    
+    def accept(self):
+        sk, addr = self.sock.accept()
+        return SCTPLoopSocket(sk), addr
+    
+    def getpeername(self):
+        return self.sock.getpeername()
+    
+    def settimeout(self, to):
+        self.sock.settimeout(to)
+    
+    def close(self):
+        self.sock.close()
+    
+    def sctp_send(self, msg, ppid=0, stream=0, **kwargs):
+        return self.sock.send(pack(SCTP_LOOP_HDR, ppid, stream) + msg) - SCTP_LOOP_HDRLEN
+    
+    def sctp_recv(self, maxlen):
+        buf, _, flags, _ = self.sock.recvmsg(SCTP_LOOP_HDRLEN + maxlen)
+        if len(buf) < SCTP_LOOP_HDRLEN:
+            # the peer closed the connection
+            return '', 0, b'', SCTPLoopNotif()
+        ppid, stream = unpack_from(SCTP_LOOP_HDR, buf)
+        return '', 0 if flags & socket.MSG_TRUNC else sctp.FLAG_EOR, \
+               buf[SCTP_LOOP_HDRLEN:], SCTPLoopNotif(ppid, stream)
+
+
 #------------------------------------------------------------------------------#
 # built-ins object copy routines
 #------------------------------------------------------------------------------#
@@ -649,6 +867,64 @@ class SigStack(object):
 class SigProc(object):
     pass
 
+
+class ProcTimers(object):
+    """heap of signalling procedures' timers
+    
+    Procedures register their timer when it starts (see 
+    NASSigProc.start_timer()), and deregister it when they end. Deregistered
+    timers are only marked, and dropped once they reach the top of the heap:
+    hence, expiring timers costs O(log(n)) for each expired or deregistered 
+    timer, whatever the number of running procedures is.
+    """
+    
+    def __init__(self):
+        self._heap = []
+        self._lock = Lock()
+        self._cnt  = 0
+    
+    def __len__(self):
+        return len(self._heap)
+    
+    def add(self, stop, proc):
+        """add the timer of proc, expiring at time stop, and return its entry
+        """
+        with self._lock:
+            self._cnt += 1
+            entry = [stop, self._cnt, proc]
+            heappush(self._heap, entry)
+        return entry
+    
+    def cancel(self, entry):
+        """cancel the timer entry returned by add()
+        """
+        entry[2] = None
+    
+    def next_stop(self):
+        """return the expiration time of the next timer, or None
+        """
+        with self._lock:
+            heap = self._heap
+            while heap and heap[0][2] is None:
+                heappop(heap)
+            if heap:
+                return heap[0][0]
+            else:
+                return None
+    
+    def pop_expired(self, T):
+        """remove and return the list of procedures with their timer expired at
+        time T
+        """
+        procs = []
+        with self._lock:
+            heap = self._heap
+            while heap and heap[0][0] <= T:
+                proc = heappop(heap)[2]
+                if proc is not None:
+                    procs.append(proc)
+        return procs
+
 # See ProcProto.py for prototype classes for the various mobile network procedures
 # and other Proc*.py for the procedures themselves
 
@@ -62,23 +62,18 @@ _WITH_ASN1 = True
 
 if _WITH_ASN1:
     
-    from threading       import Event
+    from threading       import RLock
     from pycrate_asn1dir import SS
     from pycrate_asn1rt  import wrapper
     
-    ASN_SS_READY = Event()
-    ASN_SS_READY.set()
-    _ACQUIRE_TO  = 0.005
+    # the SS ASN.1 objects and BER codec are shared by all threads
+    ASN_SS_LOCK = RLock()
     
     def asn_ss_acquire():
-        if not ASN_SS_READY.is_set():
-            ASN_SS_READY.wait(_ACQUIRE_TO)
-            if not ASN_SS_READY.is_set():
-                raise(PycrateErr('unable to acquire the SS ASN.1 module'))
-        ASN_SS_READY.clear()
+        ASN_SS_LOCK.acquire()
     
     def asn_ss_release():
-        ASN_SS_READY.set()
+        ASN_SS_LOCK.release()
     
     Facility = wrapper.gen_ber_wrapper(SS.SS_Facility.Facility, asn_ss_acquire, asn_ss_release)
 
@@ -772,7 +772,7 @@ if _with_cm:
                 None
             """
             if eia == 0:
-                self[4].set_val(b'\0\0')
+                self[3].set_val(b'\0\0')
             else:
                 try:
                     EIA = _EIA[eia]
@@ -781,7 +781,7 @@ if _with_cm:
                           .format(eia)))
                 msg = self.to_bytes()
                 mac = EIA(key, seqnoff + self[2].get_val(), 0, dir, msg[:2])
-                self[4].set_val(mac[2:4])
+                self[3].set_val(mac[2:4])
 
 else:
     
@@ -59,23 +59,18 @@ _WITH_ASN1 = True
 
 if _WITH_ASN1:
     
-    from threading       import Event
+    from threading       import RLock
     from pycrate_asn1dir import MAP
     from pycrate_asn1rt  import wrapper
     
-    ASN_MAP_READY = Event()
-    ASN_MAP_READY.set()
-    _ACQUIRE_TO  = 0.005
+    # the MAP ASN.1 objects and BER codec are shared by all threads
+    ASN_MAP_LOCK = RLock()
     
     def asn_map_acquire():
-        if not ASN_MAP_READY.is_set():
-            ASN_MAP_READY.wait(_ACQUIRE_TO)
-            if not ASN_MAP_READY.is_set():
-                raise(PycrateErr('unable to acquire the MAP ASN.1 module'))
-        ASN_MAP_READY.clear()
+        ASN_MAP_LOCK.acquire()
     
     def asn_map_release():
-        ASN_MAP_READY.set()
+        ASN_MAP_LOCK.release()
 
 
 #------------------------------------------------------------------------------#
@@ -26,6 +26,8 @@ setup(
              "tools/pycrate_berdecode.py",
              "tools/pycrate_showmedia.py",
              "tools/pycrate_map_op_info.py",
+             "tools/pycrate_aucdb.py",
+             "tools/pycrate_asn1bnd.py",
              ],
     
     # no mandatory dependency
@@ -0,0 +1,339 @@
+#!/usr/bin/env python3
+# -*- coding: UTF-8 -*-
+#/**
+# * Software Name : pycrate
+# * Version : 0.4
+# *
+# * Copyright 2019. Benoit Michau. P1Sec.
+# *
+# * This program is free software: you can redistribute it and/or modify
+# * it under the terms of the GNU General Public License version 2 as published
+# * by the Free Software Foundation.
+# *
+# * This program is distributed in the hope that it will be useful,
+# * but WITHOUT ANY WARRANTY; without even the implied warranty of
+# * MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# * GNU General Public License for more details.
+# *
+# * You will find a copy of the terms and conditions of the GNU General Public
+# * License version 2 in the "license.txt" file or
+# * see http://www.gnu.org/licenses/ or write to the Free Software Foundation,
+# * Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA
+# *
+# *--------------------------------------------------------
+# * File Name : test/bench/bench_asn1dir.py
+# * Created : 2026-10-19
+# * Authors : agent
+# *--------------------------------------------------------
+#*/
+
+"""
+Fuzzing and throughput benchmark of the ASN.1 runtime, for all the compiled
+specifications of pycrate_asn1dir
+
+For each specification, the top-level PDU types are listed from the dependency
+graph of the specification (i.e. the constructed types which are not referenced
+by any other type), random values are generated for each of them with
+ASN1Obj.gen_random(), and each value is encoded and decoded with APER, UPER,
+BER and DER. Each encoding is checked to be stable through a decoding /
+re-encoding round-trip, and the throughput of the encoders and decoders is
+measured.
+The sample buffers shipped in test/res (S1AP, TCAP MAP) are
+decoded and benchmarked too, together with the random values of their type.
+Optionally, corrupted buffers are decoded too, in order to catch decoding
+errors which are not raised as PycrateErr.
+
+Results are written as JSON, one record per (specification, type, codec), so
+that they can be compared between versions.
+"""
+
+import os
+import re
+import sys
+import json
+import random
+import argparse
+import platform
+import importlib
+from time     import perf_counter
+from binascii import unhexlify
+
+import pycrate_asn1dir
+from pycrate_core.utils     import PycrateErr
+from pycrate_asn1rt.utils   import *
+from pycrate_asn1rt.err     import *
+from pycrate_asn1rt.asnobj  import ASN1Obj
+ASN1Obj._SILENT = True
+
+
+CODECS = ('aper', 'uper', 'ber', 'der')
+
+# constructed types which can be top-level PDUs
+TYPES_PDU = (TYPE_CHOICE, TYPE_SEQ, TYPE_SEQ_OF, TYPE_SET, TYPE_SET_OF)
+
+# sample buffers shipped in test/res, per specification: list of (type, decoding
+# method, pcapr JSON export file, key of the hex buffers in the file)
+RES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'res')
+CORPUS = {
+    'S1AP'    : [('S1AP-PDU-Descriptions.S1AP-PDU', 'from_aper', 's1ap_pcapr.json',
+                  's1ap_raw')],
+    'TCAP_MAP': [('TCAP-MAP-Messages.TCAP-MAP-Message', 'from_ber', 'tcapmap_pcapr.json',
+                  'tcap_raw')],
+    }
+
+
+#------------------------------------------------------------------------------#
+# top-level PDU types of a compiled specification
+#------------------------------------------------------------------------------#
+
+def get_spec_mods(spec):
+    """imports the compiled specification `spec' from pycrate_asn1dir, and
+    returns the dict of its ASN.1 modules {module name: Python class}
+    """
+    pymod = importlib.import_module('pycrate_asn1dir.%s' % spec)
+    mods = {}
+    for cl in vars(pymod).values():
+        if isinstance(cl, type) and hasattr(cl, '_name_') and hasattr(cl, '_type_'):
+            mods[cl._name_] = cl
+    return mods
+
+
+def get_spec_pdus(spec, mods):
+    """returns the list of top-level PDU types (ASN1Obj) of the specification
+    
+    They are the constructed types which are not referenced by any other object
+    in the dependency graph of the specification (pycrate_asn1dir/$spec.json).
+    """
+    path = os.path.join(os.path.dirname(pycrate_asn1dir.__file__), '%s.json' % spec)
+    with open(path) as fd:
+        graph = json.load(fd)
+    refd = set([l['target'] for l in graph['links']])
+    pdus = []
+    for node in graph['nodes']:
+        if node['id'] in refd:
+            continue
+        modname, _, name = node['id'].partition('.')
+        if modname not in mods:
+            continue
+        Mod = mods[modname]
+        if name not in Mod._type_ or name in Mod._param_:
+            continue
+        Obj = getattr(Mod, name_to_defin(name), None)
+        if isinstance(Obj, ASN1Obj) and Obj.TYPE in TYPES_PDU:
+            pdus.append(Obj)
+    return pdus
+
+
+def get_corpus_vals(spec, mods, num=0):
+    """returns the dict {ASN1Obj: list of values} of the sample buffers shipped
+    in test/res for the specification `spec', decoded
+    
+    If num is not 0, at most num values are returned per type.
+    """
+    ret = {}
+    for ident, dec, fn, key in CORPUS.get(spec, []):
+        modname, _, name = ident.partition('.')
+        if modname not in mods:
+            continue
+        Obj = getattr(mods[modname], name_to_defin(name), None)
+        if not isinstance(Obj, ASN1Obj):
+            continue
+        try:
+            with open(os.path.join(RES_DIR, fn), 'rb') as fd:
+                data = fd.read()
+        except IOError:
+            continue
+        bufs = [unhexlify(h) for h in \
+                re.findall(b'"' + key.encode() + b'": "([0-9a-f]+)"', data)]
+        vals = []
+        for buf in bufs:
+            try:
+                getattr(Obj, dec)(buf)
+            except Exception:
+                continue
+            vals.append(Obj())
+            if num and len(vals) == num:
+                break
+        ret[Obj] = vals
+    return ret
+
+
+#------------------------------------------------------------------------------#
+# benchmark
+#------------------------------------------------------------------------------#
+
+def _corrupt(buf, rnd):
+    buf = bytearray(buf)
+    for i in range(rnd.randint(1, 4)):
+        if buf:
+            buf[rnd.randrange(len(buf))] ^= 1 << rnd.randrange(8)
+    if len(buf) > 1 and rnd.random() < 0.25:
+        del buf[rnd.randrange(len(buf)):]
+    return bytes(buf)
+
+
+def bench_type(Obj, vals, codec, rounds=1, fuzz=0, rnd=None):
+    """encodes and decodes all values in vals with Obj, using the given codec
+    
+    returns a dict with the number of values processed, the number of
+    round-trip errors, the encoding and decoding throughputs, and optionally
+    the number of unexpected exceptions raised when decoding fuzz corrupted
+    buffers
+    """
+    enc, dec = getattr(Obj, 'to_%s' % codec), getattr(Obj, 'from_%s' % codec)
+    ret = {'num': 0, 'err': 0, 'bytes': 0}
+    # encoding checks
+    bufs = []
+    for val in vals:
+        try:
+            buf = enc(val)
+            dec(buf)
+            if enc() != buf:
+                raise(ASN1Err('unstable encoding'))
+        except Exception as e:
+            ret['err'] += 1
+            if 'err_msg' not in ret:
+                ret['err_msg'] = '%s: %s' % (type(e).__name__, e)
+        else:
+            bufs.append((val, buf))
+    ret['num'] = len(bufs)
+    if not bufs:
+        return ret
+    ret['bytes'] = sum([len(b) for _, b in bufs])
+    # encoding throughput
+    T0 = perf_counter()
+    for i in range(rounds):
+        for val, _ in bufs:
+            enc(val)
+    Te = perf_counter() - T0
+    # decoding throughput
+    T0 = perf_counter()
+    for i in range(rounds):
+        for _, buf in bufs:
+            dec(buf)
+    Td = perf_counter() - T0
+    num, mb = rounds * len(bufs), rounds * ret['bytes'] / 1e6
+    ret['enc_s']       = Te
+    ret['dec_s']       = Td
+    ret['enc_msg_s']   = num / Te if Te else None
+    ret['enc_mb_s']    = mb / Te if Te else None
+    ret['dec_msg_s']   = num / Td if Td else None
+    ret['dec_mb_s']    = mb / Td if Td else None
+    # fuzzing with corrupted buffers
+    if fuzz:
+        if rnd is None:
+            rnd = random.Random(0)
+        ret['fuzz'], ret['fuzz_crash'] = 0, 0
+        for i in range(fuzz):
+            buf = _corrupt(rnd.choice(bufs)[1], rnd)
+            ret['fuzz'] += 1
+            try:
+                dec(buf)
+            except PycrateErr:
+                pass
+            except Exception as e:
+                ret['fuzz_crash'] += 1
+                if 'fuzz_crash_msg' not in ret:
+                    ret['fuzz_crash_msg'] = '%s: %s' % (type(e).__name__, e)
+    return ret
+
+
+def bench_spec(spec, args, log=None):
+    """runs the benchmark for all top-level PDU types of the specification
+    `spec', and returns the list of results
+    """
+    res = []
+    try:
+        mods   = get_spec_mods(spec)
+        pdus   = get_spec_pdus(spec, mods)
+        corpus = get_corpus_vals(spec, mods, args.num)
+    except Exception as e:
+        if log:
+            log('%s: unable to load the specification (%s)' % (spec, e))
+        return res
+    pdus = [O for O in corpus if O not in pdus] + pdus
+    if args.types:
+        pdus = [O for O in pdus if '%s.%s' % (O._mod, O._name) in args.types \
+                or O._name in args.types]
+    if args.max_types:
+        pdus = pdus[:args.max_types]
+    for Obj in pdus:
+        name = '%s.%s' % (Obj._mod, Obj._name)
+        rnd  = random.Random('%s.%s.%i' % (spec, name, args.seed))
+        vals, gerr = [], 0
+        for i in range(args.num):
+            try:
+                vals.append(Obj.gen_random(rnd, args.depth))
+            except Exception:
+                gerr += 1
+        vals.extend(corpus.get(Obj, []))
+        for codec in args.codecs:
+            r = bench_type(Obj, vals, codec, args.rounds, args.fuzz, rnd)
+            r.update({'spec': spec, 'type': name, 'codec': codec, 'gen_err': gerr})
+            res.append(r)
+            if log:
+                if r['num']:
+                    log('%-10s %-60s %-4s %5i msg, %3i err | enc %10.1f msg/s %7.3f MB/s '\
+                        '| dec %10.1f msg/s %7.3f MB/s' % (spec, name, codec,
+                        r['num'], r['err'] + gerr, r['enc_msg_s'] or 0, r['enc_mb_s'] or 0,
+                        r['dec_msg_s'] or 0, r['dec_mb_s'] or 0))
+                else:
+                    log('%-10s %-60s %-4s no value (%s)' % (spec, name, codec,
+                        r.get('err_msg', 'generation error')))
+    return res
+
+
+def main():
+    parser = argparse.ArgumentParser(description='fuzzing and throughput benchmark '\
+                                     'of the ASN.1 runtime for the compiled '\
+                                     'specifications of pycrate_asn1dir')
+    parser.add_argument('-s', '--specs', nargs='+', default=None,
+                        help='specifications to benchmark (default: all compiled ones)')
+    parser.add_argument('-t', '--types', nargs='+', default=None,
+                        help='restrict to those PDU types (name, or module.name)')
+    parser.add_argument('-c', '--codecs', nargs='+', default=list(CODECS),
+                        choices=CODECS, help='codecs to benchmark')
+    parser.add_argument('-n', '--num', type=int, default=50,
+                        help='number of random values per type')
+    parser.add_argument('-r', '--rounds', type=int, default=4,
+                        help='number of encoding / decoding rounds per value')
+    parser.add_argument('-d', '--depth', type=int, default=6,
+                        help='nesting depth for generating optional components')
+    parser.add_argument('-f', '--fuzz', type=int, default=0,
+                        help='number of corrupted buffers to decode per type and codec')
+    parser.add_argument('-m', '--max-types', type=int, default=0,
+                        help='maximum number of PDU types per specification')
+    parser.add_argument('--seed', type=int, default=0, help='random seed')
+    parser.add_argument('-o', '--output', default=None,
+                        help='JSON output file (default: stdout)')
+    parser.add_argument('-q', '--quiet', action='store_true', help='no progress log')
+    args = parser.parse_args()
+    #
+    if args.specs is None:
+        args.specs = pycrate_asn1dir.__all__
+    if args.quiet:
+        log = None
+    else:
+        log = lambda msg: print(msg, file=sys.stderr)
+    #
+    res = []
+    for spec in args.specs:
+        res.extend(bench_spec(spec, args, log))
+    out = {
+        'python'  : platform.python_implementation() + ' ' + platform.python_version(),
+        'platform': platform.platform(),
+        'args'    : {'num': args.num, 'rounds': args.rounds, 'depth': args.depth,
+                     'fuzz': args.fuzz, 'seed': args.seed},
+        'results' : res
+        }
+    if args.output:
+        with open(args.output, 'w') as fd:
+            json.dump(out, fd, indent=1, sort_keys=True)
+    else:
+        json.dump(out, sys.stdout, indent=1, sort_keys=True)
+        print('')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,829 @@
+#!/usr/bin/env python3
+# -*- coding: UTF-8 -*-
+#/**
+# * Software Name : pycrate
+# * Version : 0.4
+# *
+# * Copyright 2019. Benoit Michau. P1Sec.
+# *
+# * This program is free software: you can redistribute it and/or modify
+# * it under the terms of the GNU General Public License version 2 as published
+# * by the Free Software Foundation.
+# *
+# * This program is distributed in the hope that it will be useful,
+# * but WITHOUT ANY WARRANTY; without even the implied warranty of
+# * MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# * GNU General Public License for more details.
+# *
+# * You will find a copy of the terms and conditions of the GNU General Public
+# * License version 2 in the "license.txt" file or
+# * see http://www.gnu.org/licenses/ or write to the Free Software Foundation,
+# * Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA
+# *
+# *--------------------------------------------------------
+# * File Name : test/bench/bench_corenet_load.py
+# * Created : 2026-10-19
+# * Authors : agent
+# *--------------------------------------------------------
+#*/
+
+"""
+Signalling load generator for the corenet, with simulated eNodeBs and UEs
+
+Simulated eNodeBs connect to a CorenetServer and run the S1 Setup procedure,
+over SCTP, or over the SCTP loopback transport (see SCTPLoopSocket in
+pycrate_corenet/utils.py) where SCTP is not supported by the kernel.
+Simulated UEs, spread over the eNodeBs, then run a scenario of procedures,
+repeated a number of times:
+- attach : Attach Request with IMSI, authentication, security mode control,
+           initial context setup and Attach Complete,
+- release: eNodeB-initiated UE context release,
+- tau    : Tracking Area Update Request with GUTI from idle mode, up to the
+           UE context release,
+- service: Service Request from idle mode, up to the initial context setup,
+- detach : Detach Request with GUTI, Detach Accept, up to the UE context release.
+NAS messages are built with pycrate_mobile and S1AP PDUs with pycrate_asn1dir.
+UEs handle the NAS security as real ones (Milenage, NAS keys derivation,
+NAS counts, integrity protection and ciphering), without verifying the network
+(AUTN, DL MAC). A UE which is connected when it has to run an attach, tau or
+service procedure is released first.
+
+By default, a CorenetServer is started within this process (on the SCTP loopback
+transport, or on the local SCTP stack with --sctp), with a temporary AuC database
+provisioned with the simulated UEs, and without GTP-U. Beware that it then shares
+the interpreter with the load generator.
+With --addr, an external CorenetServer is loaded instead: its AuC database must
+then be provisioned with the simulated UEs (see --imsi, --ki, --op).
+
+The number of procedures completed per second and the latency percentiles are
+reported for each procedure type. The rate of a procedure type is measured over
+its own active window, from its first start to its last end, whereas the global
+rate is measured over the whole run. Results are written as JSON.
+"""
+
+import os
+import sys
+import json
+import heapq
+import shutil
+import socket
+import argparse
+import platform
+import tempfile
+from collections import deque
+from select      import select
+from time        import perf_counter, sleep
+from binascii    import unhexlify
+
+from CryptoMobile.Milenage import Milenage, conv_A2, conv_A7
+
+from pycrate_asn1dir import S1AP
+from pycrate_mobile  import NAS
+from pycrate_mobile.TS24301_EMM import *
+from pycrate_mobile.TS24301_ESM import *
+from pycrate_corenet.utils import sctp, htonl, SCTPLoopSocket, SCTP_PPID_S1AP
+
+
+PDU_S1AP = S1AP.S1AP_PDU_Descriptions.S1AP_PDU
+
+PLMN     = '00101'
+PLMN_BUF = b'\x00\xf1\x10'
+TAC      = 1
+TAC_BUF  = b'\x00\x01'
+# eNodeB GTP-U address and stream id for UE-associated signalling
+ENB_GTPU = (0x7f000001, 32)
+ENB_SID  = 1
+
+PROCS = ('attach', 'release', 'tau', 'service', 'detach')
+# event ending each procedure
+PROC_END = {
+    'attach' : 'attached',
+    'release': 'released',
+    'tau'    : 'released',
+    'service': 'connected',
+    'detach' : 'released'
+    }
+
+
+#------------------------------------------------------------------------------#
+# S1AP PDUs
+#------------------------------------------------------------------------------#
+
+def s1ap_ie(id, crit, name, val):
+    return {'id': id, 'criticality': crit, 'value': (name, val)}
+
+
+def s1ap_encode(typ, code, crit, name, ies):
+    PDU_S1AP.set_val((typ, {'procedureCode': code, 'criticality': crit,
+                            'value': (name, {'protocolIEs': ies})}))
+    return PDU_S1AP.to_aper()
+
+
+def s1ap_decode(buf):
+    """returns the S1AP PDU type, procedure code and dict of IEs {id: value}
+    """
+    PDU_S1AP.from_aper(buf)
+    typ, val = PDU_S1AP.get_val()
+    ies = dict([(ie['id'], ie['value'][1]) for ie in val['value'][1]['protocolIEs']])
+    return typ, val['procedureCode'], ies
+
+
+def get_s1setup_req(enbnum):
+    return s1ap_encode('initiatingMessage', 17, 'reject', 'S1SetupRequest', [
+        s1ap_ie(59, 'reject', 'Global-ENB-ID', {'pLMNidentity': PLMN_BUF,
+                                                'eNB-ID': ('macroENB-ID', (enbnum, 20))}),
+        s1ap_ie(60, 'ignore', 'ENBname', 'bench-%.5x' % enbnum),
+        s1ap_ie(64, 'reject', 'SupportedTAs', [{'tAC': TAC_BUF,
+                                                'broadcastPLMNs': [PLMN_BUF]}]),
+        s1ap_ie(137, 'ignore', 'PagingDRX', 'v128')])
+
+
+def get_ue_loc_ies(cellid):
+    return [
+        s1ap_ie(67, 'reject', 'TAI', {'pLMNidentity': PLMN_BUF, 'tAC': TAC_BUF}),
+        s1ap_ie(100, 'ignore', 'EUTRAN-CGI', {'pLMNidentity': PLMN_BUF,
+                                              'cell-ID': (cellid<<8, 28)})]
+
+
+def get_init_ue_msg(enb_ue_id, cellid, nas_pdu, cause='mo-Signalling', mtmsi=None):
+    ies = [s1ap_ie(8, 'reject', 'ENB-UE-S1AP-ID', enb_ue_id),
+           s1ap_ie(26, 'reject', 'NAS-PDU', nas_pdu)]
+    ies.extend( get_ue_loc_ies(cellid) )
+    ies.append( s1ap_ie(134, 'ignore', 'RRC-Establishment-Cause', cause) )
+    if mtmsi is not None:
+        # S-TMSI, the MMEC being fixed by the CorenetServer
+        ies.append( s1ap_ie(96, 'reject', 'S-TMSI', {'mMEC': mtmsi[0].to_bytes(1, 'big'),
+                                                     'm-TMSI': mtmsi[1].to_bytes(4, 'big')}) )
+    return s1ap_encode('initiatingMessage', 12, 'ignore', 'InitialUEMessage', ies)
+
+
+def get_ul_nas_transport(mme_ue_id, enb_ue_id, cellid, nas_pdu):
+    ies = [s1ap_ie(0, 'reject', 'MME-UE-S1AP-ID', mme_ue_id),
+           s1ap_ie(8, 'reject', 'ENB-UE-S1AP-ID', enb_ue_id),
+           s1ap_ie(26, 'reject', 'NAS-PDU', nas_pdu)]
+    ies.extend( get_ue_loc_ies(cellid) )
+    return s1ap_encode('initiatingMessage', 13, 'ignore', 'UplinkNASTransport', ies)
+
+
+def get_ics_resp(mme_ue_id, enb_ue_id, erabs):
+    return s1ap_encode('successfulOutcome', 9, 'reject', 'InitialContextSetupResponse', [
+        s1ap_ie(0, 'ignore', 'MME-UE-S1AP-ID', mme_ue_id),
+        s1ap_ie(8, 'ignore', 'ENB-UE-S1AP-ID', enb_ue_id),
+        s1ap_ie(51, 'ignore', 'E-RABSetupListCtxtSURes', [
+            s1ap_ie(50, 'ignore', 'E-RABSetupItemCtxtSURes',
+                    {'e-RAB-ID': ebi,
+                     'transportLayerAddress': ENB_GTPU,
+                     'gTP-TEID': teid.to_bytes(4, 'big')}) for (ebi, teid) in erabs])])
+
+
+def get_ue_ctx_rel_req(mme_ue_id, enb_ue_id):
+    return s1ap_encode('initiatingMessage', 18, 'ignore', 'UEContextReleaseRequest', [
+        s1ap_ie(0, 'reject', 'MME-UE-S1AP-ID', mme_ue_id),
+        s1ap_ie(8, 'reject', 'ENB-UE-S1AP-ID', enb_ue_id),
+        s1ap_ie(2, 'ignore', 'Cause', ('radioNetwork', 'user-inactivity'))])
+
+
+def get_ue_ctx_rel_cpl(mme_ue_id, enb_ue_id):
+    return s1ap_encode('successfulOutcome', 23, 'reject', 'UEContextReleaseComplete', [
+        s1ap_ie(0, 'ignore', 'MME-UE-S1AP-ID', mme_ue_id),
+        s1ap_ie(8, 'ignore', 'ENB-UE-S1AP-ID', enb_ue_id)])
+
+
+#------------------------------------------------------------------------------#
+# simulated eNodeBs and UEs
+#------------------------------------------------------------------------------#
+
+def get_imsi(i):
+    return '%s%.10i' % (PLMN, i)
+
+
+class SimENB(object):
+    """simulated eNodeB, with its S1 association
+    """
+
+    def __init__(self, num, sk):
+        self.num   = num
+        self.sk    = sk
+        # ENB-UE-S1AP-ID: SimUE
+        self.ue    = {}
+        self._ctx  = 0
+
+    def send(self, buf, sid=ENB_SID):
+        self.sk.sctp_send(buf, ppid=htonl(SCTP_PPID_S1AP), stream=sid)
+
+    def recv(self):
+        addr, flags, buf, notif = self.sk.sctp_recv(65535)
+        return buf
+
+    def new_ctx(self, ue):
+        self._ctx = (self._ctx + 1) & 0xffffff
+        while self._ctx in self.ue:
+            self._ctx = (self._ctx + 1) & 0xffffff
+        self.ue[self._ctx] = ue
+        return self._ctx
+
+
+class SimUE(object):
+    """simulated UE, with its USIM, NAS security context and S1 connection
+    """
+
+    def __init__(self, num, enb, args):
+        self.num    = num
+        self.imsi   = get_imsi(args.imsi + num)
+        self.imeisv = '35349006%.6i00' % (num % 1000000)
+        self.K      = args.ki
+        self.OP     = args.op
+        self.enb    = enb
+        self.cellid = enb.num
+        # S1 connection
+        self.enb_ue_id = None
+        self.mme_ue_id = None
+        # NAS security: pending (KSI, Kasme) from the last authentication,
+        # and current security context
+        self.auth   = None
+        self.sec    = None
+        self.seqn   = 0
+        # EPS mobility
+        self.guti   = None
+        self.ebi    = None
+        # ongoing procedure, its start time, and procedures to be run
+        self.proc   = None
+        self.t0     = None
+        self.todo   = deque()
+
+    @property
+    def connected(self):
+        return self.enb_ue_id is not None
+
+    def disconnect(self):
+        if self.enb_ue_id is not None:
+            self.enb.ue.pop(self.enb_ue_id, None)
+        self.enb_ue_id, self.mme_ue_id = None, None
+
+    def get_ksi(self):
+        return self.sec['KSI'] if self.sec else 7
+
+    def protect(self, nas, sh=2):
+        """returns the bytes of the security protected NAS message
+        """
+        sec = self.sec
+        msb = sec['UL'] & 0xffffff00
+        msg = NAS.EMMSecProtNASMessage(val={'EMMHeaderSec': {'SecHdr': sh},
+                                            'Seqn': sec['UL'] & 0xff,
+                                            'NASMessage': nas.to_bytes()})
+        if sh in (2, 4):
+            msg.encrypt(sec['Knasenc'], 0, sec['EEA'], msb)
+        msg.mac_compute(sec['Knasint'], 0, sec['EIA'], msb)
+        sec['UL'] += 1
+        return msg.to_bytes()
+
+    def unprotect(self, buf):
+        """returns the plain NAS message from the DL NAS PDU buf, or None
+        """
+        msg, err = NAS.parse_NASLTE_MT(buf, inner=False)
+        if err:
+            return None
+        sh = msg[0]['SecHdr'].get_val()
+        if sh == 0:
+            self.seqn = 0
+            return NAS.parse_NASLTE_MT(buf)[0]
+        seqn = self.seqn = msg['Seqn'].get_val()
+        if sh in (2, 4) and self.sec:
+            msb = self.sec['DL'] & 0xffffff00
+            msg.decrypt(self.sec['Knasenc'], 1, self.sec['EEA'], msb)
+            self.sec['DL'] = msb + seqn + 1
+        elif sh == 1 and self.sec:
+            self.sec['DL'] = (self.sec['DL'] & 0xffffff00) + seqn + 1
+        return NAS.parse_NASLTE_MT(msg['NASMessage'].get_val())[0]
+
+    def authenticate(self, ksi, RAND, AUTN):
+        """returns RES, and sets the pending Kasme
+        """
+        mil = Milenage(self.OP) if self.OP else Milenage(b'ffffffffffffffff')
+        RES, CK, IK, AK = mil.f2345(self.K, RAND)
+        self.auth = (ksi, conv_A2(CK, IK, PLMN_BUF, AUTN[:6]))
+        return RES
+
+    def set_sec(self, ksi, eea, eia, seqn):
+        """activates the security context ksi, after a security mode command
+        with Seqn seqn
+        """
+        if self.auth and self.auth[0] == ksi:
+            Kasme, self.auth = self.auth[1], None
+            self.sec = {'KSI': ksi, 'Kasme': Kasme, 'UL': 0, 'DL': 0}
+        elif not self.sec or self.sec['KSI'] != ksi:
+            return False
+        sec = self.sec
+        sec['EEA'], sec['EIA'] = eea, eia
+        sec['Knasenc'] = conv_A7(sec['Kasme'], 1, eea)[16:32]
+        sec['Knasint'] = conv_A7(sec['Kasme'], 2, eia)[16:32]
+        sec['DL'] = (sec['DL'] & 0xffffff00) + seqn + 1
+        return True
+
+
+#------------------------------------------------------------------------------#
+# load generator
+#------------------------------------------------------------------------------#
+
+def _percentile(vals, p):
+    if not vals:
+        return None
+    return vals[min(len(vals)-1, int(p * len(vals) / 100.0))]
+
+
+class LoadGen(object):
+    """drives simulated eNodeBs and UEs from a single thread
+    """
+
+    def __init__(self, args):
+        self.args = args
+        self.enbs = []
+        self.ues  = []
+        # SimUE started at a given time, (time, UE num)
+        self.heap = []
+        # procedure name: list of latencies in seconds, number of failures
+        self.lat  = dict([(p, []) for p in PROCS + ('s1setup', )])
+        self.fail = dict([(p, 0) for p in PROCS + ('s1setup', )])
+        # procedure name: [first start, last end], active window of the procedure
+        self.win  = {}
+        self.T0, self.T1 = None, None
+        self._teid = 0
+
+    def _new_sk(self):
+        addr = self.args.addr
+        if isinstance(addr, str):
+            sk = SCTPLoopSocket()
+        else:
+            sk = sctp.sctpsocket_tcp(socket.AF_INET)
+            sk.events.data_io = True
+            sk.events.flush()
+        sk.connect(addr)
+        return sk
+
+    def setup_enbs(self):
+        for i in range(self.args.enb):
+            enb = SimENB(i + 1, self._new_sk())
+            T = perf_counter()
+            enb.send(get_s1setup_req(enb.num), 0)
+            enb.sk.settimeout(self.args.timeout)
+            typ, code, ies = s1ap_decode(enb.recv())
+            enb.sk.settimeout(None)
+            if typ != 'successfulOutcome' or code != 17:
+                self.fail['s1setup'] += 1
+                raise(Exception('eNB %i: S1 setup failed' % enb.num))
+            self.lat['s1setup'].append(perf_counter() - T)
+            self.enbs.append(enb)
+        self._sks = dict([(enb.sk, enb) for enb in self.enbs])
+
+    def setup_ues(self):
+        args = self.args
+        scen = list(args.scenario) * args.cycles
+        for i in range(args.ue):
+            ue = SimUE(i, self.enbs[i % len(self.enbs)], args)
+            ue.todo.extend(scen)
+            self.ues.append(ue)
+            T = i / args.rate if args.rate else 0.0
+            self.heap.append( (T, i) )
+        heapq.heapify(self.heap)
+
+    #--------------------------------------------------------------------------#
+    # procedures
+    #--------------------------------------------------------------------------#
+
+    def run(self):
+        args = self.args
+        T0 = self.T0 = perf_counter()
+        # UE with an ongoing procedure
+        self.busy = {}
+        while self.heap or self.busy:
+            now = perf_counter() - T0
+            while self.heap and self.heap[0][0] <= now:
+                self.next_proc(self.ues[heapq.heappop(self.heap)[1]])
+            to = args.timeout
+            if self.heap:
+                to = min(to, max(0.0, self.heap[0][0] - now))
+            if self.busy:
+                to = min(to, max(0.0, min(self.busy.values()) - perf_counter()))
+            r = select(list(self._sks), [], [], to)[0]
+            for sk in r:
+                enb = self._sks[sk]
+                buf = enb.recv()
+                if not buf:
+                    raise(Exception('eNB %i: S1 association closed' % enb.num))
+                self.recv_s1ap(enb, buf)
+            # procedures' timeout
+            T = perf_counter()
+            for ue in [ue for (ue, dl) in self.busy.items() if dl <= T]:
+                self.end_proc(ue, False)
+        self.T1 = perf_counter()
+
+    def next_proc(self, ue):
+        if not ue.todo:
+            return
+        proc = ue.todo.popleft()
+        if proc in ('attach', 'tau', 'service') and ue.connected:
+            ue.todo.appendleft(proc)
+            proc = 'release'
+        ue.proc, ue.t0 = proc, perf_counter()
+        if proc not in self.win:
+            self.win[proc] = [ue.t0, ue.t0]
+        self.busy[ue] = ue.t0 + self.args.timeout
+        getattr(self, 'start_' + proc)(ue)
+
+    def end_proc(self, ue, success=True):
+        T = perf_counter()
+        self.win[ue.proc][1] = T
+        if success:
+            self.lat[ue.proc].append(T - ue.t0)
+        else:
+            self.fail[ue.proc] += 1
+            if self.args.verbose:
+                print('UE %s: %s failed' % (ue.imsi, ue.proc), file=sys.stderr)
+        del self.busy[ue]
+        ue.proc = None
+        if not success:
+            # the UE gives up its scenario
+            ue.disconnect()
+            ue.todo.clear()
+        elif self.args.pause:
+            heapq.heappush(self.heap, (perf_counter() - self.T0 + self.args.pause, ue.num))
+        else:
+            self.next_proc(ue)
+
+    def event(self, ue, ev):
+        if ue.proc and PROC_END[ue.proc] == ev:
+            self.end_proc(ue)
+
+    def send_init_ue(self, ue, nas_pdu, cause='mo-Signalling', stmsi=False):
+        ue.enb_ue_id = ue.enb.new_ctx(ue)
+        ue.mme_ue_id = None
+        mtmsi = (ue.guti[2], ue.guti[3]) if stmsi else None
+        ue.enb.send(get_init_ue_msg(ue.enb_ue_id, ue.cellid, nas_pdu, cause, mtmsi))
+
+    def send_ul_nas(self, ue, nas_pdu):
+        ue.enb.send(get_ul_nas_transport(ue.mme_ue_id, ue.enb_ue_id, ue.cellid, nas_pdu))
+
+    def start_attach(self, ue):
+        ue.sec, ue.auth, ue.guti, ue.ebi = None, None, None, None
+        esm = ESMPDNConnectivityRequest(val={'ESMHeader': {'PTI': 1},
+                                             'PDNType': 1, 'RequestType': 1})
+        req = EMMAttachRequest(val={'NAS_KSI': (0, 7),
+                                    'EPSID': {'type': NAS.IDTYPE_IMSI, 'ident': ue.imsi},
+                                    'ESMContainer': esm.to_bytes()})
+        req['EPSAttachType'].set_val([1])
+        req['UENetCap'][1].set_val(b'\xe0\xe0')
+        self.send_init_ue(ue, req.to_bytes())
+
+    def start_release(self, ue):
+        ue.enb.send(get_ue_ctx_rel_req(ue.mme_ue_id, ue.enb_ue_id))
+
+    def start_tau(self, ue):
+        req = EMMTrackingAreaUpdateRequest(val={
+            'NAS_KSI': (0, ue.get_ksi()),
+            'EPSUpdateType': {'Active': 0, 'Value': 0},
+            'OldGUTI': {'type': NAS.IDTYPE_GUTI, 'ident': ue.guti}})
+        self.send_init_ue(ue, ue.protect(req, 1))
+
+    def start_service(self, ue):
+        sec = ue.sec
+        req = NAS.EMMServiceRequest(val={'KSI': sec['KSI'], 'SeqnShort': sec['UL'] & 0x1f})
+        req.mac_compute(sec['Knasint'], 0, sec['EIA'], sec['UL'] & 0xffffffe0)
+        sec['UL'] += 1
+        self.send_init_ue(ue, req.to_bytes(), 'mo-Data', stmsi=True)
+
+    def start_detach(self, ue):
+        req = EMMDetachRequestMO(val={
+            'NAS_KSI': (0, ue.get_ksi()),
+            'EPSDetachType': {'SwitchOff': 0, 'Type': 1},
+            'EPSID': {'type': NAS.IDTYPE_GUTI, 'ident': ue.guti}})
+        if ue.connected:
+            self.send_ul_nas(ue, ue.protect(req, 2))
+        else:
+            self.send_init_ue(ue, ue.protect(req, 1))
+
+    #--------------------------------------------------------------------------#
+    # S1AP and NAS handlers
+    #--------------------------------------------------------------------------#
+
+    def recv_s1ap(self, enb, buf):
+        try:
+            typ, code, ies = s1ap_decode(buf)
+        except Exception:
+            return
+        if typ != 'initiatingMessage':
+            return
+        if code == 23:
+            # UEContextReleaseCommand
+            ids = ies.get(99)
+            if ids is None:
+                return
+            elif ids[0] == 'uE-S1AP-ID-pair':
+                ue = enb.ue.get(ids[1]['eNB-UE-S1AP-ID'])
+            else:
+                ue = None
+                for u in enb.ue.values():
+                    if u.mme_ue_id == ids[1]:
+                        ue = u
+                        break
+            if ue is None:
+                return
+            enb.send(get_ue_ctx_rel_cpl(ue.mme_ue_id, ue.enb_ue_id))
+            ue.disconnect()
+            self.event(ue, 'released')
+            return
+        ue = enb.ue.get(ies.get(8))
+        if ue is None:
+            return
+        if 0 in ies:
+            ue.mme_ue_id = ies[0]
+        if code == 11:
+            # DownlinkNASTransport
+            self.recv_nas(ue, ies[26])
+        elif code == 9:
+            # InitialContextSetupRequest
+            erabs, nas_pdus = [], []
+            for erab in ies[24]:
+                erab = erab['value'][1]
+                self._teid = (self._teid + 1) & 0xffffffff
+                erabs.append( (erab['e-RAB-ID'], self._teid) )
+                if 'nAS-PDU' in erab:
+                    nas_pdus.append( erab['nAS-PDU'] )
+            enb.send(get_ics_resp(ue.mme_ue_id, ue.enb_ue_id, erabs))
+            for nas_pdu in nas_pdus:
+                self.recv_nas(ue, nas_pdu)
+            self.event(ue, 'connected')
+
+    def recv_nas(self, ue, buf):
+        msg = ue.unprotect(buf)
+        if msg is None:
+            return
+        hdlr = getattr(self, '_nas_%s' % msg._name, None)
+        if hdlr is not None:
+            hdlr(ue, msg)
+
+    def _nas_EMMAuthenticationRequest(self, ue, msg):
+        RES = ue.authenticate(msg['NAS_KSI'][0].get_val()[1],
+                              msg['RAND'][0].get_val(),
+                              msg['AUTN'][1].to_bytes())
+        self.send_ul_nas(ue, EMMAuthenticationResponse(val={'RES': RES}).to_bytes())
+
+    def _nas_EMMSecurityModeCommand(self, ue, msg):
+        algo = msg['NASSecAlgo'][0]
+        if not ue.set_sec(msg['NAS_KSI'][0].get_val()[1],
+                          algo['CiphAlgo'].get_val(),
+                          algo['IntegAlgo'].get_val(),
+                          ue.seqn):
+            self.send_ul_nas(ue, EMMSecurityModeReject(val={'EMMCause': 24}).to_bytes())
+            return
+        if not msg['IMEISVReq'].get_trans() and msg['IMEISVReq'][1].get_val():
+            cpl = EMMSecurityModeComplete(val={'IMEISV': {'type': NAS.IDTYPE_IMEISV,
+                                                          'ident': ue.imeisv}})
+        else:
+            cpl = EMMSecurityModeComplete()
+        self.send_ul_nas(ue, ue.protect(cpl, 4))
+
+    def _nas_EMMIdentityRequest(self, ue, msg):
+        rsp = EMMIdentityResponse(val={'ID': {'type': NAS.IDTYPE_IMSI, 'ident': ue.imsi}})
+        if ue.sec:
+            self.send_ul_nas(ue, ue.protect(rsp))
+        else:
+            self.send_ul_nas(ue, rsp.to_bytes())
+
+    def _set_guti(self, ue, msg):
+        if not msg['GUTI'].get_trans():
+            ue.guti = msg['GUTI'][2].decode()[1:]
+            return True
+        return False
+
+    def _nas_EMMAttachAccept(self, ue, msg):
+        self._set_guti(ue, msg)
+        esm = msg['ESMContainer'][1]
+        ue.ebi = esm['ESMHeader']['EPSBearerId'].get_val()
+        acc = ESMActDefaultEPSBearerCtxtAccept(val={'ESMHeader': {
+                'EPSBearerId': ue.ebi,
+                'PTI': esm['ESMHeader']['PTI'].get_val()}})
+        cpl = EMMAttachComplete(val={'ESMContainer': acc.to_bytes()})
+        self.send_ul_nas(ue, ue.protect(cpl))
+        self.event(ue, 'attached')
+
+    def _nas_EMMTrackingAreaUpdateAccept(self, ue, msg):
+        if self._set_guti(ue, msg):
+            self.send_ul_nas(ue, ue.protect(EMMTrackingAreaUpdateComplete()))
+
+    def _reject(self, ue, msg):
+        if ue.proc:
+            self.end_proc(ue, False)
+
+    _nas_EMMAttachReject = _reject
+    _nas_EMMTrackingAreaUpdateReject = _reject
+    _nas_EMMServiceReject = _reject
+    _nas_EMMAuthenticationReject = _reject
+
+    #--------------------------------------------------------------------------#
+    # results
+    #--------------------------------------------------------------------------#
+
+    def results(self):
+        dur = self.T1 - self.T0
+        res, num = {}, 0
+        for proc in PROCS + ('s1setup', ):
+            lat = sorted([1000 * l for l in self.lat[proc]])
+            if not lat and not self.fail[proc]:
+                continue
+            if proc != 's1setup':
+                num += len(lat)
+                # rate over the procedure's own active window, from its first
+                # start to its last end, not over the whole run
+                win = self.win[proc][1] - self.win[proc][0]
+            else:
+                win = None
+            res[proc] = {
+                'ok'     : len(lat),
+                'failed' : self.fail[proc],
+                'window' : win,
+                'per_s'  : len(lat) / win if win else None,
+                'lat_ms' : {'p50': _percentile(lat, 50),
+                            'p90': _percentile(lat, 90),
+                            'p99': _percentile(lat, 99),
+                            'max': lat[-1] if lat else None}
+                }
+        return {
+            'duration': dur,
+            'procs'   : num,
+            'per_s'   : num / dur if dur else None,
+            'results' : res
+            }
+
+
+#------------------------------------------------------------------------------#
+# in-process CorenetServer
+#------------------------------------------------------------------------------#
+
+class GTPUdNull(object):
+    """GTP-U handler without any user-plane
+    """
+
+    def add_mobile(self, *args, **kw):
+        pass
+
+    set_mobile_dl = add_mobile
+    rem_mobile    = add_mobile
+
+    def stop(self):
+        pass
+
+
+def start_server(args):
+    """starts a CorenetServer within this process, with an AuC database in
+    a temporary directory provisioned with the simulated UEs
+
+    returns the server, its temporary directory and its S1AP server address
+    """
+    from pycrate_corenet.ServerAuC   import AuC
+    from pycrate_corenet.ServerAuCDB import format_aucdb_rec
+    from pycrate_corenet.HdlrENB     import ENBd
+    from pycrate_corenet.HdlrUE      import UEd
+    from pycrate_corenet.Server      import CorenetServer
+    #
+    tmpdir = tempfile.mkdtemp(prefix='corenet_load_')
+    with open(os.path.join(tmpdir, 'AuC.db'), 'w') as fd:
+        fd.write('# IMSI;K;ALG2;SQN;OP\n')
+        for i in range(args.ue):
+            fd.write( format_aucdb_rec(get_imsi(args.imsi + i), [args.ki, 1, 0, args.op]) )
+    if args.sctp:
+        addr = ('127.0.0.1', 36412)
+        inet = socket.AF_INET
+    else:
+        addr = ('\0pycrate_corenet_load_%i' % os.getpid(), 0)
+        inet = socket.AF_UNIX
+    #
+    dbg = ('ERR', 'WNG') if args.verbose else ()
+    AuC.DEBUG                       = dbg
+    AuC.AUC_DB_PATH                 = tmpdir + os.sep
+    AuC.AUC_DB_BACKEND              = args.aucdb
+    ENBd.DEBUG                      = dbg
+    UEd.DEBUG                       = dbg
+    CorenetServer.DEBUG             = dbg
+    CorenetServer.SERVER_HNB        = {}
+    CorenetServer.SERVER_ENB        = {'INET'  : inet,
+                                       'IP'    : addr[0],
+                                       'port'  : addr[1],
+                                       'MAXCLI': max(args.enb, CorenetServer.SERVER_MAXCLI),
+                                       'errclo': True,
+                                       'GTPU'  : '127.0.0.1'}
+    CorenetServer.SERVER_MODE       = args.mode
+    CorenetServer.SERVER_WORKERS    = args.workers
+    CorenetServer.GTPUd             = GTPUdNull
+    CorenetServer.SMSd              = None
+    CorenetServer.PLMN              = PLMN
+    CorenetServer.UE_ATTACH_FILTER  = '^%s' % PLMN
+    server = CorenetServer()
+    # wait for the server loop to start
+    for i in range(100):
+        if server.is_running():
+            break
+        sleep(0.1)
+    return server, tmpdir, addr
+
+
+#------------------------------------------------------------------------------#
+# benchmark
+#------------------------------------------------------------------------------#
+
+def main():
+    parser = argparse.ArgumentParser(description='signalling load generator for the corenet, '\
+                                     'with simulated eNodeBs and UEs')
+    parser.add_argument('-e', '--enb', type=int, default=4,
+                        help='number of simulated eNodeBs')
+    parser.add_argument('-u', '--ue', type=int, default=200,
+                        help='number of simulated UEs')
+    parser.add_argument('-s', '--scenario', nargs='+', choices=PROCS,
+                        default=['attach', 'tau', 'service', 'detach'],
+                        help='procedures run by each UE')
+    parser.add_argument('-c', '--cycles', type=int, default=1,
+                        help='number of times each UE runs the scenario')
+    parser.add_argument('-r', '--rate', type=float, default=0.0,
+                        help='number of UEs starting their scenario per second '\
+                             '(0: all at once)')
+    parser.add_argument('-p', '--pause', type=float, default=0.0,
+                        help='delay in seconds between 2 procedures of a UE')
+    parser.add_argument('-t', '--timeout', type=float, default=10.0,
+                        help='maximum duration in seconds of each procedure')
+    parser.add_argument('-a', '--addr', default=None,
+                        help='S1AP address of an external CorenetServer, IP:port '\
+                             'for SCTP, or path of the SCTP loopback UNIX socket '\
+                             '(starting with @ for an abstract socket)')
+    parser.add_argument('--sctp', action='store_true',
+                        help='use SCTP instead of the loopback transport, '\
+                             'for the in-process CorenetServer')
+    parser.add_argument('--mode', choices=('select', 'event'), default='select',
+                        help='SERVER_MODE of the in-process CorenetServer')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='SERVER_WORKERS of the in-process CorenetServer')
+    parser.add_argument('--aucdb', choices=('file', 'sqlite'), default='file',
+                        help='AuC database backend of the in-process CorenetServer')
+    parser.add_argument('--imsi', type=int, default=1,
+                        help='index of the first simulated UE\'s IMSI '\
+                             '(%s + 10 digits)' % PLMN)
+    parser.add_argument('--ki', default='00112233445566778899aabbccddeeff',
+                        help='K of the simulated UEs, in hex')
+    parser.add_argument('--op', default=None,
+                        help='OP of the simulated UEs, in hex '\
+                             '(default: the one of the corenet AuC)')
+    parser.add_argument('-o', '--output', default=None,
+                        help='JSON output file (default: stdout)')
+    parser.add_argument('-v', '--verbose', action='store_true',
+                        help='log failed procedures, and the corenet errors and warnings')
+    args = parser.parse_args()
+    args.ki = unhexlify(args.ki)
+    if args.op:
+        args.op = unhexlify(args.op)
+    #
+    server, tmpdir = None, None
+    if args.addr is None:
+        server, tmpdir, addr = start_server(args)
+        args.addr = addr if args.sctp else addr[0]
+    elif ':' in args.addr:
+        ip, port = args.addr.rsplit(':', 1)
+        args.addr = (ip, int(port))
+    elif args.addr[:1] == '@':
+        args.addr = '\0' + args.addr[1:]
+    #
+    gen = LoadGen(args)
+    try:
+        gen.setup_enbs()
+        gen.setup_ues()
+        gen.run()
+    finally:
+        for enb in gen.enbs:
+            enb.sk.close()
+        if server is not None:
+            server.stop()
+            shutil.rmtree(tmpdir, ignore_errors=True)
+    res = gen.results()
+    for proc, r in sorted(res['results'].items()):
+        print('%-8s: %i ok, %i failed, %.1f /s, p50 %.2f ms, p99 %.2f ms'\
+              % (proc, r['ok'], r['failed'], r['per_s'] or 0,
+                 r['lat_ms']['p50'] or 0, r['lat_ms']['p99'] or 0),
+              file=sys.stderr)
+    out = {
+        'python'  : platform.python_implementation() + ' ' + platform.python_version(),
+        'platform': platform.platform(),
+        'args'    : {'enb': args.enb, 'ue': args.ue, 'scenario': args.scenario,
+                     'cycles': args.cycles, 'rate': args.rate, 'pause': args.pause,
+                     'server': 'external' if server is None else \
+                               '%s, %s, %i worker(s), %s AuC' % ('sctp' if args.sctp else 'loopback',
+                               args.mode, args.workers, args.aucdb)}
+        }
+    out.update(res)
+    if args.output:
+        with open(args.output, 'w') as fd:
+            json.dump(out, fd, indent=1, sort_keys=True)
+    else:
+        json.dump(out, sys.stdout, indent=1, sort_keys=True)
+        print('')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,303 @@
+#!/usr/bin/env python3
+# -*- coding: UTF-8 -*-
+#/**
+# * Software Name : pycrate
+# * Version : 0.4
+# *
+# * Copyright 2019. Benoit Michau. P1Sec.
+# *
+# * This program is free software: you can redistribute it and/or modify
+# * it under the terms of the GNU General Public License version 2 as published
+# * by the Free Software Foundation.
+# *
+# * This program is distributed in the hope that it will be useful,
+# * but WITHOUT ANY WARRANTY; without even the implied warranty of
+# * MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# * GNU General Public License for more details.
+# *
+# * You will find a copy of the terms and conditions of the GNU General Public
+# * License version 2 in the "license.txt" file or
+# * see http://www.gnu.org/licenses/ or write to the Free Software Foundation,
+# * Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA
+# *
+# *--------------------------------------------------------
+# * File Name : test/bench/bench_corenet_shard.py
+# * Created : 2026-10-19
+# * Authors : agent
+# *--------------------------------------------------------
+#*/
+
+"""
+Signalling throughput benchmark of the sharded corenet UE handling
+
+Simulated eNodeBs send InitialUEMessage with an EMM Attach Request (with IMSI)
+for a number of UEs, directly to a pool of shard processes (UEShardPool),
+without any SCTP transport. Authentication vectors are requested by shards to
+an AuC running in the benchmark process (as the front AuC of a
+CorenetShardServer), with a temporary database provisioned with the UEs.
+The time to get the first downlink S1AP PDU for each UE (i.e. the
+DownlinkNASTransport with an Authentication Request) is measured, and the
+number of UEs handled per second is reported for each number of shards, with
+the speed-up against a single shard. A speed-up can only be expected with at
+least one CPU core per shard.
+
+Results are written as JSON.
+"""
+
+import os
+import sys
+import json
+import shutil
+import argparse
+import platform
+import tempfile
+from binascii  import unhexlify
+from threading import Event, Lock
+from time      import perf_counter, sleep
+
+from pycrate_asn1dir import S1AP
+from pycrate_mobile  import NAS
+from pycrate_mobile.TS24301_EMM import EMMAttachRequest
+from pycrate_mobile.TS24301_ESM import ESMPDNConnectivityRequest
+from pycrate_corenet.Server      import CorenetServer
+from pycrate_corenet.ServerAuC   import AuC
+from pycrate_corenet.ServerAuCDB import format_aucdb_rec
+from pycrate_corenet.ServerShard import *
+
+
+PDU_S1AP = S1AP.S1AP_PDU_Descriptions.S1AP_PDU
+
+PLMN     = '00101'
+PLMN_BUF = b'\x00\xf1\x10'
+TAC      = 1
+
+
+#------------------------------------------------------------------------------#
+# simulated eNodeBs and UEs
+#------------------------------------------------------------------------------#
+
+def get_imsi(i):
+    return '%s%.10i' % (PLMN, i)
+
+
+def get_attach_req(imsi):
+    esm = ESMPDNConnectivityRequest(val={'ESMHeader': {'PTI': 1},
+                                         'PDNType': 1, 'RequestType': 1})
+    epsid = NAS.EPSID()
+    epsid.encode(NAS.IDTYPE_IMSI, imsi)
+    req = EMMAttachRequest()
+    req['EPSAttachType'].set_val([1])
+    req['EPSID'][1].set_val(epsid.to_bytes())
+    req['UENetCap'][1].set_val(b'\xe0\xe0')
+    req['ESMContainer'][1].set_val(esm.to_bytes())
+    return req.to_bytes()
+
+
+def get_init_ue_msg(enb_ue_id, cellid, nas_pdu):
+    PDU_S1AP.set_val(('initiatingMessage', {
+        'procedureCode': 12,
+        'criticality': 'ignore',
+        'value': ('InitialUEMessage', {'protocolIEs': [
+            {'id': 8, 'criticality': 'reject',
+             'value': ('ENB-UE-S1AP-ID', enb_ue_id)},
+            {'id': 26, 'criticality': 'reject',
+             'value': ('NAS-PDU', nas_pdu)},
+            {'id': 67, 'criticality': 'reject',
+             'value': ('TAI', {'pLMNidentity': PLMN_BUF,
+                               'tAC': TAC.to_bytes(2, 'big')})},
+            {'id': 100, 'criticality': 'ignore',
+             'value': ('EUTRAN-CGI', {'pLMNidentity': PLMN_BUF,
+                                      'cell-ID': (cellid<<8, 28)})},
+            {'id': 134, 'criticality': 'ignore',
+             'value': ('RRC-Establishment-Cause', 'mo-Signalling')}
+            ]})
+        }))
+    return PDU_S1AP.to_aper()
+
+
+def get_enbs(num_enb):
+    """returns the list of (ENBId, Config) for simulated eNodeBs
+    """
+    # 20 bits macro eNB-ID, as a string of 5 hex digits
+    return [((PLMN, '%.5x' % (i+1)), {'TAIs': [(PLMN, TAC)]}) for i in range(num_enb)]
+
+
+def get_ue_bufs(enbs, num_ue):
+    """returns the list of (ENBId, ENB-UE-S1AP-ID, InitialUEMessage buffer)
+    for simulated UEs, spread over the simulated eNodeBs
+    """
+    bufs = []
+    for i in range(num_ue):
+        enbid = enbs[i % len(enbs)][0]
+        enb_ue_id = i // len(enbs)
+        bufs.append( (enbid, enb_ue_id,
+                      get_init_ue_msg(enb_ue_id, int(enbid[1], 16),
+                                      get_attach_req(get_imsi(i)))) )
+    return bufs
+
+
+#------------------------------------------------------------------------------#
+# benchmark
+#------------------------------------------------------------------------------#
+
+def get_shard_config(args):
+    config = dict([(name, getattr(CorenetServer, name)) \
+                   for name in CorenetShardServer.SHARD_CONFIG])
+    config['DEBUG'] = ('ERR', ) if args.verbose else ()
+    config['PLMN']  = PLMN
+    config['UE_ATTACH_FILTER'] = '^%s' % PLMN
+    return config
+
+
+class FrontAuC(object):
+    """AuC with a temporary database provisioned with the simulated UEs,
+    answering the shards' requests
+    """
+
+    def __init__(self, num_ue, args):
+        self.tmpdir = tempfile.mkdtemp(prefix='corenet_shard_')
+        with open(os.path.join(self.tmpdir, 'AuC.db'), 'w') as fd:
+            fd.write('# IMSI;K;ALG2;SQN;OP\n')
+            for i in range(num_ue):
+                fd.write( format_aucdb_rec(get_imsi(i), [unhexlify(args.ki), 1, 0, None]) )
+        AuC.DEBUG       = ('ERR', ) if args.verbose else ()
+        AuC.AUC_DB_PATH = self.tmpdir + os.sep
+        self.auc  = AuC()
+        self.lock = Lock()
+        self.num  = 0
+
+    def recv_auc(self, meth, args):
+        with self.lock:
+            self.num += 1
+            return getattr(self.auc, meth)(*args)
+
+    def stop(self):
+        self.auc.stop()
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+
+class Collector(object):
+    """collects the first downlink S1AP PDU for each simulated UE
+    """
+
+    def __init__(self, num_ue):
+        self.num_ue = num_ue
+        self.first  = {}
+        self.lock   = Lock()
+        self.done   = Event()
+
+    def recv_s1ap(self, enbid, sid, buf):
+        scan = s1ap_scan_ies(buf)
+        if scan is None:
+            return
+        enb_ue_id = s1ap_enb_ue_id(scan[2])
+        if enb_ue_id is None:
+            return
+        T = perf_counter()
+        with self.lock:
+            if (enbid, enb_ue_id) not in self.first:
+                self.first[(enbid, enb_ue_id)] = T
+                if len(self.first) >= self.num_ue:
+                    self.done.set()
+
+
+def _percentile(vals, p):
+    if not vals:
+        return None
+    return vals[min(len(vals)-1, int(p * len(vals) / 100.0))]
+
+
+def bench_shards(num_shard, enbs, bufs, args):
+    coll = Collector(len(bufs))
+    auc  = FrontAuC(len(bufs), args)
+    pool = UEShardPool(num_shard, get_shard_config(args), coll.recv_s1ap,
+                       recv_auc=auc.recv_auc)
+    pool.start()
+    try:
+        for enbid, config in enbs:
+            pool.add_enb(enbid, 0, config)
+        # let shards start and register eNodeBs
+        sleep(args.warmup)
+        #
+        T0, sent = perf_counter(), {}
+        for enbid, enb_ue_id, buf in bufs:
+            sent[(enbid, enb_ue_id)] = perf_counter()
+            pool.route_s1ap(enbid, 1, buf)
+        coll.done.wait(args.timeout)
+        T1 = perf_counter()
+    finally:
+        pool.stop()
+        auc.stop()
+    #
+    with coll.lock:
+        first = dict(coll.first)
+    lat = sorted([1000 * (first[k] - sent[k]) for k in first])
+    if first:
+        dur = max(first.values()) - T0
+    else:
+        dur = T1 - T0
+    return {
+        'shards'   : num_shard,
+        'ue'       : len(bufs),
+        'ue_ok'    : len(first),
+        'duration' : dur,
+        'ue_per_s' : len(first) / dur if dur else None,
+        'lat_ms'   : {'p50': _percentile(lat, 50),
+                      'p90': _percentile(lat, 90),
+                      'p99': _percentile(lat, 99)},
+        'routed'   : list(pool.stats),
+        'auc_req'  : auc.num
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='signalling throughput benchmark '\
+                                     'of the sharded corenet UE handling')
+    parser.add_argument('-s', '--shards', nargs='+', type=int, default=[1, 2, 4],
+                        help='numbers of shard processes to benchmark')
+    parser.add_argument('-e', '--enb', type=int, default=4,
+                        help='number of simulated eNodeBs')
+    parser.add_argument('-u', '--ue', type=int, default=2000,
+                        help='number of simulated UEs attaching')
+    parser.add_argument('-w', '--warmup', type=float, default=1.0,
+                        help='delay in seconds for starting shards')
+    parser.add_argument('-t', '--timeout', type=float, default=60.0,
+                        help='maximum duration in seconds of each run')
+    parser.add_argument('--ki', default='00112233445566778899aabbccddeeff',
+                        help='K of the simulated UEs, in hex')
+    parser.add_argument('-o', '--output', default=None,
+                        help='JSON output file (default: stdout)')
+    parser.add_argument('-v', '--verbose', action='store_true',
+                        help='log shards errors')
+    args = parser.parse_args()
+    #
+    enbs = get_enbs(args.enb)
+    bufs = get_ue_bufs(enbs, args.ue)
+    res  = []
+    for num_shard in args.shards:
+        r = bench_shards(num_shard, enbs, bufs, args)
+        print('%i shard(s): %i / %i UE, %.1f UE/s'\
+              % (num_shard, r['ue_ok'], r['ue'], r['ue_per_s'] or 0),
+              file=sys.stderr)
+        res.append(r)
+    if res and res[0]['ue_per_s']:
+        for r in res:
+            if r['ue_per_s']:
+                r['speedup'] = r['ue_per_s'] / res[0]['ue_per_s']
+    out = {
+        'python'  : platform.python_implementation() + ' ' + platform.python_version(),
+        'platform': platform.platform(),
+        'args'    : {'enb': args.enb, 'ue': args.ue},
+        'results' : res
+        }
+    if args.output:
+        with open(args.output, 'w') as fd:
+            json.dump(out, fd, indent=1, sort_keys=True)
+    else:
+        json.dump(out, sys.stdout, indent=1, sort_keys=True)
+        print('')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,413 @@
+#!/usr/bin/env python3
+# -*- coding: UTF-8 -*-
+#/**
+# * Software Name : pycrate
+# * Version : 0.4
+# *
+# * Copyright 2019. Benoit Michau. P1Sec.
+# *
+# * This program is free software: you can redistribute it and/or modify
+# * it under the terms of the GNU General Public License version 2 as published
+# * by the Free Software Foundation.
+# *
+# * This program is distributed in the hope that it will be useful,
+# * but WITHOUT ANY WARRANTY; without even the implied warranty of
+# * MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# * GNU General Public License for more details.
+# *
+# * You will find a copy of the terms and conditions of the GNU General Public
+# * License version 2 in the "license.txt" file or
+# * see http://www.gnu.org/licenses/ or write to the Free Software Foundation,
+# * Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA
+# *
+# *--------------------------------------------------------
+# * File Name : test/bench/bench_gtpu.py
+# * Created : 2026-10-19
+# * Authors : agent
+# *--------------------------------------------------------
+#*/
+
+"""
+User-plane forwarding benchmark of the corenet GTP-U handler (GTPUd)
+
+Two network namespaces are created and connected to the root namespace, where
+GTPUd runs, with veth pairs:
+- the RAN namespace, with the eNodeB / RNC GTP-U endpoint,
+- the external namespace, with the IP router of the Gi interface.
+
+    [RAN ns] 10.1.1.2 <==> 10.1.1.1 GTPUd EXT_IF <==> 192.168.1.1 [external ns]
+
+UDP packets carrying a sequence number and a timestamp are sent in the uplink
+(GTP-U from the RAN namespace, to the router) and in the downlink (from the
+router, to the UE IP address), by processes running in each namespace.
+The number of packets forwarded per second, the loss and the one-way latency
+percentiles are reported for each GTPUd.WORKER_NUM and BATCH_LEN values, and
+for each number of MOD handlers loaded (subscribed to other UDP ports than the
+one of the benchmark traffic).
+Packets are spread over several UEs, each with its own GTP-U tunnel, so that
+GTPUd workers share the load.
+
+This requires root privileges (ip netns, veth, PF_PACKET sockets).
+Results are written as JSON.
+"""
+
+import os
+import sys
+import json
+import socket
+import argparse
+import platform
+import subprocess
+from struct import pack, unpack, unpack_from
+from time   import perf_counter, sleep
+
+
+NS_RAN   = 'pcgtpu_ran'
+NS_EXT   = 'pcgtpu_ext'
+IF_RAN   = ('gtpran0', 'gtpran1')
+IF_EXT   = ('gtpext0', 'gtpext1')
+
+GTP_IP   = '10.1.1.1'
+RAN_IP   = '10.1.1.2'
+GTP_PORT = 2152
+
+GGSN_MAC = '08:00:00:01:02:03'
+GGSN_IP  = '192.168.1.100'
+ROUTER_MAC = 'f4:00:00:01:02:03'
+ROUTER_IP  = '192.168.1.1'
+UDP_PORT = 9999
+
+TEID_UL  = 0x10
+TEID_DL  = 0x20
+
+# UDP payload: sequence number, sending time
+PAY_FMT  = '>Qd'
+
+
+def ue_ip(i):
+    # UE i IPv4 address, within the Gi subnet
+    return '192.168.1.%i' % (10 + i)
+
+
+#------------------------------------------------------------------------------#
+# network namespaces
+#------------------------------------------------------------------------------#
+
+def _ip(*args, ns=None):
+    cmd = ['ip']
+    if ns:
+        cmd.extend(['netns', 'exec', ns, 'ip'])
+    subprocess.check_call(cmd + list(args))
+
+
+def setup_netns():
+    teardown_netns()
+    for ns, (if_root, if_ns) in ((NS_RAN, IF_RAN), (NS_EXT, IF_EXT)):
+        _ip('netns', 'add', ns)
+        _ip('link', 'add', if_root, 'type', 'veth', 'peer', 'name', if_ns)
+        _ip('link', 'set', if_ns, 'netns', ns)
+        _ip('link', 'set', 'lo', 'up', ns=ns)
+    # RAN side, GTP-U over IP
+    _ip('addr', 'add', GTP_IP + '/24', 'dev', IF_RAN[0])
+    _ip('link', 'set', IF_RAN[0], 'up')
+    _ip('addr', 'add', RAN_IP + '/24', 'dev', IF_RAN[1], ns=NS_RAN)
+    _ip('link', 'set', IF_RAN[1], 'up', ns=NS_RAN)
+    # external side, raw Ethernet handled by GTPUd / ARPd, without IP address
+    _ip('link', 'set', IF_EXT[0], 'address', GGSN_MAC)
+    _ip('link', 'set', IF_EXT[0], 'up')
+    _ip('link', 'set', IF_EXT[1], 'address', ROUTER_MAC, ns=NS_EXT)
+    _ip('addr', 'add', ROUTER_IP + '/24', 'dev', IF_EXT[1], ns=NS_EXT)
+    _ip('link', 'set', IF_EXT[1], 'up', ns=NS_EXT)
+
+
+def teardown_netns():
+    for ns, (if_root, if_ns) in ((NS_RAN, IF_RAN), (NS_EXT, IF_EXT)):
+        subprocess.call(['ip', 'link', 'del', if_root], stderr=subprocess.DEVNULL)
+        subprocess.call(['ip', 'netns', 'del', ns], stderr=subprocess.DEVNULL)
+
+
+def run_role(ns, role, args):
+    """starts this script within the network namespace ns, for the given role
+    """
+    cmd = ['ip', 'netns', 'exec', ns, sys.executable, os.path.abspath(__file__),
+           '--role', role, '-n', str(args.num), '-r', str(args.rate),
+           '-l', str(args.len), '-t', str(args.timeout), '-u', str(args.ue)]
+    return subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+
+
+#------------------------------------------------------------------------------#
+# traffic generators and sinks (run in the namespaces)
+#------------------------------------------------------------------------------#
+
+def _ipv4_udp(src, dst, sport, dport, pay):
+    # IPv4 / UDP packet, without UDP checksum
+    udp = pack('>HHHH', sport, dport, 8+len(pay), 0) + pay
+    hdr = pack('>BBHHHBBH4s4s', 0x45, 0, 20+len(udp), 0, 0, 64, 17, 0,
+               socket.inet_aton(src), socket.inet_aton(dst))
+    cs  = sum(unpack('>10H', hdr))
+    cs  = (cs & 0xffff) + (cs >> 16)
+    cs  = (cs & 0xffff) + (cs >> 16)
+    return hdr[:10] + pack('>H', 0xffff - cs) + hdr[12:] + udp
+
+
+def send_loop(sk, get_addr, num, rate, mkbuf):
+    if rate:
+        period = 1.0 / rate
+    T0 = perf_counter()
+    for seq in range(num):
+        if rate:
+            # busy-wait for pacing
+            while perf_counter() < T0 + seq * period:
+                pass
+        sk.sendto(mkbuf(seq), get_addr(seq))
+    return {'sent': num, 'duration': perf_counter() - T0}
+
+
+def recv_loop(sk, num, num_ue, timeout, get_pay):
+    # CLOCK_MONOTONIC (perf_counter) is shared between the namespaces' processes
+    sk.settimeout(timeout)
+    lat, seqs, first, last = [], set(), None, None
+    # last seq received for each UE, to count packets reordered within a flow
+    ue_seq, reord = [-1] * num_ue, 0
+    while len(seqs) < num:
+        try:
+            buf = sk.recv(65535)
+        except socket.timeout:
+            break
+        T = perf_counter()
+        pay = get_pay(buf)
+        if pay is None:
+            continue
+        seq, Ts = unpack_from(PAY_FMT, pay)
+        if seq in seqs:
+            continue
+        seqs.add(seq)
+        lat.append(T - Ts)
+        if seq < ue_seq[seq % num_ue]:
+            reord += 1
+        else:
+            ue_seq[seq % num_ue] = seq
+        if first is None:
+            first = T
+        last = T
+    return {'recv': len(seqs), 'reordered': reord, 'first': first, 'last': last,
+            'lat': lat}
+
+
+def role_ran_send(args):
+    # uplink GTP-U packets, to the UE router
+    sk = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sk.bind((RAN_IP, 0))
+    padlen, num_ue = max(0, args.len - 16), args.ue
+    def mkbuf(seq):
+        i = seq % num_ue
+        pay = pack(PAY_FMT, seq, perf_counter()) + padlen*b'\0'
+        ip = _ipv4_udp(ue_ip(i), ROUTER_IP, UDP_PORT, UDP_PORT, pay)
+        return pack('>BBHI', 0x30, 0xff, len(ip), TEID_UL + i) + ip
+    return send_loop(sk, lambda seq: (GTP_IP, GTP_PORT), args.num, args.rate, mkbuf)
+
+
+def role_ext_recv(args):
+    # uplink UDP packets, at the router
+    sk = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sk.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 1<<24)
+    sk.bind((ROUTER_IP, UDP_PORT))
+    print('ready', file=sys.stderr, flush=True)
+    return recv_loop(sk, args.num, args.ue, args.timeout, lambda buf: buf)
+
+
+def role_ext_send(args):
+    # downlink UDP packets, to the UE
+    sk = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sk.bind((ROUTER_IP, UDP_PORT))
+    padlen, num_ue = max(0, args.len - 16), args.ue
+    addrs = [(ue_ip(i), UDP_PORT) for i in range(num_ue)]
+    def mkbuf(seq):
+        return pack(PAY_FMT, seq, perf_counter()) + padlen*b'\0'
+    return send_loop(sk, lambda seq: addrs[seq % num_ue], args.num, args.rate, mkbuf)
+
+
+def role_ran_recv(args):
+    # downlink GTP-U packets, at the RAN
+    sk = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sk.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 1<<24)
+    sk.bind((RAN_IP, GTP_PORT))
+    print('ready', file=sys.stderr, flush=True)
+    teids = set(range(TEID_DL, TEID_DL + args.ue))
+    def get_pay(buf):
+        if len(buf) < 36 or unpack_from('>I', buf, 4)[0] not in teids:
+            return None
+        # GTP-U (8) + IPv4 (20) + UDP (8)
+        return buf[36:]
+    return recv_loop(sk, args.num, args.ue, args.timeout, get_pay)
+
+
+ROLES = {
+    'ran-send': role_ran_send,
+    'ext-recv': role_ext_recv,
+    'ext-send': role_ext_send,
+    'ran-recv': role_ran_recv,
+    }
+
+
+#------------------------------------------------------------------------------#
+# benchmark
+#------------------------------------------------------------------------------#
+
+def get_mods(num):
+    """returns num passive MOD handlers, each subscribed to its own UDP port
+    """
+    from pycrate_corenet.ServerGTPU import MOD
+    mods = []
+    for i in range(num):
+        port = 20000 + i
+        mods.append(type('BenchMOD%i' % i, (MOD, ), {
+            'TYPE'     : 1,
+            'MATCH'    : [(4, 17, port)],
+            'handle_ul': classmethod(lambda cls, ipbuf: None),
+            'handle_dl': classmethod(lambda cls, ipbuf: None)}))
+    return mods
+
+
+def start_gtpud(args, worker_num):
+    from pycrate_corenet.ServerGTPU import ARPd, GTPUd
+    ARPd.DEBUG           = ('ERR', )
+    ARPd.GGSN_ETH_IF     = IF_EXT[0]
+    ARPd.GGSN_MAC_ADDR   = GGSN_MAC
+    ARPd.GGSN_IP_ADDR    = GGSN_IP
+    ARPd.IP_POOL         = set([ue_ip(i) for i in range(args.ue)])
+    ARPd.SUBNET_PREFIX   = '192.168.1.0/24'
+    ARPd.ROUTER_MAC_ADDR = ROUTER_MAC
+    ARPd.ROUTER_IP_ADDR  = ROUTER_IP
+    GTPUd.DEBUG          = ('ERR', 'WNG') if args.verbose else ('ERR', )
+    GTPUd.EXT_IF         = IF_EXT[0]
+    GTPUd.EXT_MAC_ADDR   = GGSN_MAC
+    GTPUd.GTP_IF         = (GTP_IP, )
+    GTPUd.DPI            = args.dpi
+    GTPUd.WORKER_NUM     = worker_num
+    gtpud = GTPUd()
+    for i in range(args.ue):
+        gtpud.add_mobile(TEID_UL + i, (1, ue_ip(i)), (GTP_IP, RAN_IP), TEID_DL + i)
+    return gtpud
+
+
+def _percentile(vals, p):
+    if not vals:
+        return None
+    return vals[min(len(vals)-1, int(p * len(vals) / 100.0))]
+
+
+def bench_dir(way, args):
+    if way == 'UL':
+        (ns_send, role_send), (ns_recv, role_recv) = (NS_RAN, 'ran-send'), (NS_EXT, 'ext-recv')
+    else:
+        (ns_send, role_send), (ns_recv, role_recv) = (NS_EXT, 'ext-send'), (NS_RAN, 'ran-recv')
+    rx = run_role(ns_recv, role_recv, args)
+    # wait for the receiver to be bound
+    rx.stderr.readline()
+    tx = run_role(ns_send, role_send, args)
+    res_tx = json.loads(tx.communicate()[0])
+    res_rx = json.loads(rx.communicate()[0])
+    lat = sorted([1000 * l for l in res_rx['lat']])
+    if res_rx['recv'] > 1:
+        dur = res_rx['last'] - res_rx['first']
+    else:
+        dur = None
+    return {
+        'sent'     : res_tx['sent'],
+        'recv'     : res_rx['recv'],
+        'loss'     : 1.0 - float(res_rx['recv']) / res_tx['sent'],
+        'reordered': res_rx['reordered'],
+        'tx_pps'   : res_tx['sent'] / res_tx['duration'],
+        'pps'      : (res_rx['recv'] - 1) / dur if dur else None,
+        'lat_ms'   : {'p50': _percentile(lat, 50),
+                      'p90': _percentile(lat, 90),
+                      'p99': _percentile(lat, 99),
+                      'max': lat[-1] if lat else None}
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='user-plane forwarding benchmark '\
+                                     'of the corenet GTP-U handler')
+    parser.add_argument('-w', '--workers', nargs='+', type=int, default=[0],
+                        help='GTPUd.WORKER_NUM values to benchmark')
+    parser.add_argument('-b', '--batch', nargs='+', type=int, default=[1, 64],
+                        help='GTPUd.BATCH_LEN values to benchmark')
+    parser.add_argument('-m', '--mods', nargs='+', type=int, default=[0],
+                        help='numbers of MOD handlers to benchmark')
+    parser.add_argument('-u', '--ue', type=int, default=8,
+                        help='number of UEs (and GTP-U tunnels)')
+    parser.add_argument('-n', '--num', type=int, default=100000,
+                        help='number of packets sent in each direction')
+    parser.add_argument('-r', '--rate', type=int, default=0,
+                        help='sending rate in packets per second (0: unpaced)')
+    parser.add_argument('-l', '--len', type=int, default=64,
+                        help='UDP payload length')
+    parser.add_argument('-t', '--timeout', type=float, default=2.0,
+                        help='receivers idle timeout in seconds')
+    parser.add_argument('-d', '--dpi', action='store_true',
+                        help='enable GTPUd.DPI')
+    parser.add_argument('-o', '--output', default=None,
+                        help='JSON output file (default: stdout)')
+    parser.add_argument('-v', '--verbose', action='store_true',
+                        help='log GTPUd warnings')
+    parser.add_argument('--role', choices=list(ROLES), default=None,
+                        help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    #
+    if args.role:
+        # traffic generator / sink within a namespace
+        json.dump(ROLES[args.role](args), sys.stdout)
+        return 0
+    #
+    setup_netns()
+    res = []
+    try:
+        # the router resolves UE addresses to the GGSN MAC statically, to not
+        # lose the first DL packets while ARPd answers
+        for i in range(args.ue):
+            _ip('neigh', 'replace', ue_ip(i), 'lladdr', GGSN_MAC, 'dev', IF_EXT[1],
+                ns=NS_EXT)
+        for worker_num in args.workers:
+            gtpud = start_gtpud(args, worker_num)
+            try:
+                for mod_num in args.mods:
+                    for mod in list(gtpud.MOD):
+                        gtpud.rem_mod(mod)
+                    for mod in get_mods(mod_num):
+                        gtpud.add_mod(mod)
+                    for batch in args.batch:
+                        gtpud.BATCH_LEN = batch
+                        r = {'workers': worker_num, 'mods': mod_num, 'batch': batch}
+                        for way in ('UL', 'DL'):
+                            r[way] = bench_dir(way, args)
+                            print('workers %i, mods %i, batch %i, %s: %i / %i pkt, '\
+                                  '%.0f pps, p50 %.3f ms' % (worker_num, mod_num,
+                                  batch, way, r[way]['recv'], r[way]['sent'],
+                                  r[way]['pps'] or 0, r[way]['lat_ms']['p50'] or 0),
+                                  file=sys.stderr)
+                        res.append(r)
+            finally:
+                gtpud.stop()
+    finally:
+        teardown_netns()
+    #
+    out = {
+        'python'  : platform.python_implementation() + ' ' + platform.python_version(),
+        'platform': platform.platform(),
+        'args'    : {'num': args.num, 'rate': args.rate, 'len': args.len,
+                     'ue': args.ue, 'dpi': args.dpi},
+        'results' : res
+        }
+    if args.output:
+        with open(args.output, 'w') as fd:
+            json.dump(out, fd, indent=1, sort_keys=True)
+    else:
+        json.dump(out, sys.stdout, indent=1, sort_keys=True)
+        print('')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,80 @@
+# -*- coding: UTF-8 -*-
+#/**
+# * Software Name : pycrate
+# * Version : 0.4
+# *
+# * Copyright 2019. Benoit Michau. P1Sec.
+# *
+# * This library is free software; you can redistribute it and/or
+# * modify it under the terms of the GNU Lesser General Public
+# * License as published by the Free Software Foundation; either
+# * version 2.1 of the License, or (at your option) any later version.
+# *
+# * This library is distributed in the hope that it will be useful,
+# * but WITHOUT ANY WARRANTY; without even the implied warranty of
+# * MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# * Lesser General Public License for more details.
+# *
+# * You should have received a copy of the GNU Lesser General Public
+# * License along with this library; if not, write to the Free Software
+# * Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston,
+# * MA 02110-1301  USA
+# *
+# *--------------------------------------------------------
+# * File Name : test/test_asn1c.py
+# * Created : 2026-10-19
+# * Authors : agent
+# *--------------------------------------------------------
+#*/
+
+from timeit import timeit
+
+from pycrate_asn1c.utils     import clean_text, scan_for_comments
+from pycrate_asn1c.tokenizer import REScannerASN1, scan_text, tokenize_text
+from pycrate_asn1c.asnproc   import get_spec_dir, get_spec_files, ASN_SPECS
+
+
+def _load_spec_text(shortname):
+    spec_texts, spec_fn = get_spec_files(get_spec_dir(ASN_SPECS[shortname]))
+    return u'\n\n'.join(spec_texts)
+
+
+def test_tokenizer():
+    for fn in ('./test/res/Hardcore.asn', './test/res/test_asn1rt_mod.asn'):
+        fd = open(fn, 'r')
+        text = fd.read()
+        fd.close()
+        # the single-pass lexer must produce the same tokens as the re.Scanner
+        assert( scan_text(text) == REScannerASN1.scan(text) )
+        assert( len(tokenize_text(text)) > 0 )
+    # long identifiers used to trigger catastrophic backtracking
+    text = u'GANSS-ALM-KEPLERIANBDSALMANAC-ExtIEs NBAP-PROTOCOL-EXTENSION ::= { ... }'
+    assert( scan_text(text) == ([
+        ('ID', 'GANSS-ALM-KEPLERIANBDSALMANAC-ExtIEs'),
+        ('HID', 'NBAP-PROTOCOL-EXTENSION'), 'ASSI', 'CBRAO', 'TDOT', 'CBRAC'], u'') )
+    # comments
+    assert( scan_for_comments(u'A ::= B -- cmt -- C\nD -- cmt') == [(8, 17), (22, 28)] )
+
+
+def test_perf_asn1c():
+
+    for sn in ('RRC3G', 'NBAP'):
+        text = _load_spec_text(sn)
+        print('[+] %s ASN.1 specification: %i chars' % (sn, len(text)))
+
+        Ta = timeit(lambda: clean_text(text), number=1)
+        print('clean_text: {0:.4f}'.format(Ta))
+
+        Tb = timeit(lambda: REScannerASN1.scan(text), number=1)
+        print('REScannerASN1.scan: {0:.4f}'.format(Tb))
+
+        Tc = timeit(lambda: scan_text(text), number=1)
+        print('scan_text: {0:.4f}'.format(Tc))
+
+        Td = timeit(lambda: tokenize_text(text), number=1)
+        print('tokenize_text: {0:.4f}'.format(Td))
+
+
+if __name__ == '__main__':
+    test_perf_asn1c()
+
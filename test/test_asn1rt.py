@@ -27,7 +27,12 @@
 # *--------------------------------------------------------
 #*/
 
+import copy
+import io
+import random
+import sys
 from binascii import *
+from threading import Thread
 from timeit   import timeit
 
 from pycrate_asn1rt.utils            import *
@@ -43,6 +48,10 @@ from pycrate_asn1rt.asnobj_class     import *
 from pycrate_asn1rt.asnobj_ext       import *
 #from pycrate_asn1rt.init             import init_modules
 from pycrate_asn1rt.codecs           import _with_json
+from pycrate_asn1rt.profiler         import ASN1Profiler
+from pycrate_asn1rt.export           import ASN1ExportPlan
+from pycrate_asn1rt.compactobj       import ASN1BitView, ASN1Array
+from pycrate_asn1rt.offsets          import ASN1Offsets
 
 
 # do not print runtime warnings on screen
@@ -1906,6 +1915,807 @@ def test_X509():
     _test_X509()
 
 
+def test_profiler():
+    _load_lteran()
+    S1PDU = GLOBAL.MOD['S1AP-PDU-Descriptions']['S1AP-PDU']
+    from_per = INT._from_per
+    ASN1Profiler.reset()
+    ASN1Profiler.enable()
+    try:
+        for p in pkts_s1ap:
+            S1PDU.from_aper(p)
+            assert( S1PDU.to_aper() == p )
+    finally:
+        ASN1Profiler.disable()
+    # original methods restored
+    assert( INT._from_per is from_per )
+    stats = dict([((st[0], st[1]), st[2:]) for st in ASN1Profiler.get_stats()])
+    # calls, cumulative time, self time, bytes
+    st_dec = stats[('S1AP-PDU', '_from_per')]
+    st_enc = stats[('S1AP-PDU', '_to_per')]
+    assert( st_dec[0] == st_enc[0] == len(pkts_s1ap) )
+    assert( st_dec[3] == st_enc[3] == sum(map(len, pkts_s1ap)) )
+    assert( st_dec[1] >= st_dec[2] )
+    assert( ASN1Profiler.report(num=10).count('\n') == 10 )
+    ASN1Profiler.reset()
+
+
+def test_bnd():
+    _load_rt_base()
+    _load_lteran()
+    Mod = GLOBAL.MOD['Test-Asn1rt']
+    # Int09 ::= INTEGER (0..32000)
+    assert( Mod['Int09'].get_bnd() == (3, 0) )
+    # Seq02 ::= SEQUENCE (SIZE (2..5)) OF IA5String (SIZE (0..24))
+    assert( Mod['Seq02'].get_bnd() == (143, 1) )
+    # extensible / unconstrained types are unbounded, unless their extension
+    # root only is considered, or their unbounded components are capped
+    assert( Mod['Int01'].get_bnd() == (None, 0) )
+    # Int13 ::= INTEGER (3..6, ...)
+    assert( Mod['Int13'].get_bnd() == (None, 0) )
+    assert( Mod['Int13'].get_bnd(root=True) == (1, 0) )
+    assert( Mod['Int13'].get_bnd(cap=4) == (7, 0) )
+    S1PDU = GLOBAL.MOD['S1AP-PDU-Descriptions']['S1AP-PDU']
+    assert( S1PDU.get_bnd()[0] is None )
+    assert( S1PDU.get_bnd()[1] >= S1PDU.get_complexity()[1] )
+    maxlen, depth = S1PDU.get_bnd(cap=1024)
+    assert( maxlen >= 1024 and depth == S1PDU.get_bnd()[1] )
+    assert( S1PDU.get_bnd(root=True, cap=1024)[0] <= maxlen )
+    # early rejection of oversized buffers
+    Int09 = Mod['Int09']
+    Int09._SAFE_DECLEN = True
+    try:
+        Int09.from_aper(b'\x10\x01')
+        assert( Int09() == 4097 )
+        try:
+            Int09.from_aper(b'\x10\x01\x00\x00')
+        except ASN1PERDecodeErr:
+            pass
+        else:
+            assert()
+    finally:
+        del Int09._SAFE_DECLEN
+    S1PDU._DEC_MAXLEN = 64
+    try:
+        for p in pkts_s1ap:
+            try:
+                S1PDU.from_aper(p)
+            except ASN1PERDecodeErr:
+                assert( len(p) > 64 )
+            else:
+                assert( len(p) <= 64 )
+    finally:
+        del S1PDU._DEC_MAXLEN
+    # extensible PDUs are bounded by _SAFE_DECLEN_UNBND
+    S1PDU._SAFE_DECLEN, S1PDU._SAFE_DECLEN_UNBND = True, 64
+    try:
+        for p in pkts_s1ap:
+            try:
+                S1PDU.from_aper(p)
+            except ASN1PERDecodeErr:
+                assert( len(p) > 64 )
+            else:
+                assert( len(p) <= 64 )
+    finally:
+        del S1PDU._SAFE_DECLEN, S1PDU._SAFE_DECLEN_UNBND
+    # rejection of over-deep values while decoding
+    S1PDU._DEC_MAXDEPTH = S1PDU.get_bnd()[1]
+    try:
+        for p in pkts_s1ap:
+            S1PDU.from_aper(p)
+            S1PDU.from_aper_ws(p)
+        S1PDU._DEC_MAXDEPTH = 6
+        for p in pkts_s1ap:
+            try:
+                S1PDU.from_aper(p)
+            except ASN1PERDecodeErr:
+                pass
+            else:
+                assert()
+    finally:
+        del S1PDU._DEC_MAXDEPTH
+    assert( ASN1CodecPER._depth.cur is None )
+    S1PDU.from_aper(pkts_s1ap[0])
+    # the depth is counted per thread, while other threads decode without limit
+    # (in UPER, as the APER offsets stack is shared between threads)
+    X2PDU = GLOBAL.MOD['X2AP-PDU-Descriptions']['X2AP-PDU']
+    bufs = {}
+    for Obj, pkts in ((S1PDU, pkts_s1ap), (X2PDU, pkts_x2ap)):
+        bufs[Obj._name] = []
+        for p in pkts:
+            Obj.from_aper(p)
+            bufs[Obj._name].append( Obj.to_uper() )
+    errs = []
+    def run(Obj):
+        try:
+            for i in range(20):
+                for p in bufs[Obj._name]:
+                    Obj.from_uper(p)
+        except Exception as err:
+            errs.append(err)
+    S1PDU._DEC_MAXDEPTH = S1PDU.get_bnd()[1]
+    try:
+        thrs = [Thread(target=run, args=(S1PDU, )),
+                Thread(target=run, args=(X2PDU, ))]
+        for t in thrs:
+            t.start()
+        for t in thrs:
+            t.join()
+    finally:
+        del S1PDU._DEC_MAXDEPTH
+    assert( not errs )
+    # Seq02 ::= SEQUENCE (SIZE (2..5)) OF IA5String (SIZE (0..24))
+    Seq02 = Mod['Seq02']
+    Seq02._DEC_MAXDEPTH = 0
+    try:
+        Seq02.from_ber(b'\x30\x02\x16\x00')
+    except ASN1BERDecodeErr:
+        pass
+    else:
+        assert()
+    Seq02._DEC_MAXDEPTH = 1
+    try:
+        Seq02.from_ber(b'\x30\x04\x16\x00\x16\x00')
+        assert( Seq02() == ['', ''] )
+        try:
+            # constructed encoding of an IA5String component
+            Seq02.from_ber(b'\x30\x06\x16\x00\x36\x02\x04\x00')
+        except ASN1BERDecodeErr:
+            pass
+        else:
+            assert()
+    finally:
+        del Seq02._DEC_MAXDEPTH
+    # constraints of inner components are checked while decoding
+    for buf in (b'\x30\x02\x16\x00',
+                b'\x30\x22\x16\x00\x16\x1e' + 30*b'x'):
+        try:
+            Seq02.from_ber(buf)
+        except ASN1ObjErr:
+            pass
+        else:
+            assert()
+    ASN1Obj._SAFE_BND = False
+    try:
+        Seq02.from_ber(b'\x30\x22\x16\x00\x16\x1e' + 30*b'x')
+        assert( Seq02() == ['', 30*'x'] )
+    finally:
+        ASN1Obj._SAFE_BND = True
+
+
+def test_set():
+    # compiled membership predicates must match the values and ranges
+    def _in(S, v):
+        return any([v in r for r in S._rr]) or v in S._rv
+    for S, vals in (
+        (ASN1Set(rr=[ASN1RangeInt(0, 32000)]),
+         [-1, 0, 32000, 32001, 'a', None]),
+        (ASN1Set(rv=[1, 5, 7, 100]),
+         [0, 1, 7, 100, 101, [1], 'a']),
+        (ASN1Set(rv=[-5, 50], rr=[ASN1RangeInt(None, -100), ASN1RangeInt(0, 10),
+                                  ASN1RangeInt(20, 30), ASN1RangeInt(1000, None)]),
+         list(range(-110, 1010)) + [2**80, -2**80, 'a']),
+        (ASN1Set(rv=['0', 'AB'], rr=[ASN1RangeStr('a', 'z')]),
+         ['a', 'q', 'z', 'A', 'AB', 'ab', '0', 1]),
+        (ASN1Set(rv=[{'a': 1}]),
+         [{'a': 1}, {'a': 2}, 1])):
+        for v in vals:
+            assert( (v in S) == _in(S, v) )
+    S = ASN1Set(rr=[ASN1RangeInt(0, 3)], ev=[], er=[ASN1RangeInt(4, 10)])
+    assert( S.in_root(3) and not S.in_root(4) )
+    assert( S.in_ext(4) and not S.in_ext(11) )
+    assert( not ASN1Set(rv=[1]).in_ext(1) )
+
+
+def _load_lpp():
+    from pycrate_asn1dir import LPP
+
+def _load_rrcnr():
+    from pycrate_asn1dir import RRCNR
+
+def _iter_seqof(Obj, done):
+    # yields all SEQUENCE OF / SET OF within Obj
+    if id(Obj) in done or Obj._cont is None:
+        return
+    done.add(id(Obj))
+    if Obj.TYPE in (TYPE_SEQ_OF, TYPE_SET_OF):
+        yield Obj
+        for O in _iter_seqof(Obj._cont, done):
+            yield O
+    elif Obj.TYPE in (TYPE_SEQ, TYPE_SET, TYPE_CHOICE):
+        for Comp in Obj._cont.values():
+            for O in _iter_seqof(Comp, done):
+                yield O
+
+def _rand_prim(Obj):
+    if Obj.TYPE == TYPE_INT:
+        C = Obj._const_val
+        return random.choice([C.lb, C.ub, random.randint(C.lb, C.ub)])
+    elif Obj.TYPE == TYPE_ENUM:
+        return random.choice(Obj._root)
+    elif Obj.TYPE == TYPE_BOOL:
+        return random.choice([False, True])
+    else:
+        return bytes(bytearray([random.randint(0, 255) for i in range(Obj._const_sz.ub)]))
+
+def test_per_bulk():
+    _load_lteran()
+    _load_lpp()
+    random.seed(0)
+    # bulk decoding of SEQUENCE OF fixed-width primitives must give the same 
+    # values than decoding each component
+    num, done = 0, set()
+    for mod_name in ('S1AP-IEs', 'LPP-PDU-Definitions'):
+        Mod = GLOBAL.MOD[mod_name]
+        for name in Mod['_obj_']:
+            for Obj in _iter_seqof(Mod[name], done):
+                if Obj._get_per_bulk(True) is None:
+                    continue
+                if Obj._const_sz and Obj._const_sz.ub is not None:
+                    sz = random.randint(Obj._const_sz.lb, min(Obj._const_sz.ub, 200))
+                else:
+                    sz = random.randint(0, 40)
+                val = [_rand_prim(Obj._cont) for i in range(sz)]
+                Obj.set_val(val)
+                for enc, dec in (('to_uper', 'from_uper'), ('to_aper', 'from_aper')):
+                    buf = getattr(Obj, enc)()
+                    getattr(Obj, dec)(buf)
+                    assert( Obj() == val )
+                    Obj._per_bulk = (None, None)
+                    getattr(Obj, dec)(buf)
+                    assert( Obj() == val )
+                    del Obj._per_bulk
+                num += 1
+    assert( num > 30 )
+    # ECGI.mcc ::= SEQUENCE (SIZE (3)) OF INTEGER (0..9), with 4-bit components
+    MCC = GLOBAL.MOD['LPP-PDU-Definitions']['ECGI']._cont['mcc']
+    MCC.from_uper(b'\x01\x20')
+    assert( MCC() == [0, 1, 2] )
+    try:
+        MCC.from_uper(b'\x01\xf0')
+    except ASN1ObjErr:
+        pass
+    else:
+        assert()
+
+
+def test_compact():
+    _load_lteran()
+    _load_tcap_map()
+    _load_lpp()
+    S1PDU = GLOBAL.MOD['S1AP-PDU-Descriptions']['S1AP-PDU']
+    M = GLOBAL.MOD['TCAP-MAP-Messages']['TCAP-MAP-Message']
+    # compact values must compare equal to the classic ones, and be encoded
+    # the same way
+    for Obj, dec, enc, pkts in ((S1PDU, 'from_aper', 'to_aper', pkts_s1ap),
+                                (M, 'from_ber', 'to_ber', pkts_tcap_map)):
+        for p in pkts:
+            getattr(Obj, dec)(p)
+            val, buf = Obj(), getattr(Obj, enc)()
+            ASN1Obj._DEC_COMPACT = True
+            try:
+                getattr(Obj, dec)(p)
+                assert( Obj() == val and val == Obj() )
+                assert( getattr(Obj, enc)() == buf )
+                getattr(Obj, dec + '_ws')(p)
+                assert( Obj() == val )
+            finally:
+                ASN1Obj._DEC_COMPACT = False
+    # ECGI.mcc ::= SEQUENCE (SIZE (3)) OF INTEGER (0..9)
+    MCC = GLOBAL.MOD['LPP-PDU-Definitions']['ECGI']._cont['mcc']
+    ASN1Obj._DEC_COMPACT = True
+    try:
+        MCC.from_uper(b'\x01\x20')
+        assert( isinstance(MCC(), ASN1Array) and MCC() == [0, 1, 2] )
+        assert( MCC.to_uper() == b'\x01\x20' )
+    finally:
+        ASN1Obj._DEC_COMPACT = False
+    bv = ASN1BitView(b'\xa5\xff', 12)
+    assert( bv == (0xa5f, 12) and bv.buf == b'\xa5\xf0' )
+    assert( list(bv.iter_bits()) == [1, 0, 1, 0, 0, 1, 0, 1, 1, 1, 1, 1] )
+    assert( hash(bv) == hash((0xa5f, 12)) )
+    assert( copy.deepcopy(bv) == bv and bv.bl == 12 )
+    # the compact value is not a bytes object, and must not be larger than the
+    # classic one for large bitmaps
+    bv = ASN1BitView(b'\xa5' * 128, 1024)
+    val = bv.to_tuple()
+    assert( bv == val and bv.buf == b'\xa5' * 128 )
+    assert( not isinstance(bv, bytes_types) )
+    assert( sys.getsizeof(bv) + sys.getsizeof(bv.buf) <= \
+            sys.getsizeof(val) + sys.getsizeof(val[0]) )
+
+
+def test_perf_bnd():
+    _load_lteran()
+    _load_tcap_map()
+    S1PDU = GLOBAL.MOD['S1AP-PDU-Descriptions']['S1AP-PDU']
+    M = GLOBAL.MOD['TCAP-MAP-Messages']['TCAP-MAP-Message']
+    print('[+] S1AP and TCAP MAP decoding, with and without constraints checking')
+    def dec(Obj, meth, pkts):
+        decode = getattr(Obj, meth)
+        for p in pkts:
+            decode(p)
+    try:
+        for chk in (True, False):
+            ASN1Obj._SAFE_BND = chk
+            Ta = timeit(lambda: dec(S1PDU, 'from_aper', pkts_s1ap), number=10)
+            Tb = timeit(lambda: dec(M, 'from_ber', pkts_tcap_map), number=10)
+            print('S1AP aper decoding: %.4f, TCAP MAP ber decoding: %.4f (checks: %r)'\
+                  % (Ta, Tb, chk))
+    finally:
+        ASN1Obj._SAFE_BND = True
+
+
+def _test_jer(Obj, vals, compact=True, backend='json'):
+    ASN1CodecJER.ENC_COMPACT, ASN1CodecJER.BACKEND = compact, backend
+    for val in vals:
+        Obj.set_val(val)
+        txt = Obj.to_jer()
+        Obj.from_jer(txt)
+        assert( Obj() == val )
+
+def _get_jer_vals():
+    _load_lteran()
+    _load_tcap_map()
+    S1PDU = GLOBAL.MOD['S1AP-PDU-Descriptions']['S1AP-PDU']
+    M = GLOBAL.MOD['TCAP-MAP-Messages']['TCAP-MAP-Message']
+    s1_vals, map_vals = [], []
+    for p in pkts_s1ap:
+        S1PDU.from_aper(p)
+        s1_vals.append( S1PDU() )
+    for p in pkts_tcap_map:
+        M.from_ber(p)
+        map_vals.append( M() )
+    return S1PDU, s1_vals, M, map_vals
+
+def test_jer():
+    if not _with_json:
+        return
+    S1PDU, s1_vals, M, map_vals = _get_jer_vals()
+    compact, backend = ASN1CodecJER.ENC_COMPACT, ASN1CodecJER.BACKEND
+    try:
+        # the compact layout, with all backends available, must be decoded 
+        # to the same values
+        for be in ('json', 'orjson', 'ujson'):
+            _test_jer(S1PDU, s1_vals, True, be)
+            _test_jer(M, map_vals, True, be)
+        ASN1CodecJER.ENC_COMPACT = True
+        S1PDU.set_val(s1_vals[0])
+        txt = S1PDU.to_jer()
+        assert( ' ' not in txt and '\n' not in txt )
+        # integers beyond 64 bits fallback to the standard library
+        ASN1CodecJER.BACKEND = 'orjson'
+        Int = INT()
+        Int.set_val(2**80)
+        assert( Int.to_jer() == str(2**80) )
+        Int.from_jer(str(2**80))
+        assert( Int() == 2**80 )
+    finally:
+        ASN1CodecJER.ENC_COMPACT, ASN1CodecJER.BACKEND = compact, backend
+
+
+def test_perf_jer():
+    if not _with_json:
+        return
+    S1PDU, s1_vals, M, map_vals = _get_jer_vals()
+    compact, backend = ASN1CodecJER.ENC_COMPACT, ASN1CodecJER.BACKEND
+    print('[+] S1AP and TCAP MAP encoding / decoding (JER)')
+    def enc(Obj, vals):
+        for val in vals:
+            Obj._val = val
+            Obj.to_jer()
+    def dec(Obj, txts):
+        for txt in txts:
+            Obj.from_jer(txt)
+    try:
+        for cp, be in ((False, 'json'), (True, 'json'), (True, 'orjson'), (True, 'ujson')):
+            ASN1CodecJER.ENC_COMPACT, ASN1CodecJER.BACKEND = cp, be
+            for name, Obj, vals in (('S1AP', S1PDU, s1_vals), ('TCAP MAP', M, map_vals)):
+                txts = []
+                for val in vals:
+                    Obj._val = val
+                    txts.append( Obj.to_jer() )
+                Ta = timeit(lambda: enc(Obj, vals), number=10)
+                Tb = timeit(lambda: dec(Obj, txts), number=10)
+                print('%s jer (compact: %r, backend: %s): encoding %.4f, decoding %.4f'\
+                      % (name, cp, be, Ta, Tb))
+    finally:
+        ASN1CodecJER.ENC_COMPACT, ASN1CodecJER.BACKEND = compact, backend
+
+
+def test_export():
+    _load_tcap_map()
+    M = GLOBAL.MOD['TCAP-MAP-Messages']['TCAP-MAP-Message']
+    recs, paths = [], []
+    for p in pkts_tcap_map:
+        M.from_ber(p)
+        recs.append( dict([(tuple(path), val) for path, val in M.get_val_paths()]) )
+        for path in recs[-1]:
+            if path not in paths:
+                paths.append(path)
+    Plan = ASN1ExportPlan(M, paths)
+    # the extraction must match get_val_paths()
+    for p, rec, row in zip(pkts_tcap_map, recs, Plan.iter_rows(pkts_tcap_map, 'from_ber')):
+        for path, conv, val in zip(paths, Plan._conv, row):
+            if path in rec:
+                assert( val == conv(rec[path]) )
+            else:
+                assert( val is None )
+    fd = io.StringIO()
+    assert( Plan.export_csv(fd, pkts_tcap_map, 'from_ber', batch=4) == len(pkts_tcap_map) )
+    assert( fd.getvalue().count('\n') == 1 + len(pkts_tcap_map) )
+    try:
+        ASN1ExportPlan(M, [['begin', 'unknown']])
+    except ASN1Err:
+        pass
+    else:
+        assert()
+
+
+def _get_s1setup(num_ta, num_plmn):
+    S1PDU = GLOBAL.MOD['S1AP-PDU-Descriptions']['S1AP-PDU']
+    S1PDU.from_aper(pkts_s1ap[0])
+    val = S1PDU()
+    # enlarge the list of supported TAs
+    for ie in val[1]['value'][1]['protocolIEs']:
+        if ie['value'][0] == 'SupportedTAs':
+            ie['value'] = ('SupportedTAs', [{'tAC': uint_to_bytes(i, 16),
+                                             'broadcastPLMNs': [b'\x63\xf3\x10'] * num_plmn} \
+                                            for i in range(num_ta)])
+    Req = S1PDU._cont['initiatingMessage']._cont['value']._get_val_obj('S1SetupRequest')
+    TAs = Req._cont['protocolIEs']._cont._cont['value']._get_val_obj('SupportedTAs')
+    return S1PDU, val, TAs
+
+
+def test_per_cache():
+    _load_lteran()
+    _load_rt_base()
+    S1PDU, val, TAs = _get_s1setup(16, 6)
+    ref = (S1PDU.to_aper(val), S1PDU.to_uper(val))
+    # cache the list of TAs and each TA item
+    TAs.set_per_cache()
+    TAs._cont.set_per_cache()
+    try:
+        for i in range(3):
+            assert( (S1PDU.to_aper(val), S1PDU.to_uper(val)) == ref )
+        assert( len(TAs._per_cache) == 2 and len(TAs._cont._per_cache) >= 32 )
+        S1PDU.from_aper(ref[0])
+        assert( S1PDU() == val )
+    finally:
+        TAs.set_per_cache(False)
+        TAs._cont.set_per_cache(False)
+    assert( '_to_per' not in TAs.__dict__ and TAs._per_cache is None )
+    # Seq01 ::= SEQUENCE { --check test_asn1rt_mod.asn file-- }
+    Seq01 = GLOBAL.MOD['Test-Asn1rt']['Seq01']
+    ASN1CodecPER.CANONICAL = False
+    try:
+        vals = [{'boo': True, 'int': 10}, {'boo': False, 'int': 11, 'enu': 'cake'}]
+        ref = [(Seq01.to_aper(v), Seq01.to_uper(v)) for v in vals]
+        assert( Seq01.set_per_cache_def() == 1 )
+        Int = Seq01._cont['int']
+        for i in range(2):
+            assert( [(Seq01.to_aper(v), Seq01.to_uper(v)) for v in vals] == ref )
+        # only the DEFAULT value is cached
+        assert( len(Int._per_cache) == 2 )
+        Seq01.set_per_cache_def(False)
+        assert( '_to_per' not in Int.__dict__ )
+        # values keyed by identity
+        Seq01.set_per_cache(key='id')
+        for i in range(2):
+            assert( [(Seq01.to_aper(v), Seq01.to_uper(v)) for v in vals] == ref )
+        assert( len(Seq01._per_cache) == 4 )
+        Seq01.set_per_cache(False)
+    finally:
+        ASN1CodecPER.CANONICAL = True
+
+
+def test_offsets():
+    _load_lteran()
+    _load_tcap_map()
+    _load_X509()
+    S1PDU = GLOBAL.MOD['S1AP-PDU-Descriptions']['S1AP-PDU']
+    M = GLOBAL.MOD['TCAP-MAP-Messages']['TCAP-MAP-Message']
+    Cert = GLOBAL.MOD['PKIX1Explicit-2009']['Certificate']
+    for Obj, dec, pkts in ((S1PDU, 'from_aper', pkts_s1ap),
+                           (M, 'from_ber', pkts_tcap_map)):
+        for p in pkts:
+            getattr(Obj, dec)(p)
+            val, val_paths = Obj(), Obj.get_val_paths()
+            Offs = ASN1Offsets(Obj, dec, p)
+            assert( Offs.val == val )
+            root_off, root_bl = Offs.get([])
+            assert( root_off + root_bl <= 8*len(p) )
+            # each basic value is recorded, within the root object
+            for path, v in val_paths:
+                off, bl = Offs.get(path)
+                assert( root_off <= off and off + bl <= root_off + root_bl )
+                if dec == 'from_ber' and isinstance(v, bytes_types):
+                    assert( p[off>>3:(off+bl)>>3] == v )
+            assert( Offs.get_struct().to_bytes() == p )
+        for Offs, p in zip(ASN1Offsets.iter(Obj, dec, pkts), pkts):
+            assert( Offs.buf == p and len(Offs) > 1 )
+    # decoders are restored
+    assert( SEQ_OF._PER_BULK is True )
+    for cl in (SEQ, SEQ_OF, CHOICE, INT, OPEN):
+        assert( cl._from_per.__code__.co_name == '_from_per' )
+        assert( cl._from_ber.__code__.co_name == '_from_ber' )
+    # offsets are recorded by each thread into its own ASN1Offsets instance,
+    # while other threads decode without offsets (and SEQUENCE OF in bulk)
+    # PER decoding is done in UPER, as the APER offsets stack is shared
+    # between threads
+    X2PDU = GLOBAL.MOD['X2AP-PDU-Descriptions']['X2AP-PDU']
+    bufs = {Cert._name: pkts_X509, M._name: pkts_tcap_map}
+    for Obj, pkts in ((S1PDU, pkts_s1ap), (X2PDU, pkts_x2ap)):
+        bufs[Obj._name] = []
+        for p in pkts:
+            Obj.from_aper(p)
+            bufs[Obj._name].append( Obj.to_uper() )
+    refs = {}
+    for Obj, dec in ((S1PDU, 'from_uper'), (M, 'from_ber')):
+        refs[Obj._name] = [list(ASN1Offsets(Obj, dec, p)) for p in bufs[Obj._name]]
+    errs = []
+    def run(Obj, dec, offs):
+        try:
+            for i in range(10):
+                for j, p in enumerate(bufs[Obj._name]):
+                    if offs:
+                        assert( list(ASN1Offsets(Obj, dec, p)) == refs[Obj._name][j] )
+                    else:
+                        getattr(Obj, dec)(p)
+        except Exception as err:
+            errs.append(err)
+    thrs = [Thread(target=run, args=(S1PDU, 'from_uper', True)),
+            Thread(target=run, args=(M, 'from_ber', True)),
+            Thread(target=run, args=(X2PDU, 'from_uper', False)),
+            Thread(target=run, args=(Cert, 'from_der', False))]
+    for t in thrs:
+        t.start()
+    for t in thrs:
+        t.join()
+    assert( not errs )
+    # the profiler, enabled before or while recording, wraps the hook,
+    # and the original methods are restored when both are over
+    from_per = INT._from_per
+    ASN1Profiler.reset()
+    ASN1Profiler.enable()
+    try:
+        Offs = ASN1Offsets(S1PDU, 'from_uper', bufs[S1PDU._name][0])
+    finally:
+        ASN1Profiler.disable()
+    assert( list(Offs) == refs[S1PDU._name][0] )
+    assert( ASN1Profiler.get_stats(meth='_from_per') )
+    assert( INT._from_per is from_per )
+    gen = ASN1Offsets.iter(S1PDU, 'from_uper', bufs[S1PDU._name])
+    assert( list(next(gen)) == refs[S1PDU._name][0] )
+    ASN1Profiler.enable()
+    try:
+        assert( list(next(gen)) == refs[S1PDU._name][1] )
+        gen.close()
+        assert( INT._from_per is not from_per )
+    finally:
+        ASN1Profiler.disable()
+    assert( INT._from_per is from_per )
+    ASN1Profiler.reset()
+
+
+def test_asn1_stream():
+    _load_lteran()
+    _load_tcap_map()
+    _load_X509()
+    S1PDU = GLOBAL.MOD['S1AP-PDU-Descriptions']['S1AP-PDU']
+    M = GLOBAL.MOD['TCAP-MAP-Messages']['TCAP-MAP-Message']
+    Cert = GLOBAL.MOD['PKIX1Explicit-2009']['Certificate']
+    for Obj, dec, pkts in ((S1PDU, 'from_aper', pkts_s1ap),
+                           (M, 'from_ber', pkts_tcap_map),
+                           (Cert, 'from_der', pkts_X509)):
+        for p in pkts:
+            getattr(Obj, dec)(p)
+            txt = Obj.to_asn1()
+            # the writer must produce the same text as the recursive _to_asn1()
+            assert( txt == Obj._to_asn1() )
+            # and when streaming
+            fd = io.StringIO()
+            assert( Obj.to_asn1_stream(fd) is False )
+            assert( fd.getvalue() == txt )
+            # length cap
+            fd = io.StringIO()
+            assert( Obj.to_asn1_stream(fd, maxlen=64) is True )
+            assert( fd.getvalue() == txt[:64] + ' ...' )
+            assert( Obj.to_asn1(maxlen=len(txt)) == txt )
+            # depth cap
+            txt_d = Obj.to_asn1(maxdepth=2)
+            assert( '{ ... }' in txt_d and len(txt_d) < len(txt) )
+            assert( Obj.to_asn1(maxdepth=100) == txt )
+
+
+def test_gen_random():
+    _load_lteran()
+    _load_tcap_map()
+    _load_X509()
+    S1PDU = GLOBAL.MOD['S1AP-PDU-Descriptions']['S1AP-PDU']
+    M = GLOBAL.MOD['TCAP-MAP-Messages']['TCAP-MAP-Message']
+    Cert = GLOBAL.MOD['PKIX1Explicit-2009']['Certificate']
+    for Obj, codecs in ((S1PDU, ('aper', 'uper')),
+                        (M, ('ber', 'der')),
+                        (Cert, ('der', ))):
+        for seed in range(20):
+            val = Obj.gen_random(seed)
+            assert( Obj.gen_random(seed) == val )
+            # checks value, constraints and table constraints
+            Obj.set_val(val)
+            for codec in codecs:
+                buf = getattr(Obj, 'to_%s' % codec)()
+                getattr(Obj, 'from_%s' % codec)(buf)
+                assert( getattr(Obj, 'to_%s' % codec)() == buf )
+    # distinct values from a single random generator
+    rnd = random.Random(0)
+    vals = [S1PDU.gen_random(rnd) for i in range(20)]
+    assert( len(set([S1PDU.to_aper(v) for v in vals])) == 20 )
+    # S1AP IEs are generated from a single row of the table constraint
+    for val in vals:
+        msg = val[1]['value']
+        if not msg[1]['protocolIEs']:
+            continue
+        IE  = S1PDU.get_at([val[0], 'value', msg[0], 'protocolIEs', 0])
+        Tab = IE._cont['value']._const_tab
+        for ie in msg[1]['protocolIEs']:
+            row = Tab.get_uniq('id', ie['id'])
+            assert( ie['criticality'] == row['criticality'] )
+            assert( ie['value'][0] == row['Value']._typeref.called[1] )
+    # no optional component beyond depth
+    val = Cert.gen_random(0, depth=0)
+    assert( set(val.keys()) == set(Cert._root_mand) )
+
+
+def test_ber_tag_lut():
+    _load_tcap_map()
+    _test_tcap_map()
+    ERI  = GLOBAL.MOD['MAP-CH-DataTypes']['ExtendedRoutingInfo']
+    IMSI = GLOBAL.MOD['MAP-CommonDataTypes']['IMSI']
+    # flattened lookup table, including the nested untagged CHOICE routingInfo
+    lut = get_tag_lut([ERI, IMSI])
+    assert( sorted(lut.keys()) == [(0, 4), (0, 16), (2, 8)] )
+    assert( lut[(0, 4)][0] is ERI and lut[(0, 4)][1] is IMSI )
+    assert( lut[(0, 16)] == [ERI] and lut[(2, 8)] == [ERI] )
+    # OPEN constrained by a set of types
+    O = OPEN(name='o', mode=MODE_TYPE)
+    O._tagc = []
+    O._const_val = ASN1Set(rv=[ERI, IMSI], ev=None)
+    assert( O._get_tag_lut() is O._get_tag_lut() )
+    assert( O._get_tag_lut([IMSI])[(0, 4)] == [IMSI] )
+    ERI.set_val(('routingInfo', ('roamingNumber', b'\x91\x21\x43')))
+    buf = ERI.to_ber()
+    O.from_ber(buf)
+    assert( O._val == ('CHOICE', ('routingInfo', ('roamingNumber', b'\x91\x21\x43'))) )
+    assert( O.to_ber() == buf )
+    O.from_ber_ws(buf)
+    assert( O._val[1] == ERI._val )
+    # unknown tag
+    O.from_ber(b'\x85\x01\x00')
+    assert( O._val == ('_unk_205', b'\x00') )
+
+
+def test_perf_per_bulk():
+    _load_rrcnr()
+    # SlotFormatCombination.slotFormats ::= SEQUENCE (SIZE (1..256)) OF INTEGER (0..255)
+    SF = GLOBAL.MOD['NR-RRC-Definitions']['SlotFormatCombination']._cont['slotFormats']
+    SF.set_val([i for i in range(256)])
+    print('[+] RRC NR SEQUENCE OF INTEGER decoding, in bulk and per component')
+    for enc, dec in (('to_uper', 'from_uper'), ('to_aper', 'from_aper')):
+        buf = getattr(SF, enc)()
+        Ta = timeit(lambda: getattr(SF, dec)(buf), number=200)
+        SF._per_bulk = (None, None)
+        Tb = timeit(lambda: getattr(SF, dec)(buf), number=200)
+        del SF._per_bulk
+        print('%s: bulk %.4f, per component %.4f' % (dec, Ta, Tb))
+
+
+def test_perf_compact():
+    _load_rrcnr()
+    # SlotFormatCombination.slotFormats ::= SEQUENCE (SIZE (1..256)) OF INTEGER (0..255)
+    SF = GLOBAL.MOD['NR-RRC-Definitions']['SlotFormatCombination']._cont['slotFormats']
+    SF.set_val([i for i in range(256)])
+    buf = SF.to_uper()
+    print('[+] RRC NR SEQUENCE OF INTEGER decoding, classic and compact values')
+    for compact in (False, True):
+        ASN1Obj._DEC_COMPACT = compact
+        T = timeit(lambda: SF.from_uper(buf), number=200)
+        if compact:
+            sz = sys.getsizeof(SF._val)
+        else:
+            sz = sys.getsizeof(SF._val) + sum([sys.getsizeof(v) for v in SF._val])
+        print('compact: %r, decoding %.4f, value size %i bytes' % (compact, T, sz))
+    ASN1Obj._DEC_COMPACT = False
+    # large bitmaps
+    from pycrate_asn1dir import LPPe
+    # RateMatchPattern.patternType.bitmaps.resourceBlocks ::= BIT STRING (SIZE (275))
+    RB = GLOBAL.MOD['NR-RRC-Definitions']['RateMatchPattern']._cont['patternType']\
+         ._cont['bitmaps']._cont['resourceBlocks']
+    # OMA-LPPe-ver1-1-AuthenticationSet.rsaPublicKey.modulus ::= BIT STRING (SIZE (2048))
+    MOD = GLOBAL.MOD['OMA-LPPE']['OMA-LPPe-ver1-1-AuthenticationSet']\
+          ._cont['rsaPublicKey']._cont['modulus']
+    print('[+] RRC NR and LPPe BIT STRING decoding, classic and compact values')
+    for Obj in (RB, MOD):
+        bl = Obj._const_sz.ub
+        Obj.set_val((((1 << bl) - 1) // 3, bl))
+        buf = Obj.to_uper()
+        for compact in (False, True):
+            ASN1Obj._DEC_COMPACT = compact
+            T = timeit(lambda: Obj.from_uper(buf), number=2000)
+            if compact:
+                sz = sys.getsizeof(Obj._val) + sys.getsizeof(Obj._val.buf)
+            else:
+                sz = sys.getsizeof(Obj._val) + sys.getsizeof(Obj._val[0])
+            print('%s (%i bits), compact: %r, decoding %.4f, value size %i bytes'\
+                  % (Obj._name, bl, compact, T, sz))
+        ASN1Obj._DEC_COMPACT = False
+
+
+def test_perf_per_cache():
+    _load_lteran()
+    S1PDU, val, TAs = _get_s1setup(64, 6)
+    print('[+] S1AP S1SetupRequest encoding (64 TAs), with and without PER cache')
+    for enc in ('to_aper', 'to_uper'):
+        Ta = timeit(lambda: getattr(S1PDU, enc)(val), number=100)
+        TAs.set_per_cache()
+        Tb = timeit(lambda: getattr(S1PDU, enc)(val), number=100)
+        TAs.set_per_cache(key='id')
+        Tc = timeit(lambda: getattr(S1PDU, enc)(val), number=100)
+        TAs.set_per_cache(False)
+        print('%s: no cache %.4f, cache by value %.4f, cache by identity %.4f'\
+              % (enc, Ta, Tb, Tc))
+
+
+def test_perf_offsets():
+    _load_lteran()
+    S1PDU = GLOBAL.MOD['S1AP-PDU-Descriptions']['S1AP-PDU']
+    
+    def dec_off():
+        for p in pkts_s1ap:
+            ASN1Offsets(S1PDU, 'from_aper', p)
+    
+    def dec_off_iter():
+        for Offs in ASN1Offsets.iter(S1PDU, 'from_aper', pkts_s1ap):
+            pass
+    
+    def dec(meth):
+        for p in pkts_s1ap:
+            getattr(S1PDU, meth)(p)
+    
+    print('[+] S1AP decoding (APER), with offsets or transfer syntax structure')
+    Ta = timeit(lambda: dec('from_aper'), number=20)
+    Tb = timeit(dec_off, number=20)
+    Tc = timeit(dec_off_iter, number=20)
+    Td = timeit(lambda: dec('from_aper_ws'), number=20)
+    print('from_aper: %.4f, ASN1Offsets: %.4f, ASN1Offsets.iter: %.4f, from_aper_ws: %.4f'\
+          % (Ta, Tb, Tc, Td))
+
+
+def test_perf_asn1_stream():
+    _load_lteran()
+    S1PDU, val, TAs = _get_s1setup(256, 6)
+    S1PDU.set_val(val)
+    print('[+] S1AP S1SetupRequest (256 TAs) conversion to ASN.1 value notation')
+    Ta = timeit(lambda: S1PDU.to_asn1(), number=20)
+    Tb = timeit(lambda: S1PDU.to_asn1_stream(io.StringIO()), number=20)
+    Tc = timeit(lambda: S1PDU.to_asn1(maxlen=4096), number=20)
+    Td = timeit(lambda: S1PDU.to_asn1(maxdepth=4), number=20)
+    print('to_asn1: %.4f, to_asn1_stream: %.4f, maxlen 4096: %.4f, maxdepth 4: %.4f'\
+          % (Ta, Tb, Tc, Td))
+
+
+def test_perf_gen_random():
+    _load_lteran()
+    _load_tcap_map()
+    S1PDU = GLOBAL.MOD['S1AP-PDU-Descriptions']['S1AP-PDU']
+    M = GLOBAL.MOD['TCAP-MAP-Messages']['TCAP-MAP-Message']
+    print('[+] random values generation for S1AP-PDU and TCAP-MAP-Message')
+    rnd = random.Random(0)
+    Ta = timeit(lambda: S1PDU.gen_random(rnd), number=1000)
+    Tb = timeit(lambda: M.gen_random(rnd), number=1000)
+    print('S1AP-PDU: %.4f, TCAP-MAP-Message: %.4f (1000 values)' % (Ta, Tb))
+
+
 def test_perf_asn1rt():
     
     _load_rt_base()
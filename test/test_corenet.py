@@ -0,0 +1,602 @@
+# -*- coding: UTF-8 -*-
+#/**
+# * Software Name : pycrate
+# * Version : 0.4
+# *
+# * Copyright 2019. Benoit Michau. P1Sec.
+# *
+# * This library is free software; you can redistribute it and/or
+# * modify it under the terms of the GNU Lesser General Public
+# * License as published by the Free Software Foundation; either
+# * version 2.1 of the License, or (at your option) any later version.
+# *
+# * This library is distributed in the hope that it will be useful,
+# * but WITHOUT ANY WARRANTY; without even the implied warranty of
+# * MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# * Lesser General Public License for more details.
+# *
+# * You should have received a copy of the GNU Lesser General Public
+# * License along with this library; if not, write to the Free Software
+# * Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston,
+# * MA 02110-1301  USA
+# *
+# *--------------------------------------------------------
+# * File Name : test/test_corenet.py
+# * Created : 2026-10-19
+# * Authors : agent
+# *--------------------------------------------------------
+#*/
+
+import os
+import re
+import sys
+import shutil
+import sqlite3
+import tempfile
+from binascii  import unhexlify
+from struct    import pack
+from threading import Thread, Event, RLock
+from time      import sleep, time
+
+# pycrate_corenet requires CryptoMobile (and pysctp to run the server)
+import pycrate_corenet.utils as CNU
+from pycrate_corenet.utils     import *
+from pycrate_corenet.Server    import CorenetServer
+from pycrate_corenet.HdlrUE    import UEd
+from pycrate_corenet.ProcCNEMM import EMMAttach
+from pycrate_corenet.ServerShard import *
+from pycrate_corenet.ServerGTPU  import GTPUd
+from pycrate_corenet.ServerAuCDB import *
+from pycrate_corenet.ServerAuC   import AuC, xor_buf
+from pycrate_mobile.TS24301_EMM import EMMAttachRequest
+from pycrate_asn1rt.asnobj     import ASN1Obj
+from pycrate_asn1rt.codecs     import ASN1CodecBER
+from tools.pycrate_aucdb       import main as aucdb_main
+
+
+def _asn_ctx_glob():
+    # returns the globals of the ASN.1 runtime of the context acquired by the
+    # current thread
+    pdu = PDU_S1AP.get_pdu()
+    cl  = [c for c in type(pdu).__mro__ if c.__name__ == 'ASN1Obj'][0]
+    return cl.to_ber.__globals__
+
+
+def test_asn_ctx():
+    # the first acquisition loads a context, if the pool was not initialized
+    if not CNU.ASN_POOL_CNT:
+        assert( asn_acquire() )
+        assert( CNU.ASN_POOL_CNT == 1 )
+        assert( PDU_S1AP.get_pdu() is not PDU_S1AP._pdu )
+        asn_release()
+    #
+    # the class-level configuration of the default runtime is copied into the
+    # contexts loaded afterwards
+    lundef, silent = ASN1CodecBER.ENC_LUNDEF, ASN1Obj._SILENT
+    ASN1CodecBER.ENC_LUNDEF, ASN1Obj._SILENT = not lundef, not silent
+    try:
+        asn_pool_init(CNU.ASN_POOL_CNT + 1)
+    finally:
+        ASN1CodecBER.ENC_LUNDEF, ASN1Obj._SILENT = lundef, silent
+    # the last context loaded is the first one acquired
+    asn_acquire()
+    glob = _asn_ctx_glob()
+    assert( glob['ASN1Obj'] is not ASN1Obj )
+    assert( glob['ASN1CodecBER'].ENC_LUNDEF == (not lundef) )
+    assert( glob['ASN1Obj']._SILENT == (not silent) )
+    asn_release()
+    #
+    # once all contexts are acquired, a thread waits for one to be released
+    ev, held, got = Event(), [], []
+    def hold():
+        asn_acquire()
+        held.append(PDU_S1AP.get_pdu())
+        ev.wait()
+        asn_release()
+    def wait():
+        asn_acquire()
+        got.append(PDU_S1AP.get_pdu())
+        asn_release()
+    ths = [Thread(target=hold) for i in range(CNU.ASN_POOL_CNT)]
+    for th in ths:
+        th.start()
+    while len(held) < len(ths):
+        sleep(0.01)
+    assert( len(set(map(id, held))) == len(ths) )
+    th = Thread(target=wait)
+    th.start()
+    sleep(0.2)
+    assert( not got )
+    ev.set()
+    th.join()
+    for t in ths:
+        t.join()
+    assert( len(got) == 1 and got[0] in held )
+    assert( len(CNU.ASN_POOL) == CNU.ASN_POOL_CNT )
+
+
+class _ENBd(object):
+    """eNodeB handler, only with the table of UE contexts
+    """
+    RAT = RAT_EUTRA
+    
+    def __init__(self):
+        self.UE = {}
+    
+    def set_ue_s1(self, ued, ctx_id):
+        self.UE[ctx_id] = ued
+
+
+def _server():
+    # CorenetServer, not started, only with its UE tables
+    Server = CorenetServer.__new__(CorenetServer)
+    Server._UELock, Server.UE, Server.MTMSI = RLock(), {}, {}
+    return Server
+
+
+def test_emm_merge():
+    imsi = '001011000000001'
+    Server, enb = _server(), _ENBd()
+    ue = UEd(Server, imsi, config=Server.ConfigUE[imsi])
+    Server.UE[imsi] = ue
+    # new UE connecting with an unknown M-TMSI, which then provides its IMSI
+    new = UEd(Server, None, mtmsi=0x1234)
+    new.IMSI = imsi
+    new.set_ran(enb, 7, 1)
+    enb.set_ue_s1(new, 7)
+    Proc = EMMAttach(new.S1.EMM)
+    ret = []
+    # the S1 handler is merged while holding the existing UE's lock, and 
+    # without holding the Server's UE lock
+    with ue._lock:
+        th = Thread(target=lambda: ret.append(Proc._chk_imsi()))
+        th.start()
+        sleep(0.2)
+        assert( not ret )
+        assert( Server._UELock.acquire(timeout=1) )
+        Server._UELock.release()
+    th.join()
+    assert( ret == [True] )
+    assert( Server.MTMSI[0x1234] == imsi )
+    assert( ue.S1 is new.S1 and new.S1.UE is ue and new.S1.EMM.UE is ue )
+    # the next PDUs of the eNodeB UE context are processed for the existing UE
+    assert( enb.UE[7] is ue )
+    #
+    # an active S1 handler cannot be merged
+    new = UEd(Server, None, mtmsi=0x5678)
+    new.IMSI = imsi
+    new.set_ran(_ENBd(), 8, 1)
+    ue.S1.EMM.state = 'ACTIVE'
+    Proc = EMMAttach(new.S1.EMM)
+    assert( Proc._chk_imsi() is False )
+    assert( Proc.errcause == new.S1.EMM.ATT_IMSI_PROV_REJECT )
+    assert( ue.S1 is not new.S1 )
+
+
+# S1AP APER buffers captured from a real eNodeB (see test/res/s1ap_pcapr.readme.txt)
+with open(os.path.join(os.path.dirname(__file__), 'res', 's1ap_pcapr.json'), 'rb') as fd:
+    pkts_s1ap_pcapr = tuple(map(unhexlify, re.findall(b'"s1ap_raw": "([0-9a-f]+)"', fd.read())))
+
+# (PDU type index, procedure code) of S1AP PDUs sent by the eNodeB
+_S1AP_UL = ((0, 12), (0, 13), (0, 18), (0, 22), (1, 5), (1, 7), (1, 9), (1, 23))
+
+
+def _s1ap_init_ue_msg(enb_ue_id, nas_pdu):
+    PDU = S1AP.S1AP_PDU_Descriptions.S1AP_PDU
+    PDU.set_val(('initiatingMessage', {
+        'procedureCode': 12,
+        'criticality': 'ignore',
+        'value': ('InitialUEMessage', {'protocolIEs': [
+            {'id': 8, 'criticality': 'reject',
+             'value': ('ENB-UE-S1AP-ID', enb_ue_id)},
+            {'id': 26, 'criticality': 'reject',
+             'value': ('NAS-PDU', nas_pdu)},
+            {'id': 67, 'criticality': 'reject',
+             'value': ('TAI', {'pLMNidentity': b'\x00\xf1\x10', 'tAC': b'\x00\x01'})},
+            {'id': 100, 'criticality': 'ignore',
+             'value': ('EUTRAN-CGI', {'pLMNidentity': b'\x00\xf1\x10',
+                                      'cell-ID': (0x100, 28)})},
+            {'id': 134, 'criticality': 'ignore',
+             'value': ('RRC-Establishment-Cause', 'mo-Signalling')}
+            ]})
+        }))
+    return PDU.to_aper()
+
+
+def _nas_attach_imsi(imsi):
+    epsid = NAS.EPSID()
+    epsid.encode(NAS.IDTYPE_IMSI, imsi)
+    req = EMMAttachRequest()
+    req['EPSAttachType'].set_val([1])
+    req['EPSID'][1].set_val(epsid.to_bytes())
+    req['UENetCap'][1].set_val(b'\xe0\xe0')
+    return req.to_bytes()
+
+
+def test_shard_scan():
+    PDU = S1AP.S1AP_PDU_Descriptions.S1AP_PDU
+    for buf in pkts_s1ap_pcapr:
+        typ, code, ies = s1ap_scan_ies(buf)
+        PDU.from_aper(buf)
+        val = PDU()
+        assert( typ == ('initiatingMessage', 'successfulOutcome', 'unsuccessfulOutcome').index(val[0]) )
+        assert( code == val[1]['procedureCode'] )
+        ies_val = dict([(ie['id'], ie['value']) for ie in val[1]['value'][1]['protocolIEs']])
+        assert( set(ies) == set(ies_val) )
+        if 8 in ies_val:
+            assert( s1ap_enb_ue_id(ies) == ies_val[8][1] )
+        if 96 in ies_val:
+            assert( s1ap_mtmsi(ies) == bytes_to_uint(ies_val[96][1]['m-TMSI'], 32) )
+        if 26 in ies_val:
+            assert( s1ap_nas_pdu(ies) == ies_val[26][1] )
+    # invalid or truncated buffers
+    assert( s1ap_scan_ies(b'') is None )
+    assert( s1ap_scan_ies(b'\x80\x0c') is None )
+    assert( s1ap_scan_ies(pkts_s1ap_pcapr[0][:20]) is None )
+    #
+    # integrity-protected Attach Request with GUTI
+    nas_pdu = s1ap_nas_pdu(s1ap_scan_ies(pkts_s1ap_pcapr[0])[2])
+    assert( nas_eps_ident(nas_pdu) == (NAS.IDTYPE_GUTI, '310410', 32769, 1, 1) )
+    # Service Request, without EPS mobile identity
+    nas_pdu = s1ap_nas_pdu(s1ap_scan_ies(pkts_s1ap_pcapr[18])[2])
+    assert( nas_eps_ident(nas_pdu) is None )
+    # clear-text Attach Request with IMSI
+    assert( nas_eps_ident(_nas_attach_imsi('001010000000005')) == (NAS.IDTYPE_IMSI, '001010000000005') )
+    assert( nas_eps_ident(b'\x07') is None )
+
+
+def test_shard_route():
+    enbid = ('00101', '00001')
+    pool, sent = UEShardPool(3, {}, None), []
+    pool.send = lambda i, msg: sent.append((i, msg))
+    # captured trace: ENB-UE-S1AP-ID: shard index
+    ctx = {}
+    for buf in pkts_s1ap_pcapr:
+        typ, code, ies = s1ap_scan_ies(buf)
+        if (typ, code) not in _S1AP_UL:
+            continue
+        enb_ue_id = s1ap_enb_ue_id(ies)
+        ind = pool.route_s1ap(enbid, 1, buf)
+        assert( sent[-1] == (ind, (SHARD_S1AP, enbid, 1, buf)) )
+        if code == 12:
+            ctx[enb_ue_id] = ind
+        else:
+            # all PDUs of a UE context are routed to the same shard
+            assert( ind == ctx[enb_ue_id] )
+    # 1st UE by the M-TMSI of its GUTI, then by the M-TMSI of the S-TMSI IE
+    assert( ctx == {1: 1, 2: 1, 3: 1, 4: 1, 5: 1} )
+    # all UE contexts were released
+    assert( pool._ctx == {} )
+    assert( sum(pool.stats) == len(sent) )
+    #
+    # by the IMSI
+    imsi = '001010000000006'
+    buf  = _s1ap_init_ue_msg(6, _nas_attach_imsi(imsi))
+    assert( pool.route_s1ap(enbid, 1, buf) == int(imsi) % 3 == 2 )
+    # by the ENB-UE-S1AP-ID, without any identity
+    buf = _s1ap_init_ue_msg(7, b'\xc7\x05\x5a\xc8')
+    assert( pool.route_s1ap(enbid, 1, buf) == 7 % 3 )
+    assert( pool._ctx == {(enbid, 6): 2, (enbid, 7): 1} )
+    # unknown context, by the ENB-UE-S1AP-ID
+    assert( pool.route_s1ap(enbid, 1, pkts_s1ap_pcapr[46]) == 5 % 3 )
+    # unscannable buffer, to the 1st shard
+    assert( pool.route_s1ap(enbid, 1, b'\x80') == 0 )
+
+
+def test_proc_timers():
+    Timers = ProcTimers()
+    # expiry order, whatever the registration order is
+    e3 = Timers.add(3.0, 'P3')
+    e1 = Timers.add(1.0, 'P1')
+    e2 = Timers.add(2.0, 'P2')
+    e4 = Timers.add(2.0, 'P4')
+    assert( Timers.next_stop() == 1.0 )
+    assert( Timers.pop_expired(0.5) == [] )
+    assert( Timers.pop_expired(2.0) == ['P1', 'P2', 'P4'] )
+    # cancel before expiry
+    Timers.cancel(e3)
+    assert( Timers.next_stop() is None )
+    assert( Timers.pop_expired(10.0) == [] )
+    assert( len(Timers) == 0 )
+    #
+    # registration of NAS procedures' timers, expired by the server
+    imsi = '001011000000001'
+    Server = _server()
+    Server.Timers = Timers
+    ue = UEd(Server, imsi, config=Server.ConfigUE[imsi])
+    aborted = []
+    def new_proc():
+        Proc = EMMAttach(ue.S1.EMM)
+        Proc.abort = lambda: aborted.append(Proc)
+        ue.S1.EMM.Proc.append(Proc)
+        return Proc
+    P1, P2, P3 = new_proc(), new_proc(), new_proc()
+    T = time()
+    P1.TimerStop = T - 1.0
+    P1.start_timer(Server)
+    # re-arm: only the last timer started is kept
+    P2.TimerStop = T - 2.0
+    P2.start_timer(Server)
+    P2.TimerStop = T + 60.0
+    P2.start_timer(Server)
+    # stopped before expiry: no abort
+    P3.TimerStop = T - 3.0
+    P3.start_timer(Server)
+    P3.stop_timer()
+    assert( P3._timer is None )
+    Server.clean_ue_proc()
+    assert( aborted == [P1] )
+    assert( Timers.next_stop() == T + 60.0 )
+    Server.clean_ue_proc()
+    assert( aborted == [P1] )
+    P2.stop_timer()
+    assert( Timers.next_stop() is None )
+
+
+class _SockRec(object):
+    """socket recording the buffers sent
+    """
+    
+    def __init__(self):
+        self.sent = []
+    
+    def sendto(self, buf, addr):
+        self.sent.append((bytes(buf), addr))
+
+
+class _ARPd(object):
+    
+    ROUTER_MAC_BUF = b'\x02\0\0\0\0\x01'
+    
+    def resolve(self, ip):
+        return self.ROUTER_MAC_BUF
+
+
+def _gtpud():
+    # GTPUd, without its sockets and threads
+    gtpud = GTPUd.__new__(GTPUd)
+    gtpud.EXT_MAC_BUF = b'\x02\0\0\0\0\x02'
+    gtpud._mobiles_teid = {1: [None, 2, b'\x0a\0\0\x01', None, 1]}
+    gtpud.stats, gtpud._stats_lock, gtpud._stats_raw = {}, Lock(), {}
+    gtpud._prot_dict, gtpud.MOD = {1:'ICMP', 6:'TCP', 17:'UDP'}, []
+    gtpud.compile_rules()
+    gtpud.arpd = _ARPd()
+    gtpud.sk_ext_v4 = _SockRec()
+    gtpud.DPI = True
+    return gtpud
+
+
+def _gtpu_ipv4(src, dst, prot, pay):
+    ipbuf = pack('>BBHHHBBH4s4s', 0x45, 0, 20 + len(pay), 0, 0, 64, prot, 0, src, dst) + pay
+    return pack('>BBHI', 0x30, 0xff, len(ipbuf), 1) + ipbuf
+
+
+def test_gtpu_dpi():
+    ue, dns, web = b'\x0a\0\0\x01', b'\x08\x08\x08\x08', b'\x01\x02\x03\x04'
+    qry = b'\0\x01\x01\0\0\x01\0\0\0\0\0\0\x07example\x03com\0\0\x01\0\x01'
+    pkts = [
+        _gtpu_ipv4(ue, dns, 17, pack('>HHHH', 40000, 53, 8 + len(qry), 0) + qry),
+        _gtpu_ipv4(ue, web, 6, pack('>HHIIHHHH', 40001, 80, 0, 0, 0x5002, 0, 0, 0)),
+        _gtpu_ipv4(ue, web, 1, b'\x08\0\0\0\0\x01\0\x01'),
+        _gtpu_ipv4(ue, web, 47, b'\0\0\x08\0'),
+        # spoofed source address
+        _gtpu_ipv4(web, dns, 17, pack('>HHHH', 40000, 53, 8 + len(qry), 0) + qry),
+        ]
+    # UL packets forwarded in place, and through the copying path
+    fast, slow = _gtpud(), _gtpud()
+    off = 6
+    buf = bytearray(off + 2048)
+    mv  = memoryview(buf)
+    for pkt in pkts:
+        buf[off:off+len(pkt)] = pkt
+        fast.forward_to_ext(buf, mv, off, off+len(pkt))
+        slow.transfer_to_ext(pkt)
+    assert( fast.stats == slow.stats )
+    assert( fast.sk_ext_v4.sent == slow.sk_ext_v4.sent )
+    assert( len(fast.sk_ext_v4.sent) == 4 )
+    stats = fast.stats['10.0.0.1']
+    assert( stats['DNS'] == {'8.8.8.8'} and stats['resolved'] == {b'example.com'} )
+    assert( stats['UDP'] == {('8.8.8.8', 53)} and stats['TCP'] == {('1.2.3.4', 80)} )
+    assert( stats['ICMP'] == {'1.2.3.4'} and len(stats['alien']) == 1 )
+    assert( list(fast.stats) == ['10.0.0.1'] )
+    # with the stats of a worker
+    wstats, fast = {}, _gtpud()
+    buf[off:off+len(pkts[1])] = pkts[1]
+    fast.forward_to_ext(buf, mv, off, off+len(pkts[1]), wstats)
+    assert( fast.stats['10.0.0.1']['TCP'] == {('1.2.3.4', 80)} )
+    assert( wstats[ue][0] is fast.stats['10.0.0.1'] )
+
+
+_AUCDB_RECS = [
+    ('001010000000001', [b'\x01'*16, 0, 1, None]),
+    ('001010000000002', [b'\x02'*16, 0, 32, b'\x0f'*16]),
+    ('001010000000003', [b'\x03'*16, 1, -1, None]),
+    ]
+
+
+def _aucdb_file(path):
+    with open(path, 'w') as fd:
+        fd.write('# IMSI;K;ALG2;SQN;OP\n\n')
+        for IMSI, rec in _AUCDB_RECS:
+            fd.write( format_aucdb_rec(IMSI, rec) )
+
+
+def _aucdb_sqn(path):
+    # returns the SQN committed in the sqlite database, read by another connection
+    rd = sqlite3.connect(path)
+    try:
+        return dict(rd.execute('SELECT imsi, sqn FROM subscriber').fetchall())
+    finally:
+        rd.close()
+
+
+def test_aucdb_migrate():
+    tmp = tempfile.mkdtemp()
+    try:
+        path_db  = os.path.join(tmp, 'AuC.db')
+        path_sql = os.path.join(tmp, 'AuC.sqlite')
+        path_exp = os.path.join(tmp, 'AuC.exp.db')
+        _aucdb_file(path_db)
+        # AuC.db -> AuC.sqlite -> AuC.db, with the migration tool
+        argv = sys.argv
+        try:
+            sys.argv = ['pycrate_aucdb.py', path_db, path_sql]
+            aucdb_main()
+            sys.argv = ['pycrate_aucdb.py', '-x', path_sql, path_exp]
+            aucdb_main()
+        finally:
+            sys.argv = argv
+        db = AuCDBSQLite(path_sql, commit_period=0)
+        assert( len(db) == 3 and list(db.items()) == _AUCDB_RECS )
+        assert( '001010000000002' in db and db.get('001010000000004') is None )
+        db.close()
+        assert( sorted(AuCDBFile(path_exp).items()) == _AUCDB_RECS )
+        assert( AuCDBFile(path_exp) == AuCDBFile(path_db) )
+    finally:
+        shutil.rmtree(tmp)
+
+
+def test_aucdb_sqn():
+    tmp = tempfile.mkdtemp()
+    try:
+        path = os.path.join(tmp, 'AuC.sqlite')
+        db = AuCDBSQLite(path, commit_num=2, commit_period=0)
+        for IMSI, rec in _AUCDB_RECS:
+            db.add(IMSI, *rec)
+        # a pending update is returned, but not committed
+        db.set_sqn('001010000000001', 2)
+        assert( db['001010000000001'][2] == 2 )
+        assert( _aucdb_sqn(path)['001010000000001'] == 1 )
+        # commit_num pending updates are committed in a batch
+        db.set_sqn('001010000000002', 33)
+        sqn = _aucdb_sqn(path)
+        assert( sqn['001010000000001'] == 2 and sqn['001010000000002'] == 33 )
+        # the remaining pending update is committed when closing
+        db.set_sqn('001010000000001', 3)
+        assert( _aucdb_sqn(path)['001010000000001'] == 2 )
+        db.close()
+        db = AuCDBSQLite(path, commit_num=2, commit_period=0)
+        assert( db['001010000000001'][2] == 3 and db['001010000000002'][2] == 33 )
+        assert( db['001010000000003'][2] == -1 )
+        db.close()
+    finally:
+        shutil.rmtree(tmp)
+
+
+def test_aucdb_commit_thread():
+    tmp = tempfile.mkdtemp()
+    try:
+        path_db  = os.path.join(tmp, 'AuC.db')
+        path_sql = os.path.join(tmp, 'AuC.sqlite')
+        _aucdb_file(path_db)
+        #
+        # AuC with the sqlite backend, migrating AuC.db at startup, 
+        # pending updates have to be flushed when stopping
+        class _AuC(AuC):
+            DEBUG = ()
+            AUC_DB_PATH = tmp + os.sep
+            AUC_DB_BACKEND = 'sqlite'
+            SQLITE_COMMIT_PERIOD = 3600
+            AV_POOL_LEN = 0
+        auc = _AuC()
+        assert( len(auc.db) == 3 )
+        assert( auc.make_4g_vector('001010000000002', b'\x00\xf1\x10') is not None )
+        assert( _aucdb_sqn(path_sql)['001010000000002'] == 32 )
+        commit_t = auc.db._commit_t
+        auc.stop()
+        assert( not commit_t.is_alive() )
+        assert( _aucdb_sqn(path_sql)['001010000000002'] == 33 )
+        #
+        # pending updates committed periodically by the commit thread
+        db = AuCDBSQLite(path_sql, commit_period=0.05)
+        db.set_sqn('001010000000001', 10)
+        T = time() + 5
+        while _aucdb_sqn(path_sql)['001010000000001'] != 10 and time() < T:
+            sleep(0.01)
+        assert( _aucdb_sqn(path_sql)['001010000000001'] == 10 )
+        db.close()
+        assert( not db._commit_t.is_alive() )
+    finally:
+        shutil.rmtree(tmp)
+
+
+def _auc_pool(tmp):
+    # AuC with the file backend and vectors pools
+    _aucdb_file(os.path.join(tmp, 'AuC.db'))
+    class _AuC(AuC):
+        DEBUG = ()
+        AUC_DB_PATH = tmp + os.sep
+        DO_BACKUP = False
+        AV_POOL_LEN = 4
+    return _AuC()
+
+
+def _auc_sqn(auc, IMSI, vect):
+    # returns the SQN of a 4G vector, unmasked from its AUTN
+    K, OP = auc.db[IMSI][0], auc.db[IMSI][3]
+    RAND, AUTN = vect[0], vect[2]
+    if OP is not None:
+        AK = auc.Milenage.f2345(K, RAND, OP)[3]
+    else:
+        AK = auc.Milenage.f2345(K, RAND)[3]
+    return bytes_to_uint(xor_buf(AUTN[:6], AK), 48)
+
+
+def _auc_pool_wait(auc, IMSI):
+    # waits for the pool of IMSI to be refilled
+    T = time() + 5
+    while time() < T:
+        with auc._av_lock:
+            pool = auc._av_pool.get(IMSI)
+            if pool is not None and len(pool[1]) == auc.AV_POOL_LEN:
+                return True
+        sleep(0.01)
+    return False
+
+
+def test_auc_pool():
+    SN_ID, IMSI = b'\x00\xf1\x10', '001010000000002'
+    tmp = tempfile.mkdtemp()
+    auc = _auc_pool(tmp)
+    try:
+        # vectors are popped from the pool with consecutive SQN
+        sqn = [_auc_sqn(auc, IMSI, auc.make_4g_vector(IMSI, SN_ID))]
+        assert( sqn[0] == 32 and _auc_pool_wait(auc, IMSI) )
+        for i in range(auc.AV_POOL_LEN):
+            sqn.append( _auc_sqn(auc, IMSI, auc.make_4g_vector(IMSI, SN_ID)) )
+        assert( sqn == list(range(32, 33 + auc.AV_POOL_LEN)) )
+        #
+        # concurrent requests, interleaved with the refill of the pool:
+        # each SQN is returned once, and in increasing order to each requester
+        res, err = [[] for i in range(4)], []
+        def get_vectors(sqn):
+            try:
+                for i in range(50):
+                    sqn.append( _auc_sqn(auc, IMSI, auc.make_4g_vector(IMSI, SN_ID)) )
+            except Exception as e:
+                err.append(e)
+        thr = [Thread(target=get_vectors, args=(sqn, )) for sqn in res]
+        [t.start() for t in thr]
+        [t.join() for t in thr]
+        assert( not err )
+        for sqn in res:
+            assert( all(sqn[i] < sqn[i+1] for i in range(len(sqn)-1)) )
+        sqn = sum(res, [])
+        assert( len(set(sqn)) == len(sqn) == 200 )
+        assert( min(sqn) > 32 + auc.AV_POOL_LEN and max(sqn) < auc.db[IMSI][2] )
+        #
+        # resynchronization, with the pool refilled:
+        # pre-computed vectors are released, the next one uses the new SQN
+        assert( _auc_pool_wait(auc, IMSI) )
+        K, RAND = auc.db[IMSI][0], b'\xab'*16
+        SQN_MS  = pack('>Q', 1000)[2:]
+        AK      = auc.Milenage.f5star(K, RAND, auc.db[IMSI][3])
+        MAC_S   = auc.Milenage.f1star(K, RAND, SQN_MS, b'\0\0', auc.db[IMSI][3])
+        assert( auc.synch_sqn(IMSI, RAND, xor_buf(SQN_MS, AK) + MAC_S) == 0 )
+        assert( IMSI not in auc._av_pool and IMSI not in auc._av_sqn )
+        assert( auc.db[IMSI][2] == 1000 + auc.SQN_SYNCH_STEP )
+        vect = auc.make_4g_vector(IMSI, SN_ID)
+        assert( _auc_sqn(auc, IMSI, vect) == 1000 + auc.SQN_SYNCH_STEP )
+    finally:
+        auc.stop()
+        shutil.rmtree(tmp)
@@ -38,6 +38,7 @@ from test.test_core   import *
 from test.test_media  import *
 from test.test_ether  import *
 from test.test_csn1   import *
+from test.test_asn1c  import *
 from test.test_asn1rt import *
 from test.test_mobile import *
 from test.test_gsmrr  import *
@@ -94,6 +95,7 @@ class TestPycrate(unittest.TestCase):
     # asn1c
     def test_asn1c(self):
         print('[<>] testing pycrate_asn1c')
+        test_tokenizer()
         # create an "asn" dir for storing compiled specifications
         if 'test_asn_todelete' not in os.listdir('.'):
             os.mkdir('test_asn_todelete')
@@ -132,6 +134,18 @@ class TestPycrate(unittest.TestCase):
     def test_asn1rt(self):
         print('[<>] testing pycrate_asn1rt')
         test_rt_base()
+        test_profiler()
+        test_bnd()
+        test_set()
+        test_per_bulk()
+        test_compact()
+        test_jer()
+        test_export()
+        test_per_cache()
+        test_offsets()
+        test_asn1_stream()
+        test_gen_random()
+        test_ber_tag_lut()
         test_rrc3g()
         test_lteran()
         test_tcap_map()
@@ -168,6 +182,24 @@ class TestPycrate(unittest.TestCase):
         test_gsmrr_mo()
         test_gsmrr_l2_mt()
         test_gsmrr_mt()
+    
+    # corenet
+    def test_corenet(self):
+        try:
+            import test.test_corenet as T
+        except ImportError as err:
+            self.skipTest('pycrate_corenet not available (%s)' % err)
+        print('[<>] testing pycrate_corenet')
+        T.test_asn_ctx()
+        T.test_emm_merge()
+        T.test_shard_scan()
+        T.test_shard_route()
+        T.test_proc_timers()
+        T.test_gtpu_dpi()
+        T.test_aucdb_migrate()
+        T.test_aucdb_sqn()
+        T.test_aucdb_commit_thread()
+        T.test_auc_pool()
 
 
 def test_perf_all():
@@ -182,7 +214,16 @@ def test_perf_all():
                     './test/res/snare.mp3'
                     )
     test_perf_ether()
+    test_perf_asn1c()
     test_perf_asn1rt()
+    test_perf_jer()
+    test_perf_bnd()
+    test_perf_per_bulk()
+    test_perf_compact()
+    test_perf_per_cache()
+    test_perf_offsets()
+    test_perf_asn1_stream()
+    test_perf_gen_random()
     test_perf_csn1()
     test_perf_mobile()
     test_perf_gsmrr()
@@ -0,0 +1,148 @@
+#!/usr/bin/env python
+
+# -*- coding: UTF-8 -*-
+#/**
+# * Software Name : pycrate
+# * Version : 0.4
+# *
+# * Copyright 2019. Benoit Michau. P1Sec.
+# *
+# * This program is free software: you can redistribute it and/or modify
+# * it under the terms of the GNU General Public License version 2 as published
+# * by the Free Software Foundation.
+# *
+# * This program is distributed in the hope that it will be useful,
+# * but WITHOUT ANY WARRANTY; without even the implied warranty of
+# * MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# * GNU General Public License for more details.
+# *
+# * You will find a copy of the terms and conditions of the GNU General Public
+# * License version 2 in the "license.txt" file or
+# * see http://www.gnu.org/licenses/ or write to the Free Software Foundation,
+# * Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301 USA
+# *
+# *--------------------------------------------------------
+# * File Name : pycrate_asn1bnd.py
+# * Created : 2026-10-19
+# * Authors : agent
+# *--------------------------------------------------------
+#*/
+
+import os
+import sys
+import json
+import argparse
+import importlib
+
+import pycrate_asn1dir
+from pycrate_asn1rt.utils  import *
+from pycrate_asn1rt.asnobj import ASN1Obj
+
+
+# constructed types which can be top-level PDUs
+TYPES_PDU = (TYPE_CHOICE, TYPE_SEQ, TYPE_SEQ_OF, TYPE_SET, TYPE_SET_OF)
+
+
+def get_types(spec, names=None):
+    """returns the list of ASN.1 types (ASN1Obj) of the compiled specification
+    `spec' from pycrate_asn1dir
+
+    If names is None, the top-level PDU types are returned (i.e. the constructed
+    types which are not referenced by any other type in the dependency graph of
+    the specification), otherwise the types with the given names (name, or
+    module.name)
+    """
+    pymod = importlib.import_module('pycrate_asn1dir.%s' % spec)
+    mods  = {}
+    for cl in vars(pymod).values():
+        if isinstance(cl, type) and hasattr(cl, '_name_') and hasattr(cl, '_type_'):
+            mods[cl._name_] = cl
+    if names is None:
+        path = os.path.join(os.path.dirname(pycrate_asn1dir.__file__), '%s.json' % spec)
+        with open(path) as fd:
+            graph = json.load(fd)
+        refd = set([l['target'] for l in graph['links']])
+        idents = [n['id'] for n in graph['nodes'] if n['id'] not in refd]
+    else:
+        idents = []
+        for modname, Mod in mods.items():
+            for name in Mod._type_:
+                if name in names or '%s.%s' % (modname, name) in names:
+                    idents.append('%s.%s' % (modname, name))
+    objs = []
+    for ident in idents:
+        modname, _, name = ident.partition('.')
+        if modname not in mods:
+            continue
+        Mod = mods[modname]
+        if name not in Mod._type_ or name in Mod._param_:
+            continue
+        Obj = getattr(Mod, name_to_defin(name), None)
+        if isinstance(Obj, ASN1Obj) and (names is not None or Obj.TYPE in TYPES_PDU):
+            objs.append(Obj)
+    return objs
+
+
+def get_bnds(Obj, cap):
+    """returns the dict of size and depth bounds of the ASN.1 type Obj:
+
+    worst  : worst-case PER length in bytes, or None if unbounded
+    root   : worst-case PER length in bytes of the extension root, or None
+    capped : worst-case PER length in bytes, with each unbounded component
+             within cap bytes
+    typical: worst-case PER length in bytes of the extension root, with each
+             unbounded component within cap bytes
+    depth  : maximum depth, or None if recursive
+    depth_capped: maximum depth, recursive components not being walked
+    """
+    worst, depth = Obj.get_bnd()
+    capped, depth_capped = Obj.get_bnd(cap=cap)
+    return {'type'   : '%s.%s' % (Obj._mod, Obj._name),
+            'worst'  : worst,
+            'root'   : Obj.get_bnd(root=True)[0],
+            'capped' : capped,
+            'typical': Obj.get_bnd(root=True, cap=cap)[0],
+            'depth'  : depth,
+            'depth_capped': depth_capped}
+
+
+def main():
+
+    parser = argparse.ArgumentParser(description='print the PER encoding size and '\
+             'nesting depth bounds of the ASN.1 types of compiled specifications, '\
+             'to configure the _DEC_MAXLEN, _SAFE_DECLEN_UNBND and _DEC_MAXDEPTH '\
+             'limits of the decoders')
+    parser.add_argument('specs', nargs='+', type=str,
+                        help='compiled specifications from pycrate_asn1dir (e.g. S1AP)')
+    parser.add_argument('-t', dest='types', nargs='+', default=None,
+                        help='types to print (name, or module.name), instead of the '\
+                        'top-level PDU types')
+    parser.add_argument('-c', dest='cap', type=int, default=1024,
+                        help='length in bytes assumed for unbounded components, for the '\
+                        'capped and typical bounds (default: 1024)')
+    parser.add_argument('-j', dest='json', action='store_true', default=False,
+                        help='JSON output, one record per type')
+    args = parser.parse_args()
+    #
+    ASN1Obj._SILENT = True
+    if not args.json:
+        print('%-60s %10s %10s %10s %10s %6s %6s' % ('type', 'worst', 'root', 'capped',
+              'typical', 'depth', 'depth*'))
+    for spec in args.specs:
+        try:
+            objs = get_types(spec, args.types)
+        except Exception as err:
+            print('%s, unable to load specification %s: %s' % (sys.argv[0], spec, err))
+            continue
+        for Obj in objs:
+            bnds = get_bnds(Obj, args.cap)
+            if args.json:
+                print(json.dumps(bnds))
+            else:
+                print('%-60s %10s %10s %10s %10s %6s %6s' % (bnds['type'],
+                      bnds['worst'], bnds['root'], bnds['capped'], bnds['typical'],
+                      bnds['depth'], bnds['depth_capped']))
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,79 @@
+#!/usr/bin/env python
+
+# -*- coding: UTF-8 -*-
+#/**
+# * Software Name : pycrate
+# * Version : 0.4
+# *
+# * Copyright 2019. Benoit Michau. P1Sec.
+# *
+# * This program is free software: you can redistribute it and/or modify
+# * it under the terms of the GNU General Public License version 2 as published
+# * by the Free Software Foundation.
+# *
+# * This program is distributed in the hope that it will be useful,
+# * but WITHOUT ANY WARRANTY; without even the implied warranty of
+# * MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# * GNU General Public License for more details.
+# *
+# * You will find a copy of the terms and conditions of the GNU General Public
+# * License version 2 in the "license.txt" file or
+# * see http://www.gnu.org/licenses/ or write to the Free Software Foundation,
+# * Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301 USA
+# *
+# *--------------------------------------------------------
+# * File Name : pycrate_aucdb.py
+# * Created : 2026-10-19
+# * Authors : agent
+# *--------------------------------------------------------
+#*/
+
+import os
+import sys
+import argparse
+
+from pycrate_corenet.ServerAuCDB import AuCDBSQLite
+
+
+def main():
+
+    parser = argparse.ArgumentParser(description='migrate an AuC.db subscribers text file '\
+              'into an AuC.sqlite database for the corenet AuC, or export it back')
+    parser.add_argument('input', type=str, help='input AuC.db text file '\
+                        '(or AuC.sqlite database with -x)')
+    parser.add_argument('output', type=str, help='output AuC.sqlite database '\
+                        '(or AuC.db text file with -x)')
+    parser.add_argument('-x', action='store_true', default=False,
+                        help='export the sqlite database into a text file')
+    args = parser.parse_args()
+    
+    if not os.path.isfile(args.input):
+        print('%s, args error: invalid input %s' % (sys.argv[0], args.input))
+        return 0
+    
+    if args.x:
+        db = AuCDBSQLite(args.input, commit_period=0)
+        try:
+            num = db.export_file(args.output,
+                                 '# IMSI;K;ALG2;SQN;OP\n'\
+                                 '# exported from %s\n\n' % args.input)
+        except Exception as err:
+            print('%s, export error: %s' % (sys.argv[0], err))
+            return 0
+        finally:
+            db.close()
+        print('%i record(s) exported to %s' % (num, args.output))
+    else:
+        db = AuCDBSQLite(args.output, commit_period=0)
+        try:
+            num = db.import_file(args.input)
+        except Exception as err:
+            print('%s, import error: %s' % (sys.argv[0], err))
+            return 0
+        finally:
+            db.close()
+        print('%i record(s) imported into %s' % (num, args.output))
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())